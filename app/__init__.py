@@ -6,6 +6,55 @@ def create_app(config_name="default"):
     app = Flask(__name__)
     app.config.from_object(config[config_name])
 
+    # Keep session data server-side, with only a signed id in the cookie
+    from app.auth.sessions import init_sessions
+
+    init_sessions(app)
+
+    # Coalesce identical concurrent fetches and processing within this worker
+    from app.utils.singleflight import SingleFlight
+
+    app.extensions["single_flight"] = SingleFlight(app.config["SINGLE_FLIGHT_LOCK_DIR"])
+
+    # Fail fast while the backend is down and serve stale datasets meanwhile
+    from app.utils.api import datasets_size
+    from app.utils.resilience import CircuitBreaker, StaleWhileRevalidate
+
+    app.extensions["circuit_breaker"] = CircuitBreaker(
+        failure_rate=app.config["BREAKER_FAILURE_RATE"],
+        slow_call_rate=app.config["BREAKER_SLOW_CALL_RATE"],
+        slow_call_seconds=app.config["BREAKER_SLOW_CALL_SECONDS"],
+        min_calls=app.config["BREAKER_MIN_CALLS"],
+        window_seconds=app.config["BREAKER_WINDOW_SECONDS"],
+        open_seconds=app.config["BREAKER_OPEN_SECONDS"],
+    )
+    app.extensions["dataset_cache"] = StaleWhileRevalidate(
+        fresh_seconds=app.config["DATASETS_FRESH_SECONDS"],
+        max_stale_seconds=app.config["DATASETS_MAX_STALE_SECONDS"],
+        max_size=app.config["DATASETS_CACHE_MAX_BYTES"],
+        sizeof=datasets_size,
+    )
+
+    # Compress responses and cache precompressed dashboard pages
+    from app.utils.compression import init_compression
+
+    init_compression(app)
+
+    # Profile sampled or explicitly flagged dashboard requests
+    from app.utils.profiling import init_profiling
+
+    init_profiling(app)
+
+    # Trace allocations per pipeline stage when MEMORY_PROFILING is set
+    from app.utils.memprofile import init_memory_profiling
+
+    init_memory_profiling(app)
+
+    # Track RSS after each request and recycle workers that grow too big
+    from app.utils.watchdog import init_memory_watchdog
+
+    init_memory_watchdog(app)
+
     # Register blueprints
     from app.auth import auth as auth_blueprint
 
@@ -15,4 +64,18 @@ def create_app(config_name="default"):
 
     app.register_blueprint(dashboard_blueprint)
 
+    from app.assets import assets as assets_blueprint
+
+    app.register_blueprint(assets_blueprint, url_prefix="/assets")
+
+    from app.diagnostics import diagnostics as diagnostics_blueprint
+
+    app.register_blueprint(diagnostics_blueprint, url_prefix="/_diagnostics")
+
+    # Optionally pay for heavy imports now so forked workers share them
+    if app.config["PRELOAD_HEAVY_MODULES"]:
+        from app.utils.lazy import preload_heavy_modules
+
+        preload_heavy_modules()
+
     return app
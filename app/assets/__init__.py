@@ -0,0 +1,5 @@
+from flask import Blueprint
+
+assets = Blueprint("assets", __name__)
+
+from . import routes  # noqa: E402,F401
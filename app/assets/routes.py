@@ -0,0 +1,132 @@
+import mimetypes
+import os
+
+import click
+import requests
+from flask import abort, current_app, request, send_file
+from . import assets
+from ..utils.compression import COMPRESSIBLE_MIMETYPES, negotiate_encoding
+from .utils import (
+    FINGERPRINT_RE,
+    IMMUTABLE_CACHE_CONTROL,
+    PLOTLY_BUNDLES,
+    asset_url,
+    bundle_supports,
+    compressed_asset,
+    file_digest,
+    plotly_bundle_name,
+    plotly_js_url,
+    resolve_asset,
+    vendor_sources,
+)
+
+
+@assets.record_once
+def check_bundle(state):
+    """Fall back to SVG charts when the plotly.js bundle lacks WebGL traces"""
+    app = state.app
+    bundle = app.config["PLOTLY_BUNDLE"]
+    if bundle not in PLOTLY_BUNDLES:
+        raise ValueError(f"Unknown PLOTLY_BUNDLE: {bundle}")
+
+    if app.config["CHART_RENDER_MODE"] != "svg" and not bundle_supports(
+        "scattergl", bundle
+    ):
+        app.logger.warning(
+            "PLOTLY_BUNDLE=%s has no scattergl trace; rendering charts as SVG",
+            bundle,
+        )
+        app.config["CHART_RENDER_MODE"] = "svg"
+
+
+@assets.record_once
+def check_vendored_assets(state):
+    """Warn at startup about vendored assets pages would go without"""
+    app = state.app
+    if app.config["ASSET_CDN_FALLBACK"]:
+        return
+
+    names = [
+        "vendor/bootstrap.min.css",
+        "vendor/bootstrap.bundle.min.js",
+        plotly_bundle_name(app.config["PLOTLY_BUNDLE"]),
+    ]
+    with app.app_context():
+        missing = [name for name in names if resolve_asset(name) is None]
+    if missing:
+        app.logger.warning(
+            "Assets not vendored: %s; run `flask assets vendor` or set "
+            "ASSET_CDN_FALLBACK=true",
+            ", ".join(missing),
+        )
+
+
+@assets.app_context_processor
+def inject_asset_helpers():
+    return dict(asset_url=asset_url, plotly_js_url=plotly_js_url)
+
+
+@assets.route("/<path:filename>")
+def serve(filename):
+    """Serve a fingerprinted asset with immutable caching"""
+    match = FINGERPRINT_RE.match(filename)
+    if not match:
+        abort(404)
+
+    name = match.group("stem") + match.group("ext")
+    path, digest = resolve_asset(name), match.group("digest")
+    if path is None or file_digest(path) != digest:
+        abort(404)
+
+    # send_file passes the file through untouched, which the response
+    # compressor skips, so text assets are compressed here, once per encoding
+    config = current_app.config
+    mimetype = mimetypes.guess_type(name)[0]
+    compressible = (
+        config["COMPRESS_RESPONSES"]
+        and mimetype in COMPRESSIBLE_MIMETYPES
+        and os.path.getsize(path) >= config["COMPRESS_MIN_SIZE"]
+    )
+    encoding = negotiate_encoding() if compressible else None
+    if encoding:
+        body = compressed_asset(path, digest, encoding, config["COMPRESS_LEVEL"])
+        response = current_app.response_class(body, mimetype=mimetype)
+        response.headers["Content-Encoding"] = encoding
+        response.set_etag(f"{digest}-{encoding}")
+        response.make_conditional(request)
+    else:
+        response = send_file(path, conditional=True)
+    if compressible:
+        response.vary.add("Accept-Encoding")
+    response.headers["Cache-Control"] = IMMUTABLE_CACHE_CONTROL
+    return response
+
+
+@assets.cli.command("vendor")
+@click.option("--force", is_flag=True, help="Download assets that already exist.")
+def vendor(force):
+    """Download Bootstrap and plotly.js bundles into app/static/vendor.
+
+    Fails on the first asset that can't be downloaded, so builds without
+    network access stop here rather than produce pages without styles.
+    """
+    for name, url in vendor_sources().items():
+        path = os.path.join(current_app.static_folder, name)
+        if os.path.exists(path) and not force:
+            click.echo(f"{name}: already vendored")
+            continue
+
+        try:
+            response = requests.get(url, timeout=60)
+            response.raise_for_status()
+        except requests.RequestException as e:
+            raise click.ClickException(
+                f"Couldn't download {name} from {url}: {e}. To build without "
+                "network access, run `flask assets vendor` where there is "
+                "access and keep app/static/vendor in the build context."
+            )
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(response.content)
+        click.echo(f"{name}: {len(response.content)} bytes from {url}")
@@ -0,0 +1,169 @@
+import hashlib
+import importlib.util
+import os
+import re
+from functools import lru_cache
+
+from flask import current_app, url_for
+from werkzeug.security import safe_join
+
+from ..utils.compression import compress
+
+BOOTSTRAP_VERSION = "5.3.0-alpha1"
+BOOTSTRAP_CDN = f"https://cdn.jsdelivr.net/npm/bootstrap@{BOOTSTRAP_VERSION}/dist"
+PLOTLY_CDN = "https://cdn.plot.ly"
+
+# Trace types available in each plotly.js bundle we can serve
+PLOTLY_BUNDLES = {
+    "full": None,
+    "basic": {"scatter", "bar", "pie"},
+    "cartesian": {
+        "scatter",
+        "bar",
+        "box",
+        "heatmap",
+        "histogram",
+        "histogram2d",
+        "histogram2dcontour",
+        "image",
+        "pie",
+        "contour",
+        "scatterternary",
+        "violin",
+    },
+    "gl2d": {
+        "scatter",
+        "scattergl",
+        "splom",
+        "pointcloud",
+        "heatmapgl",
+        "contourgl",
+        "parcoords",
+    },
+}
+
+# Long-lived caching is safe because URLs change whenever content does
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+FINGERPRINT_RE = re.compile(
+    r"^(?P<stem>.+)\.(?P<digest>[0-9a-f]{12})(?P<ext>\.[^./]+)$"
+)
+
+
+def plotly_package_dir():
+    """Locate the installed plotly package without importing it"""
+    spec = importlib.util.find_spec("plotly")
+    return list(spec.submodule_search_locations)[0]
+
+
+@lru_cache(maxsize=1)
+def plotlyjs_version():
+    """Version of the plotly.js bundled with the installed plotly package"""
+    path = os.path.join(plotly_package_dir(), "offline", "_plotlyjs_version.py")
+    with open(path) as f:
+        return re.search(r"__plotlyjs_version__ = \"([^\"]+)\"", f.read()).group(1)
+
+
+def plotly_bundle_name(bundle):
+    return (
+        "vendor/plotly.min.js" if bundle == "full" else f"vendor/plotly-{bundle}.min.js"
+    )
+
+
+def vendor_sources():
+    """Map vendored asset names to the URLs they are downloaded from"""
+    version = plotlyjs_version()
+    sources = {
+        "vendor/bootstrap.min.css": f"{BOOTSTRAP_CDN}/css/bootstrap.min.css",
+        "vendor/bootstrap.bundle.min.js": f"{BOOTSTRAP_CDN}/js/bootstrap.bundle.min.js",
+        "vendor/plotly.min.js": f"{PLOTLY_CDN}/plotly-{version}.min.js",
+    }
+    for bundle in PLOTLY_BUNDLES:
+        if bundle != "full":
+            sources[plotly_bundle_name(bundle)] = (
+                f"{PLOTLY_CDN}/plotly-{bundle}-{version}.min.js"
+            )
+    return sources
+
+
+def bundle_supports(trace_type, bundle=None):
+    """Check whether the configured plotly.js bundle can draw a trace type"""
+    bundle = bundle or current_app.config["PLOTLY_BUNDLE"]
+    traces = PLOTLY_BUNDLES[bundle]
+    return traces is None or trace_type in traces
+
+
+def resolve_asset(name):
+    """Find the file backing an asset name, or None if it isn't available"""
+    # Names escaping the static folder are treated as missing
+    path = safe_join(current_app.static_folder, name)
+    if path is None:
+        return None
+    if os.path.isfile(path):
+        return path
+
+    # The full plotly.js bundle ships with the plotly Python package
+    if name == "vendor/plotly.min.js":
+        path = os.path.join(plotly_package_dir(), "package_data", "plotly.min.js")
+        if os.path.isfile(path):
+            return path
+
+    return None
+
+
+_digests = {}
+
+
+def file_digest(path):
+    """Content hash of a file, recomputed only when the file changes"""
+    stat = os.stat(path)
+    key = (path, stat.st_mtime_ns, stat.st_size)
+    digest = _digests.get(key)
+    if digest is None:
+        sha = hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                sha.update(block)
+        digest = _digests[key] = sha.hexdigest()[:12]
+    return digest
+
+
+_compressed = {}
+
+
+def compressed_asset(path, digest, encoding, level=6):
+    """An asset's content in a content coding, compressed once per process"""
+    key = (path, digest, encoding, level)
+    body = _compressed.get(key)
+    if body is None:
+        with open(path, "rb") as f:
+            body = _compressed[key] = compress(f.read(), encoding, level)
+    return body
+
+
+def fingerprinted_name(name, path):
+    stem, ext = os.path.splitext(name)
+    return f"{stem}.{file_digest(path)}{ext}"
+
+
+def asset_url(name):
+    """URL of a static asset with its content hash in the filename
+
+    Falls back to the CDN copy for vendored assets that haven't been
+    downloaded with ``flask assets vendor``.
+    """
+    path = resolve_asset(name)
+    if path is not None:
+        return url_for("assets.serve", filename=fingerprinted_name(name, path))
+
+    if current_app.config["ASSET_CDN_FALLBACK"]:
+        source = vendor_sources().get(name)
+        if source:
+            return source
+
+    return url_for("static", filename=name)
+
+
+def plotly_js_url():
+    """URL of the configured plotly.js bundle"""
+    return asset_url(plotly_bundle_name(current_app.config["PLOTLY_BUNDLE"]))
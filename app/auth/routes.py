@@ -1,6 +1,8 @@
-from flask import render_template, request, redirect, url_for, flash, session
+from flask import render_template, request, redirect, url_for, flash
+from flask import current_app
 from . import auth
 from ..utils.api import login_user, register_user
+from .utils import current_user_id, end_session, start_session
 
 
 @auth.route("/login", methods=["GET", "POST"])
@@ -12,7 +14,7 @@ def login():
         success, token, error = login_user(username, password)
 
         if success:
-            session["token"] = token
+            start_session(token)
             return redirect(url_for("dashboard.index"))
         else:
             flash(error or "Invalid credentials", "danger")
@@ -44,7 +46,7 @@ def register():
             login_success, token, login_error = login_user(username, password)
 
             if login_success:
-                session["token"] = token
+                start_session(token)
                 flash("Account created successfully!", "success")
                 return redirect(url_for("dashboard.index"))
             else:
@@ -59,6 +61,10 @@ def register():
 
 @auth.route("/logout")
 def logout():
-    session.pop("token", None)
+    # Don't keep serving this user's datasets from the worker's cache
+    current_app.extensions["dataset_cache"].invalidate(
+        ("acceleration_data", current_user_id())
+    )
+    end_session()
     flash("You have been logged out", "info")
     return redirect(url_for("auth.login"))
@@ -0,0 +1,178 @@
+import os
+import secrets
+import sqlite3
+import threading
+import time
+
+from flask.json.tag import TaggedJSONSerializer
+from flask.sessions import SecureCookieSession, SessionInterface
+from itsdangerous import BadSignature, Signer
+
+# Remove expired rows on roughly every this many writes
+PURGE_INTERVAL = 100
+
+
+class ServerSideSession(SecureCookieSession):
+    """Session whose data lives in a server-side store keyed by ``sid``"""
+
+    def __init__(self, initial=None, sid=None):
+        super().__init__(initial)
+        self.sid = sid
+
+
+class SQLiteSessionStore:
+    """Session store backed by a local SQLite file shared by all workers"""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = None
+        self._pid = None
+        self._writes = 0
+
+    def _connection(self):
+        # Connections must not be shared with forked workers
+        if self._conn is None or self._pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS sessions "
+                "(sid TEXT PRIMARY KEY, data BLOB NOT NULL, expires REAL NOT NULL)"
+            )
+            conn.commit()
+            self._conn, self._pid = conn, os.getpid()
+        return self._conn
+
+    def get(self, sid):
+        with self._lock:
+            row = (
+                self._connection()
+                .execute(
+                    "SELECT data FROM sessions WHERE sid = ? AND expires > ?",
+                    (sid, time.time()),
+                )
+                .fetchone()
+            )
+        return row[0] if row else None
+
+    def set(self, sid, data, ttl):
+        with self._lock:
+            conn = self._connection()
+            conn.execute(
+                "INSERT OR REPLACE INTO sessions (sid, data, expires) VALUES (?, ?, ?)",
+                (sid, data, time.time() + ttl),
+            )
+            self._writes += 1
+            if self._writes % PURGE_INTERVAL == 0:
+                conn.execute("DELETE FROM sessions WHERE expires <= ?", (time.time(),))
+            conn.commit()
+
+    def delete(self, sid):
+        with self._lock:
+            conn = self._connection()
+            conn.execute("DELETE FROM sessions WHERE sid = ?", (sid,))
+            conn.commit()
+
+
+class RedisSessionStore:
+    """Session store for any Redis-compatible server"""
+
+    def __init__(self, url, prefix="session:"):
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError("SESSION_BACKEND=redis requires the redis package")
+
+        self.client = redis.Redis.from_url(url)
+        self.prefix = prefix
+
+    def get(self, sid):
+        return self.client.get(self.prefix + sid)
+
+    def set(self, sid, data, ttl):
+        self.client.setex(self.prefix + sid, max(1, int(ttl)), data)
+
+    def delete(self, sid):
+        self.client.delete(self.prefix + sid)
+
+
+class ServerSideSessionInterface(SessionInterface):
+    """Keep session data on the server and only a signed id in the cookie"""
+
+    serializer = TaggedJSONSerializer()
+    session_class = ServerSideSession
+
+    def __init__(self, store):
+        self.store = store
+
+    def _signer(self, app):
+        return Signer(app.secret_key, salt="server-side-session")
+
+    def open_session(self, app, request):
+        if not app.secret_key:
+            return None
+
+        cookie = request.cookies.get(self.get_cookie_name(app))
+        if cookie:
+            try:
+                sid = self._signer(app).unsign(cookie).decode("utf-8")
+            except BadSignature:
+                sid = None
+
+            if sid:
+                data = self.store.get(sid)
+                if data is not None:
+                    try:
+                        return self.session_class(self.serializer.loads(data), sid=sid)
+                    except (ValueError, TypeError):
+                        pass
+
+        return self.session_class(sid=secrets.token_urlsafe(32))
+
+    def save_session(self, app, session, response):
+        name = self.get_cookie_name(app)
+        domain = self.get_cookie_domain(app)
+        path = self.get_cookie_path(app)
+
+        if not session:
+            if session.modified:
+                self.store.delete(session.sid)
+                response.delete_cookie(name, domain=domain, path=path)
+            return
+
+        if session.accessed:
+            response.vary.add("Cookie")
+
+        if session.modified:
+            ttl = app.permanent_session_lifetime.total_seconds()
+            self.store.set(session.sid, self.serializer.dumps(dict(session)), ttl)
+
+        if not self.should_set_cookie(app, session):
+            return
+
+        response.set_cookie(
+            name,
+            self._signer(app).sign(session.sid).decode("utf-8"),
+            expires=self.get_expiration_time(app, session),
+            httponly=self.get_cookie_httponly(app),
+            domain=domain,
+            path=path,
+            secure=self.get_cookie_secure(app),
+            samesite=self.get_cookie_samesite(app),
+        )
+
+
+def init_sessions(app):
+    """Install the session interface selected by SESSION_BACKEND"""
+    backend = app.config["SESSION_BACKEND"]
+
+    if backend == "sqlite":
+        store = SQLiteSessionStore(app.config["SESSION_SQLITE_PATH"])
+    elif backend == "redis":
+        store = RedisSessionStore(app.config["SESSION_REDIS_URL"])
+    elif backend == "cookie":
+        return
+    else:
+        raise ValueError(f"Unknown SESSION_BACKEND: {backend}")
+
+    app.session_interface = ServerSideSessionInterface(store)
@@ -1,6 +1,84 @@
+import base64
+import hashlib
+import json
+import time
+
 from flask import session
 
+# Session keys holding the login and what its token's claims say
+SESSION_KEYS = ("token", "user_id", "token_expires")
+
+
+def decode_token_claims(token):
+    """Decode the claims of a JWT without contacting the backend
+
+    The signature is not verified here; the backend still validates the
+    token on every data request. Opaque or malformed tokens have no claims.
+    """
+    try:
+        payload = token.split(".")[1]
+        payload += "=" * (-len(payload) % 4)
+        claims = json.loads(base64.urlsafe_b64decode(payload))
+    except (AttributeError, IndexError, ValueError):
+        return {}
+
+    return claims if isinstance(claims, dict) else {}
+
+
+def start_session(token):
+    """Log in with token, keeping its user id and expiry in the session
+
+    The claims are decoded once here rather than on every request.
+    """
+    session["token"] = token
+    remember_claims(token)
+
+
+def remember_claims(token):
+    """Store the user id and expiry from token's claims in the session"""
+    claims = decode_token_claims(token)
+    expires = claims.get("exp")
+    session["token_expires"] = expires if isinstance(expires, (int, float)) else None
+
+    for claim in ("sub", "user_id", "username"):
+        if claims.get(claim):
+            session["user_id"] = str(claims[claim])
+            return
+    digest = hashlib.sha256(token.encode("utf-8")).hexdigest()[:32]
+    session["user_id"] = "token:" + digest
+
+
+def end_session():
+    """Forget the login and its claims"""
+    for key in SESSION_KEYS:
+        session.pop(key, None)
+
+
+def session_token():
+    """The logged-in token, with its claims remembered in the session"""
+    token = session.get("token")
+    if token and "user_id" not in session:
+        # Logged in before the claims were stored with the token
+        remember_claims(token)
+    return token
+
 
 def is_authenticated():
     """Check if user is authenticated"""
-    return "token" in session and session["token"]
+    if not session_token():
+        return False
+
+    # Reject tokens we already know to be expired
+    expires = session.get("token_expires")
+    if expires is not None and expires <= time.time():
+        end_session()
+        return False
+
+    return True
+
+
+def current_user_id():
+    """Identify the logged-in user for cache keys without exposing the token"""
+    if not session_token():
+        return None
+    return session["user_id"]
@@ -2,4 +2,4 @@ from flask import Blueprint
 
 dashboard = Blueprint("dashboard", __name__)
 
-from . import routes
+from . import routes  # noqa: E402,F401
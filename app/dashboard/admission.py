@@ -0,0 +1,151 @@
+import heapq
+import itertools
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+
+class AdmissionRejected(Exception):
+    """Raised when a request can't be admitted; carries the HTTP status"""
+
+    def __init__(self, message, status=503, retry_after=1):
+        super().__init__(message)
+        self.status = status
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """Limit how much of a worker's CPU one user's dashboard renders can take
+
+    Each user may have ``max_per_user`` dashboard renders in progress.
+    Heavy renders (long recordings) additionally need one of
+    ``heavy_slots``; when none is free they wait in a bounded priority
+    queue, where users with fewer heavy requests of their own go first,
+    then smaller recordings, then earlier arrivals. Requests that find
+    ``degrade_depth`` or more renders waiting are told to degrade to a
+    downsampled render. Limits apply per worker process.
+    """
+
+    def __init__(
+        self,
+        max_per_user=2,
+        heavy_slots=2,
+        max_queue=16,
+        degrade_depth=4,
+        queue_timeout=30.0,
+        clock=time.monotonic,
+    ):
+        self.max_per_user = max_per_user
+        self.heavy_slots = heavy_slots
+        self.max_queue = max_queue
+        self.degrade_depth = degrade_depth
+        self.queue_timeout = queue_timeout
+        self.clock = clock
+
+        self._cond = threading.Condition()
+        self._active = Counter()  # requests in progress per user
+        self._heavy = Counter()  # heavy renders running or queued per user
+        self._running = 0
+        self._queue = []  # heap of (user's heavy count, samples, arrival)
+        self._arrivals = itertools.count()
+        self._stats = {
+            "admitted": 0,
+            "rejected_user_limit": 0,
+            "rejected_queue_full": 0,
+            "queue_timeouts": 0,
+            "heavy": 0,
+            "queued": 0,
+            "degraded": 0,
+            "max_queue_depth": 0,
+            "wait_seconds": 0.0,
+        }
+
+    def enter(self, user_id):
+        """Count a render against its user's limit or raise AdmissionRejected"""
+        with self._cond:
+            if self._active[user_id] >= self.max_per_user:
+                self._stats["rejected_user_limit"] += 1
+                raise AdmissionRejected(
+                    "Too many dashboard renders in progress", status=429
+                )
+            self._active[user_id] += 1
+            self._stats["admitted"] += 1
+
+    def leave(self, user_id):
+        with self._cond:
+            self._active[user_id] -= 1
+            if self._active[user_id] <= 0:
+                del self._active[user_id]
+
+    @contextmanager
+    def heavy(self, user_id, samples):
+        """Hold a heavy slot for the block; yields whether to degrade"""
+        degraded = self._acquire(user_id, samples)
+        try:
+            yield degraded
+        finally:
+            with self._cond:
+                self._running -= 1
+                self._release_user(user_id)
+                self._cond.notify_all()
+
+    def _acquire(self, user_id, samples):
+        with self._cond:
+            self._stats["heavy"] += 1
+            depth = len(self._queue)
+            degraded = depth >= self.degrade_depth
+            self._stats["degraded"] += degraded
+
+            if self._running < self.heavy_slots and not self._queue:
+                self._running += 1
+                self._heavy[user_id] += 1
+                return degraded
+
+            if depth >= self.max_queue:
+                self._stats["rejected_queue_full"] += 1
+                raise AdmissionRejected("The server is busy, please retry shortly")
+
+            entry = (self._heavy[user_id], samples, next(self._arrivals))
+            heapq.heappush(self._queue, entry)
+            self._heavy[user_id] += 1
+            self._stats["queued"] += 1
+            self._stats["max_queue_depth"] = max(
+                self._stats["max_queue_depth"], len(self._queue)
+            )
+
+            started = self.clock()
+            deadline = started + self.queue_timeout
+            while not (self._queue[0] is entry and self._running < self.heavy_slots):
+                remaining = deadline - self.clock()
+                if remaining <= 0:
+                    self._queue.remove(entry)
+                    heapq.heapify(self._queue)
+                    self._release_user(user_id)
+                    self._stats["queue_timeouts"] += 1
+                    self._cond.notify_all()
+                    raise AdmissionRejected("Timed out waiting for a render slot")
+                self._cond.wait(remaining)
+
+            heapq.heappop(self._queue)
+            self._running += 1
+            self._stats["wait_seconds"] += self.clock() - started
+            # The next entry may be able to start too
+            self._cond.notify_all()
+            return degraded
+
+    def _release_user(self, user_id):
+        self._heavy[user_id] -= 1
+        if self._heavy[user_id] <= 0:
+            del self._heavy[user_id]
+
+    def stats(self):
+        with self._cond:
+            return dict(
+                self._stats,
+                wait_seconds=round(self._stats["wait_seconds"], 3),
+                active_requests=sum(self._active.values()),
+                active_users=len(self._active),
+                heavy_running=self._running,
+                queue_depth=len(self._queue),
+            )
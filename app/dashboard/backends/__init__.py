@@ -0,0 +1,49 @@
+import importlib
+import importlib.util
+
+from .base import ComputeBackend
+
+# Selectable with COMPUTE_BACKEND; each lives in <name>_backend.py
+BACKENDS = ("pandas", "numpy", "polars")
+
+_instances = {}
+
+
+def get_backend(name):
+    """Return the compute backend called name, importing it on first use
+
+    Raises ValueError for unknown names and RuntimeError when the backend's
+    library isn't installed.
+    """
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown compute backend: {name}")
+
+    backend = _instances.get(name)
+    if backend is None:
+        module = importlib.import_module(f"{__name__}.{name}_backend")
+        missing = [
+            package
+            for package in module.Backend.requires
+            if importlib.util.find_spec(package) is None
+        ]
+        if missing:
+            raise RuntimeError(
+                f"The {name} compute backend requires {', '.join(missing)}"
+            )
+        backend = _instances[name] = module.Backend()
+    return backend
+
+
+def available_backends():
+    """Names of the backends whose libraries are installed"""
+    names = []
+    for name in BACKENDS:
+        try:
+            get_backend(name)
+        except RuntimeError:
+            continue
+        names.append(name)
+    return names
+
+
+__all__ = ["BACKENDS", "ComputeBackend", "available_backends", "get_backend"]
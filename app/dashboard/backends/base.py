@@ -0,0 +1,170 @@
+import abc
+import warnings
+
+from ...utils.frames import column_values
+from ...utils.lazy import LazyModule
+from ..events import origin_offsets_ms
+from ..utils import narrow, to_utc
+
+np = LazyModule("numpy")
+pd = LazyModule("pandas")
+
+SAMPLE_COLUMNS = ("timestamp", "x", "y", "z")
+
+AGGREGATE_COLUMNS = (
+    "start_ms",
+    "samples",
+    "mean_magnitude",
+    "peak_magnitude",
+    "active_samples",
+)
+
+
+def parse_timestamps(values):
+    """Parse ISO 8601 strings to int64 nanoseconds since the epoch (UTC)
+
+    Returns the nanoseconds and the timezone pandas would give the parsed
+    column (None for naive input). UTC ("Z") and naive strings are parsed
+    by NumPy; anything else, such as explicit offsets, falls back to pandas
+    so results match the pandas backend.
+    """
+    text = np.asarray(values, dtype=str)
+    utc = bool(len(text)) and bool(np.char.endswith(text, "Z").all())
+    if utc:
+        text = np.char.rstrip(text, "Z")
+
+    try:
+        with warnings.catch_warnings():
+            # NumPy only warns about timezone offsets it then ignores
+            warnings.simplefilter("error")
+            return text.astype("datetime64[ns]").view(np.int64), "UTC" if utc else None
+    except (ValueError, UserWarning, DeprecationWarning):
+        parsed = pd.DatetimeIndex(pd.to_datetime(pd.Series(values)))
+        tz = parsed.tz
+        if tz is not None:
+            parsed = parsed.tz_convert("UTC").tz_localize(None)
+        return parsed.values.astype("datetime64[ns]").view(np.int64), tz
+
+
+def to_timestamps(nanoseconds, tz):
+    """Timestamp column values from UTC nanoseconds in the parsed timezone"""
+    timestamps = pd.to_datetime(nanoseconds, unit="ns", utc=tz is not None)
+    return timestamps if tz is None else timestamps.tz_convert(tz)
+
+
+def aggregate_frame(windows, samples, mean, peak, active, window_ms):
+    """Windowed aggregates as a frame with the same dtypes for every backend"""
+    return pd.DataFrame(
+        {
+            "start_ms": np.asarray(windows, dtype=np.float64) * window_ms,
+            "samples": np.asarray(samples, dtype=np.int64),
+            "mean_magnitude": np.asarray(mean, dtype=np.float64),
+            "peak_magnitude": np.asarray(peak, dtype=np.float64),
+            "active_samples": np.asarray(active, dtype=np.int64),
+        }
+    )
+
+
+def window_ids(df, window_ms):
+    """Fixed window number of every row, counted from the time-range origin"""
+    return np.floor(origin_offsets_ms(df) / window_ms).astype(np.int64)
+
+
+class ComputeBackend(abc.ABC):
+    """The processing stage's operations, implemented per library
+
+    A backend ingests raw samples, sorts them, computes the magnitude,
+    metrics and windowed aggregates. Whatever library does the work, the
+    results are the pandas frames and metrics dicts of the pandas backend,
+    so time ranges, events and charts are shared by all backends.
+    Backends without a constructor of their own for the sample dicts
+    ingest them with pandas.
+    """
+
+    name = None
+    # Packages the backend imports, checked by get_backend
+    requires = ()
+
+    def ingest(self, samples):
+        """Raw samples as (int64 ns timestamps, (n, 3) float64 x/y/z, timezone)"""
+        # Missing axes become NaN
+        frame = pd.DataFrame(samples, columns=list(SAMPLE_COLUMNS))
+        timestamps, tz = parse_timestamps(frame["timestamp"].to_numpy())
+        return timestamps, frame[["x", "y", "z"]].to_numpy(dtype=np.float64), tz
+
+    @abc.abstractmethod
+    def sort(self, keys):
+        """Positions that stably sort keys"""
+
+    @abc.abstractmethod
+    def magnitude(self, xyz):
+        """Euclidean norm of each x/y/z row"""
+
+    def process(self, dataset, precision="float64"):
+        """Build the processed frame of a dataset, as process_acceleration_data"""
+        from ..utils import process_acceleration_data
+
+        samples = dataset.get("data", {}).get("samples", [])
+        if not samples:
+            # The empty layouts are built without touching any samples
+            return process_acceleration_data(dataset, precision)
+
+        timestamps, xyz, tz = self.ingest(samples)
+
+        if precision == "float64":
+            order = self.sort(timestamps)
+            timestamps, xyz = timestamps[order], xyz[order]
+            magnitude = self.magnitude(xyz)
+            return pd.DataFrame(
+                {
+                    "timestamp": to_timestamps(timestamps, tz),
+                    "x": xyz[:, 0],
+                    "y": xyz[:, 1],
+                    "z": xyz[:, 2],
+                    "index": np.arange(len(timestamps)),
+                    "magnitude": magnitude,
+                },
+                # Keep the original row labels, as sort_values does
+                index=order,
+            )
+
+        # Compact frames count milliseconds from start_time, naive times as UTC
+        start_time = dataset.get("start_time")
+        origin = (
+            to_utc(pd.Timestamp(start_time))
+            if start_time
+            else pd.Timestamp(int(timestamps.min()), unit="ns", tz="UTC")
+        )
+        offsets = (timestamps - origin.value) // 1_000_000
+        order = self.sort(offsets)
+        offsets, xyz = offsets[order], xyz[order]
+        magnitude = self.magnitude(xyz)
+
+        df = pd.DataFrame(
+            {
+                "offset_ms": offsets.astype(np.int64),
+                "x": narrow(xyz[:, 0], precision),
+                "y": narrow(xyz[:, 1], precision),
+                "z": narrow(xyz[:, 2], precision),
+                "magnitude": narrow(magnitude, precision),
+            }
+        )
+        df.attrs["start_time"] = origin
+        return df
+
+    @abc.abstractmethod
+    def metrics(self, df):
+        """Activity metrics of a processed frame, as calculate_metrics"""
+
+    @abc.abstractmethod
+    def window_aggregates(self, df, window_ms):
+        """Sample count, mean and peak magnitude and active samples per window
+
+        Windows are ``window_ms`` long and counted from the time-range origin
+        (the first sample, or ``start_time`` for compact frames); empty
+        windows are left out.
+        """
+
+    @staticmethod
+    def magnitude_values(df):
+        return column_values(df, "magnitude").astype(np.float64)
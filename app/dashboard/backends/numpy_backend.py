@@ -0,0 +1,60 @@
+from ...utils.frames import duration_ms
+from ...utils.lazy import LazyModule
+from ..utils import ACTIVE_THRESHOLD, GRAVITY_OFFSET, intensity_percent
+from .base import ComputeBackend, aggregate_frame, window_ids
+
+np = LazyModule("numpy")
+
+
+class Backend(ComputeBackend):
+    """Plain NumPy arrays: no per-step DataFrames or index alignment"""
+
+    name = "numpy"
+    requires = ("numpy",)
+
+    def sort(self, keys):
+        return np.argsort(keys, kind="stable")
+
+    def magnitude(self, xyz):
+        x, y, z = xyz[:, 0], xyz[:, 1], xyz[:, 2]
+        return np.sqrt(x**2 + y**2 + z**2)
+
+    def metrics(self, df):
+        if df.empty:
+            return {
+                "avg_intensity": 0,
+                "duration": 0,
+                "active_samples": 0,
+                "peak_magnitude": 0,
+            }
+
+        magnitude = self.magnitude_values(df)
+        active = np.abs(magnitude - GRAVITY_OFFSET) > ACTIVE_THRESHOLD
+        return {
+            "avg_intensity": intensity_percent(float(magnitude.mean())),
+            "duration": round(duration_ms(df) / (1000 * 60), 1),
+            "active_samples": int(np.count_nonzero(active)),
+            "peak_magnitude": round(float(magnitude.max()), 2),
+        }
+
+    def window_aggregates(self, df, window_ms):
+        if df.empty:
+            return aggregate_frame([], [], [], [], [], window_ms)
+
+        # Frames are time-sorted, so each window is one run of rows
+        windows = window_ids(df, window_ms)
+        starts = np.flatnonzero(np.diff(windows, prepend=windows[0] - 1))
+        counts = np.diff(np.append(starts, len(windows)))
+
+        magnitude = self.magnitude_values(df)
+        active = (np.abs(magnitude - GRAVITY_OFFSET) > ACTIVE_THRESHOLD).astype(
+            np.int64
+        )
+        return aggregate_frame(
+            windows[starts],
+            counts,
+            np.add.reduceat(magnitude, starts) / counts,
+            np.maximum.reduceat(magnitude, starts),
+            np.add.reduceat(active, starts),
+            window_ms,
+        )
@@ -0,0 +1,52 @@
+from ...utils.lazy import LazyModule
+from ..utils import ACTIVE_THRESHOLD, GRAVITY_OFFSET
+from ..utils import calculate_metrics, process_acceleration_data
+from .base import AGGREGATE_COLUMNS, ComputeBackend, aggregate_frame, window_ids
+
+np = LazyModule("numpy")
+pd = LazyModule("pandas")
+
+
+class Backend(ComputeBackend):
+    """The original DataFrame implementation, and the reference for the others"""
+
+    name = "pandas"
+    requires = ("pandas",)
+
+    def sort(self, keys):
+        return pd.Series(keys).argsort(kind="stable").to_numpy()
+
+    def magnitude(self, xyz):
+        frame = pd.DataFrame(xyz, columns=["x", "y", "z"])
+        return np.sqrt(frame["x"] ** 2 + frame["y"] ** 2 + frame["z"] ** 2).to_numpy()
+
+    def process(self, dataset, precision="float64"):
+        return process_acceleration_data(dataset, precision)
+
+    def metrics(self, df):
+        return calculate_metrics(df)
+
+    def window_aggregates(self, df, window_ms):
+        if df.empty:
+            return aggregate_frame([], [], [], [], [], window_ms)
+
+        magnitude = self.magnitude_values(df)
+        frame = pd.DataFrame(
+            {
+                "window": window_ids(df, window_ms),
+                "magnitude": magnitude,
+                "active": np.abs(magnitude - GRAVITY_OFFSET) > ACTIVE_THRESHOLD,
+            }
+        )
+        grouped = frame.groupby("window", sort=True)
+        result = grouped.agg(
+            samples=("magnitude", "size"),
+            mean_magnitude=("magnitude", "mean"),
+            peak_magnitude=("magnitude", "max"),
+            active_samples=("active", "sum"),
+        )
+        return aggregate_frame(
+            result.index.to_numpy(),
+            *(result[column].to_numpy() for column in AGGREGATE_COLUMNS[1:]),
+            window_ms,
+        )
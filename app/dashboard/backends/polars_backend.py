@@ -0,0 +1,117 @@
+from ...utils.frames import duration_ms
+from ...utils.lazy import LazyModule
+from ..utils import ACTIVE_THRESHOLD, GRAVITY_OFFSET, intensity_percent
+from .base import ComputeBackend, aggregate_frame, parse_timestamps, window_ids
+
+np = LazyModule("numpy")
+pl = LazyModule("polars")
+
+
+def is_active(column):
+    return (pl.col(column) - GRAVITY_OFFSET).abs() > ACTIVE_THRESHOLD
+
+
+class Backend(ComputeBackend):
+    """Polars lazy queries, which run multi-threaded
+
+    Samples are ingested by the Polars constructor; sorting, the
+    magnitude, metrics and aggregates are Polars expressions over the NumPy
+    columns of ingest. Results are converted back to the pandas layouts.
+    """
+
+    name = "polars"
+    requires = ("polars",)
+
+    def ingest(self, samples):
+        schema = {"timestamp": pl.String, "x": pl.Float64, "y": pl.Float64}
+        try:
+            frame = pl.from_dicts(samples, schema=dict(schema, z=pl.Float64))
+        except pl.exceptions.PolarsError as e:
+            # Non-numeric values fail as they do in the other backends
+            raise ValueError(str(e)) from e
+        timestamps, tz = parse_timestamps(frame["timestamp"].to_numpy())
+        # Nulls of missing axes become NaN
+        xyz = frame.select("x", "y", "z").to_numpy().astype(np.float64, copy=False)
+        return timestamps, xyz, tz
+
+    def sort(self, keys):
+        return (
+            pl.LazyFrame({"key": keys})
+            .with_row_index("position")
+            .sort("key", maintain_order=True)
+            .select("position")
+            .collect()
+            .to_series()
+            .to_numpy()
+            .astype(np.int64)
+        )
+
+    def magnitude(self, xyz):
+        return (
+            pl.LazyFrame({"x": xyz[:, 0], "y": xyz[:, 1], "z": xyz[:, 2]})
+            .select((pl.col("x") ** 2 + pl.col("y") ** 2 + pl.col("z") ** 2).sqrt())
+            .collect()
+            .to_series()
+            .to_numpy()
+        )
+
+    def metrics(self, df):
+        if df.empty:
+            return {
+                "avg_intensity": 0,
+                "duration": 0,
+                "active_samples": 0,
+                "peak_magnitude": 0,
+            }
+
+        row = (
+            pl.LazyFrame({"magnitude": self.magnitude_values(df)})
+            .select(
+                pl.col("magnitude").mean().alias("mean"),
+                pl.col("magnitude").max().alias("peak"),
+                is_active("magnitude").sum().alias("active"),
+            )
+            .collect()
+            .row(0, named=True)
+        )
+        return {
+            "avg_intensity": intensity_percent(float(row["mean"])),
+            "duration": round(duration_ms(df) / (1000 * 60), 1),
+            "active_samples": int(row["active"]),
+            "peak_magnitude": round(float(row["peak"]), 2),
+        }
+
+    def window_aggregates(self, df, window_ms):
+        if df.empty:
+            return aggregate_frame([], [], [], [], [], window_ms)
+
+        result = (
+            pl.LazyFrame(
+                {
+                    "window": window_ids(df, window_ms),
+                    "magnitude": self.magnitude_values(df),
+                }
+            )
+            .group_by("window")
+            .agg(
+                pl.len().alias("samples"),
+                pl.col("magnitude").mean().alias("mean_magnitude"),
+                pl.col("magnitude").max().alias("peak_magnitude"),
+                is_active("magnitude").sum().alias("active_samples"),
+            )
+            .sort("window")
+            .collect()
+        )
+        return aggregate_frame(
+            *(
+                result[column].to_numpy()
+                for column in (
+                    "window",
+                    "samples",
+                    "mean_magnitude",
+                    "peak_magnitude",
+                    "active_samples",
+                )
+            ),
+            window_ms,
+        )
@@ -0,0 +1,258 @@
+from itertools import islice
+
+from ..utils.lazy import LazyModule
+from .utils import count_active, intensity_percent, parse_time_bound, to_utc
+
+pd = LazyModule("pandas")
+np = LazyModule("numpy")
+
+CHART_COLUMNS = ("index", "timestamp", "x", "y", "z", "magnitude")
+
+
+class UnsortedSamplesError(Exception):
+    """Blocks of samples overlap in time, so they can't be processed in order"""
+
+
+class MetricsAccumulator:
+    """Mergeable partial aggregates behind ``calculate_metrics``
+
+    Each block of samples updates a sum, count, peak, first/last timestamp
+    and active count; accumulators for different blocks can be merged in
+    any order and produce the same metrics as the whole recording.
+    """
+
+    def __init__(self):
+        self.total = 0.0
+        self.count = 0
+        self.peak = None
+        self.first_ms = None
+        self.last_ms = None
+        self.active = 0
+
+    def update(self, magnitude, timestamps_ms):
+        if len(magnitude) == 0:
+            return self
+
+        block = MetricsAccumulator()
+        block.total = float(magnitude.sum(dtype=np.float64))
+        block.count = len(magnitude)
+        block.peak = float(magnitude.max())
+        block.first_ms = int(timestamps_ms.min())
+        block.last_ms = int(timestamps_ms.max())
+        block.active = count_active(magnitude)
+        return self.merge(block)
+
+    def merge(self, other):
+        if other.count == 0:
+            return self
+        if self.count == 0:
+            self.__dict__.update(other.__dict__)
+            return self
+
+        self.total += other.total
+        self.count += other.count
+        self.peak = max(self.peak, other.peak)
+        self.first_ms = min(self.first_ms, other.first_ms)
+        self.last_ms = max(self.last_ms, other.last_ms)
+        self.active += other.active
+        return self
+
+    def result(self):
+        """Metrics in the same shape as ``calculate_metrics``"""
+        if self.count == 0:
+            return {
+                "avg_intensity": 0,
+                "duration": 0,
+                "active_samples": 0,
+                "peak_magnitude": 0,
+            }
+
+        avg_intensity = intensity_percent(self.total / self.count)
+        duration_min = (self.last_ms - self.first_ms) / (1000 * 60)
+
+        return {
+            "avg_intensity": avg_intensity,
+            "duration": round(duration_min, 1),
+            "active_samples": self.active,
+            "peak_magnitude": round(self.peak, 2),
+        }
+
+
+class StreamingDownsampler:
+    """Keep at most ``max_points`` chart rows from an unbounded stream
+
+    Samples are grouped into buckets and each bucket keeps the rows with its
+    lowest and highest magnitude, so peaks survive thinning. Whenever the
+    kept rows would exceed the budget the bucket size doubles and adjacent
+    buckets are merged, bounding memory by ``max_points`` plus one bucket.
+    """
+
+    def __init__(self, max_points=20000):
+        self.max_buckets = max(1, max_points // 2)
+        self.bucket_size = 1
+        # Lowest- and highest-magnitude row of every bucket
+        self._lows = np.empty((0, 6))
+        self._highs = np.empty((0, 6))
+        self._pending = np.empty((0, 6))
+
+    def add(self, rows):
+        """Add rows of (index, timestamp_ms, x, y, z, magnitude)"""
+        rows = np.concatenate([self._pending, rows])
+        full = len(rows) // self.bucket_size * self.bucket_size
+
+        if full:
+            blocks = rows[:full].reshape(-1, self.bucket_size, rows.shape[1])
+            magnitude = blocks[:, :, 5]
+            picks = np.arange(len(blocks))
+            self._lows = np.concatenate(
+                [self._lows, blocks[picks, magnitude.argmin(axis=1)]]
+            )
+            self._highs = np.concatenate(
+                [self._highs, blocks[picks, magnitude.argmax(axis=1)]]
+            )
+
+        self._pending = rows[full:]
+
+        while len(self._lows) > self.max_buckets:
+            self._coarsen()
+
+    def _coarsen(self):
+        """Merge adjacent bucket pairs and double the bucket size"""
+        self._lows = self._merge_pairs(self._lows, np.less_equal)
+        self._highs = self._merge_pairs(self._highs, np.greater_equal)
+        self.bucket_size *= 2
+
+    @staticmethod
+    def _merge_pairs(rows, prefer_first):
+        even = len(rows) // 2 * 2
+        first, second = rows[0:even:2], rows[1:even:2]
+        merged = np.where(
+            prefer_first(first[:, 5], second[:, 5])[:, None], first, second
+        )
+        # An odd bucket out is carried over unchanged
+        return np.concatenate([merged, rows[even:]])
+
+    def frame(self):
+        """The kept rows as a chart frame ordered by sample index"""
+        rows = np.concatenate([self._lows, self._highs, self._pending])
+        if not len(rows):
+            return pd.DataFrame(columns=list(CHART_COLUMNS))
+
+        table = np.unique(rows, axis=0)  # sorts by index, drops duplicates
+        return pd.DataFrame(
+            {
+                "index": table[:, 0].astype(np.int64),
+                "timestamp": pd.to_datetime(table[:, 1], unit="ms", utc=True),
+                "x": table[:, 2],
+                "y": table[:, 3],
+                "z": table[:, 4],
+                "magnitude": table[:, 5],
+            }
+        )
+
+
+def iter_chunks(samples, chunk_size):
+    """Yield lists of at most chunk_size samples from any iterable"""
+    iterator = iter(samples)
+    while True:
+        chunk = list(islice(iterator, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def epoch_ms(timestamps):
+    """Milliseconds since the Unix epoch, independent of datetime resolution"""
+    epoch = pd.Timestamp(0, tz="UTC")
+    return ((timestamps - epoch) // pd.Timedelta(milliseconds=1)).to_numpy(
+        dtype=np.int64
+    )
+
+
+def process_in_chunks(
+    dataset,
+    chunk_size=50000,
+    max_points=20000,
+    start=None,
+    end=None,
+    samples=None,
+):
+    """Compute metrics and a chart frame block by block
+
+    The working memory on top of the samples themselves is bounded by
+    ``chunk_size`` and ``max_points``: no frame, sort or magnitude array of
+    the whole recording is built. The samples are not covered; they default
+    to the dataset's list, which the dashboard has already decoded and
+    cached in full. Only a lazy iterable passed as ``samples`` (for example
+    a streaming parser) bounds them too. Samples
+    are sorted within each block, but a block starting before the previous
+    one ended raises UnsortedSamplesError, as only the whole-frame
+    pipeline can sort across blocks. ``start``/``end`` accept the same
+    values as the dashboard's time-range parameters, with second offsets
+    counted from the first sample.
+
+    Returns ``(metrics, chart_df)``.
+    """
+    if samples is None:
+        samples = dataset.get("data", {}).get("samples", [])
+
+    accumulator = MetricsAccumulator()
+    downsampler = StreamingDownsampler(max_points)
+    position = 0
+    bounds = None
+    last_ms = None
+
+    for chunk in iter_chunks(samples, chunk_size):
+        block = pd.DataFrame(chunk, columns=["timestamp", "x", "y", "z"])
+        timestamps = epoch_ms(pd.to_datetime(block["timestamp"], utc=True))
+        order = np.argsort(timestamps, kind="stable")
+        timestamps = timestamps[order]
+        xyz = block[["x", "y", "z"]].to_numpy(dtype=np.float64)[order]
+        magnitude = np.sqrt(np.square(xyz).sum(axis=1))
+
+        if last_ms is not None and timestamps[0] < last_ms:
+            raise UnsortedSamplesError(
+                f"Samples before position {position} end after the next block starts"
+            )
+        last_ms = timestamps[-1]
+        if bounds is None:
+            # Blocks are in order, so this is the recording's first sample
+            bounds = resolve_bounds(timestamps[0], start, end)
+
+        # Restrict to the requested window before aggregating
+        keep = (timestamps >= bounds[0]) & (timestamps <= bounds[1])
+        positions = np.arange(position, position + len(chunk))
+        position += len(chunk)
+        if not keep.all():
+            timestamps, xyz = timestamps[keep], xyz[keep]
+            magnitude, positions = magnitude[keep], positions[keep]
+
+        accumulator.update(magnitude, timestamps)
+        downsampler.add(
+            np.column_stack([positions, timestamps, xyz, magnitude]).astype(np.float64)
+        )
+
+    return accumulator.result(), downsampler.frame()
+
+
+def resolve_bounds(first_ms, start=None, end=None):
+    """Resolve start/end parameters to epoch milliseconds
+
+    Second offsets count from ``first_ms``, the first sample, as in
+    ``slice_time_range``.
+    """
+    origin = pd.Timestamp(int(first_ms), unit="ms", tz="UTC")
+
+    start = parse_time_bound(start, origin)
+    end = parse_time_bound(end, origin)
+    return (
+        -np.inf if start is None else timestamp_ms(start),
+        np.inf if end is None else timestamp_ms(end),
+    )
+
+
+def timestamp_ms(timestamp):
+    """Milliseconds since the Unix epoch for a single timestamp"""
+    return (to_utc(timestamp) - pd.Timestamp(0, tz="UTC")) / pd.Timedelta(
+        milliseconds=1
+    )
@@ -0,0 +1,316 @@
+import hashlib
+import math
+import os
+import threading
+
+from ..utils.cache import DirectoryPruner, LRUCache
+from ..utils.frames import column_values, sample_positions
+from ..utils.lazy import LazyModule
+from .utils import ACTIVE_THRESHOLD, GRAVITY_OFFSET
+
+np = LazyModule("numpy")
+pd = LazyModule("pandas")
+
+# Low-pass window applied to the magnitude before detecting events
+SMOOTHING_SECONDS = 0.2
+
+# A step is a smoothed peak this far above 1g, at most one per interval
+STEP_THRESHOLD = 0.15
+STEP_MIN_INTERVAL = 0.3
+
+# Active runs closer than this are one bout; shorter bouts are dropped
+BOUT_MERGE_SECONDS = 2.0
+BOUT_MIN_SECONDS = 2.0
+
+# Bump when detection changes so persisted indexes are rebuilt
+EVENT_INDEX_VERSION = 2
+
+EVENT_FIELDS = (
+    "step_ms",
+    "step_pos",
+    "bout_start_ms",
+    "bout_end_ms",
+    "bout_start_pos",
+    "bout_end_pos",
+    "bout_steps",
+    "bout_peak",
+    "bout_mean",
+)
+INTEGER_FIELDS = ("step_pos", "bout_start_pos", "bout_end_pos", "bout_steps")
+
+
+def origin_offsets_ms(df):
+    """Sample times in milliseconds from the origin used by time-range queries
+
+    Matches ``slice_time_range``: every frame layout counts from its first
+    sample.
+    """
+    if "offset_ms" in df.columns:
+        offsets = df["offset_ms"].to_numpy().astype(np.float64)
+        return offsets - offsets[0] if len(offsets) else offsets
+    timestamps = df["timestamp"]
+    offsets = (timestamps - timestamps.iloc[0]) / pd.Timedelta(milliseconds=1)
+    return offsets.to_numpy(dtype=np.float64)
+
+
+def window_ms(full_df, window_df):
+    """First and last offset of a window of full_df, or None if it is empty"""
+    if window_df.empty:
+        return None
+    if "offset_ms" in window_df.columns:
+        origin = float(full_df["offset_ms"].iloc[0])
+        offsets = window_df["offset_ms"]
+        return float(offsets.iloc[0]) - origin, float(offsets.iloc[-1]) - origin
+
+    origin = full_df["timestamp"].iloc[0]
+    timestamps = window_df["timestamp"]
+    return (
+        (timestamps.iloc[0] - origin) / pd.Timedelta(milliseconds=1),
+        (timestamps.iloc[-1] - origin) / pd.Timedelta(milliseconds=1),
+    )
+
+
+def smooth(values, width):
+    """Centred moving average that keeps the input length"""
+    if width <= 1 or not len(values):
+        return values
+    # Repeat the edge samples so the ends aren't pulled towards zero
+    padded = np.pad(values, (width // 2, width - 1 - width // 2), mode="edge")
+    return np.convolve(padded, np.ones(width) / width, mode="valid")
+
+
+def rolling_max(values, radius):
+    """Maximum over a centred window of 2 * radius + 1 samples"""
+    if radius <= 0:
+        return values
+    padded = np.pad(values, radius, constant_values=-np.inf)
+    windows = np.lib.stride_tricks.sliding_window_view(padded, 2 * radius + 1)
+    return windows.max(axis=1)
+
+
+def detect_steps(filtered, rate_hz):
+    """Positions of step peaks in a smoothed magnitude signal
+
+    A step is the highest sample within ``STEP_MIN_INTERVAL`` either side,
+    rising from its predecessor and above ``STEP_THRESHOLD`` over 1g.
+    """
+    radius = int(round(STEP_MIN_INTERVAL * rate_hz))
+    rising = np.concatenate([[False], filtered[1:] > filtered[:-1]])
+    peaks = (
+        rising
+        & (filtered == rolling_max(filtered, radius))
+        & (filtered - GRAVITY_OFFSET > STEP_THRESHOLD)
+    )
+    return np.flatnonzero(peaks)
+
+
+def run_lengths(mask):
+    """Start and (exclusive) stop positions of the True runs in a mask"""
+    edges = np.diff(np.concatenate([[0], mask.astype(np.int8), [0]]))
+    return np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+
+
+def detect_bouts(active, offsets_ms):
+    """Merge nearby active runs into bouts and drop short ones"""
+    starts, stops = run_lengths(active)
+    if not len(starts):
+        return starts, stops
+
+    gaps = offsets_ms[starts[1:]] - offsets_ms[stops[:-1] - 1]
+    breaks = gaps > BOUT_MERGE_SECONDS * 1000
+    starts = starts[np.concatenate([[True], breaks])]
+    stops = stops[np.concatenate([breaks, [True]])]
+
+    durations = offsets_ms[stops - 1] - offsets_ms[starts]
+    keep = durations >= BOUT_MIN_SECONDS * 1000
+    return starts[keep], stops[keep]
+
+
+def segment_reduce(ufunc, values, starts, stops):
+    """Apply a ufunc reduction to each values[start:stop] in one call"""
+    if not len(starts):
+        return np.array([], dtype=values.dtype)
+    # A trailing element keeps every stop a valid reduceat index
+    padded = np.append(values, values[:1])
+    bounds = np.column_stack([starts, stops]).ravel()
+    return ufunc.reduceat(padded, bounds)[::2]
+
+
+class EventIndex:
+    """Steps and activity bouts of a recording as sorted NumPy arrays
+
+    Times are milliseconds from the time-range origin and positions are
+    chart sample numbers, so lookups are binary searches.
+    """
+
+    def __init__(self, **arrays):
+        for field in EVENT_FIELDS:
+            setattr(self, field, arrays[field])
+
+    @classmethod
+    def empty(cls):
+        return cls(
+            **{
+                field: np.array(
+                    [], dtype=np.int64 if field in INTEGER_FIELDS else np.float64
+                )
+                for field in EVENT_FIELDS
+            }
+        )
+
+    @classmethod
+    def from_frame(cls, df, rate_hz):
+        """Detect steps and bouts in a processed, time-sorted frame"""
+        if df.empty or not rate_hz:
+            return cls.empty()
+
+        offsets = origin_offsets_ms(df)
+        positions = sample_positions(df).astype(np.int64)
+        magnitude = column_values(df, "magnitude").astype(np.float64)
+        filtered = smooth(magnitude, int(round(SMOOTHING_SECONDS * rate_hz)))
+
+        steps = detect_steps(filtered, rate_hz)
+        active = np.abs(filtered - GRAVITY_OFFSET) > ACTIVE_THRESHOLD
+        starts, stops = detect_bouts(active, offsets)
+        lengths = stops - starts
+
+        return cls(
+            step_ms=offsets[steps],
+            step_pos=positions[steps],
+            bout_start_ms=offsets[starts],
+            bout_end_ms=offsets[stops - 1],
+            bout_start_pos=positions[starts],
+            bout_end_pos=positions[stops - 1],
+            bout_steps=(
+                np.searchsorted(steps, stops) - np.searchsorted(steps, starts)
+            ).astype(np.int64),
+            bout_peak=segment_reduce(np.maximum, magnitude, starts, stops),
+            bout_mean=segment_reduce(np.add, magnitude, starts, stops)
+            / np.maximum(lengths, 1),
+        )
+
+    def __len__(self):
+        return len(self.bout_start_ms)
+
+    @property
+    def nbytes(self):
+        return sum(getattr(self, field).nbytes for field in EVENT_FIELDS)
+
+    def steps_between(self, start_ms=None, end_ms=None):
+        """Number of steps with start_ms <= time <= end_ms"""
+        lo = 0 if start_ms is None else np.searchsorted(self.step_ms, start_ms)
+        hi = (
+            len(self.step_ms)
+            if end_ms is None
+            else np.searchsorted(self.step_ms, end_ms, side="right")
+        )
+        return int(max(0, hi - lo))
+
+    def bouts_between(self, start_ms=None, end_ms=None):
+        """Range of bout numbers overlapping [start_ms, end_ms]"""
+        lo = 0 if start_ms is None else np.searchsorted(self.bout_end_ms, start_ms)
+        hi = (
+            len(self)
+            if end_ms is None
+            else np.searchsorted(self.bout_start_ms, end_ms, side="right")
+        )
+        return range(int(lo), int(max(lo, hi)))
+
+    def next_bout(self, after_ms):
+        """Number of the first bout starting after after_ms, or None"""
+        i = int(np.searchsorted(self.bout_start_ms, after_ms, side="right"))
+        return i if i < len(self) else None
+
+    def previous_bout(self, before_ms):
+        """Number of the last bout starting before before_ms, or None"""
+        i = int(np.searchsorted(self.bout_start_ms, before_ms)) - 1
+        return i if i >= 0 else None
+
+    def bout(self, i):
+        """Per-bout metrics, with times in seconds from the origin"""
+        # Widen to whole hundredths so a start/end query keeps every sample
+        start = math.floor(self.bout_start_ms[i] / 10) / 100
+        end = math.ceil(self.bout_end_ms[i] / 10) / 100
+        return {
+            "number": i + 1,
+            "start": start,
+            "end": end,
+            "duration": round((self.bout_end_ms[i] - self.bout_start_ms[i]) / 1000, 1),
+            "steps": int(self.bout_steps[i]),
+            "peak_magnitude": round(float(self.bout_peak[i]), 2),
+            "avg_magnitude": round(float(self.bout_mean[i]), 2),
+        }
+
+    def save(self, path):
+        """Write the index to an .npz file atomically"""
+        partial = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(partial, "wb") as handle:
+            np.savez(
+                handle,
+                version=EVENT_INDEX_VERSION,
+                **{field: getattr(self, field) for field in EVENT_FIELDS},
+            )
+        os.replace(partial, path)
+
+    @classmethod
+    def load(cls, path):
+        """Read an index written by save, or None if missing or outdated"""
+        try:
+            with np.load(path) as data:
+                if int(data["version"]) != EVENT_INDEX_VERSION:
+                    return None
+                return cls(**{field: data[field] for field in EVENT_FIELDS})
+        except (OSError, KeyError, ValueError):
+            return None
+
+
+class EventIndexStore:
+    """Event indexes kept in memory and persisted as .npz files
+
+    Files survive worker restarts and are shared by all workers on the
+    host; the in-memory layer avoids re-reading them on every request.
+    Files older than ``max_age`` seconds are deleted, and the oldest ones
+    whenever they total more than ``max_disk_bytes``.
+    """
+
+    def __init__(
+        self,
+        directory=None,
+        max_bytes=16 * 1024 * 1024,
+        max_disk_bytes=None,
+        max_age=None,
+    ):
+        self.directory = directory
+        self.memory = LRUCache(max_bytes, sizeof=lambda index: index.nbytes)
+        self.pruner = None
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+            self.pruner = DirectoryPruner(
+                directory, ".npz", max_age=max_age, max_bytes=max_disk_bytes
+            )
+
+    def path(self, key):
+        digest = hashlib.sha256(repr(key).encode("utf-8")).hexdigest()[:32]
+        return os.path.join(self.directory, f"events-{digest}.npz")
+
+    def get(self, key):
+        index = self.memory.get(key)
+        if index is None and self.directory:
+            index = EventIndex.load(self.path(key))
+            if index is not None:
+                self.memory.set(key, index)
+        return index
+
+    def set(self, key, index):
+        self.memory.set(key, index)
+        if self.directory:
+            index.save(self.path(key))
+            self.pruner.maybe_prune()
+
+    def get_or_build(self, key, build, *args):
+        """Return the stored index for key, building and storing it if needed"""
+        index = self.get(key)
+        if index is None:
+            index = build(*args)
+            self.set(key, index)
+        return index
@@ -0,0 +1,163 @@
+from ..utils.frames import column_values
+from ..utils.lazy import LazyModule
+from .utils import narrow
+
+pd = LazyModule("pandas")
+np = LazyModule("numpy")
+
+# A step longer than this many sampling periods counts as a dropout
+GAP_FACTOR = 1.5
+
+
+def relative_offsets_ms(df):
+    """Sample times in milliseconds from the first sample, as float64"""
+    if "offset_ms" in df.columns:
+        offsets = df["offset_ms"].to_numpy().astype(np.float64)
+    else:
+        timestamps = df["timestamp"]
+        offsets = (timestamps - timestamps.iloc[0]) / pd.Timedelta(milliseconds=1)
+        offsets = offsets.to_numpy(dtype=np.float64)
+    return offsets - offsets[0]
+
+
+def estimate_rate_hz(offsets_ms):
+    """Estimate the sampling rate from the median sample spacing"""
+    steps = np.diff(offsets_ms)
+    steps = steps[steps > 0]
+    if not len(steps):
+        return None
+    return 1000 / float(np.median(steps))
+
+
+def sampling_rate(dataset, df):
+    """The dataset's nominal sampling rate, estimated when it is missing"""
+    rate = dataset.get("sampling_rate_hz")
+    if rate:
+        return float(rate)
+    if len(df) < 2:
+        return None
+    return estimate_rate_hz(relative_offsets_ms(df))
+
+
+def segment_index(df, rate_hz, gap_factor=GAP_FACTOR):
+    """Split a sorted frame into gap-free segments
+
+    A gap starts wherever consecutive samples are more than ``gap_factor``
+    sampling periods apart. Returns one row per segment with its positional
+    ``start``/``stop`` (exclusive) and its first/last offset in milliseconds
+    from the first sample.
+    """
+    columns = ["start", "stop", "start_ms", "end_ms", "samples"]
+    if df.empty:
+        return pd.DataFrame(columns=columns)
+
+    offsets = relative_offsets_ms(df)
+    limit = gap_factor * 1000 / rate_hz if rate_hz else np.inf
+    starts = np.concatenate([[0], np.flatnonzero(np.diff(offsets) > limit) + 1])
+    stops = np.append(starts[1:], len(offsets))
+
+    return pd.DataFrame(
+        {
+            "start": starts,
+            "stop": stops,
+            "start_ms": offsets[starts],
+            "end_ms": offsets[stops - 1],
+            "samples": stops - starts,
+        },
+        columns=columns,
+    )
+
+
+def gap_summary(segments):
+    """Count gaps and the time lost to them"""
+    if segments.empty:
+        return {"gaps": 0, "gap_seconds": 0.0}
+
+    missing = segments["start_ms"].to_numpy()[1:] - segments["end_ms"].to_numpy()[:-1]
+    return {
+        "gaps": len(segments) - 1,
+        "gap_seconds": round(float(missing.sum()) / 1000, 1),
+    }
+
+
+def grid_positions(segments, period_ms):
+    """Uniform grid steps covered by each segment, concatenated
+
+    Segment ends are snapped to the nearest grid step, so sub-period jitter
+    at either end never drops a segment. Returns the grid steps and the
+    segment number of each step.
+    """
+    first = np.rint(segments["start_ms"].to_numpy() / period_ms).astype(np.int64)
+    last = np.rint(segments["end_ms"].to_numpy() / period_ms).astype(np.int64)
+    counts = last - first + 1
+
+    owners = np.repeat(np.arange(len(counts)), counts)
+    within = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    return first[owners] + within, owners
+
+
+def uniform_magnitude(df, rate_hz, segments):
+    """A sorted frame's magnitude interpolated onto its uniform grid
+
+    The magnitude-only counterpart of ``resample_uniform``, given the
+    frame's ``segment_index``. Returns the values and each one's segment
+    number.
+    """
+    period = 1000 / rate_hz
+    steps, owners = grid_positions(segments, period)
+    magnitude = column_values(df, "magnitude").astype(np.float64)
+    return np.interp(steps * period, relative_offsets_ms(df), magnitude), owners
+
+
+def resample_uniform(df, rate_hz, gap_factor=GAP_FACTOR):
+    """Interpolate a sorted frame onto a uniform grid at rate_hz
+
+    Each gap-free segment is resampled on its own, so dropouts stay gaps
+    rather than being bridged by interpolation. The sample number of each
+    row is its grid step from the first sample, so charts show gaps as
+    jumps on the x-axis and windows can be taken with fixed strides. The
+    frame keeps its layout: timestamp frames get an ``index`` column,
+    compact frames carry the grid step in their index. Both gain a
+    ``segment`` column.
+    """
+    if df.empty or not rate_hz:
+        return df
+
+    period = 1000 / rate_hz
+    offsets = relative_offsets_ms(df)
+    segments = segment_index(df, rate_hz, gap_factor)
+    steps, owners = grid_positions(segments, period)
+    times = steps * period
+
+    # np.interp clamps at segment ends and every grid time lies inside its
+    # own segment, so neighbouring segments never blend together
+    axes = {
+        axis: np.interp(times, offsets, column_values(df, axis).astype(np.float64))
+        for axis in ("x", "y", "z")
+    }
+    magnitude = np.sqrt(axes["x"] ** 2 + axes["y"] ** 2 + axes["z"] ** 2)
+
+    if "offset_ms" in df.columns:
+        precision = df["x"].dtype.name
+        resampled = pd.DataFrame(
+            {
+                "offset_ms": np.rint(df["offset_ms"].iloc[0] + times).astype(np.int64),
+                **{axis: narrow(values, precision) for axis, values in axes.items()},
+                "magnitude": narrow(magnitude, precision),
+                "segment": owners.astype(np.int32),
+            },
+            index=pd.Index(steps),
+        )
+        resampled.attrs.update(df.attrs)
+        return resampled
+
+    origin = df["timestamp"].iloc[0]
+    return pd.DataFrame(
+        {
+            "timestamp": origin + pd.to_timedelta(times, unit="ms"),
+            **axes,
+            "index": steps,
+            "magnitude": magnitude,
+            "segment": owners.astype(np.int32),
+        }
+    )
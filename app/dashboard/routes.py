@@ -1,9 +1,499 @@
+import json
+import uuid
+from contextlib import contextmanager
+from dataclasses import asdict
+
 from flask import render_template, request, redirect, url_for, session, flash
+from flask import abort, get_flashed_messages, jsonify, stream_with_context
+from flask import current_app
 from . import dashboard
-from ..auth.utils import is_authenticated
-from ..utils.api import get_acceleration_data
+from ..auth.utils import is_authenticated, current_user_id
+from ..models.health_data import DeviceInfo
+from ..utils.api import AUTH_FAILED, backend_session, get_acceleration_data
+from ..utils.api import upload_acceleration_batch
+from ..assets.utils import bundle_supports
 from ..utils.charts import create_xyz_chart, create_magnitude_chart
+from ..utils.charts import create_spectrogram_chart, figure_to_json
+from ..utils.charts import build_xyz_figure, build_magnitude_figure
+from ..utils.charts import build_spectrogram_figure, default_template
+from ..utils.codec import FrameStore
+from ..utils.compression import CompressedPayload, payload_response
+from ..utils.memprofile import memory_stage
+from ..utils.profiling import PROFILE_QUERY_PARAM, annotate_profile, is_profiling
 from ..dashboard.utils import process_acceleration_data, calculate_metrics
+from ..dashboard.utils import slice_time_range, downsample, time_range_ms
+from ..dashboard.admission import AdmissionController, AdmissionRejected
+from ..dashboard.backends import get_backend
+from ..dashboard.chunked import UnsortedSamplesError, process_in_chunks
+from ..dashboard.resampling import gap_summary, resample_uniform, sampling_rate
+from ..dashboard.resampling import segment_index
+from ..dashboard.spectral import frame_spectrum, spectral_summary
+from ..dashboard.events import EventIndex, EventIndexStore, window_ms
+from ..dashboard.uploads import CountingReader, UploadError, detect_format
+from ..dashboard.uploads import import_recording, iter_rows
+from ..dashboard.sync import SYNC_FORMAT, dataset_version, encode_sync, sync_owner
+from ..dashboard.sync import LOCAL_COPIES_COOKIE, VERSION_HINT_LENGTH, local_copies
+
+# Bouts listed under the charts for the selected window
+MAX_LISTED_BOUTS = 20
+
+
+@dashboard.record_once
+def init_event_index(state):
+    """Keep step and bout indexes per dataset, persisted across workers if set"""
+    config = state.app.config
+    state.app.extensions["event_index"] = EventIndexStore(
+        config["EVENT_INDEX_DIR"],
+        max_age=config["EVENT_INDEX_MAX_AGE_SECONDS"],
+        max_disk_bytes=config["EVENT_INDEX_MAX_BYTES"],
+    )
+
+
+@dashboard.record_once
+def check_compute_backend(state):
+    """Fail at startup rather than on the first request if it is unavailable"""
+    get_backend(state.app.config["COMPUTE_BACKEND"])
+
+
+@dashboard.record_once
+def init_frame_store(state):
+    """Keep processed frames on disk in the compact encoding, if configured"""
+    config = state.app.config
+    state.app.extensions["frame_store"] = FrameStore(
+        config["FRAME_STORE_DIR"],
+        quantum=config["FRAME_STORE_QUANTUM"],
+        max_bytes=config["FRAME_STORE_MAX_BYTES"],
+        max_age=config["FRAME_STORE_MAX_AGE_SECONDS"],
+    )
+
+
+@dashboard.record_once
+def init_admission(state):
+    """Limit concurrent and heavy dashboard renders per worker"""
+    config = state.app.config
+    # Renders beyond the heavy slots wait in a thread each, so a queue or
+    # degrade depth above the remaining threads is never reached
+    waiting = config["WORKER_THREADS"] - config["ADMISSION_HEAVY_SLOTS"]
+    for name in ("ADMISSION_QUEUE_SIZE", "ADMISSION_DEGRADE_DEPTH"):
+        if config[name] > waiting:
+            state.app.logger.warning(
+                "%s=%s can't be reached with %s threads and %s heavy slots "
+                "per worker",
+                name,
+                config[name],
+                config["WORKER_THREADS"],
+                config["ADMISSION_HEAVY_SLOTS"],
+            )
+    state.app.extensions["admission"] = AdmissionController(
+        max_per_user=config["ADMISSION_MAX_PER_USER"],
+        heavy_slots=config["ADMISSION_HEAVY_SLOTS"],
+        max_queue=config["ADMISSION_QUEUE_SIZE"],
+        degrade_depth=config["ADMISSION_DEGRADE_DEPTH"],
+        queue_timeout=config["ADMISSION_QUEUE_TIMEOUT"],
+    )
+
+
+def rejection_response(error):
+    response = current_app.response_class(
+        str(error), status=error.status, mimetype="text/plain"
+    )
+    response.headers["Retry-After"] = str(error.retry_after)
+    return response
+
+
+@contextmanager
+def render_slot(user_id, dataset):
+    """Context manager guarding a render; yields whether to degrade it
+
+    Every render counts against the user's limit of concurrent renders,
+    raising AdmissionRejected beyond it; cached pages, uploads and other
+    requests don't. Recordings of at least ADMISSION_HEAVY_SAMPLES samples
+    also wait for one of the worker's heavy render slots.
+    """
+    admission = current_app.extensions["admission"]
+    samples = len(dataset_samples(dataset))
+    admission.enter(user_id)
+    try:
+        if samples < current_app.config["ADMISSION_HEAVY_SAMPLES"]:
+            yield False
+        else:
+            with admission.heavy(user_id, samples) as degraded:
+                yield degraded
+    finally:
+        admission.leave(user_id)
+
+
+def json_rejection_response(error):
+    response = jsonify(error=str(error))
+    response.status_code = error.status
+    response.headers["Retry-After"] = str(error.retry_after)
+    return response
+
+
+def degraded_max_points(degraded):
+    """Chart point cap for a degraded render, flashing why, or None"""
+    if not degraded:
+        return None
+    flash("The server is busy, so charts are shown at reduced resolution.", "info")
+    return current_app.config["ADMISSION_DEGRADED_MAX_POINTS"]
+
+
+def requested_max_points(cap=None):
+    """The max_points query parameter, limited to cap when one is given"""
+    max_points = request.args.get("max_points", type=int)
+    if cap:
+        max_points = min(max_points or cap, cap)
+    return max_points
+
+
+def select_time_range(df, max_points_cap=None):
+    """Apply the start/end/max_points query parameters to a processed frame
+
+    Returns the slice used for metrics and the possibly thinned frame used
+    for charts.
+    """
+    try:
+        df = slice_time_range(df, request.args.get("start"), request.args.get("end"))
+    except ValueError as e:
+        flash(f"{e}. Showing the whole recording.", "warning")
+
+    return df, downsample(df, requested_max_points(max_points_cap))
+
+
+def datasets_key(user_id):
+    return ("acceleration_data", user_id)
+
+
+def fetch_datasets(user_id, token):
+    """Fetch the user's datasets, serving the last good copy while refreshing
+
+    Returns the ``(success, datasets, error)`` tuple of get_acceleration_data.
+    A stale copy is returned immediately and refreshed in the background;
+    failed fetches never replace it, but a rejected token drops it.
+    """
+    app = current_app._get_current_object()
+    key = datasets_key(user_id)
+
+    def fetch():
+        with app.app_context():
+            # Share the fetch with concurrent requests
+            return app.extensions["single_flight"].do_shared(
+                key, get_acceleration_data, token
+            )
+
+    return app.extensions["dataset_cache"].get(
+        key,
+        fetch,
+        is_valid=lambda result: result[0],
+        is_revoked=lambda result: result[2] == AUTH_FAILED,
+    )
+
+
+def is_chunked(dataset):
+    """Whether a recording is too long to hold in memory as one frame"""
+    threshold = current_app.config["CHUNKED_PROCESSING_THRESHOLD"]
+    return bool(threshold) and len(dataset_samples(dataset)) > threshold
+
+
+def dataset_samples(dataset):
+    return dataset.get("data", {}).get("samples", [])
+
+
+def dataset_identity(dataset):
+    """What tells this copy of a dataset from others stored under its id
+
+    Besides the creation time and sample count, the first and last samples
+    keep data re-uploaded with the same id and length from matching.
+    """
+    samples = dataset_samples(dataset)
+    return (
+        dataset["id"],
+        dataset.get("created_at"),
+        len(samples),
+        repr(samples[0]) if samples else None,
+        repr(samples[-1]) if samples else None,
+    )
+
+
+def frame_key(user_id, dataset):
+    """Key of a dataset's processed frame in the frame store"""
+    return (
+        "processed",
+        user_id,
+        *dataset_identity(dataset),
+        current_app.config["FRAME_PRECISION"],
+    )
+
+
+def load_frame(user_id, dataset):
+    """Process a dataset into a sorted frame, resampled if configured
+
+    Returns the frame and the dataset's sampling rate.
+    """
+    config = current_app.config
+    flights = current_app.extensions["single_flight"]
+
+    # Process the data for plotting, or load it from the frame store
+    precision = config["FRAME_PRECISION"]
+    store = current_app.extensions["frame_store"]
+    with memory_stage("process_acceleration_data"):
+        df = flights.do(
+            ("processed", user_id, dataset["id"], precision),
+            store.get_or_build,
+            frame_key(user_id, dataset),
+            process_acceleration_data,
+            dataset,
+            precision,
+            config["COMPUTE_BACKEND"],
+        )
+
+    # Optionally move the samples onto a uniform grid, keeping gaps as gaps
+    rate = sampling_rate(dataset, df)
+    gap_factor = config["GAP_FACTOR"]
+    if config["RESAMPLE_UNIFORM_GRID"] and rate:
+        with memory_stage("resample_uniform"):
+            df = flights.do(
+                ("resampled", user_id, dataset["id"], precision, rate, gap_factor),
+                resample_uniform,
+                df,
+                rate,
+                gap_factor,
+            )
+    return df, rate
+
+
+def event_index_key(user_id, dataset, rate):
+    config = current_app.config
+    return (
+        "events",
+        user_id,
+        *dataset_identity(dataset),
+        config["FRAME_PRECISION"],
+        config["RESAMPLE_UNIFORM_GRID"],
+        rate,
+    )
+
+
+def event_index(user_id, dataset, df, rate):
+    """Load or build the step and bout index of a processed dataset"""
+    store = current_app.extensions["event_index"]
+    # Concurrent first requests may both build it; the result is identical
+    key = event_index_key(user_id, dataset, rate)
+    return store.get_or_build(key, EventIndex.from_frame, df, rate)
+
+
+def load_stored_window(user_id, dataset):
+    """Read just the requested time range from the frame store, if possible
+
+    Only the blocks overlapping the range are decompressed. Returns the
+    frame's first sample, the window, the sampling rate and the event index,
+    or None when the whole frame is needed: no range was requested, the
+    store doesn't hold the frame yet, samples are resampled, the rate isn't
+    given or the event index hasn't been built.
+    """
+    config = current_app.config
+    start, end = request.args.get("start"), request.args.get("end")
+    rate = dataset.get("sampling_rate_hz")
+    if (start is None and end is None) or config["RESAMPLE_UNIFORM_GRID"] or not rate:
+        return None
+    rate = float(rate)
+    events = current_app.extensions["event_index"].get(
+        event_index_key(user_id, dataset, rate)
+    )
+    if events is None:
+        return None
+
+    store = current_app.extensions["frame_store"]
+    key = frame_key(user_id, dataset)
+    first = store.get(key, None, 0)
+    if first is None or first.empty:
+        return None
+    try:
+        start_ms, end_ms = time_range_ms(first, start, end)
+    except ValueError:
+        # The whole-frame path reports the invalid bound
+        return None
+    with memory_stage("read_stored_window"):
+        df = store.get(key, start_ms, end_ms)
+    if df is None:
+        return None
+    return first, df, rate, events
+
+
+def build_chunked_view(user_id, dataset, max_points_cap=None):
+    """Metrics and a bounded chart frame of a long recording, block by block"""
+    config = current_app.config
+    flights = current_app.extensions["single_flight"]
+    max_points = min(
+        requested_max_points(max_points_cap) or config["CHUNKED_MAX_POINTS"],
+        config["CHUNKED_MAX_POINTS"],
+    )
+
+    def run(start, end):
+        with memory_stage("process_in_chunks"):
+            return flights.do(
+                ("chunked", user_id, dataset["id"], start, end, max_points),
+                process_in_chunks,
+                dataset,
+                config["PROCESSING_CHUNK_SIZE"],
+                max_points,
+                start,
+                end,
+            )
+
+    try:
+        metrics, chart_df = run(request.args.get("start"), request.args.get("end"))
+    except ValueError as e:
+        flash(f"{e}. Showing the whole recording.", "warning")
+        metrics, chart_df = run(None, None)
+    return dict(metrics=metrics, chart_df=chart_df, spectrum=None, bouts=None)
+
+
+def build_view(user_id, dataset, max_points_cap=None):
+    """Compute everything the dashboard shows for the requested range
+
+    Returns a dict with the metrics, the chart frame, the short-time
+    spectrum and the activity bouts in the window. Recordings longer than
+    CHUNKED_PROCESSING_THRESHOLD samples go through the chunked pipeline,
+    which never builds a frame of the whole recording, though their decoded
+    samples stay in the dataset cache either way; they have no spectrum
+    or events. Long recordings whose blocks overlap in time are processed
+    whole instead, as only that sorts them. ``max_points_cap`` limits the
+    chart points of degraded renders.
+    """
+    config = current_app.config
+    annotate_profile(dataset_id=dataset["id"], samples=len(dataset_samples(dataset)))
+
+    if is_chunked(dataset):
+        try:
+            return build_chunked_view(user_id, dataset, max_points_cap)
+        except UnsortedSamplesError as e:
+            current_app.logger.info("Processing dataset %s whole: %s", dataset["id"], e)
+
+    # Restrict to the requested time window, reading only that if stored
+    stored = load_stored_window(user_id, dataset)
+    if stored is not None:
+        first, df, rate, events = stored
+        chart_df = downsample(df, requested_max_points(max_points_cap))
+        window = window_ms(first, df)
+    else:
+        full_df, rate = load_frame(user_id, dataset)
+        with memory_stage("event_index"):
+            events = event_index(user_id, dataset, full_df, rate)
+        df, chart_df = select_time_range(full_df, max_points_cap)
+        window = window_ms(full_df, df)
+
+    # Calculate metrics, including dropouts and steps within the window
+    with memory_stage("calculate_metrics"):
+        metrics = calculate_metrics(df, backend=config["COMPUTE_BACKEND"])
+    segments = segment_index(df, rate, config["GAP_FACTOR"]) if rate else None
+    if rate:
+        metrics.update(gap_summary(segments))
+    metrics["steps"] = events.steps_between(*window) if window else 0
+
+    # Frequency content of the full-resolution window
+    with memory_stage("frame_spectrum"):
+        spectrum = frame_spectrum(df, rate, config["SPECTROGRAM_WINDOW"], segments)
+    if spectrum is not None:
+        metrics.update(spectral_summary(spectrum[1], spectrum[2]))
+
+    bouts = [events.bout(i) for i in events.bouts_between(*window)] if window else []
+    return dict(
+        metrics=metrics,
+        chart_df=chart_df,
+        spectrum=spectrum,
+        bouts=bouts[:MAX_LISTED_BOUTS],
+        window_start=window[0] / 1000 if window else 0,
+    )
+
+
+def select_dataset(datasets):
+    """Sort datasets newest first and pick the one named by ?dataset=
+
+    Returns the sorted list (a copy, as the fetched list may be shared) and
+    the selected dataset, which defaults to the newest.
+    """
+    datasets = sorted(datasets, key=lambda x: x["created_at"], reverse=True)
+    selected_id = request.args.get("dataset", datasets[0]["id"])
+    selected = next((d for d in datasets if d["id"] == selected_id), datasets[0])
+    return datasets, selected
+
+
+def chart_options():
+    config = current_app.config
+    return dict(
+        render_mode=config["CHART_RENDER_MODE"],
+        webgl_threshold=config["CHART_WEBGL_THRESHOLD"],
+    )
+
+
+def shows_spectrogram(spectrum):
+    return spectrum is not None and bundle_supports("heatmap")
+
+
+def render_fragment(user_id, dataset):
+    """Build the parts of the dashboard that change with the dataset
+
+    Returns the dict served by /fragment for the requested view: ``html``
+    maps element ids to re-rendered partials and ``charts`` maps chart
+    container ids to figure specs (None when the chart isn't shown), with
+    NumPy arrays still in place. Flashed messages are taken out of the
+    session into ``messages``.
+    """
+    with render_slot(user_id, dataset) as degraded:
+        view = build_view(user_id, dataset, degraded_max_points(degraded))
+        chart_df, spectrum = view["chart_df"], view["spectrum"]
+        context = dict(
+            selected_dataset=dataset,
+            metrics=view["metrics"],
+            bouts=view["bouts"],
+            window_start=view.get("window_start", 0),
+        )
+        charts = {
+            "xyz-chart": build_xyz_figure(chart_df, **chart_options()),
+            "magnitude-chart": build_magnitude_figure(chart_df, **chart_options()),
+            "spectrogram-chart": None,
+        }
+        if shows_spectrogram(spectrum):
+            charts["spectrogram-chart"] = build_spectrogram_figure(
+                spectrum, current_app.config["SPECTROGRAM_MAX_CELLS"]
+            )
+
+        # Messages are shown by the page, so they mustn't wait in the session
+        messages = get_flashed_messages(with_categories=True)
+        html = {
+            "metrics": render_template("dashboard/_metrics.html", **context),
+            "spectrum-summary": render_template(
+                "dashboard/_spectrum_summary.html", **context
+            ),
+            "bouts": render_template("dashboard/_bouts.html", **context),
+        }
+    return dict(dataset=dataset["id"], html=html, charts=charts, messages=messages)
+
+
+def page_cache_key(user_id, datasets, selected_dataset, kind="dashboard"):
+    """Key a rendered dashboard page by everything that shapes its content"""
+    return (
+        kind,
+        user_id,
+        tuple((d["id"], d["created_at"]) for d in datasets),
+        selected_dataset["id"],
+        len(selected_dataset.get("data", {}).get("samples", [])),
+        tuple(
+            sorted(
+                (name, value)
+                for name, value in request.args.items(multi=True)
+                if name != PROFILE_QUERY_PARAM
+            )
+        ),
+    )
+
+
+def cached_page_response(cache, key, payload):
+    """Serve a cached page, recording the size of newly compressed variants"""
+    response = payload_response(payload)
+    cache.resize(key)
+    return response
 
 
 @dashboard.route("/")
@@ -12,8 +502,11 @@ def index():
         return redirect(url_for("auth.login"))
 
     try:
+        token = session["token"]
+        user_id = current_user_id()
+
         # Fetch user's health data
-        success, datasets, error = get_acceleration_data(session["token"])
+        success, datasets, error = fetch_datasets(user_id, token)
 
         if not success:
             flash(error or "Failed to retrieve data", "danger")
@@ -22,40 +515,423 @@ def index():
         if not datasets:
             return render_template("dashboard/index.html", datasets=[])
 
-        # Sort datasets by created_at, newest first
-        datasets.sort(key=lambda x: x["created_at"], reverse=True)
+        datasets, selected_dataset = select_dataset(datasets)
+        sync = sync_context(user_id, datasets)
 
-        # Get selected dataset ID from query params, default to the first one
-        selected_id = request.args.get("dataset", datasets[0]["id"])
-        selected_dataset = next(
-            (d for d in datasets if d["id"] == selected_id), datasets[0]
-        )
+        # A browser holding this dataset's current default view renders it
+        if has_local_copy(sync, selected_dataset):
+            return render_template(
+                "dashboard/index.html",
+                datasets=datasets,
+                selected_dataset=selected_dataset,
+                local_copy=True,
+                chart_template=figure_to_json(default_template()),
+                **sync,
+            )
 
-        # Process the data for plotting
-        df = process_acceleration_data(selected_dataset)
+        # Serve a previously rendered (and compressed) page for the same view.
+        # Pages showing flashed messages are one-off and never cached, and
+        # profiled requests always render so the profile shows the real work.
+        cache = current_app.extensions["payload_cache"]
+        cache_key = page_cache_key(user_id, datasets, selected_dataset)
+        if "_flashes" not in session and not is_profiling():
+            payload = cache.get(cache_key)
+            if payload is not None:
+                return cached_page_response(cache, cache_key, payload)
 
-        # Calculate metrics
-        metrics = calculate_metrics(df)
+        # Long recordings wait for a render slot and may be degraded
+        with render_slot(user_id, selected_dataset) as degraded:
+            view = build_view(user_id, selected_dataset, degraded_max_points(degraded))
+            chart_df, spectrum = view["chart_df"], view["spectrum"]
 
-        # Create charts
-        acceleration_chart = create_xyz_chart(df)
-        magnitude_chart = create_magnitude_chart(df)
+            # Create charts
+            serializer = current_app.config["CHART_SERIALIZER"]
+            options = dict(chart_options(), serializer=serializer)
+            with memory_stage("create_xyz_chart"):
+                acceleration_chart = create_xyz_chart(chart_df, **options)
+            with memory_stage("create_magnitude_chart"):
+                magnitude_chart = create_magnitude_chart(chart_df, **options)
+            spectrogram_chart = None
+            if shows_spectrogram(spectrum):
+                with memory_stage("create_spectrogram_chart"):
+                    spectrogram_chart = create_spectrogram_chart(
+                        spectrum,
+                        max_cells=current_app.config["SPECTROGRAM_MAX_CELLS"],
+                        serializer=serializer,
+                    )
 
-        return render_template(
-            "dashboard/index.html",
-            datasets=datasets,
-            selected_dataset=selected_dataset,
-            acceleration_chart=acceleration_chart,
-            magnitude_chart=magnitude_chart,
-            metrics=metrics,
-        )
+            cacheable = "_flashes" not in session
+            page = render_template(
+                "dashboard/index.html",
+                datasets=datasets,
+                selected_dataset=selected_dataset,
+                acceleration_chart=acceleration_chart,
+                magnitude_chart=magnitude_chart,
+                spectrogram_chart=spectrogram_chart,
+                metrics=view["metrics"],
+                bouts=view["bouts"],
+                window_start=view.get("window_start", 0),
+                **sync,
+            )
+        if not cacheable:
+            return page
+
+        payload = CompressedPayload(page, level=current_app.config["COMPRESS_LEVEL"])
+        cache.set(cache_key, payload)
+        return cached_page_response(cache, cache_key, payload)
+
+    except AdmissionRejected as e:
+        return rejection_response(e)
 
     except Exception as e:
         flash(f"Error: {str(e)}", "danger")
         return render_template("dashboard/index.html", datasets=[])
 
 
+@dashboard.route("/fragment")
+def fragment():
+    """The parts of the dashboard that change with the dataset, as JSON
+
+    Lets the page switch datasets in place: ``html`` maps element ids to
+    re-rendered partials and ``charts`` maps chart container ids to figure
+    specs (None when the chart isn't shown). Figures leave out the Plotly
+    template, which the browser takes from the charts already on the page.
+    Takes the same query parameters as the dashboard itself.
+    """
+    if not is_authenticated():
+        return jsonify(error="Not logged in"), 401
+
+    try:
+        user_id = current_user_id()
+        success, datasets, error = fetch_datasets(user_id, session["token"])
+        if not success:
+            return jsonify(error=error or "Failed to retrieve data"), 502
+        if not datasets:
+            return jsonify(error="No health data found"), 404
+
+        datasets, selected_dataset = select_dataset(datasets)
+
+        cache = current_app.extensions["payload_cache"]
+        cache_key = page_cache_key(user_id, datasets, selected_dataset, "fragment")
+        if not is_profiling():
+            payload = cache.get(cache_key)
+            if payload is not None:
+                return cached_page_response(cache, cache_key, payload)
+
+        parts = render_fragment(user_id, selected_dataset)
+        with memory_stage("figure_to_json"):
+            body = figure_to_json(parts)
+
+        payload = CompressedPayload(
+            body,
+            mimetype="application/json",
+            level=current_app.config["COMPRESS_LEVEL"],
+        )
+        if parts["messages"]:
+            return payload_response(payload)
+
+        cache.set(cache_key, payload)
+        return cached_page_response(cache, cache_key, payload)
+
+    except AdmissionRejected as e:
+        return json_rejection_response(e)
+
+    except Exception as e:
+        return jsonify(error=f"Error: {str(e)}"), 500
+
+
+def sync_settings():
+    """Configuration that shapes a dataset's default view, for its version"""
+    config = current_app.config
+    return tuple(
+        config[name]
+        for name in (
+            "FRAME_PRECISION",
+            "COMPUTE_BACKEND",
+            "RESAMPLE_UNIFORM_GRID",
+            "GAP_FACTOR",
+            "CHUNKED_PROCESSING_THRESHOLD",
+            "CHUNKED_MAX_POINTS",
+            "CHART_RENDER_MODE",
+            "CHART_WEBGL_THRESHOLD",
+            "SPECTROGRAM_WINDOW",
+            "SPECTROGRAM_MAX_CELLS",
+        )
+    ) + (bundle_supports("heatmap"),)
+
+
+def sync_context(user_id, datasets):
+    """Template values letting the page check the browser's stored datasets"""
+    settings = sync_settings()
+    return dict(
+        sync_owner=sync_owner(user_id, current_app.config["SECRET_KEY"]),
+        dataset_versions={d["id"]: dataset_version(d, settings) for d in datasets},
+    )
+
+
+def has_local_copy(sync, dataset):
+    """Whether the browser reports holding the dataset's current default view
+
+    Only the whole recording is stored, so requests for anything else (a
+    time range, a point limit) and profiled requests are rendered here.
+    """
+    if is_profiling() or any(
+        value for name, value in request.args.items() if name != "dataset"
+    ):
+        return False
+    held = local_copies(request.cookies.get(LOCAL_COPIES_COOKIE), sync["sync_owner"])
+    version = sync["dataset_versions"][dataset["id"]]
+    return version[:VERSION_HINT_LENGTH] in held
+
+
+@dashboard.route("/sync", methods=["POST"])
+def sync():
+    """New and changed datasets for the browser's local cache, in binary
+
+    The JSON body's ``have`` maps the ids of datasets the browser holds to
+    their versions. The response (see ``encode_sync``) lists the versions
+    of all the user's datasets, so the browser can drop removed ones, and
+    carries the default-view fragment of up to SYNC_MAX_DATASETS datasets
+    it lacks, newest first; ``pending`` says whether more remain, including
+    those left out because the user's render limit was reached.
+    """
+    if not is_authenticated():
+        return jsonify(error="Not logged in"), 401
+    if request.args:
+        # Stored fragments are always the default view
+        return jsonify(error="The sync endpoint takes no query parameters"), 400
+
+    have = (request.get_json(silent=True) or {}).get("have") or {}
+    if not isinstance(have, dict):
+        return jsonify(error="have must map dataset ids to versions"), 400
+
+    try:
+        user_id = current_user_id()
+        success, datasets, error = fetch_datasets(user_id, session["token"])
+        if not success:
+            return jsonify(error=error or "Failed to retrieve data"), 502
+
+        settings = sync_settings()
+        datasets = sorted(datasets or [], key=lambda x: x["created_at"], reverse=True)
+        versions = [(d, dataset_version(d, settings)) for d in datasets]
+        changed = [(d, v) for d, v in versions if have.get(d["id"]) != v]
+        limit = current_app.config["SYNC_MAX_DATASETS"]
+
+        updated, rendered = [], 0
+        for dataset, version in changed[:limit]:
+            try:
+                parts = render_fragment(user_id, dataset)
+            except AdmissionRejected:
+                # The user's page renders go first; the rest come next sync
+                break
+            rendered += 1
+            # Views with messages (such as degraded renders) aren't kept;
+            # the browser asks for them again on its next sync
+            if not parts["messages"]:
+                updated.append(dict(id=dataset["id"], version=version, fragment=parts))
+
+        body = encode_sync(
+            dict(
+                format=SYNC_FORMAT,
+                owner=sync_owner(user_id, current_app.config["SECRET_KEY"]),
+                datasets=[dict(id=d["id"], version=v) for d, v in versions],
+                updated=updated,
+                pending=len(changed) > rendered,
+            )
+        )
+        response = payload_response(
+            CompressedPayload(
+                body,
+                mimetype="application/octet-stream",
+                level=current_app.config["COMPRESS_LEVEL"],
+            )
+        )
+        response.headers["Cache-Control"] = "no-store"
+        return response
+
+    except AdmissionRejected as e:
+        return json_rejection_response(e)
+
+    except Exception as e:
+        return jsonify(error=f"Error: {str(e)}"), 500
+
+
 @dashboard.route("/refresh")
 def refresh():
     """Refresh data and redirect to dashboard"""
+    if is_authenticated():
+        current_app.extensions["dataset_cache"].invalidate(
+            datasets_key(current_user_id())
+        )
     return redirect(url_for("dashboard.index"))
+
+
+@dashboard.route("/events/<direction>")
+def jump_to_bout(direction):
+    """Redirect to the activity bout after or before a time offset
+
+    ``at`` is in seconds from the start of the recording, like the
+    dashboard's start/end parameters.
+    """
+    if direction not in ("next", "previous"):
+        abort(404)
+    if not is_authenticated():
+        return redirect(url_for("auth.login"))
+
+    user_id = current_user_id()
+    dataset_id = request.args.get("dataset")
+    success, datasets, error = fetch_datasets(user_id, session["token"])
+    dataset = next((d for d in datasets or [] if d["id"] == dataset_id), None)
+    if not success or dataset is None:
+        flash(error or "Dataset not found", "danger")
+        return redirect(url_for("dashboard.index"))
+
+    if is_chunked(dataset):
+        flash("Activity bouts aren't available for very long recordings", "info")
+        return redirect(url_for("dashboard.index", dataset=dataset_id))
+
+    df, rate = load_frame(user_id, dataset)
+    events = event_index(user_id, dataset, df, rate)
+    at_ms = request.args.get("at", 0.0, type=float) * 1000
+
+    if direction == "next":
+        number = events.next_bout(at_ms)
+    else:
+        number = events.previous_bout(at_ms)
+
+    if number is None:
+        flash(f"No {direction} activity bout", "info")
+        return redirect(url_for("dashboard.index", dataset=dataset_id))
+
+    bout = events.bout(number)
+    return redirect(
+        url_for(
+            "dashboard.index",
+            dataset=dataset_id,
+            start=bout["start"],
+            end=bout["end"],
+        )
+    )
+
+
+def upload_metadata(fields):
+    """The AccelerationData fields of an upload other than its samples"""
+    rate = fields.get("sampling_rate_hz", type=int)
+    if not rate or rate <= 0:
+        raise UploadError("The sampling rate must be a positive whole number of Hz")
+
+    device = DeviceInfo(
+        device_type=fields.get("device_type") or "unknown",
+        model=fields.get("model") or "unknown",
+        os_version=fields.get("os_version") or "unknown",
+        device_id=fields.get("device_id") or None,
+    )
+    return dict(
+        data_type="acceleration", device_info=asdict(device), sampling_rate_hz=rate
+    )
+
+
+def upload_events(user_id, token, source, format, metadata):
+    """Import a recording from a binary stream, yielding its progress
+
+    See import_recording; events also carry the bytes read so far. All
+    batches go over one kept-alive backend connection. Once the import is
+    complete the user's cached datasets are dropped so the new one shows.
+    """
+    config = current_app.config
+    upload_id = uuid.uuid4().hex
+    reader = CountingReader(source)
+    http = backend_session()
+
+    def send(samples, number, final):
+        batch = dict(
+            metadata, upload_id=upload_id, batch=number, final=final, samples=samples
+        )
+        return upload_acceleration_batch(token, batch, session=http)
+
+    try:
+        for event in import_recording(
+            iter_rows(reader, format),
+            send,
+            batch_size=config["UPLOAD_BATCH_SIZE"],
+            max_errors=config["UPLOAD_MAX_ERRORS"],
+        ):
+            yield dict(event, bytes=reader.bytes_read)
+    finally:
+        http.close()
+    current_app.extensions["dataset_cache"].invalidate(datasets_key(user_id))
+
+
+@dashboard.route("/upload", methods=["GET", "POST"])
+def upload():
+    """Import a recording exported from a wearable
+
+    With JavaScript the page sends the file as the raw request body, with
+    the form fields in the query string, and reads the progress as JSON
+    Lines: an object per batch, then one with the new ``dataset_id`` or
+    one with an ``error``. A plain form post is imported the same way and
+    redirects to the dashboard.
+    """
+    form_post = bool(request.files)
+    if not is_authenticated():
+        if request.method == "POST" and not form_post:
+            return jsonify(error="Not logged in"), 401
+        return redirect(url_for("auth.login"))
+    if request.method == "GET":
+        return render_template("dashboard/upload.html")
+
+    user_id, token = current_user_id(), session["token"]
+    if form_post:
+        file = request.files["file"]
+        fields, source = request.form, file.stream
+        filename, mimetype = file.filename, file.mimetype
+    else:
+        fields, source = request.args, request.stream
+        filename, mimetype = request.args.get("filename"), request.mimetype
+
+    try:
+        metadata = upload_metadata(fields)
+        format = detect_format(fields.get("format"), filename, mimetype)
+    except UploadError as e:
+        if form_post:
+            flash(str(e), "danger")
+            return redirect(url_for("dashboard.upload"))
+        return jsonify(error=str(e)), 400
+
+    events = upload_events(user_id, token, source, format, metadata)
+
+    if form_post:
+        try:
+            for summary in events:
+                pass
+        except UploadError as e:
+            flash(f"Import failed: {e}", "danger")
+            return redirect(url_for("dashboard.upload"))
+        except Exception:
+            current_app.logger.exception("Import failed")
+            flash("Import failed: an unexpected error occurred", "danger")
+            return redirect(url_for("dashboard.upload"))
+
+        message = f"Imported {summary['imported']} samples"
+        if summary["rejected"]:
+            message += f", skipping {summary['rejected']} invalid rows"
+        flash(message, "success")
+        return redirect(url_for("dashboard.index", dataset=summary["dataset_id"]))
+
+    def progress():
+        try:
+            for event in events:
+                yield json.dumps(event) + "\n"
+        except UploadError as e:
+            yield json.dumps(dict(error=str(e))) + "\n"
+        except Exception:
+            current_app.logger.exception("Import failed")
+            yield json.dumps(dict(error="An unexpected error occurred")) + "\n"
+
+    response = current_app.response_class(
+        stream_with_context(progress()), mimetype="application/x-ndjson"
+    )
+    # Let proxies pass each progress line through as it is written
+    response.headers["X-Accel-Buffering"] = "no"
+    response.headers["Cache-Control"] = "no-store"
+    return response
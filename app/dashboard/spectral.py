@@ -0,0 +1,94 @@
+from ..utils.frames import column_values
+from ..utils.lazy import LazyModule
+from .resampling import segment_index, uniform_magnitude
+
+np = LazyModule("numpy")
+
+# 256 samples is ~5 s at 50 Hz, giving ~0.2 Hz frequency resolution
+SPECTRUM_WINDOW = 256
+
+# Physiological tremor sits roughly between 4 and 12 Hz
+TREMOR_BAND = (4.0, 12.0)
+
+
+def short_time_spectrum(
+    signal, rate_hz, window=SPECTRUM_WINDOW, hop=None, segments=None
+):
+    """Short-time power spectral density of a uniformly sampled signal
+
+    Windows are strided views into ``signal``, so the only copy is the
+    detrended block handed to a single batched ``rfft``. Each window
+    has its mean removed, so gravity doesn't swamp the low bins. When a
+    per-sample ``segments`` array is given, windows that straddle a gap are
+    dropped.
+
+    Returns ``(times, freqs, power)`` with window centres in seconds,
+    frequencies in Hz and a ``(len(times), len(freqs))`` one-sided PSD, or
+    None when the signal is shorter than one window.
+    """
+    hop = hop or window // 2
+    signal = np.asarray(signal, dtype=np.float64)
+    if not rate_hz or len(signal) < window:
+        return None
+
+    frames = np.lib.stride_tricks.sliding_window_view(signal, window)[::hop]
+    starts = np.arange(len(frames)) * hop
+
+    if segments is not None:
+        segments = np.asarray(segments)
+        whole = segments[starts] == segments[starts + window - 1]
+        frames, starts = frames[whole], starts[whole]
+        if not len(frames):
+            return None
+
+    taper = np.hanning(window)
+    frames = frames - frames.mean(axis=1, keepdims=True)
+    spectrum = np.fft.rfft(frames * taper, axis=1)
+
+    # Density scaling, doubled for the one-sided spectrum (not DC/Nyquist)
+    power = np.abs(spectrum) ** 2 / (rate_hz * np.square(taper).sum())
+    power[:, 1 : window - window // 2] *= 2
+
+    freqs = np.fft.rfftfreq(window, d=1 / rate_hz)
+    times = (starts + window / 2) / rate_hz
+    return times, freqs, power
+
+
+def frame_spectrum(df, rate_hz, window=SPECTRUM_WINDOW, segments=None):
+    """Short-time spectrum of a processed frame's magnitude
+
+    Frames that aren't on a uniform grid yet have their magnitude
+    interpolated onto one first, segment by segment, so jittered timing
+    doesn't smear the spectrum and no window spans a dropout. ``segments``
+    is the frame's ``segment_index`` and is computed when not given.
+    """
+    if df.empty or not rate_hz:
+        return None
+
+    if "segment" in df.columns:
+        magnitude = column_values(df, "magnitude")
+        owners = df["segment"].to_numpy()
+    else:
+        if segments is None:
+            segments = segment_index(df, rate_hz)
+        magnitude, owners = uniform_magnitude(df, rate_hz, segments)
+    return short_time_spectrum(magnitude, rate_hz, window, segments=owners)
+
+
+def spectral_summary(freqs, power, band=TREMOR_BAND):
+    """Dominant frequency and the share of movement energy in a band
+
+    Averages the windows into one spectrum (Welch's method) and ignores the
+    DC bin, which only holds what the per-window mean removal left behind.
+    """
+    mean_power = power.mean(axis=0)[1:]
+    freqs = freqs[1:]
+    total = mean_power.sum()
+    if not len(freqs) or total <= 0:
+        return {"dominant_frequency": 0, "tremor_energy": 0}
+
+    in_band = (freqs >= band[0]) & (freqs <= band[1])
+    return {
+        "dominant_frequency": round(float(freqs[mean_power.argmax()]), 2),
+        "tremor_energy": round(float(mean_power[in_band].sum() / total) * 100, 1),
+    }
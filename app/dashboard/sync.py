@@ -0,0 +1,161 @@
+import hashlib
+import hmac
+import json
+import struct
+
+from ..utils.charts import figure_to_json
+from ..utils.lazy import LazyModule
+
+np = LazyModule("numpy")
+
+MAGIC = b"ARS1"
+
+# Bump when the container or the stored fragments change shape, so
+# browsers re-download everything they hold
+SYNC_FORMAT = 1
+
+# Array data starts on multiples of this, so the browser can view it
+# in place as typed arrays
+ALIGNMENT = 8
+
+# Placeholder key for an array moved out of the JSON header
+ARRAY_KEY = "$array"
+
+
+# Cookie in which sync.js lists the versions the browser holds, so full
+# page loads of those datasets can be rendered by the browser
+LOCAL_COPIES_COOKIE = "dashboard_local"
+
+# Leading characters of each version listed in the cookie
+VERSION_HINT_LENGTH = 8
+
+
+def dataset_version(dataset, settings=()):
+    """Identify the content of a dataset's default dashboard view
+
+    Changes when the recording is replaced or grows, and with ``settings``:
+    the configuration that shapes the rendered view.
+    """
+    key = (
+        SYNC_FORMAT,
+        dataset["id"],
+        dataset.get("created_at"),
+        len(dataset.get("data", {}).get("samples", [])),
+        tuple(settings),
+    )
+    return hashlib.sha256(repr(key).encode("utf-8")).hexdigest()[:16]
+
+
+def sync_owner(user_id, secret):
+    """Opaque id of a user, so a browser's cache is never shown to another"""
+    if isinstance(secret, str):
+        secret = secret.encode("utf-8")
+    digest = hmac.new(secret, str(user_id).encode("utf-8"), hashlib.sha256)
+    return digest.hexdigest()[:32]
+
+
+def local_copies(cookie, owner):
+    """Version prefixes of the datasets a browser holds for owner
+
+    sync.js writes the cookie as ``owner:version.version...``; a cookie of
+    another owner, or none at all, holds nothing.
+    """
+    cookie_owner, _, versions = (cookie or "").partition(":")
+    if not hmac.compare_digest(cookie_owner.encode("utf-8"), owner.encode("utf-8")):
+        return frozenset()
+    return frozenset(versions.split("."))
+
+
+def narrow_array(values):
+    """The array as sent to the browser, or None to leave it in the JSON
+
+    Floats become float32 and integers int32 when they fit, which is plenty
+    for charts and halves the transfer and the browser's storage.
+    """
+    if values.ndim == 0 or values.size == 0:
+        return None
+    if values.dtype.kind == "f":
+        return values.astype("<f4")
+    if values.dtype.kind in "iu":
+        info = np.iinfo(np.int32)
+        if values.min() >= info.min and values.max() <= info.max:
+            return values.astype("<i4")
+        return values.astype("<f8")
+    return None
+
+
+def split_arrays(obj, arrays):
+    """Replace NumPy arrays in a JSON-like object with numbered placeholders"""
+    if isinstance(obj, dict):
+        return {key: split_arrays(value, arrays) for key, value in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [split_arrays(value, arrays) for value in obj]
+    if isinstance(obj, np.ndarray):
+        narrowed = narrow_array(obj)
+        if narrowed is not None:
+            arrays.append(narrowed)
+            return {ARRAY_KEY: len(arrays) - 1}
+    return obj
+
+
+def join_arrays(obj, arrays):
+    """Put the arrays back in place of their placeholders"""
+    if isinstance(obj, dict):
+        if set(obj) == {ARRAY_KEY}:
+            return arrays[obj[ARRAY_KEY]]
+        return {key: join_arrays(value, arrays) for key, value in obj.items()}
+    if isinstance(obj, list):
+        return [join_arrays(value, arrays) for value in obj]
+    return obj
+
+
+def padding(size):
+    return -size % ALIGNMENT
+
+
+def encode_sync(payload):
+    """Encode a JSON-like payload with its NumPy arrays stored as binary
+
+    The container is ``MAGIC``, the header length as a little-endian
+    uint32, a JSON header and the arrays' raw little-endian data. The
+    header is the payload with each array replaced by ``{"$array": n}``,
+    plus an ``arrays`` table of the dtype, shape and byte offset of each.
+    """
+    arrays = []
+    header = split_arrays(payload, arrays)
+
+    table = []
+    offset = 0
+    for values in arrays:
+        table.append(
+            dict(dtype=values.dtype.str[1:], shape=list(values.shape), offset=offset)
+        )
+        offset += values.nbytes + padding(values.nbytes)
+
+    header_bytes = figure_to_json(dict(header, arrays=table)).encode("utf-8")
+    parts = [MAGIC, struct.pack("<I", len(header_bytes)), header_bytes]
+    parts.append(b"\0" * padding(len(MAGIC) + 4 + len(header_bytes)))
+    for values in arrays:
+        parts.append(np.ascontiguousarray(values).tobytes())
+        parts.append(b"\0" * padding(values.nbytes))
+    return b"".join(parts)
+
+
+def decode_sync(data):
+    """Decode a container written by encode_sync back into its payload"""
+    if data[: len(MAGIC)] != MAGIC:
+        raise ValueError("Not a sync payload")
+
+    (header_length,) = struct.unpack_from("<I", data, len(MAGIC))
+    start = len(MAGIC) + 4
+    header = json.loads(data[start : start + header_length].decode("utf-8"))
+    base = start + header_length
+    base += padding(base)
+
+    arrays = []
+    for entry in header.pop("arrays"):
+        dtype = np.dtype("<" + entry["dtype"])
+        count = int(np.prod(entry["shape"]))
+        values = np.frombuffer(data, dtype, count, base + entry["offset"])
+        arrays.append(values.reshape(entry["shape"]))
+    return join_arrays(header, arrays)
@@ -0,0 +1,358 @@
+import csv
+import io
+import json
+import re
+from dataclasses import fields
+from itertools import islice
+
+from ..models.health_data import AccelerationSample
+from ..utils.lazy import LazyModule
+
+pd = LazyModule("pandas")
+np = LazyModule("numpy")
+
+# Columns of a sample, in the order rows are handled
+SAMPLE_FIELDS = tuple(field.name for field in fields(AccelerationSample))
+
+# Header names used by common wearable exports
+COLUMN_ALIASES = {
+    "time": "timestamp",
+    "datetime": "timestamp",
+    "date": "timestamp",
+    "ts": "timestamp",
+    "ax": "x",
+    "ay": "y",
+    "az": "z",
+    "acc_x": "x",
+    "acc_y": "y",
+    "acc_z": "z",
+    "accel_x": "x",
+    "accel_y": "y",
+    "accel_z": "z",
+}
+
+FORMATS = ("csv", "json", "ndjson")
+
+FORMAT_EXTENSIONS = {
+    ".csv": "csv",
+    ".json": "json",
+    ".ndjson": "ndjson",
+    ".jsonl": "ndjson",
+}
+
+FORMAT_MIMETYPES = {
+    "text/csv": "csv",
+    "application/json": "json",
+    "application/x-ndjson": "ndjson",
+    "application/jsonl": "ndjson",
+}
+
+# Readings beyond this are sensor faults rather than movement
+MAX_ABS_G = 64.0
+
+# Numeric timestamps above this are epoch milliseconds, below it seconds
+EPOCH_MS_THRESHOLD = 1e11
+
+# Bytes read from an upload at a time
+READ_SIZE = 64 * 1024
+
+# A JSON export's samples array must start within this many characters
+MAX_JSON_PREFIX = 1024 * 1024
+
+# A JSON sample longer than this many characters is malformed
+MAX_JSON_SAMPLE = 64 * 1024
+
+SAMPLES_KEY = re.compile(r'"samples"\s*:\s*\[')
+
+
+class UploadError(ValueError):
+    """A recording that can't be imported; the message is shown to the user"""
+
+
+class CountingReader(io.RawIOBase):
+    """Wrap a binary stream, counting the bytes read for progress reports"""
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.bytes_read = 0
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        data = self.stream.read(len(buffer))
+        buffer[: len(data)] = data
+        self.bytes_read += len(data)
+        return len(data)
+
+
+def detect_format(requested=None, filename=None, mimetype=None):
+    """Pick csv, json or ndjson from the request, the extension or the type"""
+    if requested:
+        if requested not in FORMATS:
+            raise UploadError(f"Unsupported format: {requested}")
+        return requested
+
+    for extension, name in FORMAT_EXTENSIONS.items():
+        if (filename or "").lower().endswith(extension):
+            return name
+    if mimetype in FORMAT_MIMETYPES:
+        return FORMAT_MIMETYPES[mimetype]
+    raise UploadError("Can't tell the file format; choose CSV, JSON or JSON Lines")
+
+
+def text_stream(stream):
+    return io.TextIOWrapper(
+        io.BufferedReader(stream, READ_SIZE), encoding="utf-8-sig", newline=""
+    )
+
+
+def iter_csv_rows(stream):
+    """Yield ``(timestamp, x, y, z)`` strings from a CSV export with a header"""
+    reader = csv.reader(text_stream(stream))
+    header = next(reader, None)
+    if header is None:
+        raise UploadError("The file is empty")
+
+    names = [name.strip().lower() for name in header]
+    names = [COLUMN_ALIASES.get(name, name) for name in names]
+    missing = [name for name in SAMPLE_FIELDS if name not in names]
+    if missing:
+        raise UploadError(f"Missing CSV column(s): {', '.join(missing)}")
+
+    positions = [names.index(name) for name in SAMPLE_FIELDS]
+    width = max(positions) + 1
+    for row in reader:
+        if not row:
+            continue
+        if len(row) < width:
+            row = row + [""] * (width - len(row))
+        yield tuple(row[position] for position in positions)
+
+
+def sample_row(sample):
+    """A JSON sample, as an object or a [timestamp, x, y, z] array, as a row"""
+    if isinstance(sample, dict):
+        return tuple(sample.get(name) for name in SAMPLE_FIELDS)
+    if isinstance(sample, list) and len(sample) == len(SAMPLE_FIELDS):
+        return tuple(sample)
+    return (None,) * len(SAMPLE_FIELDS)
+
+
+def iter_json_samples(stream, read_size=READ_SIZE):
+    """Yield the samples of a JSON export without loading it whole
+
+    The document may be an array of samples or an object with a
+    ``samples`` array, such as the backend's own format. Only the text
+    before the array and the sample being decoded are held in memory.
+    """
+    text = text_stream(stream)
+    decoder = json.JSONDecoder()
+    buffer = text.read(read_size)
+
+    # Find the start of the samples array
+    stripped = buffer.lstrip()
+    if stripped.startswith("["):
+        position = len(buffer) - len(stripped) + 1
+    else:
+        while True:
+            match = SAMPLES_KEY.search(buffer)
+            if match:
+                position = match.end()
+                break
+            chunk = text.read(read_size)
+            if not chunk or len(buffer) > MAX_JSON_PREFIX:
+                raise UploadError("No samples array found in the JSON file")
+            buffer += chunk
+
+    number = 0
+    while True:
+        # Skip separators, refilling the buffer as it runs out
+        while True:
+            while position < len(buffer) and buffer[position] in " \t\r\n,":
+                position += 1
+            if position < len(buffer):
+                break
+            buffer, position = text.read(read_size), 0
+            if not buffer:
+                raise UploadError("The JSON file ends inside the samples array")
+
+        if buffer[position] == "]":
+            return
+        if buffer[position] not in "{[":
+            raise UploadError(f"Malformed JSON at sample {number + 1}")
+
+        try:
+            sample, end = decoder.raw_decode(buffer, position)
+        except json.JSONDecodeError:
+            # The sample continues past the buffer; keep only what's unread
+            chunk = text.read(read_size)
+            if not chunk or len(buffer) - position > MAX_JSON_SAMPLE:
+                raise UploadError(f"Malformed JSON at sample {number + 1}")
+            buffer, position = buffer[position:] + chunk, 0
+            continue
+
+        number += 1
+        position = end
+        yield sample_row(sample)
+
+
+def iter_ndjson_samples(stream):
+    """Yield the samples of a JSON Lines export, one per line"""
+    for number, line in enumerate(text_stream(stream), 1):
+        if not line.strip():
+            continue
+        try:
+            yield sample_row(json.loads(line))
+        except json.JSONDecodeError:
+            raise UploadError(f"Malformed JSON on line {number}")
+
+
+def iter_rows(stream, format):
+    """Yield the rows of an upload; unreadable files raise UploadError"""
+    readers = dict(
+        csv=iter_csv_rows, json=iter_json_samples, ndjson=iter_ndjson_samples
+    )
+    try:
+        yield from readers[format](stream)
+    except UnicodeDecodeError:
+        raise UploadError("The file isn't UTF-8 text; export it as UTF-8")
+    except csv.Error as e:
+        raise UploadError(f"The CSV file can't be read: {e}")
+
+
+def parse_timestamps(values):
+    """Parse ISO 8601 strings or epoch seconds/milliseconds to UTC
+
+    Naive times are taken as UTC; unreadable ones become NaT.
+    """
+    values = pd.Series(values, dtype=object)
+    numbers = pd.to_numeric(values, errors="coerce")
+    is_number = numbers.notna()
+
+    parsed = pd.Series(pd.NaT, index=values.index, dtype="datetime64[ns, UTC]")
+    # Epoch numbers are floats, so keep them to the microsecond
+    for unit, mask in (
+        ("ms", is_number & (numbers >= EPOCH_MS_THRESHOLD)),
+        ("s", is_number & (numbers < EPOCH_MS_THRESHOLD)),
+    ):
+        if mask.any():
+            times = pd.to_datetime(numbers[mask].astype(float), unit=unit, utc=True)
+            parsed[mask] = times.dt.round("us")
+    strings = ~is_number & values.notna()
+    if strings.any():
+        # pandas 2 infers one format per call unless told to expect ISO 8601
+        # in any of its forms; pandas 1 parses each string on its own
+        options = (
+            {"format": "ISO8601"} if int(pd.__version__.split(".")[0]) >= 2 else {}
+        )
+        parsed[strings] = pd.to_datetime(
+            values[strings].astype(str), utc=True, errors="coerce", **options
+        )
+    return parsed
+
+
+def validate_batch(rows, first_row=1, max_errors=20):
+    """Check a batch of rows against the sample schema
+
+    Returns the valid rows as AccelerationSample-shaped dicts with UTC
+    timestamps, the number rejected, up to ``max_errors`` descriptions of
+    rejected rows and the valid rows' times in epoch nanoseconds. The
+    checks run on whole columns at once.
+    """
+    columns = list(zip(*rows))
+    timestamps = parse_timestamps(columns[0])
+    values = np.column_stack(
+        [
+            pd.to_numeric(pd.Series(column, dtype=object), errors="coerce")
+            .astype(float)
+            .to_numpy()
+            for column in columns[1:]
+        ]
+    )
+
+    has_time = timestamps.notna().to_numpy()
+    is_number = np.isfinite(values).all(axis=1)
+    in_range = (np.abs(np.nan_to_num(values)) <= MAX_ABS_G).all(axis=1)
+    valid = has_time & is_number & in_range
+
+    errors = []
+    for position in np.flatnonzero(~valid)[:max_errors]:
+        if not has_time[position]:
+            reason = "unreadable timestamp"
+        elif not is_number[position]:
+            reason = "missing or non-numeric value"
+        else:
+            reason = f"value beyond {MAX_ABS_G:g} g"
+        errors.append(f"Row {first_row + position}: {reason}")
+
+    since_epoch = timestamps[valid] - pd.Timestamp(0, tz="UTC")
+    nanoseconds = (since_epoch // pd.Timedelta(1, "ns")).to_numpy(np.int64)
+    # The backend's format, as in "2025-03-10T12:00:00.020000Z"
+    kept = np.datetime_as_string(
+        nanoseconds.astype("datetime64[ns]").astype("datetime64[us]"), unit="us"
+    )
+    samples = [
+        dict(zip(SAMPLE_FIELDS, (timestamp + "Z", *row)))
+        for timestamp, row in zip(kept.tolist(), values[valid].tolist())
+    ]
+    return samples, int((~valid).sum()), errors, nanoseconds
+
+
+def batched(rows, size):
+    rows = iter(rows)
+    while True:
+        batch = list(islice(rows, size))
+        if not batch:
+            return
+        yield batch
+
+
+def import_recording(rows, send_batch, batch_size=5000, max_errors=20):
+    """Validate rows and send them to the backend in batches
+
+    ``send_batch(samples, number, final)`` returns the ``(success,
+    dataset_id, error)`` tuple of the upload API. Batches are sent one
+    behind validation, so the last one can be marked final; at most two
+    batches are held at a time. Yields a progress dict after each batch
+    and a summary with the new dataset's id at the end, or raises
+    UploadError.
+    """
+    progress = dict(rows=0, imported=0, rejected=0, batches=0, out_of_order=0)
+    errors = []
+    pending = None
+    last_time = None
+
+    def send(samples, final):
+        success, dataset_id, error = send_batch(samples, progress["batches"], final)
+        if not success:
+            raise UploadError(error or "The backend rejected the upload")
+        progress["batches"] += 1
+        progress["imported"] += len(samples)
+        return dataset_id
+
+    for rows_batch in batched(rows, batch_size):
+        samples, rejected, batch_errors, times = validate_batch(
+            rows_batch, progress["rows"] + 1, max_errors - len(errors)
+        )
+        progress["rows"] += len(rows_batch)
+        progress["rejected"] += rejected
+        errors.extend(batch_errors)
+
+        # Out-of-order samples are kept; the dashboard sorts them
+        if len(times):
+            first = times[0] if last_time is None else last_time
+            previous = np.concatenate(([first], times[:-1]))
+            progress["out_of_order"] += int((times < previous).sum())
+            last_time = times[-1]
+
+        if samples:
+            if pending is not None:
+                send(pending, final=False)
+            pending = samples
+        yield dict(progress)
+
+    if pending is None:
+        raise UploadError("No valid samples found in the file")
+    dataset_id = send(pending, final=True)
+    yield dict(progress, dataset_id=dataset_id, errors=errors)
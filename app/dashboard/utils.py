@@ -1,13 +1,41 @@
-import pandas as pd
-import numpy as np
-from datetime import datetime
+import math
 
+from ..utils.frames import INT16_SCALE, column_values, duration_ms
+from ..utils.lazy import LazyModule
+
+# Loaded on first use so registering the dashboard stays cheap
+pd = LazyModule("pandas")
+np = LazyModule("numpy")
+
+
+GRAVITY_OFFSET = 1.0  # Earth's gravity is approximately 1.0g
+ACTIVE_THRESHOLD = 0.2  # Deviation from 1g that counts as movement
+
+# Precisions for processed frames; compact ones drop the timestamp and
+# index columns in favour of integer offsets and the frame's RangeIndex
+FRAME_PRECISIONS = ("float64", "float32", "int16")
+
+
+def process_acceleration_data(dataset, precision="float64", backend="pandas"):
+    """Process acceleration data for visualization and metrics
+
+    ``backend`` names the compute backend doing the work; all of them
+    return the same frame.
+    """
+    if precision not in FRAME_PRECISIONS:
+        raise ValueError(f"Unknown frame precision: {precision}")
+
+    if backend != "pandas":
+        from .backends import get_backend
+
+        return get_backend(backend).process(dataset, precision)
 
-def process_acceleration_data(dataset):
-    """Process acceleration data for visualization and metrics"""
     # Extract samples
     samples = dataset.get("data", {}).get("samples", [])
 
+    if precision != "float64":
+        return compact_acceleration_frame(dataset, samples, precision)
+
     if not samples:
         # Return empty dataframe if no samples
         return pd.DataFrame(columns=["index", "timestamp", "x", "y", "z", "magnitude"])
@@ -19,7 +47,7 @@ def process_acceleration_data(dataset):
     df["timestamp"] = pd.to_datetime(df["timestamp"])
 
     # Sort by timestamp
-    df = df.sort_values("timestamp")
+    df = df.sort_values("timestamp", kind="stable")
 
     # Add index for x-axis
     df["index"] = range(len(df))
@@ -30,8 +58,86 @@ def process_acceleration_data(dataset):
     return df
 
 
-def calculate_metrics(df):
+def compact_acceleration_frame(dataset, samples, precision):
+    """Build a reduced-precision frame
+
+    Timestamps become int64 millisecond offsets from the dataset's
+    ``start_time`` (kept in ``df.attrs``), x/y/z/magnitude are stored as
+    float32 or as int16 milli-g, and the sample number is the frame's own
+    RangeIndex rather than a materialized column.
+    """
+    if not samples:
+        df = pd.DataFrame(
+            {
+                "offset_ms": np.array([], dtype=np.int64),
+                **{
+                    column: np.array([], dtype=precision)
+                    for column in ("x", "y", "z", "magnitude")
+                },
+            }
+        )
+        df.attrs["start_time"] = None
+        return df
+
+    raw = pd.DataFrame(samples, columns=["timestamp", "x", "y", "z"])
+    timestamps = pd.to_datetime(raw["timestamp"], utc=True)
+
+    start_time = dataset.get("start_time")
+    origin = to_utc(pd.Timestamp(start_time)) if start_time else timestamps.min()
+    offsets = ((timestamps - origin) // pd.Timedelta(milliseconds=1)).to_numpy(
+        dtype=np.int64
+    )
+
+    # Sort by timestamp; magnitude is computed before values are narrowed
+    order = np.argsort(offsets, kind="stable")
+    xyz = raw[["x", "y", "z"]].to_numpy(dtype=np.float64)[order]
+    magnitude = np.sqrt(np.square(xyz).sum(axis=1))
+
+    df = pd.DataFrame(
+        {
+            "offset_ms": offsets[order],
+            "x": narrow(xyz[:, 0], precision),
+            "y": narrow(xyz[:, 1], precision),
+            "z": narrow(xyz[:, 2], precision),
+            "magnitude": narrow(magnitude, precision),
+        }
+    )
+    df.attrs["start_time"] = origin
+    return df
+
+
+def to_utc(timestamp):
+    """Treat naive timestamps as UTC and convert aware ones to UTC"""
+    if timestamp.tzinfo is None:
+        return timestamp.tz_localize("UTC")
+    return timestamp.tz_convert("UTC")
+
+
+def narrow(values, precision):
+    """Store float64 values with the requested precision"""
+    if precision == "int16":
+        scaled = np.rint(values * INT16_SCALE)
+        return np.clip(scaled, -32768, 32767).astype(np.int16)
+    return values.astype(precision)
+
+
+def intensity_percent(avg_magnitude):
+    """Map the mean magnitude to an activity intensity percentage"""
+    return min(max(0, (avg_magnitude - GRAVITY_OFFSET) / 0.5), 1.0) * 100
+
+
+def count_active(magnitude):
+    """Count samples whose magnitude deviates from 1g beyond the threshold"""
+    return int(np.count_nonzero(np.abs(magnitude - GRAVITY_OFFSET) > ACTIVE_THRESHOLD))
+
+
+def calculate_metrics(df, backend="pandas"):
     """Calculate activity metrics from processed dataframe"""
+    if backend != "pandas":
+        from .backends import get_backend
+
+        return get_backend(backend).metrics(df)
+
     if df.empty:
         return {
             "avg_intensity": 0,
@@ -41,23 +147,20 @@ def calculate_metrics(df):
         }
 
     # Calculate metrics
-    gravity_offset = 1.0  # Earth's gravity is approximately 1.0g
+    magnitude = column_values(df, "magnitude")
 
-    avg_magnitude = df["magnitude"].mean()
-    peak_magnitude = df["magnitude"].max()
+    # Accumulate in float64 so compact frames don't lose precision in the sum
+    avg_magnitude = float(magnitude.mean(dtype=np.float64))
+    peak_magnitude = float(magnitude.max())
 
     # Calculate intensity as percentage
-    avg_intensity = min(max(0, (avg_magnitude - gravity_offset) / 0.5), 1.0) * 100
+    avg_intensity = intensity_percent(avg_magnitude)
 
     # Calculate duration in minutes
-    duration_ms = (df["timestamp"].max() - df["timestamp"].min()).total_seconds() * 1000
-    duration_min = duration_ms / (1000 * 60)
+    duration_min = duration_ms(df) / (1000 * 60)
 
     # Calculate active samples (movement above threshold)
-    active_threshold = 0.2
-    active_samples = df[abs(df["magnitude"] - gravity_offset) > active_threshold].shape[
-        0
-    ]
+    active_samples = count_active(magnitude)
 
     return {
         "avg_intensity": avg_intensity,
@@ -65,3 +168,100 @@ def calculate_metrics(df):
         "active_samples": active_samples,
         "peak_magnitude": round(peak_magnitude, 2),
     }
+
+
+def parse_time_bound(value, origin):
+    """Resolve a start/end query value against the recording start
+
+    Accepts an ISO 8601 timestamp or a finite number of seconds from
+    ``origin``; anything else raises ValueError.
+    """
+    if value is None or str(value).strip() == "":
+        return None
+
+    try:
+        seconds = float(value)
+    except ValueError:
+        seconds = None
+    if seconds is not None:
+        if not math.isfinite(seconds):
+            raise ValueError(f"Invalid time bound: {value}")
+        try:
+            return origin + pd.Timedelta(seconds=seconds)
+        except (OverflowError, ValueError):
+            raise ValueError(f"Invalid time bound: {value}")
+
+    try:
+        bound = pd.Timestamp(value)
+    except (OverflowError, ValueError):
+        raise ValueError(f"Invalid time bound: {value}")
+
+    # Compare bounds in the recording's timezone
+    if bound.tzinfo is None and origin.tzinfo is not None:
+        bound = bound.tz_localize(origin.tzinfo)
+    elif bound.tzinfo is not None and origin.tzinfo is None:
+        bound = bound.tz_convert(None)
+    return bound
+
+
+def offset_from(bound, origin):
+    """Express a resolved time bound as milliseconds from origin"""
+    if bound is None:
+        return None
+    return (bound - origin) / pd.Timedelta(milliseconds=1)
+
+
+def first_sample_time(df):
+    """Time of a processed frame's first sample, the origin of second offsets"""
+    if "offset_ms" in df.columns:
+        offset = pd.Timedelta(milliseconds=int(df["offset_ms"].iloc[0]))
+        return df.attrs["start_time"] + offset
+    return df["timestamp"].iloc[0]
+
+
+def time_range_ms(df, start=None, end=None):
+    """Resolve start/end query values to milliseconds from df's first sample"""
+    origin = first_sample_time(df)
+    return (
+        offset_from(parse_time_bound(start, origin), origin),
+        offset_from(parse_time_bound(end, origin), origin),
+    )
+
+
+def slice_time_range(df, start=None, end=None):
+    """Select the samples with start <= timestamp <= end
+
+    Expects ``df`` sorted by timestamp, as returned by
+    ``process_acceleration_data``. Bounds are resolved with a binary search
+    and the result is a positional slice of ``df``. Second offsets count
+    from the first sample in every frame layout.
+    """
+    if df.empty or (start is None and end is None):
+        return df
+
+    if "offset_ms" in df.columns:
+        # Compact frames are searched by their offsets from start_time
+        start_time = df.attrs["start_time"]
+        timestamps = df["offset_ms"].to_numpy()
+        origin = first_sample_time(df)
+        start = offset_from(parse_time_bound(start, origin), start_time)
+        end = offset_from(parse_time_bound(end, origin), start_time)
+    else:
+        origin = first_sample_time(df)
+        timestamps = df["timestamp"]
+        start = parse_time_bound(start, origin)
+        end = parse_time_bound(end, origin)
+
+    lo = 0 if start is None else timestamps.searchsorted(start, side="left")
+    hi = len(df) if end is None else timestamps.searchsorted(end, side="right")
+
+    return df.iloc[lo : max(lo, hi)]
+
+
+def downsample(df, max_points=None):
+    """Thin a frame to at most max_points rows with a fixed stride"""
+    if not max_points or max_points <= 0 or len(df) <= max_points:
+        return df
+
+    step = -(-len(df) // max_points)
+    return df.iloc[::step]
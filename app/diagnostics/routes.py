@@ -0,0 +1,69 @@
+import hmac
+
+from flask import abort, current_app, jsonify, request
+from . import diagnostics
+from ..utils.profiling import PROFILE_QUERY_PARAM, make_profile_token
+
+
+@diagnostics.before_request
+def require_token():
+    """Hide diagnostics unless the configured token is presented"""
+    expected = current_app.config.get("DIAGNOSTICS_TOKEN")
+    provided = request.headers.get("X-Diagnostics-Token", "")
+    if not expected or not hmac.compare_digest(provided, expected):
+        abort(404)
+
+
+@diagnostics.route("/metrics")
+def metrics():
+    """Report internal counters for this worker"""
+    return jsonify(
+        single_flight=current_app.extensions["single_flight"].stats(),
+        payload_cache=current_app.extensions["payload_cache"].stats(),
+        circuit_breaker=current_app.extensions["circuit_breaker"].stats(),
+        dataset_cache=current_app.extensions["dataset_cache"].stats(),
+        admission=current_app.extensions["admission"].stats(),
+        memory_watchdog=current_app.extensions["memory_watchdog"].stats(),
+    )
+
+
+@diagnostics.route("/memory")
+def memory():
+    """Recent per-stage memory profiles of dashboard requests"""
+    profiler = current_app.extensions["memory_profiler"]
+    return jsonify(enabled=profiler.enabled, requests=profiler.recent())
+
+
+@diagnostics.route("/rss")
+def rss():
+    """This worker's RSS over time, sampled after requests"""
+    watchdog = current_app.extensions["memory_watchdog"]
+    return jsonify(dict(watchdog.stats(), samples=watchdog.history()))
+
+
+@diagnostics.route("/profiles")
+def profiles():
+    """Aggregate the stored request profiles into a top-functions report"""
+    sort = request.args.get("sort", "cumulative")
+    if sort not in ("calls", "tottime", "cumulative"):
+        abort(400)
+
+    profiler = current_app.extensions["profiler"]
+    return jsonify(profiler.report(request.args.get("limit", 30, type=int), sort))
+
+
+@diagnostics.route("/profiles", methods=["DELETE"])
+def clear_profiles():
+    """Drop the stored request profiles"""
+    current_app.extensions["profiler"].clear()
+    return "", 204
+
+
+@diagnostics.route("/profiles/token")
+def profiles_token():
+    """Issue a signed value for the _profile query parameter"""
+    return jsonify(
+        param=PROFILE_QUERY_PARAM,
+        token=make_profile_token(),
+        max_age=current_app.config["PROFILE_TOKEN_MAX_AGE"],
+    )
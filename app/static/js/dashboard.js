@@ -0,0 +1,234 @@
+// Switch datasets in place using the dashboard's /fragment endpoint.
+//
+// Without this script the dataset dropdown submits the form and reloads the
+// whole page. With it, only the metrics, bouts and chart data are fetched
+// and swapped in; fragments of visited datasets are kept so switching back
+// needs no request at all, and datasets stored by sync.js are shown from
+// the browser's own copy. Anything unexpected falls back to a normal page
+// load, so the server-rendered page stays the source of truth.
+//
+// When sync.js reports holding the selected dataset, the server sends the
+// page without metrics or charts (data-local-copy) and this script fills
+// it in from the stored copy, or from /fragment if that copy is gone.
+(function () {
+    "use strict";
+
+    // Fragments kept in this page; the oldest is dropped beyond this
+    var MAX_CACHED_FRAGMENTS = 20;
+    // Must match LOCAL_COPIES_COOKIE in app/dashboard/sync.py
+    var LOCAL_COPIES_COOKIE = "dashboard_local";
+
+    var form = document.getElementById("dataset-form");
+    var localCopy = Boolean(form) && form.dataset.localCopy !== undefined;
+
+    // Have the server render the page, as this browser can't
+    function reloadFromServer() {
+        document.cookie = LOCAL_COPIES_COOKIE + "=; path=/; max-age=0";
+        window.location.reload();
+    }
+
+    if (!form || !window.fetch || !window.history.pushState || !window.Plotly) {
+        if (localCopy) {
+            reloadFromServer();
+        }
+        return;
+    }
+
+    var select = form.querySelector("#dataset");
+    var fragmentUrl = form.dataset.fragmentUrl;
+    var visited = new Map();
+    var latest = 0;
+
+    function currentQuery() {
+        return new URLSearchParams(new FormData(form)).toString();
+    }
+
+    function pageUrl(query) {
+        return form.action + (query ? "?" + query : "");
+    }
+
+    function remember(query, fragment) {
+        visited.delete(query);
+        visited.set(query, fragment);
+        if (visited.size > MAX_CACHED_FRAGMENTS) {
+            visited.delete(visited.keys().next().value);
+        }
+    }
+
+    // The copy sync.js keeps of a dataset's whole recording, if any
+    function storedFragment(query) {
+        var params = new URLSearchParams(query);
+        var wholeRecording = true;
+        params.forEach(function (value, name) {
+            if (name !== "dataset" && value !== "") {
+                wholeRecording = false;
+            }
+        });
+        if (!window.AreumSync || !params.get("dataset") || !wholeRecording) {
+            return Promise.resolve(null);
+        }
+        return window.AreumSync.fragment(params.get("dataset"));
+    }
+
+    function fetchFragment(query) {
+        if (visited.has(query)) {
+            return Promise.resolve(visited.get(query));
+        }
+        return storedFragment(query).then(function (stored) {
+            return stored || requestFragment(query);
+        });
+    }
+
+    function requestFragment(query) {
+        return fetch(fragmentUrl + "?" + query, {
+            credentials: "same-origin",
+            headers: { Accept: "application/json" },
+        }).then(function (response) {
+            if (!response.ok) {
+                throw new Error("Fragment request failed: " + response.status);
+            }
+            return response.json();
+        }).then(function (fragment) {
+            // Messages (such as an invalid time range) belong to one visit
+            if (!fragment.messages.length) {
+                remember(query, fragment);
+            }
+            return fragment;
+        });
+    }
+
+    function plotDiv(containerId) {
+        var container = document.getElementById(containerId);
+        return container && container.querySelector(".plotly-graph-div");
+    }
+
+    function showMessages(messages) {
+        var container = document.querySelector(".container");
+        messages.forEach(function (message) {
+            var alert = document.createElement("div");
+            alert.className = "alert alert-" + message[0] + " alert-dismissible fade show";
+            alert.setAttribute("role", "alert");
+            alert.textContent = message[1];
+            var close = document.createElement("button");
+            close.type = "button";
+            close.className = "btn-close";
+            close.setAttribute("data-bs-dismiss", "alert");
+            close.setAttribute("aria-label", "Close");
+            alert.appendChild(close);
+            container.insertBefore(alert, container.firstChild);
+        });
+    }
+
+    // Returns false when the page can't show the fragment as it is laid out
+    function applyFragment(fragment) {
+        var ids = Object.keys(fragment.charts);
+        var fits = ids.every(function (id) {
+            return Boolean(plotDiv(id)) === (fragment.charts[id] !== null);
+        });
+        if (!fits) {
+            return false;
+        }
+
+        Object.keys(fragment.html).forEach(function (id) {
+            var element = document.getElementById(id);
+            if (element) {
+                element.innerHTML = fragment.html[id];
+            }
+        });
+
+        ids.forEach(function (id) {
+            var figure = fragment.charts[id];
+            if (figure === null) {
+                return;
+            }
+            var graph = plotDiv(id);
+            // Reuse the template the server embedded in the initial page
+            var layout = Object.assign({ template: graph.layout.template }, figure.layout);
+            window.Plotly.react(graph, figure.data, layout, { responsive: true });
+        });
+
+        select.value = fragment.dataset;
+        showMessages(fragment.messages);
+        return true;
+    }
+
+    // Fill in a page the server sent without metrics or charts
+    function fillPage() {
+        var template = JSON.parse(document.getElementById("chart-template").textContent);
+        return fetchFragment(currentQuery()).then(function (fragment) {
+            Object.keys(fragment.html).forEach(function (id) {
+                var element = document.getElementById(id);
+                if (element) {
+                    element.innerHTML = fragment.html[id];
+                }
+            });
+
+            Object.keys(fragment.charts).forEach(function (id) {
+                var figure = fragment.charts[id];
+                var container = document.getElementById(id);
+                if (figure === null || !container) {
+                    return;
+                }
+                var graph = document.createElement("div");
+                graph.className = "plotly-graph-div";
+                graph.style.height = (figure.layout.height || 500) + "px";
+                graph.style.width = "100%";
+                container.appendChild(graph);
+                var layout = Object.assign({ template: template }, figure.layout);
+                window.Plotly.newPlot(graph, figure.data, layout, { responsive: true });
+            });
+
+            var tab = document.getElementById("spectrogram-tab");
+            if (tab && fragment.charts["spectrogram-chart"]) {
+                tab.parentNode.hidden = false;
+            }
+            showMessages(fragment.messages);
+        }).catch(reloadFromServer);
+    }
+
+    function syncForm(query) {
+        var params = new URLSearchParams(query);
+        ["start", "end"].forEach(function (name) {
+            var input = form.elements.namedItem(name);
+            if (input) {
+                input.value = params.get(name) || "";
+            }
+        });
+        if (params.has("dataset")) {
+            select.value = params.get("dataset");
+        }
+    }
+
+    function show(query, push) {
+        var request = ++latest;
+        return fetchFragment(query).then(function (fragment) {
+            if (request !== latest) {
+                return;  // A newer selection has been made meanwhile
+            }
+            if (!applyFragment(fragment)) {
+                throw new Error("Fragment doesn't fit the page");
+            }
+            if (push) {
+                window.history.pushState({ query: query }, "", pageUrl(query));
+            }
+        }).catch(function () {
+            window.location.assign(pageUrl(query));
+        });
+    }
+
+    select.onchange = null;
+    select.addEventListener("change", function () {
+        show(currentQuery(), true);
+    });
+
+    if (localCopy) {
+        fillPage();
+    }
+
+    window.history.replaceState({ query: window.location.search.slice(1) }, "");
+    window.addEventListener("popstate", function (event) {
+        var query = event.state ? event.state.query : window.location.search.slice(1);
+        syncForm(query);
+        show(query, false);
+    });
+})();
@@ -0,0 +1,268 @@
+// Keep the user's datasets in the browser so revisits need no server work.
+//
+// The datasets already stored in IndexedDB are reported to /sync, which
+// answers with the new and changed ones in a binary container (see
+// app/dashboard/sync.py): a JSON header plus the chart arrays, stored here
+// as typed arrays. dashboard.js renders a stored copy instead of asking
+// /fragment whenever the whole of a stored dataset is shown. A stored copy
+// is only used while its version matches the one in the dataset dropdown.
+//
+// The versions held are also listed in a cookie, so the server can leave
+// full page loads of those datasets to dashboard.js. Each round renders a
+// few datasets on the server, so a page load runs only data-sync-rounds of
+// them, one per idle period; the rest are fetched on later page loads.
+(function () {
+    "use strict";
+
+    var DB_NAME = "areum-dashboard";
+    var STORE = "fragments";
+    var MAGIC = "ARS1";
+    // Must match SYNC_FORMAT, LOCAL_COPIES_COOKIE and VERSION_HINT_LENGTH
+    // in app/dashboard/sync.py
+    var SYNC_FORMAT = 1;
+    var LOCAL_COPIES_COOKIE = "dashboard_local";
+    var VERSION_HINT_LENGTH = 8;
+    // Versions listed in the cookie, newest datasets first
+    var MAX_COOKIE_VERSIONS = 200;
+    var COOKIE_MAX_AGE = 30 * 24 * 3600;
+
+    var TYPES = { f4: Float32Array, f8: Float64Array, i4: Int32Array };
+
+    var form = document.getElementById("dataset-form");
+    if (!form || !form.dataset.syncUrl || !window.indexedDB || !window.fetch ||
+            !window.TextDecoder) {
+        return;
+    }
+
+    var owner = form.dataset.syncOwner;
+    var select = form.querySelector("#dataset");
+    var maxRounds = parseInt(form.dataset.syncRounds, 10) || 1;
+    var database = null;
+
+    var idle = window.requestIdleCallback || function (callback) {
+        return window.setTimeout(callback, 1000);
+    };
+
+    function request(req) {
+        return new Promise(function (resolve, reject) {
+            req.onsuccess = function () { resolve(req.result); };
+            req.onerror = function () { reject(req.error); };
+        });
+    }
+
+    function openDatabase() {
+        if (!database) {
+            var req = window.indexedDB.open(DB_NAME, SYNC_FORMAT);
+            req.onupgradeneeded = function () {
+                // Fragments of an older format are of no use
+                var db = req.result;
+                if (db.objectStoreNames.contains(STORE)) {
+                    db.deleteObjectStore(STORE);
+                }
+                db.createObjectStore(STORE, { keyPath: "id" });
+            };
+            database = request(req);
+        }
+        return database;
+    }
+
+    function join(value, arrays) {
+        if (Array.isArray(value)) {
+            return value.map(function (item) { return join(item, arrays); });
+        }
+        if (value && typeof value === "object") {
+            var keys = Object.keys(value);
+            if (keys.length === 1 && keys[0] === "$array") {
+                return arrays[value.$array];
+            }
+            var joined = {};
+            keys.forEach(function (key) { joined[key] = join(value[key], arrays); });
+            return joined;
+        }
+        return value;
+    }
+
+    function decode(buffer) {
+        var bytes = new Uint8Array(buffer);
+        if (String.fromCharCode.apply(null, bytes.subarray(0, 4)) !== MAGIC) {
+            throw new Error("Not a sync payload");
+        }
+        var headerLength = new DataView(buffer).getUint32(4, true);
+        var header = JSON.parse(
+            new TextDecoder().decode(bytes.subarray(8, 8 + headerLength))
+        );
+        var base = 8 + headerLength;
+        base += (8 - base % 8) % 8;
+
+        var arrays = header.arrays.map(function (entry) {
+            var count = entry.shape.reduce(function (a, b) { return a * b; }, 1);
+            // A copy, so each stored dataset holds only its own data
+            var values = new TYPES[entry.dtype](buffer, base + entry.offset, count).slice();
+            if (entry.shape.length === 1) {
+                return values;
+            }
+            // Heatmaps take their 2-D values as an array of rows
+            var width = entry.shape[1];
+            var rows = [];
+            for (var start = 0; start < count; start += width) {
+                rows.push(values.subarray(start, start + width));
+            }
+            return rows;
+        });
+        delete header.arrays;
+        return join(header, arrays);
+    }
+
+    function readAll(db) {
+        return request(db.transaction(STORE).objectStore(STORE).getAll());
+    }
+
+    // List the current versions held in the cookie the server reads
+    function writeCookie(records, payload) {
+        var held = {};
+        records.forEach(function (record) {
+            if (record.owner === owner) {
+                held[record.id] = record.version;
+            }
+        });
+        payload.updated.forEach(function (entry) { held[entry.id] = entry.version; });
+
+        var hints = payload.datasets.filter(function (entry) {
+            return held[entry.id] === entry.version;
+        }).slice(0, MAX_COOKIE_VERSIONS).map(function (entry) {
+            return entry.version.slice(0, VERSION_HINT_LENGTH);
+        });
+        var secure = window.location.protocol === "https:" ? "; Secure" : "";
+        document.cookie = LOCAL_COPIES_COOKIE + "=" + owner + ":" + hints.join(".") +
+            "; path=/; max-age=" + COOKIE_MAX_AGE + "; SameSite=Lax" + secure;
+    }
+
+    function clearCookie() {
+        document.cookie = LOCAL_COPIES_COOKIE + "=; path=/; max-age=0";
+    }
+
+    // Store the round's datasets and drop removed, outdated and foreign ones
+    function apply(db, records, payload) {
+        var current = {};
+        payload.datasets.forEach(function (entry) { current[entry.id] = entry.version; });
+
+        var transaction = db.transaction(STORE, "readwrite");
+        var store = transaction.objectStore(STORE);
+        records.forEach(function (record) {
+            if (record.owner !== owner || current[record.id] !== record.version) {
+                store.delete(record.id);
+            }
+        });
+        payload.updated.forEach(function (entry) {
+            store.put({
+                id: entry.id,
+                version: entry.version,
+                owner: owner,
+                fragment: entry.fragment,
+            });
+        });
+        return new Promise(function (resolve, reject) {
+            transaction.oncomplete = resolve;
+            transaction.onerror = function () { reject(transaction.error); };
+            transaction.onabort = function () { reject(transaction.error); };
+        });
+    }
+
+    function syncRound(db, round) {
+        return readAll(db).then(function (records) {
+            var have = {};
+            records.forEach(function (record) {
+                if (record.owner === owner) {
+                    have[record.id] = record.version;
+                }
+            });
+            return fetch(form.dataset.syncUrl, {
+                method: "POST",
+                credentials: "same-origin",
+                headers: { "Content-Type": "application/json" },
+                body: JSON.stringify({ have: have }),
+            }).then(function (response) {
+                if (!response.ok) {
+                    throw new Error("Sync request failed: " + response.status);
+                }
+                return response.arrayBuffer();
+            }).then(function (buffer) {
+                var payload = decode(buffer);
+                if (payload.format !== SYNC_FORMAT || payload.owner !== owner) {
+                    throw new Error("Unexpected sync payload");
+                }
+                return apply(db, records, payload).then(function () {
+                    writeCookie(records, payload);
+                    // Stop when the server can't make progress (e.g. it's busy)
+                    if (payload.pending && payload.updated.length && round < maxRounds) {
+                        idle(function () {
+                            syncRound(db, round + 1).catch(function () {});
+                        });
+                    }
+                });
+            });
+        });
+    }
+
+    function optionVersion(datasetId) {
+        for (var i = 0; i < select.options.length; i++) {
+            if (select.options[i].value === datasetId) {
+                return select.options[i].dataset.version;
+            }
+        }
+        return undefined;
+    }
+
+    // Close our connection and delete the database, then follow the link
+    function clearAndFollow(event) {
+        event.preventDefault();
+        var href = event.currentTarget.href;
+        var followed = false;
+        clearCookie();
+        var follow = function () {
+            if (!followed) {
+                followed = true;
+                window.location.assign(href);
+            }
+        };
+        openDatabase().then(function (db) {
+            db.close();
+        }).catch(function () {}).then(function () {
+            var req = window.indexedDB.deleteDatabase(DB_NAME);
+            req.onsuccess = req.onerror = req.onblocked = follow;
+        });
+        window.setTimeout(follow, 1000);
+    }
+
+    window.AreumSync = {
+        // Resolves with the stored fragment of a dataset's whole recording,
+        // or null when there is no up-to-date copy
+        fragment: function (datasetId) {
+            var version = optionVersion(datasetId);
+            if (!version) {
+                return Promise.resolve(null);
+            }
+            return openDatabase().then(function (db) {
+                return request(db.transaction(STORE).objectStore(STORE).get(datasetId));
+            }).then(function (record) {
+                var current = record && record.owner === owner && record.version === version;
+                return current ? record.fragment : null;
+            }).catch(function () {
+                return null;
+            });
+        },
+    };
+
+    document.querySelectorAll("[data-clears-local-data]").forEach(function (link) {
+        link.addEventListener("click", clearAndFollow);
+    });
+
+    // Sync once the page has settled, so it doesn't compete with rendering
+    idle(function () {
+        openDatabase().then(function (db) {
+            return syncRound(db, 1);
+        }).catch(function () {
+            // The local cache is an optimization; the server stays the fallback
+        });
+    });
+})();
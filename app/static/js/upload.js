@@ -0,0 +1,125 @@
+// Import a recording with live progress.
+//
+// Without this script the form posts the file and the page waits until the
+// whole import is done. With it, the file is sent as the raw request body
+// and the server reports progress as JSON Lines while it validates the
+// samples and forwards them to the backend in batches.
+(function () {
+    "use strict";
+
+    var form = document.getElementById("upload-form");
+    if (!form || !window.XMLHttpRequest || !window.URLSearchParams) {
+        return;
+    }
+
+    var panel = document.getElementById("upload-progress");
+    var bar = panel.querySelector(".progress-bar");
+    var status = document.getElementById("upload-status");
+    var errors = document.getElementById("upload-errors");
+
+    function setProgress(fraction) {
+        var percent = Math.min(100, Math.round(fraction * 100)) + "%";
+        bar.style.width = percent;
+        bar.textContent = percent;
+    }
+
+    function showErrors(messages) {
+        errors.textContent = "";
+        (messages || []).forEach(function (message) {
+            var item = document.createElement("li");
+            item.textContent = message;
+            errors.appendChild(item);
+        });
+    }
+
+    function finish(event) {
+        setProgress(1);
+        bar.classList.add("bg-success");
+        status.textContent = "Imported " + event.imported + " samples" +
+            (event.rejected ? ", skipping " + event.rejected + " invalid rows. " : ". ");
+        var link = document.createElement("a");
+        var params = new URLSearchParams(event.dataset_id ? { dataset: event.dataset_id } : {});
+        link.href = form.dataset.dashboardUrl + (event.dataset_id ? "?" + params : "");
+        link.textContent = "Show it on the dashboard";
+        status.appendChild(link);
+        showErrors(event.errors);
+    }
+
+    function fail(message) {
+        bar.classList.add("bg-danger");
+        status.textContent = "Import failed: " + message;
+        form.querySelector("button[type=submit]").disabled = false;
+    }
+
+    form.addEventListener("submit", function (submitEvent) {
+        var file = form.elements.namedItem("file").files[0];
+        if (!file) {
+            return;
+        }
+        submitEvent.preventDefault();
+
+        var params = new URLSearchParams(new FormData(form));
+        params.delete("file");
+        params.set("filename", file.name);
+
+        var xhr = new XMLHttpRequest();
+        var seen = 0;
+        var done = false;
+
+        function handle(line) {
+            var event = JSON.parse(line);
+            if (event.error) {
+                done = true;
+                fail(event.error);
+            } else if ("dataset_id" in event) {
+                done = true;
+                finish(event);
+            } else {
+                setProgress(file.size ? event.bytes / file.size : 0);
+                status.textContent = "Checked " + event.rows + " rows, sent " +
+                    event.imported + " samples in " + event.batches + " batches";
+            }
+        }
+
+        // Handle the complete lines received so far
+        function readLines() {
+            var text = xhr.responseText;
+            var end;
+            while ((end = text.indexOf("\n", seen)) !== -1) {
+                handle(text.slice(seen, end));
+                seen = end + 1;
+            }
+        }
+
+        xhr.open("POST", form.action + "?" + params.toString());
+        xhr.setRequestHeader("Content-Type", "application/octet-stream");
+        xhr.onprogress = readLines;
+        xhr.onload = function () {
+            if (xhr.status !== 200) {
+                var response = {};
+                try {
+                    response = JSON.parse(xhr.responseText);
+                } catch (error) {
+                    // Not one of our JSON errors
+                }
+                fail(response.error || "the server returned status " + xhr.status);
+                return;
+            }
+            readLines();
+            if (!done) {
+                fail("the connection was closed early");
+            }
+        };
+        xhr.onerror = function () {
+            fail("the connection failed");
+        };
+
+        panel.hidden = false;
+        bar.classList.remove("bg-success", "bg-danger");
+        setProgress(0);
+        showErrors([]);
+        status.textContent = "Uploading " + file.name + "…";
+        form.querySelector("button[type=submit]").disabled = true;
+        xhr.send(file);
+    });
+})();
@@ -1,13 +1,51 @@
 import requests
 from flask import current_app
+from requests.adapters import HTTPAdapter
+
+from .memprofile import memory_stage
+
+# Error of calls the backend refused for an invalid or expired token
+AUTH_FAILED = "Authentication failed or session expired"
+
+# Memory of one decoded sample: a dict with an ISO timestamp and three floats
+DECODED_SAMPLE_BYTES = 340
+
+
+def backend_request(method, path, session=None, **kwargs):
+    """Call the backend with timeouts, through the circuit breaker
+
+    Server errors and slow responses count against the breaker; while it
+    is open this raises ``CircuitOpenError``, a ``RequestException``.
+    Calls go through ``session`` when one is given.
+    """
+    config = current_app.config
+    return current_app.extensions["circuit_breaker"].call(
+        getattr(session or requests, method),
+        f"{config['API_BASE_URL']}{path}",
+        timeout=(config["API_CONNECT_TIMEOUT"], config["API_READ_TIMEOUT"]),
+        is_failure=lambda response: response.status_code >= 500,
+        **kwargs,
+    )
+
+
+def backend_session(pool_size=1):
+    """A session keeping its connections to the backend open between calls
+
+    For a series of calls from one request, such as the batches of an
+    upload; close it when done.
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
 
 
 def login_user(username, password):
     """Authenticate user with the backend API"""
     try:
-        response = requests.post(
-            f"{current_app.config['API_BASE_URL']}/login",
-            json={"username": username, "password": password},
+        response = backend_request(
+            "post", "/login", json={"username": username, "password": password}
         )
 
         if response.status_code == 200:
@@ -24,8 +62,9 @@ def login_user(username, password):
 def register_user(username, password, email):
     """Register a new user with the backend API"""
     try:
-        response = requests.post(
-            f"{current_app.config['API_BASE_URL']}/register_user",
+        response = backend_request(
+            "post",
+            "/register_user",
             json={"username": username, "password": password, "email": email},
         )
 
@@ -36,7 +75,7 @@ def register_user(username, password, email):
         try:
             error_data = response.json()
             error_message = error_data.get("message", "Unknown error")
-        except:
+        except ValueError:
             if response.status_code == 409:
                 error_message = "Username or email already exists"
             else:
@@ -51,15 +90,20 @@ def register_user(username, password, email):
 def get_acceleration_data(token):
     """Fetch user's acceleration data from the API"""
     try:
-        response = requests.get(
-            f"{current_app.config['API_BASE_URL']}/health/acceleration_data",
-            headers={"Authorization": f"Bearer {token}"},
-        )
-
+        with memory_stage("fetch"):
+            response = backend_request(
+                "get",
+                "/health/acceleration_data",
+                headers={"Authorization": f"Bearer {token}"},
+            )
+
+        if response.status_code == 401:
+            return False, None, AUTH_FAILED
         if response.status_code != 200:
-            return False, None, "Authentication failed or session expired"
+            return False, None, f"Server returned status code {response.status_code}"
 
-        data = response.json()
+        with memory_stage("json_decode"):
+            data = response.json()
         if data["status"] != "success" or not data.get("data"):
             return False, None, data.get("message", "No data available")
 
@@ -67,3 +111,48 @@ def get_acceleration_data(token):
 
     except requests.RequestException as e:
         return False, None, f"Connection error: {str(e)}"
+
+
+def datasets_size(result):
+    """Approximate memory held by a get_acceleration_data result"""
+    datasets = result[1] or []
+    samples = sum(
+        len((dataset.get("data") or {}).get("samples") or []) for dataset in datasets
+    )
+    return max(1, samples * DECODED_SAMPLE_BYTES)
+
+
+def upload_acceleration_batch(token, batch, session=None):
+    """Send one batch of an imported recording to the backend
+
+    ``batch`` is an AccelerationData-shaped dict with ``upload_id``,
+    ``batch`` (its number) and ``final`` added; the backend assembles the
+    batches of an upload into one dataset once the final one arrives and
+    returns the dataset's id.
+    """
+    try:
+        response = backend_request(
+            "post",
+            current_app.config["API_UPLOAD_PATH"],
+            session=session,
+            headers={"Authorization": f"Bearer {token}"},
+            json=batch,
+        )
+
+        if response.status_code == 401:
+            return False, None, AUTH_FAILED
+
+        try:
+            data = response.json()
+        except ValueError:
+            data = {}
+        if response.status_code != 200 or data.get("status") != "success":
+            message = data.get("message") or (
+                f"Server returned status code {response.status_code}"
+            )
+            return False, None, f"Upload failed: {message}"
+
+        return True, (data.get("data") or {}).get("id"), None
+
+    except requests.RequestException as e:
+        return False, None, f"Connection error: {str(e)}"
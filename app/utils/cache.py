@@ -0,0 +1,145 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+
+
+class LRUCache:
+    """Thread-safe LRU cache bounded by the total size of its values
+
+    ``sizeof`` reports the size of a value; by default every entry counts
+    as one, which turns ``max_size`` into an entry limit.
+    """
+
+    def __init__(self, max_size, sizeof=None):
+        self.max_size = max_size
+        self.sizeof = sizeof or (lambda value: 1)
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._size = 0
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._stats["misses"] += 1
+                return default
+            self._entries.move_to_end(key)
+            self._stats["hits"] += 1
+            return entry[0]
+
+    def set(self, key, value):
+        size = self.sizeof(value)
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._size -= old[1]
+            if size > self.max_size:
+                return
+            self._entries[key] = (value, size)
+            self._size += size
+            while self._size > self.max_size:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._size -= evicted_size
+                self._stats["evictions"] += 1
+
+    def resize(self, key):
+        """Re-measure an entry whose value grew in place"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                size = self.sizeof(entry[0])
+                self._entries[key] = (entry[0], size)
+                self._size += size - entry[1]
+
+    def delete(self, key):
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is not None:
+                self._size -= entry[1]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats, entries=len(self._entries), size=self._size)
+
+
+class DirectoryPruner:
+    """Keep the files of an on-disk cache under an age and a total size
+
+    ``prune`` deletes the files ending in ``suffix`` written more than
+    ``max_age`` seconds ago, then the oldest remaining ones until they total
+    at most ``max_bytes``; either limit may be None. Partial ``.tmp`` files
+    left by crashed writers go once they are ``interval`` seconds old.
+    ``maybe_prune`` prunes at most once per ``interval``, so stores can call
+    it after every write.
+    """
+
+    def __init__(
+        self,
+        directory,
+        suffix,
+        max_age=None,
+        max_bytes=None,
+        interval=60.0,
+        clock=time.time,
+    ):
+        self.directory = directory
+        self.suffix = suffix
+        self.max_age = max_age
+        self.max_bytes = max_bytes
+        self.interval = interval
+        self.clock = clock
+        self._last = None
+        self._lock = threading.Lock()
+
+    def maybe_prune(self):
+        now = self.clock()
+        with self._lock:
+            if self._last is not None and now - self._last < self.interval:
+                return 0
+            self._last = now
+        return self.prune(now)
+
+    def prune(self, now=None):
+        """Delete expired files and the oldest ones over the size limit"""
+        now = self.clock() if now is None else now
+        files = []
+        for entry in os.scandir(self.directory):
+            try:
+                stat = entry.stat()
+            except OSError:
+                continue
+            if entry.name.endswith(".tmp"):
+                if now - stat.st_mtime > self.interval:
+                    self._remove(entry.path)
+            elif entry.name.endswith(self.suffix):
+                files.append((stat.st_mtime, stat.st_size, entry.path))
+
+        files.sort()
+        total = sum(size for _, size, _ in files)
+        removed = 0
+        for mtime, size, path in files:
+            expired = self.max_age is not None and now - mtime > self.max_age
+            if not expired and (self.max_bytes is None or total <= self.max_bytes):
+                break  # Every later file is newer and the total fits
+            removed += self._remove(path)
+            total -= size
+        return removed
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+            return 1
+        except OSError:
+            # Already removed by another worker
+            return 0
@@ -1,107 +1,294 @@
-import plotly
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
+import json
+import pkgutil
+import uuid
+from functools import lru_cache
 
+from .frames import column_values, sample_positions
+from .lazy import LazyModule
 
-def create_xyz_chart(df):
-    """Create an interactive chart showing X, Y, Z acceleration components"""
+# Loaded on first use so registering the dashboard stays cheap
+np = LazyModule("numpy")
+plotly = LazyModule("plotly")
+go = LazyModule("plotly.graph_objects")
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - falls back to the standard library
+    orjson = None
+
+# Above this many points SVG traces become unusable in the browser
+WEBGL_THRESHOLD = 20000
+
+XYZ_TRACES = (
+    ("x", "X-axis", dict(color="rgb(31, 119, 180)")),
+    ("y", "Y-axis", dict(color="rgb(44, 160, 44)")),
+    ("z", "Z-axis", dict(color="rgb(255, 127, 14)")),
+)
+
+MAGNITUDE_TRACES = (
+    ("magnitude", "Magnitude", dict(color="rgb(214, 39, 40)", width=2)),
+)
+
+# Heatmap cells sent to the browser for a spectrogram
+SPECTROGRAM_MAX_CELLS = 20000
+
+
+def use_webgl(n_points, render_mode="auto", webgl_threshold=WEBGL_THRESHOLD):
+    """Decide whether a chart with n_points should be rendered with WebGL"""
+    if render_mode == "webgl":
+        return True
+    if render_mode == "svg":
+        return False
+    return n_points > webgl_threshold
+
+
+def build_line_figure(
+    df,
+    traces,
+    title,
+    yaxis_title,
+    empty_title,
+    render_mode="auto",
+    webgl_threshold=WEBGL_THRESHOLD,
+    **layout,
+):
+    """Build the figure spec shared by the line charts
+
+    Traces reference the DataFrame's NumPy arrays directly instead of
+    per-point Python lists, and switch to ``scattergl`` once the sample
+    count crosses ``webgl_threshold``. Attributes are spelled the way
+    plotly.js expects them so the spec can be serialized without plotly's
+    graph_objects validation.
+    """
     if df.empty:
-        fig = go.Figure()
-        fig.update_layout(title="No acceleration data available", height=500)
-        return plotly.offline.plot(fig, include_plotlyjs=False, output_type="div")
+        return dict(data=[], layout=dict(title=dict(text=empty_title), height=500))
 
-    fig = go.Figure()
+    trace_type = (
+        "scattergl" if use_webgl(len(df), render_mode, webgl_threshold) else "scatter"
+    )
+    x = sample_positions(df)
 
-    fig.add_trace(
-        go.Scatter(
-            x=df["index"],
-            y=df["x"],
+    data = [
+        dict(
+            type=trace_type,
+            x=x,
+            y=column_values(df, column),
             mode="lines",
-            name="X-axis",
-            line=dict(color="rgb(31, 119, 180)"),
+            name=name,
+            line=line,
         )
+        for column, name, line in traces
+    ]
+
+    return dict(
+        data=data,
+        layout=dict(
+            title=dict(text=title),
+            xaxis=dict(title=dict(text="Samples")),
+            yaxis=dict(title=dict(text=yaxis_title)),
+            height=500,
+            **layout,
+        ),
     )
 
-    fig.add_trace(
-        go.Scatter(
-            x=df["index"],
-            y=df["y"],
-            mode="lines",
-            name="Y-axis",
-            line=dict(color="rgb(44, 160, 44)"),
-        )
+
+@lru_cache(maxsize=1)
+def default_template():
+    """Load the default Plotly template that go.Figure would apply"""
+    return json.loads(pkgutil.get_data("plotly", "package_data/templates/plotly.json"))
+
+
+def _json_default(obj):
+    if isinstance(obj, np.ndarray):
+        if obj.dtype.kind == "f":
+            # Non-finite values become null so plotly.js draws a gap
+            return np.where(np.isfinite(obj), obj, None).tolist()
+        return obj.tolist()
+    if isinstance(obj, np.generic):
+        return obj.item()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def figure_to_json(obj):
+    """Encode a figure spec (or any part of it) to a JSON string
+
+    NumPy arrays are written directly by orjson when it is installed.
+    """
+    if orjson is not None:
+        encoded = orjson.dumps(
+            obj, default=_json_default, option=orjson.OPT_SERIALIZE_NUMPY
+        ).decode("utf-8")
+    else:
+        encoded = json.dumps(obj, default=_json_default, separators=(",", ":"))
+
+    # Keep the payload from closing the surrounding <script> element
+    return encoded.replace("</", "<\\/")
+
+
+def render_figure_lean(figure):
+    """Render a figure spec to a div without plotly's graph_objects
+
+    Produces the same markup contract as ``plotly.offline.plot`` with
+    ``output_type="div"`` and ``include_plotlyjs=False``.
+    """
+    layout = dict(figure["layout"], template=default_template())
+    div_id = str(uuid.uuid4())
+    height = layout.get("height", 500)
+
+    return (
+        f'<div><div id="{div_id}" class="plotly-graph-div" '
+        f'style="height:{height}px; width:100%;"></div>'
+        '<script type="text/javascript">'
+        "window.PLOTLYENV=window.PLOTLYENV || {};"
+        f'if (document.getElementById("{div_id}")) {{Plotly.newPlot("{div_id}", '
+        f"{figure_to_json(figure['data'])}, {figure_to_json(layout)}, "
+        '{"responsive": true})};</script></div>'
     )
 
-    fig.add_trace(
-        go.Scatter(
-            x=df["index"],
-            y=df["z"],
-            mode="lines",
-            name="Z-axis",
-            line=dict(color="rgb(255, 127, 14)"),
-        )
+
+def render_figure(figure, serializer="lean"):
+    """Render a figure spec to an embeddable div
+
+    ``serializer="plotly"`` validates the spec through ``go.Figure`` and
+    ``plotly.offline.plot``; ``"lean"`` encodes it directly.
+    """
+    if serializer == "lean":
+        return render_figure_lean(figure)
+
+    return plotly.offline.plot(
+        go.Figure(figure), include_plotlyjs=False, output_type="div"
     )
 
-    fig.update_layout(
+
+def build_xyz_figure(df, render_mode="auto", webgl_threshold=WEBGL_THRESHOLD):
+    """Build the figure spec of the X, Y, Z acceleration chart"""
+    return build_line_figure(
+        df,
+        XYZ_TRACES,
         title="Acceleration Components",
-        xaxis_title="Samples",
         yaxis_title="Acceleration (g)",
+        empty_title="No acceleration data available",
+        render_mode=render_mode,
+        webgl_threshold=webgl_threshold,
         legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1),
-        height=500,
     )
 
-    return plotly.offline.plot(fig, include_plotlyjs=False, output_type="div")
 
+def create_xyz_chart(
+    df, render_mode="auto", webgl_threshold=WEBGL_THRESHOLD, serializer="lean"
+):
+    """Create an interactive chart showing X, Y, Z acceleration components"""
+    return render_figure(build_xyz_figure(df, render_mode, webgl_threshold), serializer)
 
-def create_magnitude_chart(df):
-    """Create an interactive chart showing acceleration magnitude"""
+
+def build_magnitude_figure(df, render_mode="auto", webgl_threshold=WEBGL_THRESHOLD):
+    """Build the figure spec of the acceleration magnitude chart"""
     if df.empty:
-        fig = go.Figure()
-        fig.update_layout(title="No magnitude data available", height=500)
-        return plotly.offline.plot(fig, include_plotlyjs=False, output_type="div")
+        extra_layout = {}
+    else:
+        positions = sample_positions(df)
+        x_min = positions.min()
+        x_max = positions.max()
+        extra_layout = dict(
+            # Add a reference line for 1g (approximately Earth's gravity)
+            shapes=[
+                dict(
+                    type="line",
+                    x0=x_min,
+                    y0=1.0,
+                    x1=x_max,
+                    y1=1.0,
+                    line=dict(color="rgba(0,0,0,0.3)", width=1, dash="dash"),
+                )
+            ],
+            annotations=[
+                dict(
+                    x=x_min + (x_max - x_min) * 0.02,
+                    y=1.05,
+                    xref="x",
+                    yref="y",
+                    text="Earth's gravity (1g)",
+                    showarrow=False,
+                    font=dict(size=10, color="rgba(0,0,0,0.5)"),
+                )
+            ],
+        )
 
-    fig = go.Figure()
+    return build_line_figure(
+        df,
+        MAGNITUDE_TRACES,
+        title="Movement Magnitude",
+        yaxis_title="Magnitude (g)",
+        empty_title="No magnitude data available",
+        render_mode=render_mode,
+        webgl_threshold=webgl_threshold,
+        **extra_layout,
+    )
 
-    fig.add_trace(
-        go.Scatter(
-            x=df["index"],
-            y=df["magnitude"],
-            mode="lines",
-            name="Magnitude",
-            line=dict(color="rgb(214, 39, 40)", width=2),
-        )
+
+def create_magnitude_chart(
+    df, render_mode="auto", webgl_threshold=WEBGL_THRESHOLD, serializer="lean"
+):
+    """Create an interactive chart showing acceleration magnitude"""
+    return render_figure(
+        build_magnitude_figure(df, render_mode, webgl_threshold), serializer
     )
 
-    # Add a reference line for 1g (approximately Earth's gravity)
-    fig.add_shape(
-        type="line",
-        x0=df["index"].min(),
-        y0=1.0,
-        x1=df["index"].max(),
-        y1=1.0,
-        line=dict(
-            color="rgba(0,0,0,0.3)",
-            width=1,
-            dash="dash",
-        ),
+
+def pool_frames(times, power, max_frames):
+    """Average runs of adjacent spectrogram frames down to max_frames"""
+    if len(times) <= max_frames:
+        return times, power
+
+    group = -(-len(times) // max_frames)
+    starts = np.arange(0, len(times), group)
+    counts = np.diff(np.append(starts, len(times)))
+    return (
+        np.add.reduceat(times, starts) / counts,
+        np.add.reduceat(power, starts, axis=0) / counts[:, None],
     )
 
-    fig.update_layout(
-        title="Movement Magnitude",
-        xaxis_title="Samples",
-        yaxis_title="Magnitude (g)",
-        height=500,
-        annotations=[
+
+def build_spectrogram_figure(spectrum, max_cells=SPECTROGRAM_MAX_CELLS):
+    """Build a heatmap spec of a short-time spectrum in dB
+
+    Adjacent time frames are averaged so the heatmap has at most
+    ``max_cells`` cells, however long the recording.
+    """
+    if spectrum is None:
+        return dict(
+            data=[],
+            layout=dict(
+                title=dict(text="Not enough data for a spectrogram"), height=500
+            ),
+        )
+
+    times, freqs, power = spectrum
+    times, power = pool_frames(times, power, max(1, max_cells // len(freqs)))
+
+    return dict(
+        data=[
             dict(
-                x=df["index"].min() + (df["index"].max() - df["index"].min()) * 0.02,
-                y=1.05,
-                xref="x",
-                yref="y",
-                text="Earth's gravity (1g)",
-                showarrow=False,
-                font=dict(size=10, color="rgba(0,0,0,0.5)"),
+                type="heatmap",
+                x=times,
+                y=freqs,
+                # Rows are frequencies; the floor keeps log10 finite
+                z=10 * np.log10(np.maximum(power.T, 1e-12)),
+                colorscale="Viridis",
+                colorbar=dict(title=dict(text="dB/Hz")),
             )
         ],
+        layout=dict(
+            title=dict(text="Movement Spectrogram"),
+            xaxis=dict(title=dict(text="Time (s)")),
+            yaxis=dict(title=dict(text="Frequency (Hz)")),
+            height=500,
+        ),
     )
 
-    return plotly.offline.plot(fig, include_plotlyjs=False, output_type="div")
+
+def create_spectrogram_chart(
+    spectrum, max_cells=SPECTROGRAM_MAX_CELLS, serializer="lean"
+):
+    """Create a heatmap of movement frequency content over time"""
+    return render_figure(build_spectrogram_figure(spectrum, max_cells), serializer)
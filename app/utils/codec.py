@@ -0,0 +1,413 @@
+import hashlib
+import io
+import json
+import os
+import struct
+import threading
+import zlib
+
+from .cache import DirectoryPruner
+from .lazy import LazyModule
+
+np = LazyModule("numpy")
+pd = LazyModule("pandas")
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - optional, zlib is always available
+    zstandard = None
+
+try:
+    import lz4.frame as lz4_frame
+except ImportError:  # pragma: no cover - optional, zlib is always available
+    lz4_frame = None
+
+MAGIC = b"ARF1"
+CODEC_VERSION = 2
+
+# Rows per block; a range read decompresses only the blocks it overlaps
+BLOCK_ROWS = 4096
+
+# Float columns are stored exactly when 0; a positive quantum (in g) rounds
+# them to that step before delta encoding, which compresses far better
+QUANTUM = 0
+
+# Columns holding sample times, encoded as delta-of-delta
+TIME_COLUMNS = ("timestamp", "offset_ms")
+
+INDEX_COLUMN = "__index__"
+
+
+def available_compressors():
+    """Block compressors we can write, in order of preference"""
+    names = []
+    if zstandard is not None:
+        names.append("zstd")
+    if lz4_frame is not None:
+        names.append("lz4")
+    return names + ["zlib"]
+
+
+def compress_block(data, compressor):
+    if compressor == "zstd":
+        return zstandard.ZstdCompressor(level=3).compress(data)
+    if compressor == "lz4":
+        return lz4_frame.compress(data)
+    if compressor == "zlib":
+        return zlib.compress(data, 6)
+    raise ValueError(f"Unsupported compressor: {compressor}")
+
+
+def decompress_block(data, compressor):
+    if compressor == "zstd" and zstandard is not None:
+        return zstandard.ZstdDecompressor().decompress(data)
+    if compressor == "lz4" and lz4_frame is not None:
+        return lz4_frame.decompress(data)
+    if compressor == "zlib":
+        return zlib.decompress(data)
+    raise ValueError(f"Compressor not available: {compressor}")
+
+
+def smallest_int_dtype(values):
+    """The narrowest signed integer dtype that holds every value"""
+    if not len(values):
+        return np.dtype(np.int8)
+    lo, hi = int(values.min()), int(values.max())
+    for dtype in (np.int8, np.int16, np.int32):
+        info = np.iinfo(dtype)
+        if info.min <= lo and hi <= info.max:
+            return np.dtype(dtype)
+    return np.dtype(np.int64)
+
+
+def delta_encode(values, order):
+    """First ``order`` values followed by the order-th differences"""
+    values = values.astype(np.int64)
+    head = values[:order]
+    for _ in range(order):
+        values = np.diff(values)
+    return head, values
+
+
+def time_values(series):
+    """Integer sample times of a time column (nanoseconds or milliseconds)"""
+    if series.dtype.kind == "M":
+        series = series.dt.tz_convert("UTC") if series.dt.tz else series
+        return series.to_numpy(dtype="datetime64[ns]").view(np.int64)
+    return series.to_numpy().astype(np.int64)
+
+
+def origin_of(times):
+    """Origin of the millisecond offsets used for range reads
+
+    Matches the dashboard's time ranges, which count from the first sample
+    in every frame layout.
+    """
+    return int(times[0]) if len(times) else 0
+
+
+def to_ms(times, time_column, origin):
+    if time_column == "offset_ms":
+        return (times - origin).astype(np.float64)
+    return (times - origin) / 1e6
+
+
+def column_kind(name, dtype):
+    if name in TIME_COLUMNS or name == INDEX_COLUMN:
+        return "time"
+    if dtype.kind in "iu":
+        return "int"
+    if dtype.kind == "f":
+        return "float"
+    raise ValueError(f"Column {name} of type {dtype} can't be encoded")
+
+
+def encode_column(values, kind, quantum):
+    """Integer residuals of one column within a block"""
+    if kind == "time":
+        return delta_encode(values, 2)
+    if kind == "float" and not quantum:
+        # Exact: deltas of the IEEE 754 bit patterns
+        return delta_encode(values.view(f"i{values.dtype.itemsize}"), 1)
+    if kind == "float":
+        values = values.astype(np.float64)
+        if not np.isfinite(values).all():
+            raise ValueError("Non-finite values can't be quantized")
+        values = np.rint(values / quantum)
+    return delta_encode(values, 1)
+
+
+def encode_frame(df, quantum=QUANTUM, block_rows=BLOCK_ROWS, compressor=None):
+    """Encode a processed, time-sorted frame into a compact byte string
+
+    Sample times are stored as delta-of-delta, which is all zeros for
+    uniform sampling; integer columns as deltas; float columns as deltas of
+    their bit patterns, or rounded to ``quantum`` first when it is positive.
+    Each block of ``block_rows`` rows
+    is compressed on its own, and the header lists every block's time span
+    and byte range, so ``read_range`` only decompresses the blocks it needs.
+    """
+    compressor = compressor or available_compressors()[0]
+    time_column = next((c for c in TIME_COLUMNS if c in df.columns), None)
+    if time_column is None:
+        raise ValueError("Frame has no timestamp or offset_ms column")
+
+    columns = {name: df[name] for name in df.columns}
+    arrays = {name: None for name in columns}
+    arrays[time_column] = time_values(columns[time_column])
+    for name, series in columns.items():
+        if name != time_column:
+            arrays[name] = series.to_numpy()
+    arrays[INDEX_COLUMN] = df.index.to_numpy().astype(np.int64)
+
+    times = arrays[time_column]
+    origin = origin_of(times)
+    offsets_ms = to_ms(times, time_column, origin)
+    kinds = {name: column_kind(name, values.dtype) for name, values in arrays.items()}
+
+    blocks, body = [], bytearray()
+    for start in range(0, len(df), block_rows):
+        stop = min(start + block_rows, len(df))
+        parts, layout = [], {}
+        for name, values in arrays.items():
+            head, residuals = encode_column(values[start:stop], kinds[name], quantum)
+            dtype = smallest_int_dtype(residuals)
+            parts += [head.astype("<i8").tobytes(), residuals.astype(dtype).tobytes()]
+            layout[name] = [len(head), dtype.str]
+        compressed = compress_block(b"".join(parts), compressor)
+        blocks.append(
+            dict(
+                rows=stop - start,
+                start_ms=float(offsets_ms[start]),
+                end_ms=float(offsets_ms[stop - 1]),
+                offset=len(body),
+                length=len(compressed),
+                layout=layout,
+            )
+        )
+        body += compressed
+
+    start_time = df.attrs.get("start_time")
+    header = dict(
+        version=CODEC_VERSION,
+        compressor=compressor,
+        quantum=quantum,
+        rows=len(df),
+        time_column=time_column,
+        origin=origin,
+        start_time=None if start_time is None else pd.Timestamp(start_time).isoformat(),
+        columns=[
+            dict(name=name, dtype=str(series.dtype), kind=kinds[name])
+            for name, series in columns.items()
+        ],
+        blocks=blocks,
+    )
+    encoded_header = json.dumps(header, separators=(",", ":")).encode("utf-8")
+    return MAGIC + struct.pack("<I", len(encoded_header)) + encoded_header + body
+
+
+def decode_block(block, data, header):
+    """Decode one block's columns into a dict of NumPy arrays"""
+    raw = decompress_block(data, header["compressor"])
+    rows = block["rows"]
+    names = [column["name"] for column in header["columns"]] + [INDEX_COLUMN]
+    kinds = {column["name"]: column["kind"] for column in header["columns"]}
+    kinds[INDEX_COLUMN] = "time"
+
+    arrays, position = {}, 0
+    for name in names:
+        heads, dtype = block["layout"][name]
+        dtype = np.dtype(dtype)
+        order = 2 if kinds[name] == "time" else 1
+        head = np.frombuffer(raw, dtype="<i8", count=heads, offset=position)
+        position += heads * 8
+        count = max(rows - order, 0)
+        residuals = np.frombuffer(raw, dtype=dtype, count=count, offset=position)
+        position += count * dtype.itemsize
+        arrays[name] = undelta(head, residuals, order, rows)
+    return arrays
+
+
+def undelta(head, residuals, order, rows):
+    """Invert delta_encode: rebuild values from their first values and residuals"""
+    if rows <= order:
+        return head[:rows].astype(np.int64)
+    if order == 1:
+        return np.concatenate([head, residuals.astype(np.int64)]).cumsum()
+
+    first_delta = head[1] - head[0]
+    deltas = np.concatenate([[first_delta], residuals.astype(np.int64)]).cumsum()
+    return np.concatenate([head[:1], deltas]).cumsum()
+
+
+def restore_times(values, dtype):
+    """Timestamps from UTC nanoseconds, in the original time zone or naive"""
+    times = pd.to_datetime(values, unit="ns", utc=True)
+    tz = getattr(pd.api.types.pandas_dtype(dtype), "tz", None)
+    times = times.tz_localize(None) if tz is None else times.tz_convert(tz)
+    return times.astype(dtype)
+
+
+def restore_frame(arrays, header):
+    """Build a frame with the original columns and dtypes from decoded arrays"""
+    positions = arrays[INDEX_COLUMN]
+    if len(positions) and (np.diff(positions) == 1).all():
+        index = pd.RangeIndex(positions[0], positions[-1] + 1)
+    else:
+        index = pd.Index(positions)
+
+    columns = {}
+    for column in header["columns"]:
+        name, dtype, kind = column["name"], column["dtype"], column["kind"]
+        values = arrays[name]
+        if kind == "float" and header["quantum"]:
+            columns[name] = (values * header["quantum"]).astype(dtype)
+        elif kind == "float":
+            bits = values.astype(f"i{np.dtype(dtype).itemsize}")
+            columns[name] = bits.view(dtype)
+        elif name == "timestamp":
+            columns[name] = restore_times(values, dtype)
+        else:
+            columns[name] = values.astype(dtype)
+
+    df = pd.DataFrame(columns, index=index)
+    if header["time_column"] == "offset_ms":
+        start_time = header["start_time"]
+        df.attrs["start_time"] = (
+            None if start_time is None else pd.Timestamp(start_time)
+        )
+    return df
+
+
+def read_header(handle):
+    """Read the header of an encoded frame; returns it and the body offset"""
+    prefix = handle.read(len(MAGIC) + 4)
+    if len(prefix) < len(MAGIC) + 4 or prefix[: len(MAGIC)] != MAGIC:
+        raise ValueError("Not an encoded frame")
+    (length,) = struct.unpack("<I", prefix[len(MAGIC) :])
+    header = json.loads(handle.read(length))
+    if header["version"] != CODEC_VERSION:
+        raise ValueError(f"Unsupported frame codec version: {header['version']}")
+    return header, len(prefix) + length
+
+
+def read_range(handle, start_ms=None, end_ms=None):
+    """Decode the rows of an encoded frame with start_ms <= time <= end_ms
+
+    ``handle`` is a binary file object positioned at the start of the
+    encoding. Times are milliseconds from the frame's first sample, as in
+    the dashboard's time ranges. Only blocks overlapping the range are read and
+    decompressed.
+    """
+    header, body = read_header(handle)
+    lo = -np.inf if start_ms is None else start_ms
+    hi = np.inf if end_ms is None else end_ms
+
+    chunks = []
+    for block in header["blocks"]:
+        if block["end_ms"] < lo or block["start_ms"] > hi:
+            continue
+        handle.seek(body + block["offset"])
+        chunks.append(decode_block(block, handle.read(block["length"]), header))
+
+    names = [column["name"] for column in header["columns"]] + [INDEX_COLUMN]
+    arrays = {
+        name: (
+            np.concatenate([chunk[name] for chunk in chunks])
+            if chunks
+            else np.array([], dtype=np.int64)
+        )
+        for name in names
+    }
+
+    # Trim the partly covered blocks at either end
+    time_column = header["time_column"]
+    offsets = to_ms(arrays[time_column], time_column, header["origin"])
+    keep = (offsets >= lo) & (offsets <= hi)
+    if not keep.all():
+        arrays = {name: values[keep] for name, values in arrays.items()}
+    return restore_frame(arrays, header)
+
+
+def decode_frame(data, start_ms=None, end_ms=None):
+    """Decode an encoded frame from bytes, optionally only a time range"""
+    return read_range(io.BytesIO(data), start_ms, end_ms)
+
+
+def write_frame(path, df, **options):
+    """Encode a frame to a file atomically"""
+    partial = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(partial, "wb") as handle:
+        handle.write(encode_frame(df, **options))
+    os.replace(partial, path)
+
+
+def read_frame(path, start_ms=None, end_ms=None):
+    """Decode an encoded frame file, optionally only a time range"""
+    with open(path, "rb") as handle:
+        return read_range(handle, start_ms, end_ms)
+
+
+class FrameStore:
+    """Processed frames persisted on disk in the compact encoding
+
+    Saves re-parsing a recording's JSON samples after a restart and is
+    shared by all workers on the host. Reads can be limited to a time
+    range, which only decompresses the blocks it overlaps. Values are
+    stored exactly unless a positive ``quantum`` is given. Frames older than
+    ``max_age`` seconds are deleted, and the oldest ones whenever the store
+    holds more than ``max_bytes``.
+    """
+
+    def __init__(
+        self,
+        directory=None,
+        quantum=QUANTUM,
+        block_rows=BLOCK_ROWS,
+        max_bytes=None,
+        max_age=None,
+    ):
+        self.directory = directory
+        self.quantum = quantum
+        self.block_rows = block_rows
+        self.pruner = None
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+            self.pruner = DirectoryPruner(
+                directory, ".arf", max_age=max_age, max_bytes=max_bytes
+            )
+
+    def path(self, key):
+        # Frames stored with another quantum hold other values
+        digest = hashlib.sha256(repr((key, self.quantum)).encode("utf-8"))
+        digest = digest.hexdigest()[:32]
+        return os.path.join(self.directory, f"frame-{digest}.arf")
+
+    def get(self, key, start_ms=None, end_ms=None):
+        """The stored frame for key, or None if missing or unreadable"""
+        if not self.directory:
+            return None
+        try:
+            return read_frame(self.path(key), start_ms, end_ms)
+        except (OSError, ValueError, TypeError, KeyError, zlib.error):
+            return None
+
+    def set(self, key, df):
+        """Store a frame; frames the codec can't encode are skipped"""
+        if not self.directory or df.empty:
+            return
+        try:
+            write_frame(
+                self.path(key), df, quantum=self.quantum, block_rows=self.block_rows
+            )
+        except ValueError:
+            return
+        self.pruner.maybe_prune()
+
+    def get_or_build(self, key, build, *args):
+        """Return the stored frame for key, building and storing it if needed"""
+        df = self.get(key)
+        if df is None:
+            df = build(*args)
+            self.set(key, df)
+        return df
@@ -0,0 +1,120 @@
+import gzip
+import threading
+
+from flask import current_app, request
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - gzip is always available
+    brotli = None
+
+# Only bodies of these types are worth compressing
+COMPRESSIBLE_MIMETYPES = {
+    "text/html",
+    "text/css",
+    "text/plain",
+    "text/csv",
+    "application/json",
+    "application/javascript",
+    "text/javascript",
+    "image/svg+xml",
+}
+
+
+def available_encodings():
+    """Content codings we can produce, in order of preference"""
+    return ["br", "gzip"] if brotli is not None else ["gzip"]
+
+
+def negotiate_encoding():
+    """Pick the best encoding the client accepts, or None for identity"""
+    return request.accept_encodings.best_match(available_encodings())
+
+
+def compress(data, encoding, level=6):
+    """Compress bytes with gzip or brotli"""
+    if encoding == "br":
+        return brotli.compress(data, quality=level)
+    if encoding == "gzip":
+        return gzip.compress(data, compresslevel=level, mtime=0)
+    raise ValueError(f"Unsupported encoding: {encoding}")
+
+
+class CompressedPayload:
+    """A response body kept alongside its compressed variants
+
+    Each encoding is compressed at most once, so cached payloads are served
+    to repeat visitors without paying for compression again.
+    """
+
+    def __init__(self, data, mimetype="text/html", level=6):
+        self.raw = data.encode("utf-8") if isinstance(data, str) else data
+        self.mimetype = mimetype
+        self.level = level
+        self._encoded = {}
+        self._lock = threading.Lock()
+
+    def encoded(self, encoding):
+        if encoding is None:
+            return self.raw
+
+        body = self._encoded.get(encoding)
+        if body is None:
+            with self._lock:
+                body = self._encoded.get(encoding)
+                if body is None:
+                    body = compress(self.raw, encoding, self.level)
+                    self._encoded[encoding] = body
+        return body
+
+    @property
+    def size(self):
+        return len(self.raw) + sum(len(body) for body in self._encoded.values())
+
+
+def payload_response(payload, status=200):
+    """Build a response from a payload using its cached compressed bytes"""
+    encoding = negotiate_encoding()
+    response = current_app.response_class(
+        payload.encoded(encoding), status=status, mimetype=payload.mimetype
+    )
+    if encoding:
+        response.headers["Content-Encoding"] = encoding
+    response.vary.add("Accept-Encoding")
+    return response
+
+
+def compress_response(response):
+    """Compress eligible responses according to Accept-Encoding"""
+    config = current_app.config
+    if (
+        not config["COMPRESS_RESPONSES"]
+        or response.direct_passthrough
+        or response.is_streamed
+        or "Content-Encoding" in response.headers
+        or response.mimetype not in COMPRESSIBLE_MIMETYPES
+        or not 200 <= response.status_code < 300
+    ):
+        return response
+
+    response.vary.add("Accept-Encoding")
+
+    data = response.get_data()
+    if len(data) < config["COMPRESS_MIN_SIZE"]:
+        return response
+
+    encoding = negotiate_encoding()
+    if encoding:
+        response.set_data(compress(data, encoding, config["COMPRESS_LEVEL"]))
+        response.headers["Content-Encoding"] = encoding
+    return response
+
+
+def init_compression(app):
+    """Compress responses and keep a cache of precompressed payloads"""
+    from .cache import LRUCache
+
+    app.extensions["payload_cache"] = LRUCache(
+        app.config["PAYLOAD_CACHE_MAX_BYTES"], sizeof=lambda payload: payload.size
+    )
+    app.after_request(compress_response)
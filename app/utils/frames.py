@@ -0,0 +1,29 @@
+from .lazy import LazyModule
+
+np = LazyModule("numpy")
+
+# int16 frames store values in milli-g, covering +/-32.767 g
+INT16_SCALE = 1000
+
+
+def column_values(df, column):
+    """Column values as floats, undoing int16 fixed-point storage"""
+    values = df[column].to_numpy()
+    if values.dtype == np.int16:
+        return values.astype(np.float32) / np.float32(INT16_SCALE)
+    return values
+
+
+def sample_positions(df):
+    """Sample numbers for the x-axis of charts"""
+    if "index" in df.columns:
+        return df["index"].to_numpy()
+    return df.index.to_numpy()
+
+
+def duration_ms(df):
+    """Time spanned by the samples of a processed frame in milliseconds"""
+    if "offset_ms" in df.columns:
+        offsets = df["offset_ms"].to_numpy()
+        return float(offsets.max() - offsets.min())
+    return (df["timestamp"].max() - df["timestamp"].min()).total_seconds() * 1000
@@ -0,0 +1,67 @@
+import gc
+import importlib
+
+# Modules that dominate import time and memory, in dependency order
+HEAVY_MODULES = ("numpy", "pandas", "plotly", "plotly.graph_objects")
+
+
+class LazyModule:
+    """Stand-in for a module that is imported on first attribute access
+
+    Lets modules keep writing ``pd.DataFrame`` or ``go.Figure`` while only
+    paying for the import when a request first needs it.
+    """
+
+    def __init__(self, name):
+        self.__dict__["_name"] = name
+        self.__dict__["_module"] = None
+
+    def _load(self):
+        module = self.__dict__["_module"]
+        if module is None:
+            module = importlib.import_module(self._name)
+            self.__dict__["_module"] = module
+        return module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __setattr__(self, attr, value):
+        setattr(self._load(), attr, value)
+
+    def __repr__(self):
+        state = "loaded" if self.__dict__["_module"] is not None else "not loaded"
+        return f"<lazy module {self._name!r} ({state})>"
+
+
+def preload_heavy_modules():
+    """Import heavy dependencies and exercise the pipeline once
+
+    Meant for gunicorn's preload mode: running this in the master before
+    workers fork lets them share the imported pages copy-on-write.
+    Freezing the GC keeps collections in workers from touching (and
+    therefore copying) those pages.
+    """
+    for name in HEAVY_MODULES:
+        importlib.import_module(name)
+
+    # Warm the lazily initialised parts of the processing and chart code
+    from app.dashboard.utils import process_acceleration_data, calculate_metrics
+    from app.utils.charts import create_xyz_chart, default_template
+
+    df = process_acceleration_data(
+        {
+            "data": {
+                "samples": [
+                    {"timestamp": "2025-01-01T00:00:00Z", "x": 0, "y": 0, "z": 1},
+                    {"timestamp": "2025-01-01T00:00:01Z", "x": 0, "y": 0, "z": 1},
+                ]
+            }
+        }
+    )
+    calculate_metrics(df)
+    create_xyz_chart(df)
+    default_template()
+
+    gc.collect()
+    gc.freeze()
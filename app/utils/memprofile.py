@@ -0,0 +1,175 @@
+import contextvars
+import threading
+import time
+import tracemalloc
+from collections import deque
+from contextlib import contextmanager
+
+from flask import current_app, g, request
+
+from .profiling import annotate_profile
+
+# The current request's measurements; a context variable rather than ``g``
+# so stages inside nested app contexts (such as dataset fetches) are seen
+_current = contextvars.ContextVar("memory_profile", default=None)
+
+
+def kib(size):
+    return round(size / 1024, 1)
+
+
+class RequestMemory:
+    """Peak and retained allocations of one request, per pipeline stage
+
+    Sizes are relative to the traced memory when the request started. A
+    stage's peak includes its nested stages; its retained size is what was
+    still allocated when it finished.
+    """
+
+    def __init__(self):
+        self.baseline = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        self.peak = self.baseline
+        self.stages = []
+        self._open = []  # [name, started, peak] of stages in progress
+
+    def _fold_peak(self):
+        # tracemalloc has a single peak, so record it in every open stage
+        # before resetting it for the next one
+        peak = tracemalloc.get_traced_memory()[1]
+        self.peak = max(self.peak, peak)
+        for stage in self._open:
+            stage[2] = max(stage[2], peak)
+        tracemalloc.reset_peak()
+
+    def enter(self, name):
+        self._fold_peak()
+        self._open.append([name, time.perf_counter(), self.baseline])
+
+    def exit(self):
+        self._fold_peak()
+        name, started, peak = self._open.pop()
+        current = tracemalloc.get_traced_memory()[0]
+        self.stages.append(
+            {
+                "stage": name,
+                "peak_kb": kib(peak - self.baseline),
+                "retained_kb": kib(current - self.baseline),
+                "seconds": round(time.perf_counter() - started, 6),
+            }
+        )
+
+    def finish(self):
+        while self._open:
+            self.exit()
+        self._fold_peak()
+        current = tracemalloc.get_traced_memory()[0]
+        return {
+            "peak_kb": kib(self.peak - self.baseline),
+            "retained_kb": kib(current - self.baseline),
+            "stages": self.stages,
+        }
+
+
+@contextmanager
+def memory_stage(name):
+    """Measure the allocations of a block when the request is being traced"""
+    record = _current.get()
+    if record is None:
+        yield
+        return
+
+    record.enter(name)
+    try:
+        yield
+    finally:
+        record.exit()
+
+
+def format_memory(info):
+    """One log line summarizing a request's memory profile"""
+    stages = "; ".join(
+        f"{stage['stage']} peak {stage['peak_kb']} KiB "
+        f"retained {stage['retained_kb']} KiB"
+        for stage in info["stages"]
+    )
+    return (
+        f"Memory {info['path']}: peak {info['peak_kb']} KiB, "
+        f"retained {info['retained_kb']} KiB ({stages or 'no stages'})"
+    )
+
+
+class MemoryProfiler:
+    """Trace allocations of dashboard requests with tracemalloc
+
+    When enabled, tracing runs only while a request to one of ``endpoints``
+    is in progress, one request at a time per worker. Results are logged,
+    attached to the request's cProfile profile if there is one and kept for
+    the diagnostics endpoint. Allocations by other requests running at the
+    same time are counted too, so figures are most precise on a quiet worker.
+    """
+
+    def __init__(
+        self,
+        enabled=False,
+        endpoints=("dashboard.index", "dashboard.fragment"),
+        frames=1,
+        max_records=50,
+    ):
+        self.enabled = enabled
+        self.endpoints = frozenset(endpoints)
+        self.frames = frames
+        self.records = deque(maxlen=max_records)
+        self._active = threading.Lock()
+        self._lock = threading.Lock()
+        self._started_tracing = False
+
+    def start(self):
+        """Start tracing the current request if it is wanted"""
+        if not self.enabled or request.endpoint not in self.endpoints:
+            return
+        if not self._active.acquire(blocking=False):
+            return
+
+        # Leave tracing on afterwards if someone else started it
+        self._started_tracing = not tracemalloc.is_tracing()
+        if self._started_tracing:
+            tracemalloc.start(self.frames)
+        g.memory_token = _current.set(RequestMemory())
+        g.memory_path = request.full_path.rstrip("?")
+
+    def finish(self, exc=None):
+        """Stop tracing the current request, then log and store the results"""
+        token = g.pop("memory_token", None)
+        if token is None:
+            return
+
+        record = _current.get()
+        _current.reset(token)
+        info = dict(record.finish(), path=g.pop("memory_path"), time=time.time())
+        if self._started_tracing:
+            tracemalloc.stop()
+        self._active.release()
+
+        annotate_profile(memory=info)
+        current_app.logger.info(format_memory(info))
+        with self._lock:
+            self.records.append(info)
+
+    def recent(self):
+        with self._lock:
+            return list(self.records)
+
+    def clear(self):
+        with self._lock:
+            self.records.clear()
+
+
+def init_memory_profiling(app):
+    """Register the memory profiler; a no-op check when it is disabled"""
+    profiler = MemoryProfiler(
+        app.config["MEMORY_PROFILING"], frames=app.config["MEMORY_PROFILE_FRAMES"]
+    )
+    app.extensions["memory_profiler"] = profiler
+    app.before_request(profiler.start)
+    app.teardown_request(profiler.finish)
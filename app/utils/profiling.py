@@ -0,0 +1,179 @@
+import cProfile
+import pstats
+import random
+import threading
+import time
+from collections import deque
+
+from flask import current_app, g, request
+from itsdangerous import BadSignature, URLSafeTimedSerializer
+
+PROFILE_QUERY_PARAM = "_profile"
+PROFILE_TOKEN_SALT = "request-profile"
+
+# Functions kept per stored profile, by cumulative time
+FUNCTIONS_PER_PROFILE = 200
+
+
+def function_label(key):
+    """Format a pstats function key as file:line(function)"""
+    filename, line, name = key
+    if filename == "~":
+        return name
+    return f"{filename}:{line}({name})"
+
+
+class RequestProfiler:
+    """Profile a sample of requests with cProfile and keep recent results
+
+    Only the endpoints in ``endpoints`` are considered. A request is profiled
+    when it wins the ``sample_rate`` draw or carries a valid signed
+    ``_profile`` token. One request is profiled at a time per worker; others
+    arriving meanwhile run unprofiled.
+    """
+
+    def __init__(
+        self, sample_rate=0.0, endpoints=("dashboard.index",), max_profiles=50
+    ):
+        self.sample_rate = sample_rate
+        self.endpoints = frozenset(endpoints)
+        self.profiles = deque(maxlen=max_profiles)
+        self._active = threading.Lock()
+        self._lock = threading.Lock()
+
+    def wanted(self):
+        """Decide whether the current request should be profiled"""
+        if request.endpoint not in self.endpoints:
+            return False
+
+        token = request.args.get(PROFILE_QUERY_PARAM)
+        if token is not None:
+            return valid_profile_token(token)
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    def start(self):
+        """Start profiling the current request if it is wanted"""
+        if not self.wanted() or not self._active.acquire(blocking=False):
+            return
+
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            # Another profiler or monitoring tool owns the hook
+            self._active.release()
+            return
+
+        g.profile = profile
+        g.profile_info = {
+            "endpoint": request.endpoint,
+            "path": request.full_path.rstrip("?"),
+            "started": time.time(),
+        }
+        g.profile_clock = time.perf_counter()
+
+    def finish(self, exc=None):
+        """Stop the current request's profile and store it"""
+        profile = g.pop("profile", None)
+        if profile is None:
+            return
+
+        profile.disable()
+        self._active.release()
+
+        info = g.pop("profile_info")
+        info["seconds"] = round(time.perf_counter() - g.pop("profile_clock"), 6)
+        info["error"] = repr(exc) if exc is not None else None
+
+        stats = pstats.Stats(profile).stats
+        top = sorted(stats.items(), key=lambda item: item[1][3], reverse=True)
+        info["functions"] = {
+            function_label(key): (calls, tottime, cumtime)
+            for key, (_, calls, tottime, cumtime, _) in top[:FUNCTIONS_PER_PROFILE]
+        }
+
+        with self._lock:
+            self.profiles.append(info)
+
+    def report(self, limit=30, sort="cumulative"):
+        """Aggregate the stored profiles into a top-functions report"""
+        column = {"calls": 0, "tottime": 1, "cumulative": 2}[sort]
+        totals = {}
+
+        with self._lock:
+            profiles = list(self.profiles)
+
+        for info in profiles:
+            for name, values in info["functions"].items():
+                current = totals.setdefault(name, [0, 0.0, 0.0, 0])
+                current[0] += values[0]
+                current[1] += values[1]
+                current[2] += values[2]
+                current[3] += 1
+
+        top = sorted(totals.items(), key=lambda item: item[1][column], reverse=True)
+        return {
+            "profiles": len(profiles),
+            "sample_rate": self.sample_rate,
+            "recent": [
+                {key: value for key, value in info.items() if key != "functions"}
+                for info in profiles[-10:]
+            ],
+            "top_functions": [
+                {
+                    "function": name,
+                    "calls": calls,
+                    "tottime": round(tottime, 6),
+                    "cumtime": round(cumtime, 6),
+                    "profiles": seen,
+                }
+                for name, (calls, tottime, cumtime, seen) in top[:limit]
+            ],
+        }
+
+    def clear(self):
+        with self._lock:
+            self.profiles.clear()
+
+
+def profile_serializer():
+    return URLSafeTimedSerializer(current_app.secret_key, salt=PROFILE_TOKEN_SALT)
+
+
+def make_profile_token():
+    """Create a signed value for the ``_profile`` query parameter"""
+    return profile_serializer().dumps("profile")
+
+
+def valid_profile_token(token):
+    """Check a ``_profile`` value's signature and age"""
+    try:
+        profile_serializer().loads(
+            token, max_age=current_app.config["PROFILE_TOKEN_MAX_AGE"]
+        )
+    except BadSignature:
+        return False
+    return True
+
+
+def is_profiling():
+    """Whether the current request is being profiled"""
+    return "profile" in g
+
+
+def annotate_profile(**fields):
+    """Attach details such as the dataset size to the current profile"""
+    info = g.get("profile_info")
+    if info is not None:
+        info.update(fields)
+
+
+def init_profiling(app):
+    """Register the request profiler; a no-op check when nothing is sampled"""
+    profiler = RequestProfiler(
+        app.config["PROFILE_SAMPLE_RATE"],
+        max_profiles=app.config["PROFILE_MAX_STORED"],
+    )
+    app.extensions["profiler"] = profiler
+    app.before_request(profiler.start)
+    app.teardown_request(profiler.finish)
@@ -0,0 +1,222 @@
+import threading
+import time
+from collections import deque
+
+import requests
+
+from .cache import LRUCache
+
+
+class CircuitOpenError(requests.RequestException):
+    """Raised instead of calling the backend while the circuit is open"""
+
+
+class CircuitBreaker:
+    """Stop calling a backend that is failing or too slow
+
+    Outcomes of the calls in the last ``window_seconds`` are kept. Once at
+    least ``min_calls`` have been seen and the share of failed calls, or of
+    calls slower than ``slow_call_seconds``, reaches its rate, the circuit
+    opens and calls fail fast with ``CircuitOpenError``. After
+    ``open_seconds`` up to ``half_open_probes`` calls are let through; the
+    circuit closes if they succeed quickly and opens again otherwise.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        failure_rate=0.5,
+        slow_call_rate=0.5,
+        slow_call_seconds=5.0,
+        min_calls=10,
+        window_seconds=60.0,
+        open_seconds=30.0,
+        half_open_probes=1,
+        clock=time.monotonic,
+    ):
+        self.failure_rate = failure_rate
+        self.slow_call_rate = slow_call_rate
+        self.slow_call_seconds = slow_call_seconds
+        self.min_calls = min_calls
+        self.window_seconds = window_seconds
+        self.open_seconds = open_seconds
+        self.half_open_probes = half_open_probes
+        self.clock = clock
+
+        self.state = self.CLOSED
+        self._lock = threading.Lock()
+        self._outcomes = deque()  # (finished_at, failed, slow)
+        self._opened_at = None
+        self._probes = 0
+        self._stats = {"calls": 0, "rejected": 0, "failures": 0, "slow": 0, "opened": 0}
+
+    def call(self, fn, *args, is_failure=None, **kwargs):
+        """Call fn through the breaker
+
+        Exceptions count as failures and are re-raised; ``is_failure`` can
+        also mark a returned value (such as a 5xx response) as failed.
+        """
+        probe = self._admit()
+        started = self.clock()
+        try:
+            result = fn(*args, **kwargs)
+        except Exception:
+            self._record(True, self.clock() - started, probe)
+            raise
+
+        failed = bool(is_failure and is_failure(result))
+        self._record(failed, self.clock() - started, probe)
+        return result
+
+    def _admit(self):
+        with self._lock:
+            self._stats["calls"] += 1
+            if self.state == self.OPEN:
+                if self.clock() - self._opened_at < self.open_seconds:
+                    self._stats["rejected"] += 1
+                    raise CircuitOpenError("Backend unavailable (circuit open)")
+                self.state = self.HALF_OPEN
+                self._probes = 0
+
+            if self.state == self.HALF_OPEN:
+                if self._probes >= self.half_open_probes:
+                    self._stats["rejected"] += 1
+                    raise CircuitOpenError("Backend unavailable (circuit half-open)")
+                self._probes += 1
+                return True
+            return False
+
+    def _record(self, failed, seconds, probe):
+        slow = seconds >= self.slow_call_seconds
+        with self._lock:
+            self._stats["failures"] += failed
+            self._stats["slow"] += slow
+
+            if probe:
+                self._probes -= 1
+                if failed or slow:
+                    self._open()
+                elif self.state == self.HALF_OPEN:
+                    self.state = self.CLOSED
+                    self._outcomes.clear()
+                return
+
+            if self.state != self.CLOSED:
+                return
+
+            now = self.clock()
+            self._outcomes.append((now, failed, slow))
+            while self._outcomes and self._outcomes[0][0] < now - self.window_seconds:
+                self._outcomes.popleft()
+
+            calls = len(self._outcomes)
+            if calls < self.min_calls:
+                return
+            failures = sum(outcome[1] for outcome in self._outcomes)
+            slow_calls = sum(outcome[2] for outcome in self._outcomes)
+            if (
+                failures / calls >= self.failure_rate
+                or slow_calls / calls >= self.slow_call_rate
+            ):
+                self._open()
+
+    def _open(self):
+        self.state = self.OPEN
+        self._opened_at = self.clock()
+        self._outcomes.clear()
+        self._stats["opened"] += 1
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats, state=self.state)
+
+
+class StaleWhileRevalidate:
+    """Serve the last good result at once and refresh it in the background
+
+    Results younger than ``fresh_seconds`` are returned as they are. Older
+    ones, up to ``max_stale_seconds``, are returned too while one
+    background refresh per key replaces them. Only results accepted by
+    ``is_valid`` are kept, so errors never overwrite good data; results
+    matched by ``is_revoked``, such as a rejected token, drop the entry
+    instead. ``max_size`` and ``sizeof`` bound the entries as in LRUCache.
+    """
+
+    def __init__(
+        self,
+        fresh_seconds=30.0,
+        max_stale_seconds=3600.0,
+        max_size=256,
+        sizeof=None,
+        clock=time.monotonic,
+    ):
+        self.fresh_seconds = fresh_seconds
+        self.max_stale_seconds = max_stale_seconds
+        self.clock = clock
+        self._entries = LRUCache(
+            max_size, sizeof=sizeof and (lambda entry: sizeof(entry[1]))
+        )
+        self._lock = threading.Lock()
+        self._refreshing = set()
+        self._stats = {"fresh": 0, "stale": 0, "misses": 0, "refreshes": 0}
+
+    def get(
+        self, key, fetch, is_valid=lambda result: True, is_revoked=lambda result: False
+    ):
+        entry = self._entries.get(key)
+        age = None if entry is None else self.clock() - entry[0]
+
+        if age is not None and age < self.fresh_seconds:
+            self._count("fresh")
+            return entry[1]
+
+        if age is not None and age < self.max_stale_seconds:
+            self._count("stale")
+            self.revalidate(key, fetch, is_valid, is_revoked)
+            return entry[1]
+
+        self._count("misses")
+        result = fetch()
+        self._store(key, result, is_valid, is_revoked)
+        return result
+
+    def _store(self, key, result, is_valid, is_revoked):
+        if is_revoked(result):
+            self._entries.delete(key)
+        elif is_valid(result):
+            self._entries.set(key, (self.clock(), result))
+
+    def revalidate(self, key, fetch, is_valid, is_revoked=lambda result: False):
+        """Start a background refresh of key unless one is running"""
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+            self._stats["refreshes"] += 1
+
+        def refresh():
+            try:
+                self._store(key, fetch(), is_valid, is_revoked)
+            except Exception:
+                pass  # Keep serving the stale result
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        thread = threading.Thread(target=refresh, daemon=True)
+        thread.start()
+        return thread
+
+    def invalidate(self, key):
+        self._entries.delete(key)
+
+    def _count(self, name):
+        with self._lock:
+            self._stats[name] += 1
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats, entries=len(self._entries))
@@ -0,0 +1,215 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - not available on Windows
+    fcntl = None
+
+
+class _Call:
+    """An in-flight call that followers wait on"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Coalesce concurrent calls sharing a key into a single execution
+
+    Within a worker, callers arriving while a call for the same key is in
+    flight wait for it and receive its result. ``do_shared`` goes further
+    when ``lock_dir`` is set: identical calls in other worker processes are
+    serialized with a file lock, and results that are plain JSON data of at
+    most ``max_shared_bytes``, such as API payloads, are left next to the
+    lock for the followers that waited. Use it only for calls whose results
+    can be shared that way; a follower that finds nothing runs the call
+    again after waiting for the leader. Result and lock files older than
+    ``result_ttl`` seconds are deleted.
+
+    Shared results are users' health data, so the directory is restricted
+    to the owner (0700) and every file in it is created 0600.
+    """
+
+    def __init__(self, lock_dir=None, max_shared_bytes=4 * 1024 * 1024, result_ttl=60):
+        self.lock_dir = lock_dir if fcntl is not None else None
+        self.max_shared_bytes = max_shared_bytes
+        self.result_ttl = result_ttl
+        self._last_expiry = None
+        self._lock = threading.Lock()
+        self._calls = {}
+        self._stats = {
+            "calls": 0,
+            "executions": 0,
+            "coalesced": 0,
+            "coalesced_across_workers": 0,
+        }
+
+        if self.lock_dir:
+            os.makedirs(self.lock_dir, mode=0o700, exist_ok=True)
+            os.chmod(self.lock_dir, 0o700)
+
+    def do(self, key, fn, *args, **kwargs):
+        """Run ``fn(*args, **kwargs)`` unless a call for ``key`` is in flight"""
+        return self._coalesce(key, lambda: self._run(fn, args, kwargs))
+
+    def do_shared(self, key, fn, *args, **kwargs):
+        """Like ``do``, also sharing the JSON result of ``fn`` across workers"""
+        return self._coalesce(key, lambda: self._execute(key, fn, args, kwargs))
+
+    def _coalesce(self, key, execute):
+        with self._lock:
+            self._stats["calls"] += 1
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+            else:
+                self._stats["coalesced"] += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = execute()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    def stats(self):
+        """Return a snapshot of the coalescing counters"""
+        with self._lock:
+            return dict(self._stats, in_flight=len(self._calls))
+
+    def _execute(self, key, fn, args, kwargs):
+        if not self.lock_dir:
+            return self._run(fn, args, kwargs)
+
+        digest = hashlib.sha256(repr(key).encode("utf-8")).hexdigest()
+        base = os.path.join(self.lock_dir, digest)
+        waiting_since = time.time()
+
+        try:
+            with self._file_lock(base + ".lock"):
+                # Another worker finished the same call while we were waiting
+                shared = self._read_result(base + ".result", waiting_since)
+                if shared is not None:
+                    with self._lock:
+                        self._stats["coalesced_across_workers"] += 1
+                    return shared[0]
+
+                result = self._run(fn, args, kwargs)
+                self._write_result(base + ".result", result)
+                return result
+        finally:
+            self._expire_results()
+
+    @contextmanager
+    def _file_lock(self, path):
+        """Hold an exclusive lock on path, retrying if it was expired meanwhile"""
+        while True:
+            fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX)
+                try:
+                    current = os.stat(path).st_ino == os.fstat(fd).st_ino
+                except FileNotFoundError:
+                    current = False
+                if current:
+                    # Keep a lock in use from looking expired
+                    os.utime(path)
+                    yield
+                    return
+            finally:
+                os.close(fd)
+
+    def _run(self, fn, args, kwargs):
+        with self._lock:
+            self._stats["executions"] += 1
+        return fn(*args, **kwargs)
+
+    @staticmethod
+    def _read_result(path, newer_than):
+        try:
+            if os.path.getmtime(path) < newer_than:
+                return None
+            with open(path, "rb") as f:
+                shared = json.load(f)
+            value = shared["value"]
+            return (tuple(value) if shared["tuple"] else value,)
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+
+    def _write_result(self, path, result):
+        # Only JSON data is shared, so followers never load code or objects
+        try:
+            shared = dict(tuple=isinstance(result, tuple), value=result)
+            data = json.dumps(shared, separators=(",", ":")).encode("utf-8")
+        except (TypeError, ValueError):
+            return
+        if len(data) > self.max_shared_bytes:
+            return
+
+        fd, tmp_path = tempfile.mkstemp(dir=self.lock_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except OSError:
+            # Results that can't be shared are still returned to this worker
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def _expire_results(self):
+        """Delete result and lock files older than result_ttl, once per ttl"""
+        now = time.time()
+        with self._lock:
+            last = self._last_expiry
+            if last is not None and now - last < self.result_ttl:
+                return
+            self._last_expiry = now
+
+        for entry in os.scandir(self.lock_dir):
+            if not entry.name.endswith((".result", ".tmp", ".lock")):
+                continue
+            try:
+                if now - entry.stat().st_mtime <= self.result_ttl:
+                    continue
+                if entry.name.endswith(".lock"):
+                    self._remove_idle_lock(entry.path)
+                else:
+                    os.remove(entry.path)
+            except OSError:
+                # Already removed by another worker
+                pass
+
+    @staticmethod
+    def _remove_idle_lock(path):
+        """Delete a lock file unless some worker holds it
+
+        Workers already waiting on it notice the file is gone once they get
+        the lock and take a fresh one (see ``_file_lock``).
+        """
+        fd = os.open(path, os.O_RDWR)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            os.remove(path)
+        except BlockingIOError:
+            pass
+        finally:
+            os.close(fd)
@@ -0,0 +1,187 @@
+import ctypes
+import ctypes.util
+import gc
+import os
+import signal
+import threading
+import time
+from collections import deque
+from functools import lru_cache, partial
+
+from flask import request
+
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+def mib(size_kb):
+    return None if size_kb is None else round(size_kb / 1024, 1)
+
+
+def current_rss_kb():
+    """Resident set size of this process in KiB, or None where /proc is missing"""
+    try:
+        with open("/proc/self/statm") as statm:
+            pages = int(statm.read().split()[1])
+    except (OSError, IndexError, ValueError):
+        return None
+    return pages * PAGE_SIZE // 1024
+
+
+@lru_cache(maxsize=None)
+def _malloc_trim():
+    try:
+        return ctypes.CDLL(ctypes.util.find_library("c")).malloc_trim
+    except (OSError, AttributeError, TypeError):
+        return None
+
+
+def release_memory():
+    """Collect garbage and return free heap pages to the OS where glibc can"""
+    gc.collect()
+    trim = _malloc_trim()
+    if trim is not None:
+        trim(0)
+
+
+class MemoryWatchdog:
+    """Track this worker's RSS after each request and recycle it when too big
+
+    RSS is read once each response has been sent, and sampled into a
+    bounded history at most every ``sample_seconds``. Above ``limit_mb``
+    the worker first collects garbage and trims the heap, at most once per
+    ``trim_seconds``; if it is still above the limit it sends itself
+    SIGTERM, which Gunicorn handles by finishing the requests in progress
+    and starting a fresh worker. Other servers would stop altogether, so
+    under them a breach is only logged. A limit of 0 only tracks RSS.
+    """
+
+    def __init__(
+        self,
+        limit_mb=0,
+        sample_seconds=10,
+        history=360,
+        trim_seconds=60,
+        logger=None,
+    ):
+        self.limit_kb = limit_mb * 1024
+        self.sample_seconds = sample_seconds
+        self.trim_seconds = trim_seconds
+        self.logger = logger
+        self.samples = deque(maxlen=history)
+        self.started = time.time()
+        self.requests = 0
+        self.trims = 0
+        self.rss_kb = None
+        self.peak_kb = None
+        self.recycle_requested = False
+        self._last_sample = None
+        self._last_trim = None
+        self._lock = threading.Lock()
+
+    def after_request(self, response):
+        server = request.environ.get("SERVER_SOFTWARE", "")
+        response.call_on_close(partial(self.check, server.startswith("gunicorn")))
+        return response
+
+    def check(self, can_recycle=False):
+        """Record the current RSS and act on a breach of the limit"""
+        rss = current_rss_kb()
+        if rss is None:
+            return
+        now = time.time()
+
+        with self._lock:
+            self.requests += 1
+            self.rss_kb = rss
+            self.peak_kb = max(self.peak_kb or 0, rss)
+            if (
+                self._last_sample is None
+                or now - self._last_sample >= self.sample_seconds
+            ):
+                self.samples.append((now, rss, self.requests))
+                self._last_sample = now
+
+            if not self.limit_kb or rss <= self.limit_kb or self.recycle_requested:
+                return
+            trim = self._last_trim is None or now - self._last_trim >= self.trim_seconds
+            if trim:
+                self._last_trim = now
+                self.trims += 1
+
+        if trim:
+            release_memory()
+            trimmed = current_rss_kb()
+            if trimmed is None:
+                return
+            self._log(
+                "info", "Trimmed the heap: RSS %s MiB -> %s MiB", mib(rss), mib(trimmed)
+            )
+            if trimmed <= self.limit_kb:
+                return
+            rss = trimmed
+        self.recycle(rss, can_recycle)
+
+    def recycle(self, rss, can_recycle):
+        """Ask the server to replace this worker, once"""
+        with self._lock:
+            if self.recycle_requested:
+                return
+            self.recycle_requested = True
+            self.samples.append((time.time(), rss, self.requests))
+
+        if not can_recycle:
+            self._log(
+                "warning",
+                "RSS %s MiB is above the limit of %s MiB; not running under "
+                "Gunicorn, so the worker is not recycled",
+                mib(rss),
+                mib(self.limit_kb),
+            )
+            return
+        self._log(
+            "warning",
+            "Recycling worker %d after %d requests: RSS %s MiB is above the limit "
+            "of %s MiB",
+            os.getpid(),
+            self.requests,
+            mib(rss),
+            mib(self.limit_kb),
+        )
+        os.kill(os.getpid(), signal.SIGTERM)
+
+    def _log(self, level, message, *args):
+        if self.logger is not None:
+            getattr(self.logger, level)(message, *args)
+
+    def stats(self):
+        with self._lock:
+            return dict(
+                pid=os.getpid(),
+                limit_mb=mib(self.limit_kb) or None,
+                rss_mb=mib(self.rss_kb),
+                peak_mb=mib(self.peak_kb),
+                requests=self.requests,
+                trims=self.trims,
+                recycle_requested=self.recycle_requested,
+                uptime_seconds=round(time.time() - self.started, 1),
+            )
+
+    def history(self):
+        """RSS samples, oldest first"""
+        with self._lock:
+            return [
+                dict(time=round(sampled, 3), rss_mb=mib(rss), requests=requests)
+                for sampled, rss, requests in self.samples
+            ]
+
+
+def init_memory_watchdog(app):
+    """Register the watchdog; it reads RSS after every response"""
+    watchdog = MemoryWatchdog(
+        app.config["MEMORY_WATCHDOG_LIMIT_MB"],
+        sample_seconds=app.config["MEMORY_WATCHDOG_SAMPLE_SECONDS"],
+        history=app.config["MEMORY_WATCHDOG_HISTORY"],
+        logger=app.logger,
+    )
+    app.extensions["memory_watchdog"] = watchdog
+    app.after_request(watchdog.after_request)
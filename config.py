@@ -1,4 +1,5 @@
 import os
+import tempfile
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -8,6 +9,180 @@ class Config:
     SECRET_KEY = os.environ.get("SECRET_KEY") or os.urandom(24)
     API_BASE_URL = os.environ.get("API_BASE_URL") or "http://localhost:8080"
 
+    # Backend timeouts (seconds) and the circuit breaker around backend calls
+    API_CONNECT_TIMEOUT = float(os.environ.get("API_CONNECT_TIMEOUT") or 3.05)
+    API_READ_TIMEOUT = float(os.environ.get("API_READ_TIMEOUT") or 15)
+    BREAKER_FAILURE_RATE = float(os.environ.get("BREAKER_FAILURE_RATE") or 0.5)
+    BREAKER_SLOW_CALL_RATE = float(os.environ.get("BREAKER_SLOW_CALL_RATE") or 0.5)
+    BREAKER_SLOW_CALL_SECONDS = float(os.environ.get("BREAKER_SLOW_CALL_SECONDS") or 5)
+    BREAKER_MIN_CALLS = int(os.environ.get("BREAKER_MIN_CALLS") or 10)
+    BREAKER_WINDOW_SECONDS = float(os.environ.get("BREAKER_WINDOW_SECONDS") or 60)
+    BREAKER_OPEN_SECONDS = float(os.environ.get("BREAKER_OPEN_SECONDS") or 30)
+
+    # Serve cached datasets for this long, then stale while refreshing them
+    DATASETS_FRESH_SECONDS = float(os.environ.get("DATASETS_FRESH_SECONDS") or 30)
+    DATASETS_MAX_STALE_SECONDS = float(
+        os.environ.get("DATASETS_MAX_STALE_SECONDS") or 3600
+    )
+    # Total estimated memory of the cached datasets, across all users
+    DATASETS_CACHE_MAX_BYTES = int(
+        os.environ.get("DATASETS_CACHE_MAX_BYTES") or 256 * 1024 * 1024
+    )
+
+    # Server-side session storage: "sqlite", "redis" or "cookie"
+    SESSION_BACKEND = os.environ.get("SESSION_BACKEND") or "sqlite"
+    SESSION_SQLITE_PATH = os.environ.get("SESSION_SQLITE_PATH") or os.path.join(
+        tempfile.gettempdir(), "areum-sessions.sqlite3"
+    )
+    SESSION_REDIS_URL = (
+        os.environ.get("SESSION_REDIS_URL") or "redis://localhost:6379/0"
+    )
+
+    # Share identical concurrent backend fetches across workers via file locks;
+    # the directory holds health data and is made private to the app's user
+    SINGLE_FLIGHT_LOCK_DIR = os.environ.get("SINGLE_FLIGHT_LOCK_DIR")
+
+    # Storage for processed frames: "float64", or compact "float32"/"int16"
+    FRAME_PRECISION = os.environ.get("FRAME_PRECISION") or "float64"
+
+    # Library doing the processing stage: "pandas", "numpy" or "polars" (which
+    # needs the polars package); all produce the same frames and metrics
+    COMPUTE_BACKEND = os.environ.get("COMPUTE_BACKEND") or "pandas"
+
+    # Processed frames cached on disk in a compact, block-compressed encoding
+    # (disabled when unset). Values are stored exactly; a FRAME_STORE_QUANTUM
+    # in g, e.g. 1e-4, rounds them to that step for smaller files, which
+    # changes metrics by up to half a step. Frames are deleted once
+    # FRAME_STORE_MAX_AGE_SECONDS old, oldest first above FRAME_STORE_MAX_BYTES
+    FRAME_STORE_DIR = os.environ.get("FRAME_STORE_DIR")
+    FRAME_STORE_QUANTUM = float(os.environ.get("FRAME_STORE_QUANTUM") or 0)
+    FRAME_STORE_MAX_AGE_SECONDS = float(
+        os.environ.get("FRAME_STORE_MAX_AGE_SECONDS") or 7 * 24 * 3600
+    )
+    FRAME_STORE_MAX_BYTES = int(
+        os.environ.get("FRAME_STORE_MAX_BYTES") or 1024 * 1024 * 1024
+    )
+
+    # Interpolate recordings onto a uniform grid at their sampling rate; steps
+    # longer than GAP_FACTOR sampling periods are reported as gaps either way
+    RESAMPLE_UNIFORM_GRID = (
+        os.environ.get("RESAMPLE_UNIFORM_GRID", "false").lower() == "true"
+    )
+    GAP_FACTOR = float(os.environ.get("GAP_FACTOR") or 1.5)
+
+    # Spectrogram window length (samples) and heatmap cell budget
+    SPECTROGRAM_WINDOW = int(os.environ.get("SPECTROGRAM_WINDOW") or 256)
+    SPECTROGRAM_MAX_CELLS = int(os.environ.get("SPECTROGRAM_MAX_CELLS") or 20000)
+
+    # Directory persisting step and activity-bout indexes per dataset, shared
+    # by workers (kept in memory only when unset). Index files are deleted
+    # once EVENT_INDEX_MAX_AGE_SECONDS old, oldest first above EVENT_INDEX_MAX_BYTES
+    EVENT_INDEX_DIR = os.environ.get("EVENT_INDEX_DIR")
+    EVENT_INDEX_MAX_AGE_SECONDS = float(
+        os.environ.get("EVENT_INDEX_MAX_AGE_SECONDS") or 7 * 24 * 3600
+    )
+    EVENT_INDEX_MAX_BYTES = int(
+        os.environ.get("EVENT_INDEX_MAX_BYTES") or 256 * 1024 * 1024
+    )
+
+    # Recordings above this many samples are processed in chunks, so no frame
+    # of the whole recording is built (their decoded samples are still cached)
+    CHUNKED_PROCESSING_THRESHOLD = int(
+        os.environ.get("CHUNKED_PROCESSING_THRESHOLD") or 500000
+    )
+    PROCESSING_CHUNK_SIZE = int(os.environ.get("PROCESSING_CHUNK_SIZE") or 50000)
+    CHUNKED_MAX_POINTS = int(os.environ.get("CHUNKED_MAX_POINTS") or 20000)
+
+    # Request threads per worker, as set for Gunicorn in gunicorn.conf.py
+    WORKER_THREADS = int(os.environ.get("GUNICORN_THREADS") or 4)
+
+    # Admission control per worker: concurrent dashboard renders per user,
+    # render slots and a bounded queue for recordings above
+    # ADMISSION_HEAVY_SAMPLES, and downsampled renders once
+    # ADMISSION_DEGRADE_DEPTH renders are queued. Queued renders each hold a
+    # thread, so the defaults split the worker's threads between the two
+    ADMISSION_MAX_PER_USER = int(os.environ.get("ADMISSION_MAX_PER_USER") or 2)
+    ADMISSION_HEAVY_SAMPLES = int(os.environ.get("ADMISSION_HEAVY_SAMPLES") or 100000)
+    ADMISSION_HEAVY_SLOTS = int(
+        os.environ.get("ADMISSION_HEAVY_SLOTS") or max(1, WORKER_THREADS // 2)
+    )
+    ADMISSION_QUEUE_SIZE = int(
+        os.environ.get("ADMISSION_QUEUE_SIZE")
+        or max(1, WORKER_THREADS - ADMISSION_HEAVY_SLOTS)
+    )
+    ADMISSION_DEGRADE_DEPTH = int(
+        os.environ.get("ADMISSION_DEGRADE_DEPTH") or max(1, ADMISSION_QUEUE_SIZE // 2)
+    )
+    ADMISSION_QUEUE_TIMEOUT = float(os.environ.get("ADMISSION_QUEUE_TIMEOUT") or 30)
+    ADMISSION_DEGRADED_MAX_POINTS = int(
+        os.environ.get("ADMISSION_DEGRADED_MAX_POINTS") or 2000
+    )
+
+    # Imported recordings are validated and sent to the backend in batches of
+    # UPLOAD_BATCH_SIZE samples; up to UPLOAD_MAX_ERRORS bad rows are listed
+    API_UPLOAD_PATH = (
+        os.environ.get("API_UPLOAD_PATH") or "/health/upload_acceleration_data"
+    )
+    UPLOAD_BATCH_SIZE = int(os.environ.get("UPLOAD_BATCH_SIZE") or 5000)
+    UPLOAD_MAX_ERRORS = int(os.environ.get("UPLOAD_MAX_ERRORS") or 20)
+
+    # Datasets rendered per /sync request for the browser's local cache, and
+    # /sync requests per page load; the rest follow on later visits
+    SYNC_MAX_DATASETS = int(os.environ.get("SYNC_MAX_DATASETS") or 3)
+    SYNC_MAX_ROUNDS = int(os.environ.get("SYNC_MAX_ROUNDS") or 1)
+
+    # Chart rendering: "auto" switches to WebGL above CHART_WEBGL_THRESHOLD points
+    CHART_RENDER_MODE = os.environ.get("CHART_RENDER_MODE") or "auto"
+    CHART_WEBGL_THRESHOLD = int(os.environ.get("CHART_WEBGL_THRESHOLD") or 20000)
+
+    # "lean" encodes figures directly, "plotly" goes through plotly.offline.plot
+    CHART_SERIALIZER = os.environ.get("CHART_SERIALIZER") or "lean"
+
+    # Import pandas/numpy/plotly at startup (for gunicorn --preload)
+    PRELOAD_HEAVY_MODULES = (
+        os.environ.get("PRELOAD_HEAVY_MODULES", "false").lower() == "true"
+    )
+
+    # plotly.js bundle: "full", or a partial "basic", "cartesian" or "gl2d" build
+    PLOTLY_BUNDLE = os.environ.get("PLOTLY_BUNDLE") or "full"
+
+    # Load assets from the CDN when they haven't been vendored locally; off by
+    # default, so pages never depend on a third party without opting in
+    ASSET_CDN_FALLBACK = os.environ.get("ASSET_CDN_FALLBACK", "false").lower() == "true"
+
+    # Response compression (gzip, plus brotli when installed)
+    COMPRESS_RESPONSES = os.environ.get("COMPRESS_RESPONSES", "true").lower() == "true"
+    COMPRESS_MIN_SIZE = int(os.environ.get("COMPRESS_MIN_SIZE") or 1024)
+    COMPRESS_LEVEL = int(os.environ.get("COMPRESS_LEVEL") or 6)
+
+    # Rendered dashboard pages kept with their compressed variants
+    PAYLOAD_CACHE_MAX_BYTES = int(
+        os.environ.get("PAYLOAD_CACHE_MAX_BYTES") or 64 * 1024 * 1024
+    )
+
+    # Fraction of dashboard requests profiled with cProfile (0 disables sampling);
+    # requests carrying a signed _profile token are always profiled
+    PROFILE_SAMPLE_RATE = float(os.environ.get("PROFILE_SAMPLE_RATE") or 0)
+    PROFILE_MAX_STORED = int(os.environ.get("PROFILE_MAX_STORED") or 50)
+    PROFILE_TOKEN_MAX_AGE = int(os.environ.get("PROFILE_TOKEN_MAX_AGE") or 3600)
+
+    # Trace allocations of dashboard requests per pipeline stage (tracemalloc
+    # slows requests down noticeably, so only enable it while investigating)
+    MEMORY_PROFILING = os.environ.get("MEMORY_PROFILING", "false").lower() == "true"
+    MEMORY_PROFILE_FRAMES = int(os.environ.get("MEMORY_PROFILE_FRAMES") or 1)
+
+    # Recycle a Gunicorn worker whose RSS stays above this after a request,
+    # even once the heap is trimmed (0 only tracks RSS); RSS is sampled into
+    # a history of MEMORY_WATCHDOG_HISTORY entries every few seconds
+    MEMORY_WATCHDOG_LIMIT_MB = int(os.environ.get("MEMORY_WATCHDOG_LIMIT_MB") or 0)
+    MEMORY_WATCHDOG_SAMPLE_SECONDS = float(
+        os.environ.get("MEMORY_WATCHDOG_SAMPLE_SECONDS") or 10
+    )
+    MEMORY_WATCHDOG_HISTORY = int(os.environ.get("MEMORY_WATCHDOG_HISTORY") or 360)
+
+    # Token required by the internal diagnostics endpoints
+    DIAGNOSTICS_TOKEN = os.environ.get("DIAGNOSTICS_TOKEN")
+
 
 class DevelopmentConfig(Config):
     DEBUG = True
@@ -17,6 +192,7 @@ class DevelopmentConfig(Config):
 class TestingConfig(Config):
     DEBUG = True
     TESTING = True
+    DIAGNOSTICS_TOKEN = "test-diagnostics-token"
 
 
 class ProductionConfig(Config):
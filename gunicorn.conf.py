@@ -0,0 +1,9 @@
+import os
+
+bind = os.environ.get("GUNICORN_BIND", "0.0.0.0:5000")
+workers = int(os.environ.get("GUNICORN_WORKERS", "2"))
+threads = int(os.environ.get("GUNICORN_THREADS", "4"))
+
+# With PRELOAD_HEAVY_MODULES the app (and pandas/numpy/plotly) is imported
+# once in the master and shared copy-on-write by the forked workers
+preload_app = os.environ.get("PRELOAD_HEAVY_MODULES", "false").lower() == "true"
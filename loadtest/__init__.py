@@ -0,0 +1 @@
+"""Local load-testing harness: a stub Areum backend and a load generator"""
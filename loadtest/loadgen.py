@@ -0,0 +1,306 @@
+"""Concurrent load generator for the visualization app
+
+Each virtual user logs in, opens the dashboard and then keeps switching
+between its datasets until the run ends. The report covers throughput,
+latency percentiles per step and the peak RSS of the server processes.
+
+Run ``python -m loadtest`` to start the stub backend and a Gunicorn server
+on this machine and drive them, or pass ``--app-url`` to target a running
+app (with ``--pid`` for RSS sampling).
+"""
+
+import argparse
+import json
+import os
+import re
+import signal
+import socket
+import subprocess
+import sys
+import threading
+import time
+from collections import defaultdict
+
+import requests
+
+from .stub_backend import create_stub_app, serve_in_thread
+from .synthetic import PROFILES
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+DATASET_OPTION_RE = re.compile(r'<option value="([^"]+)"')
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a list of numbers"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, -(-len(ordered) * pct // 100))
+    return ordered[int(rank) - 1]
+
+
+def rss_kb(pid):
+    """Resident set size of a process in KiB, or None if it is gone"""
+    try:
+        with open(f"/proc/{pid}/status") as status:
+            for line in status:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+
+def process_tree(pid):
+    """A process and all of its descendants (Gunicorn master and workers)"""
+    pids = [pid]
+    for current in pids:
+        try:
+            tasks = os.listdir(f"/proc/{current}/task")
+        except OSError:
+            continue
+        for task in tasks:
+            try:
+                with open(f"/proc/{current}/task/{task}/children") as children:
+                    pids.extend(int(child) for child in children.read().split())
+            except OSError:
+                pass
+    return pids
+
+
+class RssSampler:
+    """Track the peak RSS of a process tree from a background thread"""
+
+    def __init__(self, pid, interval=0.5):
+        self.pid = pid
+        self.interval = interval
+        self.peaks = {}
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.sample()
+            self._stop.wait(self.interval)
+
+    def sample(self):
+        for pid in process_tree(self.pid):
+            rss = rss_kb(pid)
+            if rss is not None:
+                self.peaks[pid] = max(rss, self.peaks.get(pid, 0))
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        self.sample()
+        return self.peaks
+
+
+def virtual_user(app_url, number, deadline, record):
+    """Drive one session through login, dashboard and dataset switching"""
+    client = requests.Session()
+
+    def step(name, method, path, **kwargs):
+        started = time.perf_counter()
+        try:
+            response = client.request(method, app_url + path, timeout=60, **kwargs)
+            ok = response.status_code == 200
+        except requests.RequestException:
+            response, ok = None, False
+        record(name, time.perf_counter() - started, ok)
+        return response
+
+    response = step(
+        "login",
+        "POST",
+        "/login",
+        data={"username": f"load-user-{number}", "password": "load-test-pass"},
+    )
+    if response is None or "/login" in response.url:
+        return
+
+    dataset_ids = DATASET_OPTION_RE.findall(response.text)
+    while time.monotonic() < deadline:
+        for dataset_id in dataset_ids or [None]:
+            if time.monotonic() >= deadline:
+                break
+            params = {"dataset": dataset_id} if dataset_id else None
+            step("switch_dataset", "GET", "/", params=params)
+
+
+def run_load(app_url, users=10, duration=30.0, pid=None, ramp_up=0.0):
+    """Run concurrent virtual users against app_url and summarize the run"""
+    latencies = defaultdict(list)
+    errors = defaultdict(int)
+    lock = threading.Lock()
+
+    def record(name, seconds, ok):
+        with lock:
+            latencies[name].append(seconds)
+            if not ok:
+                errors[name] += 1
+
+    sampler = RssSampler(pid).start() if pid else None
+    started = time.monotonic()
+    deadline = started + duration
+    threads = []
+
+    for number in range(users):
+        thread = threading.Thread(
+            target=virtual_user, args=(app_url, number, deadline, record)
+        )
+        thread.start()
+        threads.append(thread)
+        if ramp_up:
+            time.sleep(ramp_up / users)
+
+    for thread in threads:
+        thread.join()
+
+    elapsed = time.monotonic() - started
+    peaks = sampler.stop() if sampler else {}
+    return summarize(latencies, errors, elapsed, users, peaks)
+
+
+def summarize(latencies, errors, elapsed, users, rss_peaks):
+    """Build the report dict from raw per-step latencies"""
+
+    def stats(values):
+        return {
+            "count": len(values),
+            "p50_ms": round(percentile(values, 50) * 1000, 1),
+            "p90_ms": round(percentile(values, 90) * 1000, 1),
+            "p99_ms": round(percentile(values, 99) * 1000, 1),
+            "max_ms": round(max(values) * 1000, 1),
+        }
+
+    everything = [value for values in latencies.values() for value in values]
+    return {
+        "users": users,
+        "seconds": round(elapsed, 2),
+        "requests": len(everything),
+        "errors": sum(errors.values()),
+        "throughput_rps": round(len(everything) / elapsed, 1) if elapsed else 0,
+        "latency": stats(everything) if everything else None,
+        "steps": {
+            name: dict(stats(values), errors=errors[name])
+            for name, values in sorted(latencies.items())
+        },
+        "rss_peak_kb": {str(pid): rss for pid, rss in sorted(rss_peaks.items())},
+        "rss_peak_total_kb": sum(rss_peaks.values()),
+    }
+
+
+def format_report(report):
+    """Render a report as a short plain-text table"""
+    lines = [
+        f"{report['users']} users, {report['seconds']}s: "
+        f"{report['requests']} requests, {report['errors']} errors, "
+        f"{report['throughput_rps']} req/s",
+        f"{'step':<16}{'count':>8}{'p50':>10}{'p90':>10}{'p99':>10}{'max':>10}",
+    ]
+    rows = dict(report["steps"])
+    if report["latency"]:
+        rows["all"] = report["latency"]
+    for name, stats in rows.items():
+        lines.append(
+            f"{name:<16}{stats['count']:>8}{stats['p50_ms']:>8}ms"
+            f"{stats['p90_ms']:>8}ms{stats['p99_ms']:>8}ms{stats['max_ms']:>8}ms"
+        )
+    for pid, rss in report["rss_peak_kb"].items():
+        lines.append(f"peak RSS pid {pid}: {rss / 1024:.1f} MiB")
+    if report["rss_peak_kb"]:
+        lines.append(f"peak RSS total: {report['rss_peak_total_kb'] / 1024:.1f} MiB")
+    return "\n".join(lines)
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(server, api_base_url, workers, env=None):
+    """Start the app under Gunicorn or the Werkzeug dev server
+
+    Returns ``(process, app_url)`` once the login page responds.
+    """
+    port = free_port()
+    env = dict(
+        os.environ,
+        API_BASE_URL=api_base_url,
+        GUNICORN_BIND=f"127.0.0.1:{port}",
+        GUNICORN_WORKERS=str(workers),
+        **(env or {}),
+    )
+    if server == "gunicorn":
+        command = [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py"]
+        command.append("run:app")
+    else:
+        command = [sys.executable, "-m", "flask", "--app", "run:app", "run"]
+        command += ["--port", str(port), "--with-threads", "--no-reload"]
+
+    process = subprocess.Popen(command, cwd=ROOT, env=env)
+    app_url = f"http://127.0.0.1:{port}"
+
+    for _ in range(300):
+        if process.poll() is not None:
+            raise RuntimeError(f"{server} exited with status {process.returncode}")
+        try:
+            requests.get(app_url + "/login", timeout=1)
+            return process, app_url
+        except requests.RequestException:
+            time.sleep(0.1)
+
+    process.terminate()
+    raise RuntimeError(f"{server} did not start listening on {app_url}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--app-url", help="Target a running app instead")
+    parser.add_argument("--pid", type=int, help="Server pid to sample RSS from")
+    parser.add_argument("--server", choices=["gunicorn", "werkzeug"])
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--users", type=int, default=10)
+    parser.add_argument("--duration", type=float, default=30)
+    parser.add_argument("--ramp-up", type=float, default=0)
+    parser.add_argument("--datasets", type=int, default=3)
+    parser.add_argument("--samples", type=int, default=3000)
+    parser.add_argument("--latency-ms", type=float, default=50)
+    parser.add_argument("--jitter-ms", type=float, default=0)
+    parser.add_argument("--profile", choices=sorted(PROFILES), default="mixed")
+    parser.add_argument("--json", action="store_true", help="Print JSON")
+    args = parser.parse_args(argv)
+
+    process = None
+    app_url, pid = args.app_url, args.pid
+    if not app_url:
+        stub = serve_in_thread(
+            create_stub_app(
+                args.datasets,
+                args.samples,
+                args.latency_ms,
+                args.jitter_ms,
+                args.profile,
+            )
+        )
+        server = args.server or "gunicorn"
+        process, app_url = start_server(
+            server, f"http://127.0.0.1:{stub.server_port}", args.workers
+        )
+        pid = process.pid
+
+    try:
+        report = run_load(app_url, args.users, args.duration, pid, args.ramp_up)
+    finally:
+        if process is not None:
+            process.send_signal(signal.SIGTERM)
+            process.wait(timeout=30)
+
+    print(json.dumps(report, indent=2) if args.json else format_report(report))
+    return 1 if report["errors"] else 0
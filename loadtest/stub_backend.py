@@ -0,0 +1,171 @@
+"""Stand-in for the Areum backend used by the load generator
+
+Implements ``/login``, ``/register_user``, ``/health/acceleration_data``
+and ``/health/upload_acceleration_data`` with synthetic acceleration data of
+configurable size and an injected response latency. Run it with
+``python -m loadtest.stub_backend``.
+"""
+
+import argparse
+import base64
+import json
+import random
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+from flask import Flask, Response, jsonify, request
+from werkzeug.serving import make_server
+
+from .synthetic import DEFAULT_START, PROFILES, make_recording
+
+TOKEN_LIFETIME = 3600
+
+
+def make_token(username, lifetime=TOKEN_LIFETIME):
+    """Build an unsigned JWT-shaped token carrying the username and expiry"""
+
+    def encode(part):
+        raw = json.dumps(part, separators=(",", ":")).encode("utf-8")
+        return base64.urlsafe_b64encode(raw).rstrip(b"=").decode("ascii")
+
+    claims = {"sub": username, "exp": int(time.time()) + lifetime}
+    return f"{encode({'alg': 'none', 'typ': 'JWT'})}.{encode(claims)}.stub"
+
+
+def make_datasets(count=3, samples=3000, rate_hz=50, seed=0, profile="mixed"):
+    """Generate acceleration datasets in the backend's response format
+
+    Recordings are synthetic (see ``loadtest.synthetic``), a day apart and
+    evenly sampled.
+    """
+    return [
+        make_recording(
+            samples / rate_hz,
+            rate_hz,
+            profile,
+            seed + number,
+            start=DEFAULT_START + timedelta(days=number),
+            dataset_id=f"stub-dataset-{number}",
+            device_info={"device_type": "iPhone", "model": "Stub"},
+        )
+        for number in range(count)
+    ]
+
+
+def create_stub_app(
+    datasets=3, samples=3000, latency_ms=0, jitter_ms=0, profile="mixed"
+):
+    """Create the stub backend
+
+    Every request sleeps for ``latency_ms`` plus up to ``jitter_ms`` before
+    answering. Any non-empty username/password logs in; the data endpoint
+    serves the same pre-encoded payload to every authenticated user, which
+    includes recordings uploaded since the stub started.
+    """
+    app = Flask(__name__)
+    users = {}
+    uploads = {}
+    lock = threading.Lock()
+
+    recordings = make_datasets(datasets, samples, profile=profile)
+
+    def encode(recordings):
+        return json.dumps({"status": "success", "data": recordings}).encode("utf-8")
+
+    payload = {"body": encode(recordings)}
+
+    @app.before_request
+    def inject_latency():
+        delay = latency_ms + random.uniform(0, jitter_ms)
+        if delay > 0:
+            time.sleep(delay / 1000)
+
+    @app.route("/login", methods=["POST"])
+    def login():
+        credentials = request.get_json(silent=True) or {}
+        if not credentials.get("username") or not credentials.get("password"):
+            return jsonify(message="Invalid credentials"), 401
+        return jsonify(token=make_token(credentials["username"]))
+
+    @app.route("/register_user", methods=["POST"])
+    def register_user():
+        details = request.get_json(silent=True) or {}
+        username = details.get("username")
+        if not username:
+            return jsonify(message="Username is required"), 400
+
+        with lock:
+            if username in users:
+                return jsonify(message="Username or email already exists"), 409
+            users[username] = details.get("email")
+        return jsonify(status="success")
+
+    @app.route("/health/acceleration_data")
+    def acceleration_data():
+        if not request.headers.get("Authorization", "").startswith("Bearer "):
+            return jsonify(status="error", message="Unauthorized"), 401
+        return Response(payload["body"], mimetype="application/json")
+
+    @app.route("/health/upload_acceleration_data", methods=["POST"])
+    def upload_acceleration_data():
+        if not request.headers.get("Authorization", "").startswith("Bearer "):
+            return jsonify(status="error", message="Unauthorized"), 401
+        batch = request.get_json(silent=True) or {}
+        if not batch.get("upload_id") or not isinstance(batch.get("samples"), list):
+            return jsonify(status="error", message="Invalid upload batch"), 400
+
+        with lock:
+            received = uploads.setdefault(batch["upload_id"], [])
+            received.extend(batch["samples"])
+            if not batch.get("final"):
+                return jsonify(status="success", data={})
+
+            del uploads[batch["upload_id"]]
+            received.sort(key=lambda sample: sample["timestamp"])
+            dataset = {
+                "id": f"upload-{batch['upload_id']}",
+                "data_type": batch.get("data_type", "acceleration"),
+                "device_info": batch.get("device_info", {}),
+                "sampling_rate_hz": batch.get("sampling_rate_hz"),
+                "start_time": received[0]["timestamp"] if received else None,
+                "created_at": datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+                "data": {"samples": received},
+            }
+            recordings.append(dataset)
+            payload["body"] = encode(recordings)
+        return jsonify(status="success", data={"id": dataset["id"]})
+
+    return app
+
+
+def serve_in_thread(app, host="127.0.0.1", port=0):
+    """Serve a WSGI app from a background thread
+
+    Returns the server; its base URL is ``http://host:server.server_port``.
+    """
+    server = make_server(host, port, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--datasets", type=int, default=3)
+    parser.add_argument("--samples", type=int, default=3000)
+    parser.add_argument("--latency-ms", type=float, default=0)
+    parser.add_argument("--jitter-ms", type=float, default=0)
+    parser.add_argument("--profile", choices=sorted(PROFILES), default="mixed")
+    args = parser.parse_args(argv)
+
+    app = create_stub_app(
+        args.datasets, args.samples, args.latency_ms, args.jitter_ms, args.profile
+    )
+    print(f"Stub backend listening on http://{args.host}:{args.port}")
+    make_server(args.host, args.port, app, threaded=True).serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,348 @@
+"""Deterministic synthetic acceleration recordings for tests and benchmarks
+
+Recordings are built from a seed in the backend's response format, from
+seconds to days long at any sampling rate. They alternate rest, walking,
+running and short bursts of movement, and can carry timestamp jitter,
+dropouts and out-of-order samples. Samples are generated with NumPy in
+fixed-size blocks, so long recordings are written to a file in constant
+memory. Run ``python -m loadtest.synthetic --help`` to write fixture files.
+"""
+
+import argparse
+import csv
+import json
+import re
+import sys
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+
+DEFAULT_START = datetime(2025, 3, 10, 12, 0, tzinfo=timezone.utc)
+
+DEVICE_INFO = {"device_type": "iPhone", "model": "Synthetic"}
+
+# Samples generated at a time; each block has its own random stream, so
+# changing this changes every recording
+BLOCK_SIZE = 65536
+
+# Cadence in Hz, vertical amplitude in g and sensor noise in g of each
+# activity; cadence and amplitude are drawn per segment from these ranges
+ACTIVITIES = {
+    "rest": dict(cadence=(0.0, 0.0), amplitude=(0.0, 0.0), noise=0.01),
+    "walk": dict(cadence=(1.6, 2.1), amplitude=(0.25, 0.45), noise=0.03),
+    "run": dict(cadence=(2.5, 3.0), amplitude=(0.8, 1.4), noise=0.06),
+    "burst": dict(cadence=(3.0, 4.0), amplitude=(1.5, 3.0), noise=0.15),
+}
+
+# Mean length of a segment of each activity in seconds
+MEAN_SEGMENT_SECONDS = dict(rest=120.0, walk=90.0, run=60.0, burst=4.0)
+
+# Share of segments spent in each activity
+PROFILES = {
+    "rest": dict(rest=1.0),
+    "walk": dict(walk=1.0),
+    "run": dict(run=1.0),
+    "mixed": dict(rest=0.45, walk=0.3, run=0.15, burst=0.1),
+    "day": dict(rest=0.8, walk=0.14, run=0.03, burst=0.03),
+}
+
+# Largest tilt of the device away from lying flat, in radians
+MAX_TILT = 0.5
+
+# Jitter never moves a sample further than this share of a period, so it
+# neither reorders samples nor opens a gap
+MAX_JITTER_PERIODS = 0.2
+
+FORMATS = ("json", "ndjson", "csv")
+
+DURATION_UNITS = dict(s=1, m=60, h=3600, d=86400)
+
+
+def parse_duration(value):
+    """Seconds from ``"90"``, ``"90s"``, ``"15m"``, ``"2h"`` or ``"3d"``"""
+    match = re.fullmatch(r"\s*(\d+(?:\.\d+)?)\s*([smhd]?)\s*", str(value))
+    if not match:
+        raise ValueError(f"Invalid duration: {value}")
+    number, unit = match.groups()
+    return float(number) * DURATION_UNITS[unit or "s"]
+
+
+def unit_vectors(rng, count, max_tilt):
+    """Random directions within ``max_tilt`` radians of +z"""
+    tilt = rng.uniform(0, max_tilt, count)
+    azimuth = rng.uniform(0, 2 * np.pi, count)
+    return np.column_stack(
+        [np.sin(tilt) * np.cos(azimuth), np.sin(tilt) * np.sin(azimuth), np.cos(tilt)]
+    )
+
+
+def plan_recording(
+    duration_s, profile="mixed", seed=0, gaps_per_hour=0.0, gap_seconds=10.0
+):
+    """Lay out the activity segments and dropouts of a recording
+
+    Segments follow each other with exponentially distributed lengths;
+    each has its own activity, cadence, amplitude, phase and device
+    orientation. Dropouts are placed uniformly at random and overlapping
+    ones are merged. Returns a dict of arrays, with times in seconds from
+    the start.
+    """
+    if profile not in PROFILES:
+        raise ValueError(f"Unknown profile: {profile}")
+    rng = np.random.default_rng(seed)
+    names = list(PROFILES[profile])
+    shares = np.array([PROFILES[profile][name] for name in names])
+    means = np.array([MEAN_SEGMENT_SECONDS[name] for name in names])
+
+    # Draw segments in one go, twice as many as expected, more if short
+    count = int(duration_s / (shares @ means) * 2) + 16
+    while True:
+        activity = rng.choice(len(names), count, p=shares / shares.sum())
+        lengths = np.maximum(rng.exponential(means[activity]), 1.0)
+        if lengths.sum() >= duration_s:
+            break
+        count *= 2
+    starts = np.concatenate([[0.0], np.cumsum(lengths)[:-1]])
+    used = np.flatnonzero(starts < duration_s)
+
+    cadence_range = np.array([ACTIVITIES[name]["cadence"] for name in names])
+    amplitude_range = np.array([ACTIVITIES[name]["amplitude"] for name in names])
+    activity = activity[used]
+    segments = len(used)
+
+    gap_count = rng.poisson(gaps_per_hour * duration_s / 3600)
+    gap_lengths = np.maximum(rng.exponential(gap_seconds, gap_count), 1.0)
+    gap_starts = np.sort(rng.uniform(0, duration_s, gap_count))
+    gap_ends = np.maximum.accumulate(gap_starts + gap_lengths)
+    # A dropout starting inside the previous one extends it
+    first = np.ones(gap_count, dtype=bool)
+    first[1:] = gap_starts[1:] > gap_ends[:-1]
+    firsts = np.flatnonzero(first)
+    lasts = np.append(firsts[1:] - 1, gap_count - 1)[: len(firsts)]
+
+    return dict(
+        activity=activity,
+        names=names,
+        start=starts[used],
+        cadence=rng.uniform(*cadence_range[activity].T),
+        amplitude=rng.uniform(*amplitude_range[activity].T),
+        phase=rng.uniform(0, 2 * np.pi, segments),
+        gravity=unit_vectors(rng, segments, MAX_TILT),
+        sway=unit_vectors(rng, segments, np.pi / 2) * [1, 1, 0.2],
+        noise=np.array([ACTIVITIES[name]["noise"] for name in names])[activity],
+        gap_start=gap_starts[firsts],
+        gap_end=gap_ends[lasts],
+    )
+
+
+def iter_blocks(
+    duration_s,
+    rate_hz=50,
+    profile="mixed",
+    seed=0,
+    start=DEFAULT_START,
+    jitter_ms=0.0,
+    gaps_per_hour=0.0,
+    gap_seconds=10.0,
+    out_of_order=0.0,
+    plan=None,
+):
+    """Yield ``(times, values)`` blocks of a recording
+
+    ``times`` are ``datetime64[us]`` in UTC and ``values`` an ``(n, 3)``
+    array of x, y and z in g. The magnitude oscillates at the segment's
+    cadence around 1g with a second harmonic, plus a sideways sway at half
+    the cadence. ``jitter_ms`` is the standard deviation of the timestamp
+    error and ``out_of_order`` the share of samples swapped with their
+    successor.
+    """
+    if plan is None:
+        plan = plan_recording(duration_s, profile, seed, gaps_per_hour, gap_seconds)
+    total = int(round(duration_s * rate_hz))
+    origin = np.datetime64(start.astimezone(timezone.utc).replace(tzinfo=None), "us")
+    max_jitter = MAX_JITTER_PERIODS / rate_hz
+
+    for block, first in enumerate(range(0, total, BLOCK_SIZE)):
+        rng = np.random.default_rng([seed, block])
+        t = np.arange(first, min(first + BLOCK_SIZE, total)) / rate_hz
+        if jitter_ms:
+            jitter = rng.normal(0, jitter_ms / 1000, len(t))
+            t = np.maximum(t + np.clip(jitter, -max_jitter, max_jitter), 0)
+
+        segment = np.searchsorted(plan["start"], t, side="right") - 1
+        cycle = 2 * np.pi * plan["cadence"][segment] * (t - plan["start"][segment])
+        cycle += plan["phase"][segment]
+        amplitude = plan["amplitude"][segment]
+        vertical = amplitude * (np.sin(cycle) + 0.25 * np.sin(2 * cycle))
+        sideways = 0.3 * amplitude * np.sin(cycle / 2)
+
+        values = plan["gravity"][segment] * (1 + vertical)[:, None]
+        values += plan["sway"][segment] * sideways[:, None]
+        values += rng.normal(0, 1, values.shape) * plan["noise"][segment][:, None]
+
+        if len(plan["gap_start"]):
+            gap = np.searchsorted(plan["gap_start"], t, side="right") - 1
+            keep = (gap < 0) | (t >= plan["gap_end"][np.maximum(gap, 0)])
+            t, values = t[keep], values[keep]
+
+        if out_of_order and len(t) > 1:
+            swaps = np.flatnonzero(rng.random(len(t) - 1) < out_of_order)
+            # Never swap a sample twice
+            swaps = swaps[np.concatenate([[True], np.diff(swaps) > 1])]
+            order = np.arange(len(t))
+            order[swaps], order[swaps + 1] = swaps + 1, swaps
+            t, values = t[order], values[order]
+
+        times = origin + np.rint(t * 1e6).astype("timedelta64[us]")
+        yield times, values
+
+
+def block_samples(times, values, decimals=4):
+    """A block as backend samples, as in ``{"timestamp": ..., "x": ...}``"""
+    stamps = np.datetime_as_string(times, unit="us").tolist()
+    return [
+        {"timestamp": stamp + "Z", "x": x, "y": y, "z": z}
+        for stamp, (x, y, z) in zip(stamps, np.round(values, decimals).tolist())
+    ]
+
+
+def recording_metadata(
+    duration_s, rate_hz=50, start=DEFAULT_START, dataset_id=None, device_info=None
+):
+    """Everything of a backend dataset but its samples"""
+    return {
+        "id": dataset_id or f"synthetic-{start:%Y%m%dT%H%M%S}",
+        "data_type": "acceleration",
+        "device_info": dict(device_info or DEVICE_INFO),
+        "sampling_rate_hz": rate_hz,
+        "start_time": start.strftime("%Y-%m-%dT%H:%M:%SZ"),
+        "created_at": (start + timedelta(seconds=duration_s)).strftime(
+            "%Y-%m-%dT%H:%M:%SZ"
+        ),
+    }
+
+
+def make_recording(
+    duration_s,
+    rate_hz=50,
+    profile="mixed",
+    seed=0,
+    start=DEFAULT_START,
+    dataset_id=None,
+    device_info=None,
+    decimals=4,
+    **options,
+):
+    """Build a recording in the backend's format, held in memory
+
+    ``options`` are the irregularities taken by ``iter_blocks``.
+    """
+    samples = []
+    for times, values in iter_blocks(
+        duration_s, rate_hz, profile, seed, start, **options
+    ):
+        samples.extend(block_samples(times, values, decimals))
+    dataset = recording_metadata(duration_s, rate_hz, start, dataset_id, device_info)
+    dataset["data"] = {"samples": samples}
+    return dataset
+
+
+def recording_specs(count, duration_s, seed=0, start=DEFAULT_START):
+    """Seeds, start times and ids of ``count`` recordings a day apart"""
+    return [
+        dict(
+            seed=seed + number,
+            start=start + timedelta(days=number * max(1, -(-duration_s // 86400))),
+            dataset_id=f"synthetic-{seed + number}",
+        )
+        for number in range(count)
+    ]
+
+
+def write_json(stream, recordings, duration_s, rate_hz=50, decimals=4, **options):
+    """Write a backend response holding ``recordings`` (from ``recording_specs``)
+
+    Samples are written a block at a time, so memory doesn't grow with the
+    duration.
+    """
+    stream.write('{"status": "success", "data": [')
+    for number, spec in enumerate(recordings):
+        metadata = recording_metadata(
+            duration_s, rate_hz, spec["start"], spec["dataset_id"]
+        )
+        stream.write(", " if number else "")
+        stream.write(json.dumps(metadata)[:-1] + ', "data": {"samples": [')
+        separator = ""
+        for times, values in iter_blocks(
+            duration_s, rate_hz, seed=spec["seed"], start=spec["start"], **options
+        ):
+            samples = block_samples(times, values, decimals)
+            if samples:
+                stream.write(separator + json.dumps(samples)[1:-1])
+                separator = ", "
+        stream.write("]}}")
+    stream.write("]}\n")
+
+
+def write_samples(stream, format, duration_s, rate_hz=50, decimals=4, **options):
+    """Write the samples of one recording as JSON Lines or CSV with a header"""
+    writer = csv.writer(stream, lineterminator="\n")
+    if format == "csv":
+        writer.writerow(["timestamp", "x", "y", "z"])
+    for times, values in iter_blocks(duration_s, rate_hz, **options):
+        samples = block_samples(times, values, decimals)
+        if format == "csv":
+            writer.writerows(sample.values() for sample in samples)
+        else:
+            stream.writelines(json.dumps(sample) + "\n" for sample in samples)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--duration", type=parse_duration, default="10m")
+    parser.add_argument("--rate-hz", type=float, default=50.0)
+    parser.add_argument("--profile", choices=sorted(PROFILES), default="mixed")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--datasets", type=int, default=1)
+    parser.add_argument("--jitter-ms", type=float, default=0)
+    parser.add_argument("--gaps-per-hour", type=float, default=0)
+    parser.add_argument("--gap-seconds", type=float, default=10)
+    parser.add_argument("--out-of-order", type=float, default=0)
+    parser.add_argument("--decimals", type=int, default=4)
+    parser.add_argument("--format", choices=FORMATS, default="json")
+    parser.add_argument("--output", "-o", help="File to write instead of stdout")
+    args = parser.parse_args(argv)
+    if args.format != "json" and args.datasets != 1:
+        parser.error(f"{args.format} files hold a single recording")
+
+    rate_hz = int(args.rate_hz) if args.rate_hz.is_integer() else args.rate_hz
+    options = dict(
+        profile=args.profile,
+        jitter_ms=args.jitter_ms,
+        gaps_per_hour=args.gaps_per_hour,
+        gap_seconds=args.gap_seconds,
+        out_of_order=args.out_of_order,
+    )
+    stream = open(args.output, "w", newline="") if args.output else sys.stdout
+    try:
+        if args.format == "json":
+            specs = recording_specs(args.datasets, args.duration, args.seed)
+            write_json(stream, specs, args.duration, rate_hz, args.decimals, **options)
+        else:
+            write_samples(
+                stream,
+                args.format,
+                args.duration,
+                rate_hz,
+                args.decimals,
+                seed=args.seed,
+                **options,
+            )
+    finally:
+        if args.output:
+            stream.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,5 +1,4 @@
 import pytest
-from flask import Flask
 from unittest.mock import patch, MagicMock
 import os
 import sys
@@ -7,8 +6,18 @@ import sys
 # Add the parent directory to sys.path to allow importing from app
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
-from app import create_app
-from config import TestingConfig
+from app import create_app  # noqa: E402
+from config import TestingConfig  # noqa: E402
+from loadtest.synthetic import make_recording  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def isolated_storage(monkeypatch, tmp_path):
+    """Keep each test's sessions and event indexes in its own directory."""
+    monkeypatch.setattr(
+        TestingConfig, "SESSION_SQLITE_PATH", str(tmp_path / "sessions.sqlite3")
+    )
+    monkeypatch.setattr(TestingConfig, "EVENT_INDEX_DIR", str(tmp_path / "events"))
 
 
 @pytest.fixture
@@ -26,8 +35,10 @@ def app():
 
 @pytest.fixture
 def client(app):
-    """A test client for the app."""
-    return app.test_client()
+    """A test client for the app, presenting the diagnostics token."""
+    client = app.test_client()
+    client.environ_base["HTTP_X_DIAGNOSTICS_TOKEN"] = app.config["DIAGNOSTICS_TOKEN"]
+    return client
 
 
 @pytest.fixture
@@ -135,6 +146,26 @@ def mock_health_data(monkeypatch):
     return mock
 
 
+@pytest.fixture
+def synthetic_recording():
+    """Build seeded, realistic recordings; see loadtest.synthetic."""
+    return make_recording
+
+
+@pytest.fixture
+def mock_synthetic_health_data(monkeypatch, synthetic_recording):
+    """Mock the health data response with a 10-minute synthetic recording."""
+    sample_data = [
+        synthetic_recording(600, 50, "mixed", seed=1, dataset_id="synthetic")
+    ]
+
+    mock = MagicMock(return_value=(True, sample_data, None))
+    monkeypatch.setattr("app.utils.api.get_acceleration_data", mock)
+    monkeypatch.setattr("app.dashboard.routes.get_acceleration_data", mock)
+
+    return mock
+
+
 @pytest.fixture
 def mock_no_health_data():
     """Mock an empty health data response."""
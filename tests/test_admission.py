@@ -0,0 +1,225 @@
+import logging
+import os
+import subprocess
+import sys
+import threading
+import time
+
+import pytest
+from flask import session
+
+from app import create_app
+from app.auth.utils import current_user_id
+from app.dashboard.admission import AdmissionController, AdmissionRejected
+from app.dashboard.sync import decode_sync
+from config import TestingConfig
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def wait_for(predicate, timeout=5):
+    deadline = time.time() + timeout
+    while not predicate() and time.time() < deadline:
+        time.sleep(0.005)
+    assert predicate()
+
+
+def test_per_user_limit():
+    """Test that one user can't hold more than max_per_user requests."""
+    admission = AdmissionController(max_per_user=2)
+    admission.enter("alice")
+    admission.enter("alice")
+    admission.enter("bob")
+
+    with pytest.raises(AdmissionRejected) as error:
+        admission.enter("alice")
+    assert error.value.status == 429
+
+    admission.leave("alice")
+    admission.enter("alice")
+    stats = admission.stats()
+    assert stats["active_requests"] == 3
+    assert stats["active_users"] == 2
+    assert stats["rejected_user_limit"] == 1
+
+
+def test_heavy_renders_queue_by_priority():
+    """Test that queued renders run fairly across users, then by size."""
+    admission = AdmissionController(heavy_slots=1, degrade_depth=10)
+    order = []
+    release = threading.Event()
+
+    def render(user, samples):
+        with admission.heavy(user, samples):
+            order.append(user)
+            if user == "first":
+                release.wait(5)
+
+    first = threading.Thread(target=render, args=("first", 1))
+    first.start()
+    wait_for(lambda: order == ["first"])
+
+    threads = []
+    for user, samples in [("alice", 500), ("alice", 100), ("bob", 900)]:
+        thread = threading.Thread(target=render, args=(user, samples))
+        thread.start()
+        threads.append(thread)
+        expected = len(threads)
+        wait_for(lambda: admission.stats()["queue_depth"] == expected)
+
+    release.set()
+    for thread in [first] + threads:
+        thread.join(5)
+
+    # Alice's second request waits behind Bob, who has nothing running yet
+    assert order == ["first", "alice", "bob", "alice"]
+    stats = admission.stats()
+    assert stats["max_queue_depth"] == 3
+    assert stats["queue_depth"] == 0
+    assert stats["heavy_running"] == 0
+
+
+def test_deep_queue_degrades_and_full_queue_rejects():
+    """Test degradation at degrade_depth and rejection beyond max_queue."""
+    admission = AdmissionController(heavy_slots=1, max_queue=2, degrade_depth=1)
+    release = threading.Event()
+    degraded = {}
+
+    def render(user):
+        with admission.heavy(user, 1) as degrade:
+            degraded[user] = degrade
+            release.wait(5)
+
+    threads = [threading.Thread(target=render, args=(user,)) for user in "abc"]
+    for i, thread in enumerate(threads):
+        thread.start()
+        wait_for(lambda: admission.stats()["heavy"] == i + 1)
+
+    with pytest.raises(AdmissionRejected) as error:
+        with admission.heavy("d", 1):
+            pass
+    assert error.value.status == 503
+
+    release.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert degraded == {"a": False, "b": False, "c": True}
+    assert admission.stats()["rejected_queue_full"] == 1
+
+
+def test_queue_timeout_gives_up_the_place():
+    """Test that a render that waits too long is rejected and dequeued."""
+    admission = AdmissionController(heavy_slots=1, queue_timeout=0.05)
+
+    with admission.heavy("a", 1):
+        with pytest.raises(AdmissionRejected):
+            with admission.heavy("b", 1):
+                pass
+
+    assert admission.stats()["queue_timeouts"] == 1
+    assert admission.stats()["queue_depth"] == 0
+    with admission.heavy("b", 1):
+        pass
+
+
+def test_dashboard_rejects_a_user_over_the_limit(app, client, mock_health_data):
+    """Test the 429 response and that finished requests free their slot."""
+    with client.session_transaction() as sess:
+        sess["token"] = "fake-jwt-token"
+    admission = app.extensions["admission"]
+
+    assert client.get("/").status_code == 200
+    assert admission.stats()["active_requests"] == 0
+
+    with app.test_request_context():
+        session["token"] = "fake-jwt-token"
+        user_id = current_user_id()
+    for _ in range(app.config["ADMISSION_MAX_PER_USER"]):
+        admission.enter(user_id)
+
+    response = client.get("/?max_points=50")
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == "1"
+    assert admission.stats()["active_requests"] == 2
+
+
+def test_only_renders_count_against_the_limit(app, client, mock_health_data):
+    """Test that cached pages, uploads and sync aren't refused at the limit."""
+    with client.session_transaction() as sess:
+        sess["token"] = "fake-jwt-token"
+    assert client.get("/").status_code == 200
+
+    with app.test_request_context():
+        session["token"] = "fake-jwt-token"
+        user_id = current_user_id()
+    for _ in range(app.config["ADMISSION_MAX_PER_USER"]):
+        app.extensions["admission"].enter(user_id)
+
+    assert client.get("/").status_code == 200
+    assert client.get("/upload").status_code == 200
+    assert client.get("/fragment?max_points=50").status_code == 429
+
+    # Sync leaves the renders for later instead of failing
+    response = client.post("/sync", json={"have": {}})
+    assert response.status_code == 200
+    synced = decode_sync(response.data)
+    assert synced["updated"] == []
+    assert synced["pending"]
+
+
+def test_default_limits_fit_the_worker_threads():
+    """Test that the queue and degrade depth are reachable by default."""
+    env = {
+        name: value
+        for name, value in os.environ.items()
+        if not name.startswith("ADMISSION_")
+    }
+    env["GUNICORN_THREADS"] = "8"
+    script = (
+        "from config import Config as c; "
+        "print(c.ADMISSION_HEAVY_SLOTS, c.ADMISSION_QUEUE_SIZE, "
+        "c.ADMISSION_DEGRADE_DEPTH)"
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", script],
+        cwd=ROOT,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+
+    assert output.split() == ["4", "4", "2"]
+
+
+def test_unreachable_limits_are_reported(monkeypatch, caplog):
+    """Test the startup warning for a queue longer than the free threads."""
+    monkeypatch.setattr(TestingConfig, "WORKER_THREADS", 4)
+    monkeypatch.setattr(TestingConfig, "ADMISSION_HEAVY_SLOTS", 2)
+    monkeypatch.setattr(TestingConfig, "ADMISSION_QUEUE_SIZE", 16)
+    monkeypatch.setattr(TestingConfig, "ADMISSION_DEGRADE_DEPTH", 2)
+    with caplog.at_level(logging.WARNING):
+        create_app("testing")
+
+    assert "ADMISSION_QUEUE_SIZE=16 can't be reached" in caplog.text
+    assert "ADMISSION_DEGRADE_DEPTH" not in caplog.text
+
+
+def test_dashboard_degrades_heavy_renders_when_busy(app, client, mock_health_data):
+    """Test the downsampled render and the diagnostics counters."""
+    app.config["ADMISSION_HEAVY_SAMPLES"] = 1
+    app.config["ADMISSION_DEGRADED_MAX_POINTS"] = 2
+    app.extensions["admission"] = AdmissionController(degrade_depth=0)
+    with client.session_transaction() as sess:
+        sess["token"] = "fake-jwt-token"
+
+    response = client.get("/fragment")
+
+    fragment = response.get_json()
+    assert len(fragment["charts"]["xyz-chart"]["data"][0]["y"]) == 2
+    assert "reduced resolution" in fragment["messages"][0][1]
+
+    stats = client.get("/_diagnostics/metrics").get_json()["admission"]
+    assert stats["heavy"] == 1
+    assert stats["degraded"] == 1
@@ -0,0 +1,156 @@
+import gzip
+import logging
+import re
+from unittest.mock import MagicMock
+
+import requests
+
+from app import create_app
+from app.assets.utils import asset_url, plotly_js_url, resolve_asset
+
+
+def test_pages_reference_fingerprinted_assets(client):
+    """Test that the base template links content-hashed asset URLs."""
+    response = client.get("/login")
+
+    assert b"plotly-latest" not in response.data
+    assert re.search(rb"/assets/css/styles\.[0-9a-f]{12}\.css", response.data)
+    assert re.search(rb"/assets/vendor/plotly\.min\.[0-9a-f]{12}\.js", response.data)
+
+
+def test_fingerprinted_asset_is_immutable(app, client):
+    """Test that assets are served with long-lived cache headers."""
+    with app.test_request_context():
+        url = asset_url("css/styles.css")
+
+    response = client.get(url)
+
+    assert response.status_code == 200
+    assert b".metric-value" in response.data
+    assert "immutable" in response.headers["Cache-Control"]
+    assert "max-age=31536000" in response.headers["Cache-Control"]
+
+
+def test_stale_or_unhashed_asset_urls_are_rejected(client):
+    """Test that only the current content hash is served."""
+    assert client.get("/assets/css/styles.000000000000.css").status_code == 404
+    assert client.get("/assets/css/styles.css").status_code == 404
+
+
+def test_full_plotly_bundle_comes_from_plotly_package(app, client):
+    """Test that the full plotly.js bundle is served without vendoring."""
+    with app.test_request_context():
+        url = plotly_js_url()
+
+    assert url.startswith("/assets/vendor/plotly.")
+    response = client.get(url)
+    assert response.status_code == 200
+    assert b"plotly" in response.data[:1000].lower()
+
+
+def test_missing_vendored_asset_falls_back_to_cdn(app, tmp_path):
+    """Test the opt-in CDN fallback for assets that haven't been vendored."""
+    app.static_folder = str(tmp_path)
+
+    with app.test_request_context():
+        assert asset_url("vendor/bootstrap.min.css") == (
+            "/static/vendor/bootstrap.min.css"
+        )
+
+        app.config["ASSET_CDN_FALLBACK"] = True
+        assert asset_url("vendor/bootstrap.min.css").startswith("https://")
+
+
+def test_missing_vendored_assets_are_reported_at_startup(monkeypatch, caplog):
+    """Test the startup warning when assets would be missing from pages."""
+    from config import TestingConfig
+
+    monkeypatch.setattr(
+        "app.assets.routes.resolve_asset",
+        lambda name: None if name.startswith("vendor/bootstrap") else name,
+    )
+    with caplog.at_level(logging.WARNING):
+        create_app("testing")
+    assert "Assets not vendored: vendor/bootstrap.min.css" in caplog.text
+
+    caplog.clear()
+    monkeypatch.setattr(TestingConfig, "ASSET_CDN_FALLBACK", True)
+    with caplog.at_level(logging.WARNING):
+        create_app("testing")
+    assert "Assets not vendored" not in caplog.text
+
+
+def test_text_assets_are_served_compressed(app, client):
+    """Test that plotly.js is compressed once and revalidates per encoding."""
+    with app.test_request_context():
+        url = plotly_js_url()
+    path = resolve_asset("vendor/plotly.min.js")
+    with open(path, "rb") as f:
+        raw = f.read()
+
+    response = client.get(url, headers={"Accept-Encoding": "gzip"})
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert "Accept-Encoding" in response.headers["Vary"]
+    assert "immutable" in response.headers["Cache-Control"]
+    assert gzip.decompress(response.data) == raw
+    assert len(response.data) < len(raw) / 2
+
+    etag = response.headers["ETag"]
+    revalidated = client.get(
+        url, headers={"Accept-Encoding": "gzip", "If-None-Match": etag}
+    )
+    assert revalidated.status_code == 304
+
+    identity = client.get(url, headers={"Accept-Encoding": "identity"})
+    assert "Content-Encoding" not in identity.headers
+    assert identity.data == raw
+    assert identity.headers["ETag"] != etag
+
+
+def test_vendor_command_fails_loudly_without_network(app, tmp_path, monkeypatch):
+    """Test that a failed download stops the build with a clear message."""
+    app.static_folder = str(tmp_path)
+    get = MagicMock(side_effect=requests.ConnectionError("no route to host"))
+    monkeypatch.setattr("app.assets.routes.requests.get", get)
+
+    result = app.test_cli_runner().invoke(args=["assets", "vendor"])
+
+    assert result.exit_code != 0
+    assert "Couldn't download vendor/bootstrap.min.css" in result.output
+    assert not (tmp_path / "vendor").exists()
+
+
+def test_partial_bundle_without_webgl_forces_svg(monkeypatch):
+    """Test that bundles lacking scattergl switch charts to SVG."""
+    from config import TestingConfig
+
+    monkeypatch.setattr(TestingConfig, "PLOTLY_BUNDLE", "cartesian")
+    app = create_app("testing")
+
+    assert app.config["CHART_RENDER_MODE"] == "svg"
+    with app.test_request_context():
+        assert "plotly-cartesian" in plotly_js_url()
+
+
+def test_vendor_command_downloads_assets(app, tmp_path, monkeypatch):
+    """Test that `flask assets vendor` writes assets into the static folder."""
+    app.static_folder = str(tmp_path)
+    response = MagicMock(content=b"/* asset */")
+    get = MagicMock(return_value=response)
+    monkeypatch.setattr("app.assets.routes.requests.get", get)
+
+    result = app.test_cli_runner().invoke(args=["assets", "vendor"])
+
+    assert result.exit_code == 0
+    assert (tmp_path / "vendor" / "bootstrap.min.css").read_bytes() == b"/* asset */"
+    assert (tmp_path / "vendor" / "plotly-gl2d.min.js").exists()
+
+    with app.test_request_context():
+        assert asset_url("vendor/bootstrap.min.css").startswith("/assets/vendor/")
+
+
+def test_asset_names_cannot_leave_the_static_folder(app):
+    """Test that traversal and absolute names resolve to no file."""
+    assert resolve_asset("../../config.py") is None
+    assert resolve_asset("/etc/passwd") is None
+    assert resolve_asset("vendor/../../app/__init__.py") is None
@@ -1,6 +1,4 @@
 from unittest.mock import MagicMock
-import pytest
-from flask import session, url_for
 
 
 def test_login_page_loads(client):
@@ -46,6 +44,7 @@ def test_successful_login(client, monkeypatch):
     # Session should contain token
     with client.session_transaction() as sess:
         assert "token" in sess
+        assert sess["user_id"].startswith("token:")
 
 
 def test_failed_login(client, mock_login_failure):
@@ -179,3 +178,4 @@ def test_logout(client, mock_login_success):
     # Session should not contain token
     with client.session_transaction() as sess:
         assert "token" not in sess
+        assert "user_id" not in sess
@@ -0,0 +1,191 @@
+from unittest.mock import MagicMock
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.dashboard.chunked import (
+    MetricsAccumulator,
+    StreamingDownsampler,
+    UnsortedSamplesError,
+    process_in_chunks,
+)
+from app.dashboard.utils import (
+    calculate_metrics,
+    process_acceleration_data,
+    slice_time_range,
+)
+
+
+def make_dataset(n=2000, seed=1):
+    """Build a chronological dataset with a burst of movement."""
+    rng = np.random.default_rng(seed)
+    timestamps = pd.date_range("2025-03-10T12:00:00Z", periods=n, freq="20ms")
+    values = rng.normal([0.0, 0.0, 1.0], 0.05, size=(n, 3))
+    values[n // 2 : n // 2 + 50] += [1.5, 0.0, 0.0]
+    return {
+        "start_time": "2025-03-10T12:00:00Z",
+        "data": {
+            "samples": [
+                {
+                    "timestamp": ts.strftime("%Y-%m-%dT%H:%M:%S.%fZ"),
+                    "x": float(v[0]),
+                    "y": float(v[1]),
+                    "z": float(v[2]),
+                }
+                for ts, v in zip(timestamps, values)
+            ]
+        },
+    }
+
+
+def assert_metrics_close(actual, expected):
+    assert actual["duration"] == expected["duration"]
+    assert actual["active_samples"] == expected["active_samples"]
+    assert actual["peak_magnitude"] == expected["peak_magnitude"]
+    assert actual["avg_intensity"] == pytest.approx(expected["avg_intensity"])
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 500, 10000])
+def test_chunked_metrics_match_full_pipeline(chunk_size):
+    """Test that merged partial aggregates equal whole-frame metrics."""
+    dataset = make_dataset()
+    expected = calculate_metrics(process_acceleration_data(dataset))
+
+    metrics, _ = process_in_chunks(dataset, chunk_size=chunk_size)
+
+    assert_metrics_close(metrics, expected)
+
+
+def test_chunked_metrics_respect_time_range():
+    """Test that windowed chunked metrics match slicing the full frame."""
+    dataset = make_dataset()
+    df = slice_time_range(process_acceleration_data(dataset), "10", "25.5")
+    expected = calculate_metrics(df)
+
+    metrics, chart_df = process_in_chunks(
+        dataset, chunk_size=300, start="10", end="25.5"
+    )
+
+    assert_metrics_close(metrics, expected)
+    assert chart_df["index"].min() == df["index"].min()
+    assert chart_df["index"].max() <= df["index"].max()
+
+
+def test_chunked_time_range_counts_from_the_first_sample():
+    """Test that offsets agree with the in-memory path despite start_time."""
+    dataset = make_dataset()
+    # The recording was started 5 seconds before its first sample
+    dataset["start_time"] = "2025-03-10T11:59:55Z"
+    df = slice_time_range(process_acceleration_data(dataset), "5", "10")
+
+    metrics, chart_df = process_in_chunks(dataset, chunk_size=300, start="5", end="10")
+
+    assert_metrics_close(metrics, calculate_metrics(df))
+    assert chart_df["index"].min() == df["index"].min()
+
+
+def test_chunked_pipeline_rejects_overlapping_blocks():
+    """Test that samples unsorted across blocks aren't aggregated wrongly."""
+    dataset = make_dataset(600)
+    samples = dataset["data"]["samples"]
+    dataset["data"]["samples"] = samples[300:] + samples[:300]
+
+    # Shuffling within blocks is fine
+    shuffled = make_dataset(600)
+    shuffled["data"]["samples"][:300] = shuffled["data"]["samples"][:300][::-1]
+    metrics, _ = process_in_chunks(shuffled, chunk_size=300)
+    assert_metrics_close(
+        metrics, calculate_metrics(process_acceleration_data(shuffled))
+    )
+
+    with pytest.raises(UnsortedSamplesError):
+        process_in_chunks(dataset, chunk_size=300)
+
+
+def test_dashboard_processes_unsorted_long_recordings_whole(
+    app, client, mock_health_data
+):
+    """Test that the dashboard falls back to the sorted in-memory frame."""
+    samples = mock_health_data.return_value[1][0]["data"]["samples"]
+    samples.reverse()
+    app.config["CHUNKED_PROCESSING_THRESHOLD"] = 2
+    app.config["PROCESSING_CHUNK_SIZE"] = 1
+    with client.session_transaction() as sess:
+        sess["token"] = "fake-jwt-token"
+
+    response = client.get("/")
+
+    assert response.status_code == 200
+    assert b"plotly-graph-div" in response.data
+    # Only the whole-frame pipeline detects activity bouts
+    assert b"&laquo; Previous" in response.data
+
+
+def test_chunked_pipeline_accepts_generators():
+    """Test that samples can come from any iterable."""
+    dataset = make_dataset(300)
+    samples = (sample for sample in dataset["data"]["samples"])
+
+    metrics, chart_df = process_in_chunks(
+        {"start_time": dataset["start_time"]}, chunk_size=64, samples=samples
+    )
+
+    assert metrics["duration"] == 0.1
+    assert len(chart_df) == 300
+
+
+def test_streaming_downsampler_bounds_points_and_keeps_peaks():
+    """Test that the chart frame stays within budget and keeps extremes."""
+    dataset = make_dataset(20000)
+    full = process_acceleration_data(dataset)
+
+    _, chart_df = process_in_chunks(dataset, chunk_size=1000, max_points=500)
+
+    assert len(chart_df) <= 500 + 2 * 64
+    assert chart_df["magnitude"].max() == pytest.approx(full["magnitude"].max())
+    assert chart_df["magnitude"].min() == pytest.approx(full["magnitude"].min())
+    assert chart_df["index"].is_monotonic_increasing
+    assert list(chart_df.columns) == [
+        "index",
+        "timestamp",
+        "x",
+        "y",
+        "z",
+        "magnitude",
+    ]
+
+
+def test_streaming_downsampler_empty():
+    """Test that an empty stream yields an empty chart frame."""
+    assert StreamingDownsampler(100).frame().empty
+
+
+def test_metrics_accumulator_merge_is_order_independent():
+    """Test merging accumulators built from different blocks."""
+    magnitude = np.array([0.9, 1.5, 1.0, 2.0])
+    timestamps = np.array([0, 1000, 2000, 3000])
+
+    left = MetricsAccumulator().update(magnitude[:2], timestamps[:2])
+    right = MetricsAccumulator().update(magnitude[2:], timestamps[2:])
+    whole = MetricsAccumulator().update(magnitude, timestamps)
+
+    assert MetricsAccumulator().merge(right).merge(left).result() == whole.result()
+    assert MetricsAccumulator().result()["active_samples"] == 0
+
+
+def test_dashboard_uses_chunked_pipeline_for_large_recordings(
+    app, client, mock_health_data, monkeypatch
+):
+    """Test that recordings above the threshold skip the in-memory frame."""
+    app.config["CHUNKED_PROCESSING_THRESHOLD"] = 2
+    process = MagicMock()
+    monkeypatch.setattr("app.dashboard.routes.process_acceleration_data", process)
+    with client.session_transaction() as sess:
+        sess["token"] = "fake-jwt-token"
+
+    response = client.get("/")
+
+    assert response.status_code == 200
+    assert b"plotly-graph-div" in response.data
+    process.assert_not_called()
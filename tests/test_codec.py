@@ -0,0 +1,267 @@
+import os
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.dashboard.resampling import resample_uniform
+from app.dashboard.routes import build_view
+from app.dashboard.utils import process_acceleration_data
+from app.utils import codec
+from app.utils.codec import (
+    FrameStore,
+    available_compressors,
+    decode_frame,
+    encode_frame,
+)
+
+RATE = 50
+
+
+def make_dataset(n=3000, jitter=True):
+    rng = np.random.default_rng(7)
+    start = pd.Timestamp("2025-03-10T12:00:00Z")
+    offsets = np.arange(n) * 20 + (rng.integers(0, 2, n) if jitter else 0)
+    return {
+        "id": "long",
+        "sampling_rate_hz": RATE,
+        "start_time": "2025-03-10T12:00:00Z",
+        "created_at": "2025-03-10T12:10:00Z",
+        "data": {
+            "samples": [
+                {
+                    "timestamp": (
+                        start + pd.Timedelta(milliseconds=int(offset))
+                    ).strftime("%Y-%m-%dT%H:%M:%S.%fZ"),
+                    "x": float(rng.normal(0, 0.1)),
+                    "y": float(rng.normal(0, 0.1)),
+                    "z": float(1 + rng.normal(0, 0.1)),
+                }
+                for offset in offsets
+            ]
+        },
+    }
+
+
+@pytest.mark.parametrize("precision", ["float64", "float32", "int16"])
+def test_round_trip_keeps_layout_and_values(precision):
+    """Test that decoding restores columns, dtypes, index and attrs."""
+    df = process_acceleration_data(make_dataset(), precision)
+
+    decoded = decode_frame(encode_frame(df, block_rows=512))
+
+    assert list(decoded.columns) == list(df.columns)
+    assert decoded.dtypes.to_dict() == df.dtypes.to_dict()
+    assert decoded.index.equals(df.index)
+    assert decoded.attrs == df.attrs
+    assert decoded.equals(df)
+
+
+@pytest.mark.parametrize("precision", ["float64", "float32"])
+def test_quantized_round_trip_is_within_half_a_step(precision):
+    """Test that a positive quantum rounds float columns to that step."""
+    df = process_acceleration_data(make_dataset(), precision)
+
+    decoded = decode_frame(encode_frame(df, quantum=1e-4, block_rows=512))
+
+    assert decoded.dtypes.to_dict() == df.dtypes.to_dict()
+    for column in ("x", "y", "z", "magnitude"):
+        error = np.abs(decoded[column].to_numpy(float) - df[column].to_numpy(float))
+        assert 0 < error.max() <= 0.5e-4 + 1e-7
+
+
+@pytest.mark.parametrize("tz", [None, "UTC", "Europe/Berlin"])
+def test_timestamps_keep_their_time_zone(tz):
+    """Test that naive and zoned timestamps decode to the same values."""
+    df = process_acceleration_data(make_dataset(200), "float64")
+    timestamps = df["timestamp"]
+    df["timestamp"] = (
+        timestamps.dt.tz_convert(tz) if tz else timestamps.dt.tz_localize(None)
+    )
+
+    decoded = decode_frame(encode_frame(df))
+
+    assert decoded["timestamp"].dtype == df["timestamp"].dtype
+    assert decoded.equals(df)
+
+
+def test_uniform_timestamps_compress_to_almost_nothing():
+    """Test that delta-of-delta makes regular sampling nearly free."""
+    df = process_acceleration_data(make_dataset(jitter=False), "int16")
+    times_only = df[["offset_ms"]]
+
+    encoded = encode_frame(times_only, block_rows=len(df))
+
+    assert len(encoded) < 400
+    assert len(encode_frame(df)) < df.memory_usage().sum() / 2
+
+
+def test_range_reads_decompress_only_overlapping_blocks(monkeypatch):
+    """Test random access to a time range."""
+    df = process_acceleration_data(make_dataset(), "float32")
+    encoded = encode_frame(df, block_rows=500)
+
+    calls = []
+    decompress = codec.decompress_block
+    monkeypatch.setattr(
+        codec,
+        "decompress_block",
+        lambda data, name: calls.append(name) or decompress(data, name),
+    )
+    window = decode_frame(encoded, 15000, 25000)
+
+    assert len(calls) == 2
+    expected = df[(df["offset_ms"] >= 15000) & (df["offset_ms"] <= 25000)]
+    assert window.index.equals(expected.index)
+    assert (window["offset_ms"] == expected["offset_ms"]).all()
+    assert decode_frame(encoded, 10**9, None).empty
+
+
+def test_timestamp_frames_use_offsets_from_the_first_sample():
+    """Test that range reads on timestamp frames match the dashboard origin."""
+    df = process_acceleration_data(make_dataset(), "float64")
+
+    window = decode_frame(encode_frame(df, block_rows=700), 0, 1000)
+
+    expected = df[df["timestamp"] <= df["timestamp"].iloc[0] + pd.Timedelta(1, "s")]
+    assert window["index"].tolist() == expected["index"].tolist()
+
+
+def test_resampled_frames_keep_their_grid_index():
+    """Test that non-contiguous indexes and integer columns survive."""
+    df = process_acceleration_data(make_dataset(), "int16")
+    df = df[(df["offset_ms"] < 10000) | (df["offset_ms"] > 20000)]
+    resampled = resample_uniform(df, RATE)
+
+    decoded = decode_frame(encode_frame(resampled))
+
+    assert decoded.index.equals(resampled.index)
+    assert (decoded["segment"] == resampled["segment"]).all()
+
+
+def test_compressor_fallback_and_errors():
+    """Test the zlib fallback and that unknown input is rejected."""
+    df = process_acceleration_data(make_dataset(200), "int16")
+
+    assert available_compressors()[-1] == "zlib"
+    encoded = encode_frame(df, compressor="zlib")
+    assert decode_frame(encoded).shape == df.shape
+    with pytest.raises(ValueError):
+        encode_frame(df, compressor="snappy")
+    with pytest.raises(ValueError):
+        decode_frame(b"not a frame")
+
+
+def test_frame_store_persists_and_skips_unencodable_frames(tmp_path):
+    """Test the on-disk store used by the dashboard."""
+    store = FrameStore(str(tmp_path))
+    df = process_acceleration_data(make_dataset(), "int16")
+    build_calls = []
+
+    def build():
+        build_calls.append(1)
+        return df
+
+    store.get_or_build(("processed", "long"), build)
+    stored = FrameStore(str(tmp_path)).get_or_build(("processed", "long"), build)
+
+    assert len(build_calls) == 1
+    assert (stored["x"] == df["x"]).all()
+    assert len(list(tmp_path.glob("frame-*.arf"))) == 1
+    assert len(store.get(("processed", "long"), 0, 1000)) == 51
+
+    missing = df.astype({"x": np.float64})
+    missing.loc[0, "x"] = np.nan
+    store.set(("processed", "nan"), missing)
+    assert store.get(("processed", "nan")).equals(missing)
+    quantized = FrameStore(str(tmp_path), quantum=1e-4)
+    assert quantized.get(("processed", "long")) is None
+    quantized.set(("processed", "nan"), missing)
+    assert quantized.get(("processed", "nan")) is None
+    assert FrameStore(None).get(("processed", "long")) is None
+
+
+def test_frame_store_expires_old_and_excess_frames(tmp_path):
+    """Test that frames are deleted by age and oldest first over max_bytes."""
+    df = process_acceleration_data(make_dataset(), "float64")
+    store = FrameStore(str(tmp_path), max_age=3600)
+    store.set(("processed", "old"), df)
+    store.set(("processed", "kept"), df)
+    now = time.time()
+    os.utime(store.path(("processed", "old")), (now - 7200, now - 7200))
+    partial = tmp_path / "frame-x.arf.1.2.tmp"
+    partial.write_bytes(b"partial")
+    os.utime(partial, (now - 7200, now - 7200))
+
+    assert store.pruner.prune() == 1
+    assert store.get(("processed", "old")) is None
+    assert store.get(("processed", "kept")) is not None
+    assert not partial.exists()
+
+    size = os.path.getsize(store.path(("processed", "kept")))
+    small = FrameStore(str(tmp_path / "small"), max_bytes=size * 2)
+    for i, name in enumerate(("first", "second", "third")):
+        small.set(("processed", name), df)
+        os.utime(small.path(("processed", name)), (now + i, now + i))
+
+    assert small.pruner.prune() == 1
+    assert small.get(("processed", "first")) is None
+    assert small.get(("processed", "third")) is not None
+
+
+def test_dashboard_reads_processed_frames_from_the_store(
+    app, client, monkeypatch, tmp_path
+):
+    """Test that a configured frame store replaces re-processing."""
+    dataset = make_dataset(500)
+    monkeypatch.setattr(
+        "app.dashboard.routes.get_acceleration_data",
+        lambda token: (True, [dataset], None),
+    )
+    app.extensions["frame_store"] = FrameStore(str(tmp_path))
+    with client.session_transaction() as sess:
+        sess["token"] = "fake-jwt-token"
+
+    assert client.get("/").status_code == 200
+    assert len(list(tmp_path.glob("frame-*.arf"))) == 1
+
+    def fail(*args):
+        raise AssertionError("processed again")
+
+    monkeypatch.setattr("app.dashboard.routes.process_acceleration_data", fail)
+    app.extensions["payload_cache"].clear()
+    response = client.get("/?max_points=100")
+    assert response.status_code == 200
+    assert b"plotly-graph-div" in response.data
+
+
+@pytest.mark.parametrize("precision", ["float64", "int16"])
+def test_dashboard_reads_only_the_requested_range(
+    app, monkeypatch, tmp_path, precision
+):
+    """Test that a time range is decoded from the overlapping blocks alone."""
+    dataset = make_dataset(1000)
+    app.config["FRAME_PRECISION"] = precision
+    with app.test_request_context("/?start=5&end=6"):
+        expected = build_view("user", dataset)
+
+    app.extensions["frame_store"] = FrameStore(str(tmp_path), block_rows=100)
+    with app.test_request_context("/"):
+        build_view("user", dataset)
+
+    calls = []
+    decompress = codec.decompress_block
+    monkeypatch.setattr(
+        codec,
+        "decompress_block",
+        lambda data, name: calls.append(name) or decompress(data, name),
+    )
+    monkeypatch.setattr("app.dashboard.routes.load_frame", None)
+    with app.test_request_context("/?start=5&end=6"):
+        view = build_view("user", dataset)
+
+    assert len(calls) == 3
+    assert view["metrics"] == expected["metrics"]
+    assert view["chart_df"].equals(expected["chart_df"])
+    assert view["window_start"] == expected["window_start"]
@@ -0,0 +1,104 @@
+import gzip
+from unittest.mock import MagicMock
+
+import pytest
+
+from app.utils.cache import LRUCache
+from app.utils.compression import CompressedPayload
+
+
+def login_session(client):
+    with client.session_transaction() as sess:
+        sess["token"] = "fake-jwt-token"
+
+
+def test_responses_are_gzip_compressed(client):
+    """Test that large HTML responses honour Accept-Encoding: gzip."""
+    response = client.get("/login", headers={"Accept-Encoding": "gzip"})
+
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert "Accept-Encoding" in response.headers["Vary"]
+    assert b"Login to View Your Health Data" in gzip.decompress(response.data)
+
+
+def test_brotli_is_preferred_when_accepted(client):
+    """Test that brotli wins over gzip when the client accepts both."""
+    brotli = pytest.importorskip("brotli")
+    response = client.get("/login", headers={"Accept-Encoding": "gzip, br"})
+
+    assert response.headers["Content-Encoding"] == "br"
+    assert b"Login to View Your Health Data" in brotli.decompress(response.data)
+
+
+def test_uncompressed_without_accept_encoding(client):
+    """Test that clients without Accept-Encoding get identity responses."""
+    response = client.get("/login")
+
+    assert "Content-Encoding" not in response.headers
+    assert b"Login to View Your Health Data" in response.data
+
+
+def test_small_responses_are_not_compressed(app, client):
+    """Test that bodies below COMPRESS_MIN_SIZE are sent as is."""
+    app.config["COMPRESS_MIN_SIZE"] = 10**6
+
+    response = client.get("/login", headers={"Accept-Encoding": "gzip"})
+
+    assert "Content-Encoding" not in response.headers
+
+
+def test_dashboard_reuses_precompressed_payload(client, mock_health_data, monkeypatch):
+    """Test that repeat dashboard views skip rendering and compression."""
+    import app.utils.compression as compression
+
+    compress = MagicMock(wraps=compression.compress)
+    monkeypatch.setattr(compression, "compress", compress)
+    xyz_chart = MagicMock(return_value="<div>chart</div>")
+    monkeypatch.setattr("app.dashboard.routes.create_xyz_chart", xyz_chart)
+    login_session(client)
+
+    first = client.get("/", headers={"Accept-Encoding": "gzip"})
+    second = client.get("/", headers={"Accept-Encoding": "gzip"})
+
+    assert first.headers["Content-Encoding"] == "gzip"
+    assert first.data == second.data
+    assert compress.call_count == 1
+    assert xyz_chart.call_count == 1
+    assert b"Areum Health Data Dashboard" in gzip.decompress(second.data)
+
+
+def test_dashboard_pages_with_flashes_are_not_cached(app, client, mock_health_data):
+    """Test that pages showing flashed messages aren't stored."""
+    login_session(client)
+
+    client.get("/?start=not-a-time")
+
+    assert len(app.extensions["payload_cache"]) == 0
+
+
+def test_compressed_payload_encodes_once():
+    """Test that each encoding is compressed only once."""
+    payload = CompressedPayload("<p>hello</p>" * 100)
+
+    first = payload.encoded("gzip")
+    assert payload.encoded("gzip") is first
+    assert payload.encoded(None) == payload.raw
+    assert payload.size == len(payload.raw) + len(first)
+
+    with pytest.raises(ValueError):
+        payload.encoded("deflate")
+
+
+def test_lru_cache_evicts_by_size():
+    """Test that the cache stays within its size budget."""
+    cache = LRUCache(10, sizeof=len)
+
+    cache.set("a", "xxxx")
+    cache.set("b", "xxxx")
+    cache.get("a")
+    cache.set("c", "xxxx")
+
+    assert cache.get("b") is None
+    assert cache.get("a") == "xxxx"
+    assert cache.stats()["evictions"] == 1
+    assert cache.stats()["size"] == 8
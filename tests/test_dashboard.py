@@ -1,6 +1,4 @@
-import pytest
 from unittest.mock import MagicMock
-from flask import session
 
 
 def test_dashboard_requires_login(client):
@@ -148,3 +146,110 @@ def test_refresh_endpoint(client):
     # Try to access refresh endpoint
     response = client.get("/refresh", follow_redirects=True)
     assert response.status_code == 200
+
+
+def test_dashboard_time_range_limits_metrics(client, mock_health_data, monkeypatch):
+    """Test that start/end query parameters restrict the processed samples."""
+    from app.dashboard.utils import calculate_metrics
+
+    metrics_mock = MagicMock(wraps=calculate_metrics)
+    monkeypatch.setattr("app.dashboard.routes.calculate_metrics", metrics_mock)
+
+    with client.session_transaction() as sess:
+        sess["token"] = "fake-jwt-token"
+
+    response = client.get("/?start=0.01&end=0.05")
+
+    assert response.status_code == 200
+    df = metrics_mock.call_args[0][0]
+    assert list(df["index"]) == [1, 2]
+
+
+def test_dashboard_invalid_time_range(client, mock_health_data):
+    """Test that an invalid time bound falls back to the whole recording."""
+    with client.session_transaction() as sess:
+        sess["token"] = "fake-jwt-token"
+
+    response = client.get("/?start=not-a-time")
+
+    assert response.status_code == 200
+    assert b"Invalid time bound" in response.data
+    assert b"plotly-graph-div" in response.data
+
+    response = client.get("/?start=inf")
+
+    assert response.status_code == 200
+    assert b"Invalid time bound" in response.data
+
+
+def test_dashboard_loads_the_fragment_script(client, mock_health_data):
+    """Test that the page wires the dropdown to the fragment endpoint."""
+    with client.session_transaction() as sess:
+        sess["token"] = "fake-jwt-token"
+
+    response = client.get("/")
+
+    assert b'data-fragment-url="/fragment"' in response.data
+    assert b"js/dashboard." in response.data
+    assert b'<div id="metrics">' in response.data
+
+
+def test_fragment_requires_login(client):
+    """Test that the fragment endpoint answers with JSON instead of redirecting."""
+    response = client.get("/fragment")
+
+    assert response.status_code == 401
+    assert response.get_json()["error"] == "Not logged in"
+
+
+def test_fragment_returns_metrics_and_figures(client, mock_health_data):
+    """Test the JSON shape used to swap a dataset in place."""
+    with client.session_transaction() as sess:
+        sess["token"] = "fake-jwt-token"
+
+    response = client.get("/fragment?dataset=test-dataset-id")
+
+    assert response.status_code == 200
+    fragment = response.get_json()
+    assert fragment["dataset"] == "test-dataset-id"
+    assert set(fragment["html"]) == {"metrics", "spectrum-summary", "bouts"}
+    assert "Activity Intensity" in fragment["html"]["metrics"]
+    assert "<html" not in fragment["html"]["metrics"]
+
+    xyz = fragment["charts"]["xyz-chart"]
+    assert [trace["name"] for trace in xyz["data"]] == ["X-axis", "Y-axis", "Z-axis"]
+    assert xyz["data"][0]["y"] == [0.1, 0.2, 0.15]
+    assert "template" not in xyz["layout"]
+    assert fragment["charts"]["spectrogram-chart"] is None
+    assert fragment["messages"] == []
+
+
+def test_fragment_is_cached_and_carries_messages(app, client, mock_health_data):
+    """Test that fragments are cached, except those with one-off messages."""
+    with client.session_transaction() as sess:
+        sess["token"] = "fake-jwt-token"
+    cache = app.extensions["payload_cache"]
+
+    first = client.get("/fragment")
+    assert client.get("/fragment").data == first.data
+    entries = cache.stats()["entries"]
+
+    response = client.get("/fragment?start=not-a-time")
+    message = response.get_json()["messages"][0]
+    assert message[0] == "warning"
+    assert "Invalid time bound" in message[1]
+    assert cache.stats()["entries"] == entries
+    with client.session_transaction() as sess:
+        assert "_flashes" not in sess
+
+
+def test_fragment_reports_backend_errors(client, mock_health_data):
+    """Test that failed fetches are reported with an error status."""
+    mock_health_data.return_value = (False, None, "Connection error: down")
+    with client.session_transaction() as sess:
+        sess["token"] = "fake-jwt-token"
+
+    response = client.get("/fragment")
+
+    assert response.status_code == 502
+    assert response.get_json()["error"] == "Connection error: down"
@@ -0,0 +1,235 @@
+import os
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.dashboard.events import (
+    EventIndex,
+    EventIndexStore,
+    detect_bouts,
+    run_lengths,
+    window_ms,
+)
+from app.dashboard.routes import event_index_key, frame_key
+from app.dashboard.utils import process_acceleration_data, slice_time_range
+
+RATE = 50
+
+
+def walking_signal():
+    """10 s still, 20 s walking at 2 steps/s, 10 s still, 5 s walking."""
+    phases = [(10, 0.0), (20, 0.5), (10, 0.0), (5, 0.5)]
+    parts = []
+    for seconds, amplitude in phases:
+        t = np.arange(seconds * RATE) / RATE
+        parts.append(1.0 + amplitude * np.sin(2 * np.pi * 2 * t - np.pi / 2))
+    return np.concatenate(parts)
+
+
+def make_dataset(values):
+    start = pd.Timestamp("2025-03-10T12:00:00Z")
+    step = pd.Timedelta(seconds=1 / RATE)
+    return {
+        "id": "walk",
+        "sampling_rate_hz": RATE,
+        "start_time": "2025-03-10T12:00:00Z",
+        "created_at": "2025-03-10T12:10:00Z",
+        "data": {
+            "samples": [
+                {
+                    "timestamp": (start + step * i).strftime("%Y-%m-%dT%H:%M:%S.%fZ"),
+                    "x": 0.0,
+                    "y": 0.0,
+                    "z": float(value),
+                }
+                for i, value in enumerate(values)
+            ]
+        },
+    }
+
+
+@pytest.fixture
+def walk_df():
+    return process_acceleration_data(make_dataset(walking_signal()))
+
+
+def test_run_lengths():
+    """Test run-length encoding of a boolean mask."""
+    starts, stops = run_lengths(np.array([1, 1, 0, 0, 1, 0, 1], dtype=bool))
+
+    assert starts.tolist() == [0, 4, 6]
+    assert stops.tolist() == [2, 5, 7]
+
+
+def test_detect_bouts_merges_close_runs_and_drops_short_ones():
+    """Test bout merging and the minimum duration."""
+    offsets = np.arange(20) * 500.0
+    active = np.zeros(20, dtype=bool)
+    active[[0, 1, 2, 4, 5, 6, 7]] = True  # one gap of 1 s
+    active[[15]] = True  # a lone blip
+
+    starts, stops = detect_bouts(active, offsets)
+
+    assert starts.tolist() == [0]
+    assert stops.tolist() == [8]
+
+
+def test_event_index_finds_steps_and_bouts(walk_df):
+    """Test step counts and bout boundaries on a synthetic walk."""
+    events = EventIndex.from_frame(walk_df, RATE)
+
+    assert len(events) == 2
+    assert len(events.step_ms) == pytest.approx(50, abs=2)
+    first, second = events.bout(0), events.bout(1)
+    assert first["start"] == pytest.approx(10, abs=0.5)
+    assert first["duration"] == pytest.approx(20, abs=0.5)
+    assert first["steps"] == pytest.approx(40, abs=1)
+    assert second["start"] == pytest.approx(40, abs=0.5)
+    assert second["steps"] == pytest.approx(10, abs=1)
+    assert first["peak_magnitude"] == pytest.approx(1.5, abs=0.01)
+
+
+def test_event_index_lookups(walk_df):
+    """Test binary-search navigation and window queries."""
+    events = EventIndex.from_frame(walk_df, RATE)
+
+    assert events.next_bout(0) == 0
+    assert events.next_bout(events.bout_start_ms[0]) == 1
+    assert events.next_bout(events.bout_start_ms[1]) is None
+    assert events.previous_bout(events.bout_start_ms[1]) == 0
+    assert events.previous_bout(0) is None
+
+    assert list(events.bouts_between(0, 5000)) == []
+    assert list(events.bouts_between(15000, 45000)) == [0, 1]
+    assert events.steps_between(10000, 20000) == pytest.approx(20, abs=1)
+    assert events.steps_between() == len(events.step_ms)
+
+
+def test_bout_bounds_select_the_whole_bout(walk_df):
+    """Test that a bout's start/end query covers all of its samples."""
+    events = EventIndex.from_frame(walk_df, RATE)
+    bout = events.bout(0)
+
+    window = slice_time_range(walk_df, str(bout["start"]), str(bout["end"]))
+
+    assert window["index"].iloc[0] == events.bout_start_pos[0]
+    assert window["index"].iloc[-1] == events.bout_end_pos[0]
+    assert window_ms(walk_df, window) == (
+        events.bout_start_ms[0],
+        events.bout_end_ms[0],
+    )
+
+
+def test_compact_frames_use_the_same_offsets():
+    """Test that compact frames index events against start_time."""
+    dataset = make_dataset(walking_signal())
+    full = EventIndex.from_frame(process_acceleration_data(dataset), RATE)
+    compact = EventIndex.from_frame(
+        process_acceleration_data(dataset, precision="int16"), RATE
+    )
+
+    assert len(compact) == len(full)
+    assert compact.bout_start_ms.tolist() == full.bout_start_ms.tolist()
+    assert compact.bout_start_pos.tolist() == full.bout_start_pos.tolist()
+
+
+def test_empty_frame_has_empty_index(walk_df):
+    """Test that empty frames produce an index with no events."""
+    events = EventIndex.from_frame(walk_df.iloc[0:0], RATE)
+
+    assert len(events) == 0
+    assert events.steps_between() == 0
+    assert events.next_bout(0) is None
+
+
+def test_event_index_store_persists_indexes(walk_df, tmp_path):
+    """Test that indexes survive a new store (another worker or restart)."""
+    store = EventIndexStore(str(tmp_path))
+    built = store.get_or_build(("events", "walk"), EventIndex.from_frame, walk_df, RATE)
+
+    reloaded = EventIndexStore(str(tmp_path)).get(("events", "walk"))
+
+    assert len(list(tmp_path.glob("events-*.npz"))) == 1
+    assert reloaded.bout_start_ms.tolist() == built.bout_start_ms.tolist()
+    assert reloaded.step_pos.dtype == np.int64
+    assert EventIndexStore(str(tmp_path)).get(("events", "other")) is None
+
+
+def test_event_index_store_prunes_old_and_excess_files(walk_df, tmp_path):
+    """Test that index files expire by age and the oldest go over the budget."""
+    index = EventIndex.from_frame(walk_df, RATE)
+    store = EventIndexStore(str(tmp_path), max_age=3600)
+    for name in ("old", "kept"):
+        store.set(("events", name), index)
+    old = store.path(("events", "old"))
+    os.utime(old, (time.time() - 7200, time.time() - 7200))
+
+    assert store.pruner.prune() == 1
+    assert not os.path.exists(old)
+    assert os.path.exists(store.path(("events", "kept")))
+
+    size = os.path.getsize(store.path(("events", "kept")))
+    small = EventIndexStore(str(tmp_path / "small"), max_disk_bytes=size * 2)
+    for i, name in enumerate(("first", "second", "third")):
+        small.set(("events", name), index)
+        os.utime(small.path(("events", name)), (time.time() + i, time.time() + i))
+
+    assert small.pruner.prune() == 1
+    assert not os.path.exists(small.path(("events", "first")))
+    assert len(list((tmp_path / "small").glob("events-*.npz"))) == 2
+
+
+def test_event_index_key_tells_same_sized_uploads_apart(app):
+    """Test that replaced data with the same id and length gets a new index."""
+    first = make_dataset(walking_signal())
+    second = make_dataset(walking_signal() + 0.1)
+
+    with app.test_request_context():
+        assert event_index_key("u", first, RATE) != event_index_key("u", second, RATE)
+        assert frame_key("u", first) != frame_key("u", second)
+        assert event_index_key("u", first, RATE) == event_index_key(
+            "u", make_dataset(walking_signal()), RATE
+        )
+
+
+def dashboard_client(app, client, monkeypatch, tmp_path):
+    dataset = make_dataset(walking_signal())
+    monkeypatch.setattr(
+        "app.dashboard.routes.get_acceleration_data",
+        lambda token: (True, [dataset], None),
+    )
+    app.extensions["event_index"] = EventIndexStore(str(tmp_path))
+    with client.session_transaction() as sess:
+        sess["token"] = "fake-jwt-token"
+    return client
+
+
+def test_dashboard_lists_bouts_and_steps(app, client, monkeypatch, tmp_path):
+    """Test the steps metric and the bouts table."""
+    client = dashboard_client(app, client, monkeypatch, tmp_path)
+
+    response = client.get("/")
+
+    assert response.status_code == 200
+    assert b"Activity Bouts" in response.data
+    assert b"dataset=walk&amp;start=10.0" in response.data
+    assert len(list(tmp_path.glob("events-*.npz"))) == 1
+
+
+def test_jump_to_next_and_previous_bout(app, client, monkeypatch, tmp_path):
+    """Test redirecting to the window of the neighbouring bout."""
+    client = dashboard_client(app, client, monkeypatch, tmp_path)
+
+    response = client.get("/events/next?dataset=walk&at=0")
+    assert response.status_code == 302
+    assert "start=10.0" in response.headers["Location"]
+
+    response = client.get("/events/previous?dataset=walk&at=40")
+    assert "start=10.0" in response.headers["Location"]
+
+    response = client.get("/events/next?dataset=walk&at=50", follow_redirects=True)
+    assert b"No next activity bout" in response.data
+
+    assert client.get("/events/sideways?dataset=walk").status_code == 404
@@ -0,0 +1,86 @@
+import os
+
+from app import create_app
+from app.auth.utils import decode_token_claims
+from app.utils.api import get_acceleration_data, login_user, register_user
+from loadtest.loadgen import format_report, percentile, rss_kb, run_load
+from loadtest.stub_backend import create_stub_app, make_datasets, serve_in_thread
+
+
+def test_stub_backend_speaks_the_backend_api():
+    """Test that the API client works unchanged against the stub backend."""
+    server = serve_in_thread(create_stub_app(datasets=2, samples=10))
+    app = create_app("testing")
+    app.config["API_BASE_URL"] = f"http://127.0.0.1:{server.server_port}"
+
+    try:
+        with app.app_context():
+            success, token, error = login_user("alice", "password123")
+            assert success and error is None
+            assert decode_token_claims(token)["sub"] == "alice"
+
+            assert register_user("bob", "password123", "bob@example.com")[0]
+            assert register_user("bob", "password123", "bob@example.com") == (
+                False,
+                "Username or email already exists",
+            )
+
+            success, datasets, error = get_acceleration_data(token)
+            assert success
+            assert [len(d["data"]["samples"]) for d in datasets] == [10, 10]
+    finally:
+        server.shutdown()
+
+
+def test_stub_backend_rejects_missing_credentials():
+    """Test that the stub requires credentials and a bearer token."""
+    client = create_stub_app(datasets=1, samples=1).test_client()
+
+    assert client.post("/login", json={"username": "alice"}).status_code == 401
+    assert client.get("/health/acceleration_data").status_code == 401
+
+
+def test_make_datasets_parse_with_the_dashboard_pipeline():
+    """Test that generated datasets are chronological and evenly sampled."""
+    dataset = make_datasets(count=1, samples=50, rate_hz=50)[0]
+    samples = dataset["data"]["samples"]
+
+    assert samples[0]["timestamp"] == "2025-03-10T12:00:00.000000Z"
+    assert samples[-1]["timestamp"] == "2025-03-10T12:00:00.980000Z"
+    assert dataset["created_at"] == "2025-03-10T12:00:01Z"
+
+
+def test_percentile_uses_nearest_rank():
+    """Test the latency percentile helper."""
+    values = list(range(1, 101))
+
+    assert percentile(values, 50) == 50
+    assert percentile(values, 99) == 99
+    assert percentile([3.0], 90) == 3.0
+    assert percentile([], 50) is None
+
+
+def test_run_load_drives_sessions_through_the_dashboard():
+    """Test a short run against the app and stub backend in threads."""
+    stub = serve_in_thread(create_stub_app(datasets=2, samples=200))
+    app = create_app("testing")
+    app.config["API_BASE_URL"] = f"http://127.0.0.1:{stub.server_port}"
+    server = serve_in_thread(app)
+
+    try:
+        report = run_load(
+            f"http://127.0.0.1:{server.server_port}",
+            users=2,
+            duration=1.0,
+            pid=os.getpid(),
+        )
+    finally:
+        server.shutdown()
+        stub.shutdown()
+
+    assert report["errors"] == 0
+    assert report["steps"]["login"]["count"] == 2
+    assert report["steps"]["switch_dataset"]["count"] >= 2
+    assert report["throughput_rps"] > 0
+    assert report["rss_peak_kb"][str(os.getpid())] >= rss_kb(os.getpid()) // 2
+    assert "switch_dataset" in format_report(report)
@@ -0,0 +1,141 @@
+import gc
+import json
+import logging
+import tracemalloc
+from unittest.mock import patch
+
+import pandas as pd
+import pytest
+import requests
+
+from app.utils.memprofile import RequestMemory, _current, memory_stage
+
+
+def large_response(samples=20000):
+    """A real backend response, so JSON decoding is part of the request"""
+    start = pd.Timestamp("2025-03-10T12:00:00Z")
+    timestamps = pd.date_range(start, periods=samples, freq="20ms")
+    payload = {
+        "status": "success",
+        "data": [
+            {
+                "id": "large",
+                "data_type": "acceleration",
+                "sampling_rate_hz": 50,
+                "start_time": "2025-03-10T12:00:00Z",
+                "created_at": "2025-03-10T12:10:00Z",
+                "data": {
+                    "samples": [
+                        {
+                            "timestamp": t.strftime("%Y-%m-%dT%H:%M:%S.%fZ"),
+                            "x": (i % 7) / 10,
+                            "y": (i % 5) / 10,
+                            "z": 1.0,
+                        }
+                        for i, t in enumerate(timestamps)
+                    ]
+                },
+            }
+        ],
+    }
+    response = requests.Response()
+    response.status_code = 200
+    response._content = json.dumps(payload).encode("utf-8")
+    return response
+
+
+@pytest.fixture
+def traced():
+    tracemalloc.start()
+    yield
+    tracemalloc.stop()
+
+
+def test_memory_stage_is_a_no_op_without_a_traced_request():
+    """Test that stages cost nothing when profiling is off."""
+    with memory_stage("process_acceleration_data"):
+        data = bytearray(1024)
+    assert len(data) == 1024
+    assert _current.get() is None
+
+
+def test_nested_stages_report_peak_and_retained(traced):
+    """Test that outer stages include the peaks of nested ones."""
+    record = RequestMemory()
+    token = _current.set(record)
+    try:
+        with memory_stage("outer"):
+            kept = bytearray(2 * 1024 * 1024)
+            with memory_stage("inner"):
+                temporary = bytearray(4 * 1024 * 1024)
+                del temporary
+        info = record.finish()
+    finally:
+        _current.reset(token)
+
+    inner, outer = info["stages"]
+    assert inner["stage"] == "inner"
+    assert inner["peak_kb"] >= 6 * 1024
+    assert abs(inner["retained_kb"] - 2048) < 64
+    assert outer["peak_kb"] >= inner["peak_kb"]
+    assert info["peak_kb"] >= outer["peak_kb"]
+    assert abs(info["retained_kb"] - 2048) < 64
+    del kept
+
+
+def test_dashboard_request_is_profiled_per_stage(app, client, caplog):
+    """Test that stages are recorded, logged and exposed in diagnostics."""
+    profiler = app.extensions["memory_profiler"]
+    profiler.enabled = True
+    with client.session_transaction() as sess:
+        sess["token"] = "fake-jwt-token"
+
+    with patch("requests.get", return_value=large_response(2000)):
+        with caplog.at_level(logging.INFO):
+            assert client.get("/?dataset=large").status_code == 200
+
+    stages = [stage["stage"] for stage in profiler.recent()[-1]["stages"]]
+    for name in (
+        "fetch",
+        "json_decode",
+        "process_acceleration_data",
+        "calculate_metrics",
+        "create_xyz_chart",
+        "create_magnitude_chart",
+    ):
+        assert name in stages
+    assert any("Memory /?dataset=large" in message for message in caplog.messages)
+    assert not tracemalloc.is_tracing()
+
+    report = client.get("/_diagnostics/memory").get_json()
+    assert report["enabled"] is True
+    assert report["requests"][-1]["path"] == "/?dataset=large"
+
+
+def test_retained_memory_returns_to_baseline_after_a_large_request(app, client, traced):
+    """Test that a large dashboard load leaves nothing behind."""
+    profiler = app.extensions["memory_profiler"]
+    profiler.enabled = True
+    # Always refetch, so the measured request decodes and processes everything
+    app.extensions["dataset_cache"].fresh_seconds = 0
+    app.extensions["dataset_cache"].max_stale_seconds = 0
+    page_cache = app.extensions["payload_cache"]
+    with client.session_transaction() as sess:
+        sess["token"] = "fake-jwt-token"
+
+    with patch("requests.get", return_value=large_response()):
+        client.get("/")  # Warm up imports, templates and caches
+        page_cache.clear()
+        gc.collect()
+        baseline = tracemalloc.get_traced_memory()[0]
+
+        assert client.get("/").status_code == 200
+        page_cache.clear()
+        gc.collect()
+        retained = tracemalloc.get_traced_memory()[0] - baseline
+
+    record = profiler.recent()[-1]
+    stages = {stage["stage"]: stage for stage in record["stages"]}
+    assert stages["process_acceleration_data"]["peak_kb"] > 1024
+    assert record["peak_kb"] > 4 * 1024
+    assert retained < 256 * 1024
@@ -0,0 +1,85 @@
+def login(client):
+    with client.session_transaction() as sess:
+        sess["token"] = "fake-jwt-token"
+
+
+def profile_token(client):
+    return client.get("/_diagnostics/profiles/token").get_json()["token"]
+
+
+def test_requests_are_not_profiled_by_default(app, client, mock_health_data):
+    """Test that nothing is recorded while sampling is disabled."""
+    login(client)
+
+    client.get("/")
+
+    assert client.get("/_diagnostics/profiles").get_json()["profiles"] == 0
+
+
+def test_signed_flag_profiles_dashboard_request(app, client, mock_health_data):
+    """Test that a signed _profile token profiles the dashboard."""
+    login(client)
+    token = profile_token(client)
+
+    # Warm the page cache; the profiled request must still render
+    client.get("/")
+    response = client.get("/", query_string={"_profile": token})
+    assert response.status_code == 200
+
+    report = client.get("/_diagnostics/profiles").get_json()
+    assert report["profiles"] == 1
+    recent = report["recent"][0]
+    assert recent["endpoint"] == "dashboard.index"
+    assert recent["dataset_id"] == "test-dataset-id"
+    assert recent["samples"] == 3
+    assert recent["seconds"] > 0
+    assert any("build_view" in f["function"] for f in report["top_functions"])
+
+
+def test_invalid_flag_is_ignored(app, client, mock_health_data):
+    """Test that unsigned or tampered _profile values don't profile."""
+    login(client)
+
+    client.get("/", query_string={"_profile": "1"})
+
+    assert client.get("/_diagnostics/profiles").get_json()["profiles"] == 0
+
+
+def test_sample_rate_profiles_only_configured_endpoints(app, client, mock_health_data):
+    """Test sampling applies to the dashboard but not other endpoints."""
+    app.extensions["profiler"].sample_rate = 1.0
+    login(client)
+
+    client.get("/login")
+    client.get("/")
+    client.get("/", query_string={"dataset": "test-dataset-id"})
+
+    report = client.get("/_diagnostics/profiles?limit=5&sort=tottime").get_json()
+    assert report["profiles"] == 2
+    assert len(report["top_functions"]) == 5
+    tottimes = [f["tottime"] for f in report["top_functions"]]
+    assert tottimes == sorted(tottimes, reverse=True)
+
+    assert client.delete("/_diagnostics/profiles").status_code == 204
+    assert client.get("/_diagnostics/profiles").get_json()["profiles"] == 0
+
+
+def test_profile_report_rejects_unknown_sort(client):
+    """Test that the report validates its sort column."""
+    assert client.get("/_diagnostics/profiles?sort=name").status_code == 400
+
+
+def test_diagnostics_require_the_token(app):
+    """Test that diagnostics are hidden without the right token, even in tests."""
+    client = app.test_client()
+
+    assert client.get("/_diagnostics/profiles").status_code == 404
+    response = client.get(
+        "/_diagnostics/profiles", headers={"X-Diagnostics-Token": "wrong"}
+    )
+    assert response.status_code == 404
+    response = client.get(
+        "/_diagnostics/profiles",
+        headers={"X-Diagnostics-Token": app.config["DIAGNOSTICS_TOKEN"]},
+    )
+    assert response.status_code == 200
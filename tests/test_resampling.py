@@ -0,0 +1,139 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.dashboard.resampling import (
+    estimate_rate_hz,
+    gap_summary,
+    resample_uniform,
+    sampling_rate,
+    segment_index,
+)
+from app.dashboard.utils import (
+    calculate_metrics,
+    process_acceleration_data,
+    slice_time_range,
+)
+from app.utils.frames import sample_positions
+
+
+def make_dataset(offsets_ms, rate_hz=50):
+    """Build a dataset with samples at the given millisecond offsets."""
+    start = pd.Timestamp("2025-03-10T12:00:00Z")
+    return {
+        "id": "gappy",
+        "sampling_rate_hz": rate_hz,
+        "start_time": "2025-03-10T12:00:00Z",
+        "data": {
+            "samples": [
+                {
+                    "timestamp": (start + pd.Timedelta(milliseconds=offset)).strftime(
+                        "%Y-%m-%dT%H:%M:%S.%fZ"
+                    ),
+                    "x": offset / 1000,
+                    "y": 0.0,
+                    "z": 1.0,
+                }
+                for offset in offsets_ms
+            ]
+        },
+    }
+
+
+# 50 Hz with jitter, a 1 s dropout after 5 samples and a 200 ms one later
+OFFSETS = [0, 21, 39, 61, 80, 1080, 1099, 1121, 1140, 1340, 1360]
+
+
+def test_segment_index_splits_at_dropouts():
+    """Test that steps beyond the gap factor start new segments."""
+    df = process_acceleration_data(make_dataset(OFFSETS))
+
+    segments = segment_index(df, 50)
+
+    assert segments["start"].tolist() == [0, 5, 9]
+    assert segments["stop"].tolist() == [5, 9, 11]
+    assert segments["samples"].tolist() == [5, 4, 2]
+    assert gap_summary(segments) == {"gaps": 2, "gap_seconds": 1.2}
+
+
+def test_jitter_below_gap_factor_is_not_a_gap():
+    """Test that ordinary jitter keeps a single segment."""
+    df = process_acceleration_data(make_dataset([0, 25, 38, 62, 80]))
+
+    assert len(segment_index(df, 50)) == 1
+    assert gap_summary(segment_index(df.iloc[0:0], 50)) == {
+        "gaps": 0,
+        "gap_seconds": 0.0,
+    }
+
+
+def test_resample_uniform_uses_fixed_strides_and_keeps_gaps():
+    """Test resampling onto the grid without bridging dropouts."""
+    df = process_acceleration_data(make_dataset(OFFSETS))
+
+    resampled = resample_uniform(df, 50)
+
+    assert resampled["index"].tolist() == [0, 1, 2, 3, 4, 54, 55, 56, 57, 67, 68]
+    assert resampled["segment"].tolist() == [0] * 5 + [1] * 4 + [2] * 2
+    steps = resampled["timestamp"].diff().dt.total_seconds().mul(1000).round(6)
+    assert set(steps[resampled["segment"].diff() == 0]) == {20.0}
+
+    # x equals the offset in seconds, so interpolation reproduces grid times
+    assert resampled["x"].to_numpy() == pytest.approx(
+        resampled["index"].to_numpy() * 0.02
+    )
+    assert resampled["magnitude"].to_numpy() == pytest.approx(
+        np.sqrt(resampled["x"] ** 2 + 1.0)
+    )
+
+
+def test_resampled_frame_works_with_slicing_and_metrics():
+    """Test that the resampled frame flows through the rest of the pipeline."""
+    df = resample_uniform(process_acceleration_data(make_dataset(OFFSETS)), 50)
+
+    window = slice_time_range(df, "1", "1.2")
+
+    assert window["index"].tolist() == [54, 55, 56, 57]
+    assert calculate_metrics(df)["duration"] == 0.0
+    assert len(segment_index(df, 50)) == 3
+
+
+@pytest.mark.parametrize("precision", ["float32", "int16"])
+def test_resample_compact_frames(precision):
+    """Test that compact frames keep their layout when resampled."""
+    df = process_acceleration_data(make_dataset(OFFSETS), precision=precision)
+
+    resampled = resample_uniform(df, 50)
+
+    assert "index" not in resampled.columns
+    assert resampled["x"].dtype == np.dtype(precision)
+    assert resampled["offset_ms"].tolist()[:3] == [0, 20, 40]
+    assert sample_positions(resampled).tolist()[4:6] == [4, 54]
+    assert resampled.attrs["start_time"] == df.attrs["start_time"]
+
+
+def test_sampling_rate_is_estimated_when_missing():
+    """Test the median-spacing estimate for datasets without a rate."""
+    dataset = make_dataset(OFFSETS, rate_hz=None)
+    df = process_acceleration_data(dataset)
+
+    assert sampling_rate(dataset, df) == pytest.approx(50, rel=0.1)
+    assert sampling_rate({"sampling_rate_hz": 100}, df) == 100.0
+    assert estimate_rate_hz(np.array([0.0])) is None
+
+
+def test_dashboard_reports_gaps(app, client, monkeypatch):
+    """Test that the dashboard shows dropouts and can resample."""
+    dataset = dict(make_dataset(OFFSETS), created_at="2025-03-10T12:10:00Z")
+    monkeypatch.setattr(
+        "app.dashboard.routes.get_acceleration_data",
+        lambda token: (True, [dataset], None),
+    )
+    app.config["RESAMPLE_UNIFORM_GRID"] = True
+    with client.session_transaction() as sess:
+        sess["token"] = "fake-jwt-token"
+
+    response = client.get("/")
+
+    assert response.status_code == 200
+    assert b"2 gaps (1.2 s missing)" in response.data
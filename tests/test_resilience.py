@@ -0,0 +1,305 @@
+import threading
+import time
+from unittest.mock import MagicMock, patch
+
+import pytest
+import requests
+
+from app import create_app
+from app.utils.api import AUTH_FAILED, DECODED_SAMPLE_BYTES
+from app.utils.api import datasets_size, get_acceleration_data
+from app.utils.resilience import (
+    CircuitBreaker,
+    CircuitOpenError,
+    StaleWhileRevalidate,
+)
+from config import TestingConfig
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def fail():
+    raise requests.ConnectionError("down")
+
+
+def make_breaker(clock, **kwargs):
+    options = dict(min_calls=4, window_seconds=60, open_seconds=30, clock=clock)
+    options.update(kwargs)
+    return CircuitBreaker(**options)
+
+
+def test_breaker_opens_on_failure_rate():
+    """Test that the circuit opens once half the recent calls failed."""
+    clock = FakeClock()
+    breaker = make_breaker(clock)
+
+    for outcome in (lambda: "ok", lambda: "ok", fail, fail):
+        try:
+            breaker.call(outcome)
+        except requests.ConnectionError:
+            pass
+
+    assert breaker.state == CircuitBreaker.OPEN
+    backend = MagicMock()
+    with pytest.raises(CircuitOpenError):
+        breaker.call(backend)
+    backend.assert_not_called()
+    assert breaker.stats()["rejected"] == 1
+
+
+def test_breaker_needs_min_calls_and_forgets_old_outcomes():
+    """Test the minimum sample size and the rolling window."""
+    clock = FakeClock()
+    breaker = make_breaker(clock)
+
+    for _ in range(3):
+        with pytest.raises(requests.ConnectionError):
+            breaker.call(fail)
+    assert breaker.state == CircuitBreaker.CLOSED
+
+    clock.now = 120
+    breaker.call(lambda: "ok")
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_breaker_opens_on_slow_calls_and_marked_failures():
+    """Test latency- and result-based failures."""
+    clock = FakeClock()
+    breaker = make_breaker(clock, slow_call_seconds=5)
+
+    def slow():
+        clock.now += 6
+        return "late"
+
+    for _ in range(4):
+        assert breaker.call(slow) == "late"
+    assert breaker.state == CircuitBreaker.OPEN
+
+    breaker = make_breaker(clock)
+    for _ in range(4):
+        breaker.call(lambda: 503, is_failure=lambda status: status >= 500)
+    assert breaker.state == CircuitBreaker.OPEN
+
+
+def test_breaker_half_open_probe_closes_or_reopens():
+    """Test half-open probing after the open period."""
+    clock = FakeClock()
+    breaker = make_breaker(clock)
+    for _ in range(4):
+        with pytest.raises(requests.ConnectionError):
+            breaker.call(fail)
+
+    clock.now += 31
+    with pytest.raises(requests.ConnectionError):
+        breaker.call(fail)
+    assert breaker.state == CircuitBreaker.OPEN
+
+    clock.now += 31
+    assert breaker.call(lambda: "ok") == "ok"
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.stats()["opened"] == 2
+
+
+def test_breaker_allows_one_probe_at_a_time():
+    """Test that concurrent calls are rejected while a probe runs."""
+    clock = FakeClock()
+    breaker = make_breaker(clock)
+    for _ in range(4):
+        with pytest.raises(requests.ConnectionError):
+            breaker.call(fail)
+    clock.now += 31
+
+    def probe():
+        with pytest.raises(CircuitOpenError):
+            breaker.call(lambda: "second")
+        return "first"
+
+    assert breaker.call(probe) == "first"
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_stale_while_revalidate_serves_stale_and_refreshes():
+    """Test fresh hits, stale hits with background refresh and misses."""
+    clock = FakeClock()
+    cache = StaleWhileRevalidate(fresh_seconds=30, max_stale_seconds=300, clock=clock)
+    fetch = MagicMock(side_effect=["v1", "v2"])
+
+    assert cache.get("key", fetch) == "v1"
+    clock.now = 10
+    assert cache.get("key", fetch) == "v1"
+    assert fetch.call_count == 1
+
+    clock.now = 60
+    refreshed = threading.Event()
+    fetch.side_effect = lambda: refreshed.set() or "v2"
+    assert cache.get("key", fetch) == "v1"
+    assert refreshed.wait(5)
+    for _ in range(500):
+        if cache.get("key", fetch) == "v2":
+            break
+        time.sleep(0.01)
+    assert cache.get("key", fetch) == "v2"
+
+    clock.now = 1000
+    fetch.side_effect = None
+    fetch.return_value = "v3"
+    assert cache.get("key", fetch) == "v3"
+    assert cache.stats()["misses"] == 2
+
+
+def test_stale_while_revalidate_keeps_good_data_on_errors():
+    """Test that invalid results are returned but never cached."""
+    clock = FakeClock()
+    cache = StaleWhileRevalidate(fresh_seconds=0, clock=clock)
+
+    def valid(result):
+        return result[0]
+
+    assert cache.get("key", lambda: (False, None), valid) == (False, None)
+    assert cache.get("key", lambda: (True, "data"), valid) == (True, "data")
+
+    done = threading.Event()
+
+    def failing():
+        done.set()
+        raise requests.ConnectionError("down")
+
+    clock.now = 1
+    assert cache.get("key", failing, valid) == (True, "data")
+    assert done.wait(5)
+    assert cache.get("key", lambda: (False, None), valid) == (True, "data")
+
+
+def test_stale_while_revalidate_is_bounded_by_size():
+    """Test that the total size of the entries stays under max_size."""
+    cache = StaleWhileRevalidate(max_size=10, sizeof=len, clock=FakeClock())
+
+    cache.get("a", lambda: "x" * 6)
+    cache.get("b", lambda: "x" * 6)
+    cache.get("c", lambda: "x" * 20)
+
+    assert cache.stats()["entries"] == 1
+    fetch = MagicMock(return_value="y")
+    cache.get("b", fetch)
+    assert fetch.call_count == 0
+
+
+def test_stale_while_revalidate_drops_revoked_entries():
+    """Test that a revoked result evicts the stale entry instead of serving it."""
+    clock = FakeClock()
+    cache = StaleWhileRevalidate(fresh_seconds=0, clock=clock)
+
+    def revoked(result):
+        return result == "401"
+
+    cache.get("key", lambda: "data", is_revoked=revoked)
+    clock.now = 1
+    assert cache.get("key", lambda: "401", is_revoked=revoked) == "data"
+    for _ in range(500):
+        if cache.stats()["entries"] == 0:
+            break
+        time.sleep(0.01)
+
+    assert cache.stats()["entries"] == 0
+    assert cache.get("key", lambda: "401", is_revoked=revoked) == "401"
+
+
+def test_dashboard_drops_cached_datasets_on_rejected_token(
+    app, client, mock_health_data
+):
+    """Test that a 401 from the backend stops the cached copy being served."""
+    cache = app.extensions["dataset_cache"]
+    cache.fresh_seconds = 0
+    with client.session_transaction() as sess:
+        sess["token"] = "fake-jwt-token"
+
+    assert b"test-dataset-id" in client.get("/").data
+
+    mock_health_data.return_value = (False, None, AUTH_FAILED)
+    client.get("/")
+    for _ in range(500):
+        if cache.stats()["entries"] == 0:
+            break
+        time.sleep(0.01)
+
+    assert cache.stats()["entries"] == 0
+    assert b"test-dataset-id" not in client.get("/").data
+
+
+def test_datasets_size_counts_decoded_samples(mock_health_data):
+    """Test that cached results are sized by their samples."""
+    result = mock_health_data.return_value
+
+    assert datasets_size(result) == 3 * DECODED_SAMPLE_BYTES
+    assert datasets_size((False, None, "down")) == 1
+
+
+@patch("requests.get")
+def test_api_calls_use_timeouts_and_the_breaker(mock_get, app):
+    """Test that backend calls have timeouts and fail fast when open."""
+    mock_get.side_effect = requests.ConnectionError("refused")
+    app.extensions["circuit_breaker"] = CircuitBreaker(min_calls=2)
+
+    with app.app_context():
+        for _ in range(2):
+            assert get_acceleration_data("token")[0] is False
+        success, data, error = get_acceleration_data("token")
+
+    assert mock_get.call_count == 2
+    assert mock_get.call_args.kwargs["timeout"] == (
+        app.config["API_CONNECT_TIMEOUT"],
+        app.config["API_READ_TIMEOUT"],
+    )
+    assert success is False
+    assert "circuit open" in error
+
+
+def test_dashboard_serves_cached_datasets_while_backend_is_down(
+    app, client, mock_health_data
+):
+    """Test that a failing backend doesn't blank the dashboard."""
+    app.extensions["dataset_cache"].fresh_seconds = 0
+    with client.session_transaction() as sess:
+        sess["token"] = "fake-jwt-token"
+
+    assert b"test-dataset-id" in client.get("/").data
+
+    mock_health_data.return_value = (False, None, "Connection error: down")
+    response = client.get("/")
+
+    assert response.status_code == 200
+    assert b"test-dataset-id" in response.data
+    assert b"Connection error" not in response.data
+
+
+def test_refresh_and_logout_drop_cached_datasets(app, client, mock_health_data):
+    """Test that refresh refetches and logout forgets the user's datasets."""
+    with client.session_transaction() as sess:
+        sess["token"] = "fake-jwt-token"
+
+    client.get("/")
+    client.get("/")
+    assert mock_health_data.call_count == 1
+
+    client.get("/refresh", follow_redirects=True)
+    assert mock_health_data.call_count == 2
+
+    client.get("/logout")
+    assert app.extensions["dataset_cache"].stats()["entries"] == 0
+
+
+def test_breaker_rates_are_configured_separately(monkeypatch):
+    """Test that the slow-call threshold has its own setting."""
+    monkeypatch.setattr(TestingConfig, "BREAKER_FAILURE_RATE", 0.9)
+    monkeypatch.setattr(TestingConfig, "BREAKER_SLOW_CALL_RATE", 0.2)
+
+    breaker = create_app("testing").extensions["circuit_breaker"]
+
+    assert breaker.failure_rate == 0.9
+    assert breaker.slow_call_rate == 0.2
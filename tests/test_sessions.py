@@ -0,0 +1,144 @@
+import base64
+import json
+import time
+from unittest.mock import MagicMock
+
+from flask import session
+
+from app import create_app
+from app.auth.sessions import ServerSideSessionInterface, SQLiteSessionStore
+from app.auth.utils import current_user_id, decode_token_claims, is_authenticated
+from app.auth.utils import start_session
+
+
+def make_jwt(claims):
+    """Build an unsigned JWT carrying the given claims."""
+
+    def encode(part):
+        raw = base64.urlsafe_b64encode(json.dumps(part).encode("utf-8"))
+        return raw.rstrip(b"=").decode("ascii")
+
+    return f"{encode({'alg': 'HS256'})}.{encode(claims)}.signature"
+
+
+def test_session_cookie_holds_only_signed_id(client, mock_login_success):
+    """Test that the token is kept server-side rather than in the cookie."""
+    client.post("/login", data={"username": "testuser", "password": "password123"})
+
+    cookie = client.get_cookie("session")
+    assert cookie is not None
+    assert "fake-jwt-token" not in cookie.value
+    assert len(cookie.value) < 100
+
+    with client.session_transaction() as sess:
+        assert sess["token"] == "fake-jwt-token"
+
+
+def test_session_store_round_trip(tmp_path):
+    """Test storing, loading and deleting session payloads."""
+    store = SQLiteSessionStore(str(tmp_path / "sessions.sqlite3"))
+
+    store.set("sid", "payload", ttl=60)
+    assert store.get("sid") == "payload"
+
+    store.delete("sid")
+    assert store.get("sid") is None
+
+    store.set("expired", "payload", ttl=-1)
+    assert store.get("expired") is None
+
+
+def test_tampered_session_cookie_starts_new_session(client):
+    """Test that a cookie with a bad signature is ignored."""
+    with client.session_transaction() as sess:
+        sess["token"] = "fake-jwt-token"
+
+    client.set_cookie("session", "forged-session-id.bad-signature")
+
+    response = client.get("/", follow_redirects=True)
+    assert b"Login to View Your Health Data" in response.data
+
+
+def test_logout_removes_token_from_store(app, client, mock_login_success):
+    """Test that logging out drops the token from the stored session."""
+    client.post("/login", data={"username": "testuser", "password": "password123"})
+    signed = client.get_cookie("session").value
+    interface = app.session_interface
+    sid = interface._signer(app).unsign(signed).decode("utf-8")
+    assert "fake-jwt-token" in interface.store.get(sid)
+
+    client.get("/logout")
+    assert "fake-jwt-token" not in interface.store.get(sid)
+
+    # Once the flashed message is consumed the empty session is deleted
+    client.get("/login")
+    assert interface.store.get(sid) is None
+
+
+def test_cookie_session_backend_can_be_selected(monkeypatch):
+    """Test that SESSION_BACKEND=cookie keeps Flask's default sessions."""
+    from config import TestingConfig
+
+    monkeypatch.setattr(TestingConfig, "SESSION_BACKEND", "cookie")
+    app = create_app("testing")
+
+    assert not isinstance(app.session_interface, ServerSideSessionInterface)
+
+
+def test_decode_token_claims():
+    """Test decoding JWT claims and tolerating opaque tokens."""
+    token = make_jwt({"sub": "user-42", "exp": 2000000000})
+
+    assert decode_token_claims(token) == {"sub": "user-42", "exp": 2000000000}
+    assert decode_token_claims("fake-jwt-token") == {}
+    assert decode_token_claims("a.%%%.c") == {}
+
+
+def test_is_authenticated_rejects_expired_tokens(app):
+    """Test that expired tokens are rejected locally."""
+    with app.test_request_context():
+        start_session(make_jwt({"sub": "user-42", "exp": time.time() - 10}))
+        assert not is_authenticated()
+        assert "token" not in session
+        assert "user_id" not in session
+
+        start_session(make_jwt({"sub": "user-42", "exp": time.time() + 60}))
+        assert is_authenticated()
+
+        start_session("fake-jwt-token")
+        assert is_authenticated()
+
+
+def test_current_user_id(app):
+    """Test deriving cache keys from the user id instead of the raw token."""
+    with app.test_request_context():
+        assert current_user_id() is None
+
+        start_session(make_jwt({"sub": "user-42"}))
+        assert current_user_id() == "user-42"
+
+        start_session("fake-jwt-token")
+        user_id = current_user_id()
+        assert user_id.startswith("token:")
+        assert "fake-jwt-token" not in user_id
+
+
+def test_claims_are_decoded_once_per_login(app, monkeypatch):
+    """Test that requests read the claims stored at login."""
+    token = make_jwt({"sub": "user-42", "exp": time.time() + 60})
+    decode = MagicMock(side_effect=decode_token_claims)
+    monkeypatch.setattr("app.auth.utils.decode_token_claims", decode)
+
+    with app.test_request_context():
+        start_session(token)
+        for _ in range(3):
+            assert is_authenticated()
+            assert current_user_id() == "user-42"
+        assert decode.call_count == 1
+
+    # Sessions holding only a token get their claims on first use
+    with app.test_request_context():
+        session["token"] = token
+        assert current_user_id() == "user-42"
+        assert session["user_id"] == "user-42"
+        assert decode.call_count == 2
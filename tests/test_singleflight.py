@@ -0,0 +1,209 @@
+import os
+import stat
+import threading
+import time
+
+import pandas as pd
+
+from app.utils.singleflight import SingleFlight
+
+
+def test_single_flight_runs_uncontended_calls():
+    """Test that sequential calls each execute."""
+    flights = SingleFlight()
+
+    assert flights.do("key", lambda: 1) == 1
+    assert flights.do("key", lambda: 2) == 2
+
+    stats = flights.stats()
+    assert stats["calls"] == 2
+    assert stats["executions"] == 2
+    assert stats["coalesced"] == 0
+
+
+def test_single_flight_coalesces_concurrent_calls():
+    """Test that concurrent calls for the same key share one execution."""
+    flights = SingleFlight()
+    release = threading.Event()
+    executions = []
+
+    def slow_fetch():
+        executions.append(1)
+        release.wait(5)
+        return "payload"
+
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(flights.do("k", slow_fetch)))
+        for _ in range(5)
+    ]
+    for thread in threads:
+        thread.start()
+
+    # Wait until every follower has joined the in-flight call
+    deadline = time.time() + 5
+    while flights.stats()["coalesced"] < 4 and time.time() < deadline:
+        time.sleep(0.01)
+    release.set()
+
+    for thread in threads:
+        thread.join(5)
+
+    assert results == ["payload"] * 5
+    assert len(executions) == 1
+    assert flights.stats()["coalesced"] == 4
+    assert flights.stats()["in_flight"] == 0
+
+
+def test_single_flight_shares_errors_with_followers():
+    """Test that followers see the leader's exception."""
+    flights = SingleFlight()
+    release = threading.Event()
+    errors = []
+
+    def failing_fetch():
+        release.wait(5)
+        raise ValueError("backend down")
+
+    def call():
+        try:
+            flights.do("k", failing_fetch)
+        except ValueError as e:
+            errors.append(str(e))
+
+    threads = [threading.Thread(target=call) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+
+    deadline = time.time() + 5
+    while flights.stats()["coalesced"] < 2 and time.time() < deadline:
+        time.sleep(0.01)
+    release.set()
+
+    for thread in threads:
+        thread.join(5)
+
+    assert errors == ["backend down"] * 3
+
+
+def test_single_flight_coalesces_across_workers(tmp_path):
+    """Test that a file lock lets a second worker reuse the leader's result."""
+    # Two instances sharing a lock directory stand in for two workers
+    leader = SingleFlight(str(tmp_path))
+    follower = SingleFlight(str(tmp_path))
+    started = threading.Event()
+    release = threading.Event()
+
+    def slow_fetch():
+        started.set()
+        release.wait(5)
+        return {"datasets": [1, 2, 3]}
+
+    leader_thread = threading.Thread(target=lambda: leader.do_shared("k", slow_fetch))
+    leader_thread.start()
+    started.wait(5)
+
+    results = []
+    follower_thread = threading.Thread(
+        target=lambda: results.append(follower.do_shared("k", lambda: "recomputed"))
+    )
+    follower_thread.start()
+    time.sleep(0.05)
+    release.set()
+
+    leader_thread.join(5)
+    follower_thread.join(5)
+
+    assert results == [{"datasets": [1, 2, 3]}]
+    assert follower.stats()["executions"] == 0
+    assert follower.stats()["coalesced_across_workers"] == 1
+
+
+def test_single_flight_shares_only_json_results_across_workers(tmp_path):
+    """Test that objects are recomputed by followers, never unpickled."""
+    leader = SingleFlight(str(tmp_path))
+    follower = SingleFlight(str(tmp_path))
+
+    frame = pd.DataFrame({"x": [1.0, 2.0]})
+    leader.do_shared("frame", lambda: frame)
+    assert not list(tmp_path.glob("*.result"))
+    assert follower.do_shared("frame", lambda: "recomputed") == "recomputed"
+
+    fetches = SingleFlight(str(tmp_path / "fetches"))
+    fetches.do_shared("fetch", lambda: (True, [{"id": "a"}], None))
+    waiting_since = time.time() - 1
+    (path,) = (tmp_path / "fetches").glob("*.result")
+    assert path.read_bytes().startswith(b"{")
+    assert follower._read_result(str(path), waiting_since) == (
+        (True, [{"id": "a"}], None),
+    )
+
+    small = SingleFlight(str(tmp_path / "small"), max_shared_bytes=10)
+    small.do_shared("fetch", lambda: list(range(100)))
+    assert not list((tmp_path / "small").glob("*.result"))
+
+
+def test_single_flight_do_stays_in_process(tmp_path):
+    """Test that unshareable calls never wait on the cross-worker lock."""
+    flights = SingleFlight(str(tmp_path))
+
+    assert flights.do("frame", lambda: pd.DataFrame({"x": [1.0]})).shape == (1, 1)
+    assert not list(tmp_path.iterdir())
+
+
+def test_single_flight_expires_shared_results(tmp_path):
+    """Test that result and lock files are deleted once result_ttl old."""
+    flights = SingleFlight(str(tmp_path), result_ttl=60)
+    flights.do_shared("old", lambda: [1])
+    old = next(tmp_path.glob("*.result"))
+    (old_lock,) = tmp_path.glob("*.lock")
+    for path in (old, old_lock):
+        os.utime(path, (time.time() - 120, time.time() - 120))
+
+    flights.do_shared("new", lambda: [2])
+    assert old.exists()  # expiry runs at most once per ttl
+
+    flights._last_expiry -= 61
+    flights.do_shared("newer", lambda: [3])
+    assert not old.exists()
+    assert not old_lock.exists()
+    assert len(list(tmp_path.glob("*.result"))) == 2
+    assert len(list(tmp_path.glob("*.lock"))) == 2
+
+
+def test_single_flight_keeps_held_locks(tmp_path):
+    """Test that expiry skips a lock another worker holds."""
+    flights = SingleFlight(str(tmp_path), result_ttl=60)
+    flights.do_shared("busy", lambda: [1])
+    (lock,) = tmp_path.glob("*.lock")
+    os.utime(lock, (time.time() - 120, time.time() - 120))
+
+    with flights._file_lock(str(lock)):
+        os.utime(lock, (time.time() - 120, time.time() - 120))
+        flights._expire_results()
+        assert lock.exists()
+
+
+def test_single_flight_files_are_private(tmp_path):
+    """Test that shared health data is readable by the owner only."""
+    lock_dir = tmp_path / "flights"
+    flights = SingleFlight(str(lock_dir))
+    flights.do_shared("fetch", lambda: [{"id": "a"}])
+
+    assert stat.S_IMODE(lock_dir.stat().st_mode) == 0o700
+    for path in lock_dir.iterdir():
+        assert stat.S_IMODE(path.stat().st_mode) == 0o600
+
+
+def test_diagnostics_metrics_reports_single_flight(client, mock_health_data):
+    """Test that dashboard fetches are counted in the diagnostics endpoint."""
+    with client.session_transaction() as sess:
+        sess["token"] = "fake-jwt-token"
+
+    client.get("/")
+    response = client.get("/_diagnostics/metrics")
+
+    assert response.status_code == 200
+    stats = response.get_json()["single_flight"]
+    assert stats["calls"] == 2  # one fetch and one processing call
+    assert stats["executions"] == 2
@@ -0,0 +1,175 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.dashboard.resampling import resample_uniform
+from app.dashboard.spectral import (
+    frame_spectrum,
+    short_time_spectrum,
+    spectral_summary,
+)
+from app.dashboard.utils import process_acceleration_data
+
+
+def sine(freq_hz, seconds=20, rate_hz=50, amplitude=0.3):
+    t = np.arange(int(seconds * rate_hz)) / rate_hz
+    return 1.0 + amplitude * np.sin(2 * np.pi * freq_hz * t)
+
+
+def make_dataset(values, rate_hz=50):
+    """Build a dataset whose z-axis carries the given values."""
+    start = pd.Timestamp("2025-03-10T12:00:00Z")
+    step = pd.Timedelta(seconds=1 / rate_hz)
+    return {
+        "id": "long",
+        "sampling_rate_hz": rate_hz,
+        "start_time": "2025-03-10T12:00:00Z",
+        "created_at": "2025-03-10T12:10:00Z",
+        "data": {
+            "samples": [
+                {
+                    "timestamp": (start + step * i).strftime("%Y-%m-%dT%H:%M:%S.%fZ"),
+                    "x": 0.0,
+                    "y": 0.0,
+                    "z": float(value),
+                }
+                for i, value in enumerate(values)
+            ]
+        },
+    }
+
+
+def test_short_time_spectrum_shapes():
+    """Test window count, bin count and window centre times."""
+    times, freqs, power = short_time_spectrum(sine(2.0), 50, window=256, hop=128)
+
+    assert power.shape == (6, 129)
+    assert freqs[-1] == 25.0
+    assert times[0] == pytest.approx(128 / 50)
+    assert np.all(np.diff(times) == pytest.approx(128 / 50))
+
+
+def test_short_time_spectrum_too_short():
+    """Test that signals shorter than a window have no spectrum."""
+    assert short_time_spectrum(np.ones(100), 50, window=256) is None
+    assert short_time_spectrum(np.ones(1000), None) is None
+
+
+def test_dominant_frequency_and_tremor_band():
+    """Test the summary for slow walking and tremor-like movement."""
+    _, freqs, power = short_time_spectrum(sine(2.0), 50)
+    walking = spectral_summary(freqs, power)
+
+    _, freqs, power = short_time_spectrum(sine(6.0), 50)
+    tremor = spectral_summary(freqs, power)
+
+    assert walking["dominant_frequency"] == pytest.approx(2.0, abs=0.2)
+    assert walking["tremor_energy"] < 5
+    assert tremor["dominant_frequency"] == pytest.approx(6.0, abs=0.2)
+    assert tremor["tremor_energy"] > 95
+
+
+def test_power_matches_signal_variance():
+    """Test Parseval: the integrated PSD equals the signal variance."""
+    signal = sine(5.0, amplitude=0.5)
+    _, freqs, power = short_time_spectrum(signal, 50)
+
+    variance = power.mean(axis=0).sum() * (freqs[1] - freqs[0])
+
+    # Hann windowing loses a little energy at window edges
+    assert variance == pytest.approx(0.5**2 / 2, rel=0.05)
+
+
+def test_flat_signal_has_empty_summary():
+    """Test that a still device reports no dominant frequency."""
+    _, freqs, power = short_time_spectrum(np.ones(1000), 50)
+
+    assert spectral_summary(freqs, power) == {
+        "dominant_frequency": 0,
+        "tremor_energy": 0,
+    }
+
+
+def test_windows_straddling_gaps_are_dropped():
+    """Test that resampled segments are analysed separately."""
+    segments = np.repeat([0, 1], [300, 300])
+
+    times, _, power = short_time_spectrum(
+        np.ones(600), 50, window=256, hop=128, segments=segments
+    )
+
+    # Windows at 0 and 300+ fit; 128 and 256 cross the boundary
+    assert len(power) == 1
+    assert times.tolist() == [128 / 50]
+
+
+def test_frame_spectrum_uses_magnitude():
+    """Test the spectrum of a processed and resampled frame."""
+    dataset = make_dataset(sine(3.0, seconds=10))
+    df = resample_uniform(process_acceleration_data(dataset), 50)
+
+    _, freqs, power = frame_spectrum(df, 50)
+
+    assert spectral_summary(freqs, power)["dominant_frequency"] == pytest.approx(
+        3.0, abs=0.2
+    )
+    assert frame_spectrum(df.iloc[0:0], 50) is None
+
+
+def test_frame_spectrum_puts_raw_frames_on_a_grid():
+    """Test that jittered samples with a dropout are resampled first."""
+    dataset = make_dataset(sine(3.0, seconds=30))
+    samples = dataset["data"]["samples"]
+    rng = np.random.default_rng(1)
+    for sample in samples:
+        jitter = pd.Timedelta(milliseconds=int(rng.integers(-4, 5)))
+        moved = pd.Timestamp(sample["timestamp"]) + jitter
+        sample["timestamp"] = moved.strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+    # Samples 12.0-17.0 s go missing
+    del samples[600:850]
+    df = process_acceleration_data(dataset)
+
+    times, freqs, power = frame_spectrum(df, 50)
+    expected = frame_spectrum(resample_uniform(df, 50), 50)
+
+    # Three windows fit in each segment; none straddles the dropout
+    assert len(times) == 6
+    assert times.tolist() == expected[0].tolist()
+    np.testing.assert_allclose(power, expected[2], rtol=0.05, atol=1e-6)
+    summary = spectral_summary(freqs, power)
+    assert summary["dominant_frequency"] == pytest.approx(3.0, abs=0.2)
+
+
+def test_dashboard_shows_spectrogram(app, client, monkeypatch):
+    """Test the frequency tab for recordings longer than one window."""
+    dataset = make_dataset(sine(6.0, seconds=10))
+    monkeypatch.setattr(
+        "app.dashboard.routes.get_acceleration_data",
+        lambda token: (True, [dataset], None),
+    )
+    with client.session_transaction() as sess:
+        sess["token"] = "fake-jwt-token"
+
+    response = client.get("/")
+
+    assert response.status_code == 200
+    assert b"spectrogram-chart" in response.data
+    assert b'"heatmap"' in response.data
+    assert b"Dominant frequency 6.0" in response.data
+
+
+def test_dashboard_hides_spectrogram_without_heatmap_bundle(app, client, monkeypatch):
+    """Test that partial plotly.js bundles lacking heatmaps skip the tab."""
+    dataset = make_dataset(sine(6.0, seconds=10))
+    monkeypatch.setattr(
+        "app.dashboard.routes.get_acceleration_data",
+        lambda token: (True, [dataset], None),
+    )
+    app.config["PLOTLY_BUNDLE"] = "gl2d"
+    with client.session_transaction() as sess:
+        sess["token"] = "fake-jwt-token"
+
+    response = client.get("/")
+
+    assert response.status_code == 200
+    assert b"spectrogram-chart" not in response.data
@@ -0,0 +1,76 @@
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+HEAVY_MODULES = ["numpy", "pandas", "plotly.graph_objects"]
+
+# Runs in a fresh interpreter so modules imported by other tests don't count
+MEASURE_STARTUP = """
+import json, resource, sys, time
+
+
+def peak_rss_kb():
+    # ru_maxrss survives exec on Linux, so prefer this process's own VmHWM
+    try:
+        with open("/proc/self/status") as status:
+            for line in status:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+start = time.perf_counter()
+from app import create_app
+
+app = create_app("testing")
+elapsed = time.perf_counter() - start
+heavy = %r
+loaded = [name for name in heavy if name in sys.modules]
+
+# Pages that don't chart anything must not pull the heavy modules in either
+app.test_client().get("/auth/login")
+
+print(json.dumps({
+    "seconds": elapsed,
+    "max_rss_kb": peak_rss_kb(),
+    "loaded": loaded,
+    "loaded_after_login_page": [name for name in heavy if name in sys.modules],
+}))
+"""
+
+
+def measure_startup(**env):
+    """Create the app in a subprocess and report time, RSS and heavy imports."""
+    result = subprocess.run(
+        [sys.executable, "-c", MEASURE_STARTUP % HEAVY_MODULES],
+        cwd=ROOT,
+        env=dict(os.environ, **env),
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def test_create_app_does_not_import_heavy_modules(record_property):
+    """Test that app startup defers pandas, numpy and plotly."""
+    stats = measure_startup(PRELOAD_HEAVY_MODULES="false")
+
+    record_property("startup_seconds", stats["seconds"])
+    record_property("startup_max_rss_kb", stats["max_rss_kb"])
+
+    # Time and RSS depend on the host, so they are recorded, not asserted
+    assert stats["loaded"] == []
+    assert stats["loaded_after_login_page"] == []
+
+
+def test_preload_imports_heavy_modules():
+    """Test that the opt-in warm-up imports everything before forking."""
+    stats = measure_startup(PRELOAD_HEAVY_MODULES="true")
+
+    assert stats["loaded"] == HEAVY_MODULES
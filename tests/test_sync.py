@@ -0,0 +1,219 @@
+import copy
+import json
+
+import numpy as np
+import pytest
+
+from app.dashboard.sync import (
+    ALIGNMENT,
+    LOCAL_COPIES_COOKIE,
+    MAGIC,
+    VERSION_HINT_LENGTH,
+    dataset_version,
+    decode_sync,
+    encode_sync,
+    local_copies,
+    padding,
+    sync_owner,
+)
+
+
+def login(client):
+    with client.session_transaction() as sess:
+        sess["token"] = "fake-jwt-token"
+
+
+def sync(client, have=None):
+    response = client.post("/sync", json={"have": have or {}})
+    assert response.status_code == 200
+    assert response.mimetype == "application/octet-stream"
+    return decode_sync(response.data)
+
+
+def test_encode_sync_round_trip():
+    """Test that arrays come back narrowed and everything else unchanged."""
+    payload = dict(
+        name="spectrum",
+        count=np.int64(3),
+        positions=np.arange(5),
+        values=np.array([0.5, np.nan, 1.25]),
+        matrix=np.arange(6, dtype=np.float64).reshape(2, 3),
+        nested=[dict(y=np.array([1.0, 2.0])), None, "</script>"],
+        empty=np.array([]),
+    )
+
+    data = encode_sync(payload)
+    decoded = decode_sync(data)
+
+    assert data[:4] == MAGIC
+    assert decoded["name"] == "spectrum"
+    assert decoded["count"] == 3
+    assert decoded["positions"].dtype == np.int32
+    assert decoded["positions"].tolist() == [0, 1, 2, 3, 4]
+    assert decoded["values"].dtype == np.float32
+    np.testing.assert_array_equal(decoded["values"], [0.5, np.nan, 1.25])
+    assert decoded["matrix"].shape == (2, 3)
+    assert decoded["nested"][0]["y"].tolist() == [1.0, 2.0]
+    assert decoded["nested"][1:] == [None, "</script>"]
+    assert decoded["empty"] == []
+
+
+def test_encode_sync_aligns_arrays():
+    """Test that every array starts on an aligned offset of the container."""
+    payload = dict(a=np.ones(3, dtype=np.float32), b=np.arange(1, dtype=np.int64))
+    data = encode_sync(payload)
+
+    header_length = int.from_bytes(data[4:8], "little")
+    header = json.loads(data[8 : 8 + header_length])
+    base = 8 + header_length + padding(8 + header_length)
+    assert base % ALIGNMENT == 0
+    assert [entry["offset"] % ALIGNMENT for entry in header["arrays"]] == [0, 0]
+    assert len(data) % ALIGNMENT == 0
+    assert decode_sync(data)["b"].tolist() == [0]
+
+    with pytest.raises(ValueError):
+        decode_sync(b"nope" + data[4:])
+
+
+def test_large_integers_stay_exact():
+    """Test that integers beyond int32 are sent as float64."""
+    decoded = decode_sync(encode_sync(dict(v=np.array([2**40, 1]))))
+    assert decoded["v"].dtype == np.float64
+    assert decoded["v"].tolist() == [2**40, 1]
+
+
+def test_dataset_version(mock_health_data):
+    """Test that versions follow the recording and the view settings."""
+    dataset = mock_health_data.return_value[1][0]
+    version = dataset_version(dataset, ("float64",))
+
+    assert version == dataset_version(copy.deepcopy(dataset), ("float64",))
+    assert version != dataset_version(dataset, ("float32",))
+
+    grown = copy.deepcopy(dataset)
+    grown["data"]["samples"].append(grown["data"]["samples"][-1])
+    assert dataset_version(grown, ("float64",)) != version
+
+    replaced = dict(dataset, created_at="2025-03-11T08:00:00Z")
+    assert dataset_version(replaced, ("float64",)) != version
+
+
+def test_sync_owner():
+    """Test that owners are opaque and differ per user and secret."""
+    owner = sync_owner("alice", b"secret")
+
+    assert "alice" not in owner
+    assert owner == sync_owner("alice", "secret")
+    assert owner != sync_owner("bob", b"secret")
+    assert owner != sync_owner("alice", b"other")
+
+
+def test_sync_requires_login_and_no_query(client, mock_health_data):
+    """Test the error responses of the sync endpoint."""
+    assert client.post("/sync", json={}).status_code == 401
+
+    login(client)
+    assert client.post("/sync?start=5", json={}).status_code == 400
+    assert client.post("/sync", json={"have": ["x"]}).status_code == 400
+
+
+def test_sync_sends_only_new_and_changed_datasets(client, mock_health_data):
+    """Test full, empty and changed syncs against the same fragments."""
+    login(client)
+
+    payload = sync(client)
+    assert payload["pending"] is False
+    assert [d["id"] for d in payload["datasets"]] == ["test-dataset-id"]
+    (entry,) = payload["updated"]
+    version = payload["datasets"][0]["version"]
+    assert entry["version"] == version
+
+    # The stored fragment is the dataset's default view from /fragment
+    fragment = client.get("/fragment?dataset=test-dataset-id").get_json()
+    stored = entry["fragment"]
+    assert stored["html"] == fragment["html"]
+    assert stored["messages"] == []
+    xyz = stored["charts"]["xyz-chart"]["data"][0]
+    assert xyz["y"].dtype == np.float32
+    np.testing.assert_allclose(
+        xyz["y"], fragment["charts"]["xyz-chart"]["data"][0]["y"], rtol=1e-6
+    )
+    assert stored["charts"]["spectrogram-chart"] is None
+
+    assert sync(client, {"test-dataset-id": version})["updated"] == []
+
+    payload = sync(client, {"test-dataset-id": "outdated", "removed-id": version})
+    assert [d["id"] for d in payload["updated"]] == ["test-dataset-id"]
+
+
+def test_sync_limits_datasets_per_request(app, client, mock_health_data):
+    """Test that large syncs are split over several requests, newest first."""
+    first = mock_health_data.return_value[1][0]
+    second = dict(copy.deepcopy(first), id="newer", created_at="2025-03-11T08:00:00Z")
+    mock_health_data.return_value = (True, [first, second], None)
+    app.config["SYNC_MAX_DATASETS"] = 1
+    login(client)
+
+    payload = sync(client)
+    assert payload["pending"] is True
+    assert [d["id"] for d in payload["updated"]] == ["newer"]
+
+    have = {d["id"]: d["version"] for d in payload["updated"]}
+    payload = sync(client, have)
+    assert payload["pending"] is False
+    assert [d["id"] for d in payload["updated"]] == ["test-dataset-id"]
+
+
+def test_dashboard_exposes_versions_for_the_local_cache(app, client, mock_health_data):
+    """Test that the page carries what sync.js needs to trust stored copies."""
+    login(client)
+
+    page = client.get("/").data.decode("utf-8")
+    payload = sync(client)
+
+    assert 'data-sync-url="/sync"' in page
+    assert f'data-sync-owner="{payload["owner"]}"' in page
+    assert f'data-version="{payload["datasets"][0]["version"]}"' in page
+    assert "js/sync." in page
+
+
+def test_local_copies():
+    """Test parsing of the cookie listing the versions a browser holds."""
+    assert local_copies("owner:abcd1234.ef567890", "owner") == {"abcd1234", "ef567890"}
+    assert local_copies("other:abcd1234", "owner") == frozenset()
+    assert local_copies("ownér:abcd1234", "owner") == frozenset()
+    assert local_copies(None, "owner") == frozenset()
+
+
+def test_dashboard_leaves_stored_datasets_to_the_browser(
+    app, client, monkeypatch, mock_health_data
+):
+    """Test that a held, current default view is sent without rendering it."""
+    login(client)
+    payload = sync(client)
+    owner = payload["owner"]
+    version = payload["datasets"][0]["version"][:VERSION_HINT_LENGTH]
+
+    def fail(*args):
+        raise AssertionError("rendered on the server")
+
+    client.set_cookie(LOCAL_COPIES_COOKIE, f"{owner}:{version}")
+    with monkeypatch.context() as patch:
+        patch.setattr("app.dashboard.routes.build_view", fail)
+        page = client.get("/?dataset=test-dataset-id&start=").data.decode("utf-8")
+
+    assert "data-local-copy" in page
+    assert 'id="chart-template"' in page
+    assert "plotly-graph-div" not in page
+    assert 'data-sync-rounds="1"' in page
+
+    # Other views, versions and owners are rendered as before
+    for query, cookie in [
+        ("/?start=1", f"{owner}:{version}"),
+        ("/", f"{owner}:00000000"),
+        ("/", f"someone-else:{version}"),
+    ]:
+        client.set_cookie(LOCAL_COPIES_COOKIE, cookie)
+        page = client.get(query).data.decode("utf-8")
+        assert "data-local-copy" not in page
+        assert "plotly-graph-div" in page
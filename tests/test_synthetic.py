@@ -0,0 +1,160 @@
+import io
+import json
+
+import numpy as np
+import pytest
+
+from app.dashboard.events import EventIndex
+from app.dashboard.resampling import gap_summary, segment_index
+from app.dashboard.uploads import iter_csv_rows, iter_ndjson_samples, validate_batch
+from app.dashboard.utils import process_acceleration_data
+from loadtest import synthetic
+from loadtest.synthetic import (
+    iter_blocks,
+    main,
+    make_recording,
+    parse_duration,
+    plan_recording,
+)
+
+
+def timestamps(dataset):
+    return [sample["timestamp"] for sample in dataset["data"]["samples"]]
+
+
+def test_recordings_are_deterministic():
+    """Test that a seed always gives the same recording, and only that seed."""
+    options = dict(jitter_ms=3, gaps_per_hour=30, out_of_order=0.01)
+    first = make_recording(120, 50, "mixed", seed=7, **options)
+
+    assert first == make_recording(120, 50, "mixed", seed=7, **options)
+    assert first != make_recording(120, 50, "mixed", seed=8, **options)
+
+
+def test_recordings_match_the_backend_format(synthetic_recording):
+    """Test the shape of a clean recording."""
+    dataset = synthetic_recording(2, 50, dataset_id="two-seconds")
+    samples = dataset["data"]["samples"]
+
+    assert dataset["id"] == "two-seconds"
+    assert dataset["sampling_rate_hz"] == 50
+    assert dataset["start_time"] == "2025-03-10T12:00:00Z"
+    assert dataset["created_at"] == "2025-03-10T12:00:02Z"
+    assert len(samples) == 100
+    assert samples[1]["timestamp"] == "2025-03-10T12:00:00.020000Z"
+    assert set(samples[0]) == {"timestamp", "x", "y", "z"}
+
+    df = process_acceleration_data(dataset)
+    assert df["magnitude"].between(0.5, 5).all()
+
+
+def test_blocks_span_long_recordings_quickly():
+    """Test that an hour at 100 Hz is generated block by block."""
+    sizes = [len(times) for times, _ in iter_blocks(3600, 100, "day", seed=1)]
+
+    assert sum(sizes) == 360000
+    assert max(sizes) == synthetic.BLOCK_SIZE
+    times, values = next(iter_blocks(3600, 100, "day", seed=1))
+    assert times.dtype == np.dtype("datetime64[us]")
+    assert values.shape == (synthetic.BLOCK_SIZE, 3)
+
+
+def test_steps_follow_the_planned_cadence():
+    """Test that the dashboard counts the steps the walk was built with."""
+    plan = plan_recording(600, "walk", seed=3)
+    ends = np.append(plan["start"][1:], 600)
+    cycles = (plan["cadence"] * (ends - plan["start"])).sum()
+
+    df = process_acceleration_data(make_recording(600, 50, "walk", seed=3))
+    steps = len(EventIndex.from_frame(df, 50).step_ms)
+
+    assert steps == pytest.approx(cycles, rel=0.05)
+
+
+def test_rest_has_no_steps():
+    """Test that a resting recording stays near 1g."""
+    df = process_acceleration_data(make_recording(120, 50, "rest", seed=3))
+
+    assert len(EventIndex.from_frame(df, 50).step_ms) == 0
+    assert df["magnitude"].between(0.9, 1.1).all()
+
+
+def test_gaps_and_jitter_are_seen_by_gap_detection():
+    """Test that planned dropouts, and only those, show up as gaps."""
+    plan = plan_recording(3600, "day", seed=5, gaps_per_hour=6)
+    inside = (plan["gap_start"] > 0.02) & (plan["gap_end"] < 3600 - 0.02)
+    dataset = make_recording(3600, 50, "day", seed=5, gaps_per_hour=6, jitter_ms=5)
+
+    df = process_acceleration_data(dataset)
+    summary = gap_summary(segment_index(df, 50))
+
+    assert inside.sum() > 0
+    assert summary["gaps"] == inside.sum()
+    lost = (plan["gap_end"] - plan["gap_start"])[inside].sum()
+    assert summary["gap_seconds"] == pytest.approx(lost, abs=0.1 * inside.sum())
+
+
+def test_out_of_order_samples():
+    """Test that a share of samples is swapped with its successor."""
+    dataset = make_recording(60, 50, "walk", seed=2, out_of_order=0.02)
+    stamps = timestamps(dataset)
+
+    swapped = sum(a > b for a, b in zip(stamps, stamps[1:]))
+    assert 20 <= swapped <= 100
+    assert sorted(stamps) == timestamps(make_recording(60, 50, "walk", seed=2))
+
+
+def test_parse_duration():
+    """Test the CLI's duration syntax."""
+    assert parse_duration("90") == 90
+    assert parse_duration("15m") == 900
+    assert parse_duration("1.5h") == 5400
+    assert parse_duration("2d") == 172800
+
+    with pytest.raises(ValueError):
+        parse_duration("soon")
+
+
+def test_cli_writes_the_same_recordings(tmp_path):
+    """Test that streamed fixture files hold what make_recording builds."""
+    path = tmp_path / "fixture.json"
+    main(["--duration", "90s", "--datasets", "2", "--seed", "4", "-o", str(path)])
+
+    payload = json.loads(path.read_text())
+    assert payload["status"] == "success"
+    first, second = payload["data"]
+    assert first == make_recording(90, 50, seed=4, dataset_id="synthetic-4")
+    assert second["id"] == "synthetic-5"
+    assert second["start_time"] == "2025-03-11T12:00:00Z"
+
+
+@pytest.mark.parametrize(
+    "format, reader", [("ndjson", iter_ndjson_samples), ("csv", iter_csv_rows)]
+)
+def test_cli_writes_importable_samples(tmp_path, format, reader):
+    """Test that sample files pass the import's validation."""
+    path = tmp_path / f"fixture.{format}"
+    main(["--duration", "30s", "--rate-hz", "25", "--format", format, "-o", str(path)])
+
+    rows = list(reader(io.BytesIO(path.read_bytes())))
+    samples, rejected, _, _ = validate_batch(rows)
+    assert rejected == 0
+    assert samples == make_recording(30, 25)["data"]["samples"]
+
+
+def test_cli_rejects_several_recordings_per_sample_file(capsys):
+    """Test that CSV and JSON Lines files hold a single recording."""
+    with pytest.raises(SystemExit):
+        main(["--format", "csv", "--datasets", "2"])
+    assert "single recording" in capsys.readouterr().err
+
+
+def test_dashboard_renders_a_synthetic_recording(client, mock_synthetic_health_data):
+    """Test the fixture end to end through the dashboard."""
+    with client.session_transaction() as sess:
+        sess["token"] = "fake-jwt-token"
+
+    response = client.get("/")
+
+    assert response.status_code == 200
+    assert b"synthetic" in response.data
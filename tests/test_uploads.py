@@ -0,0 +1,426 @@
+import io
+import json
+import tracemalloc
+from unittest.mock import MagicMock
+
+import pytest
+
+from app import create_app
+from app.dashboard.uploads import (
+    UploadError,
+    detect_format,
+    import_recording,
+    iter_csv_rows,
+    iter_json_samples,
+    iter_ndjson_samples,
+    iter_rows,
+    validate_batch,
+)
+from app.utils.api import get_acceleration_data, login_user
+from loadtest.stub_backend import create_stub_app, serve_in_thread
+
+CSV = (
+    "﻿Time,AX,ay,az,battery\n"
+    "2025-03-10T12:00:00.000Z,0.1,0.2,0.9,80\n"
+    "2025-03-10T12:00:00.020Z,0.2,0.3\n"
+    "2025-03-10T12:00:00.040Z,0.15,0.25,0.85,80\n"
+).encode("utf-8")
+
+
+class GeneratedCSV(io.RawIOBase):
+    """A CSV export of many rows, produced as it is read"""
+
+    def __init__(self, rows):
+        self.rows = iter(range(rows))
+        self.pending = b"timestamp,x,y,z\n"
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        while len(self.pending) < len(buffer):
+            number = next(self.rows, None)
+            if number is None:
+                break
+            self.pending += (
+                f"{1741608000000 + number * 20},0.1,0.2,{number % 100 / 100}\n"
+            ).encode("ascii")
+        data, self.pending = self.pending[: len(buffer)], self.pending[len(buffer) :]
+        buffer[: len(data)] = data
+        return len(data)
+
+
+def accept(sent):
+    def send(samples, number, final):
+        sent.append((len(samples), number, final))
+        return True, "new-dataset" if final else None, None
+
+    return send
+
+
+def test_detect_format():
+    """Test the explicit choice, file extensions and content types."""
+    assert detect_format("ndjson", "export.csv") == "ndjson"
+    assert detect_format(None, "Export.JSONL") == "ndjson"
+    assert detect_format(None, "export", "text/csv") == "csv"
+    with pytest.raises(UploadError):
+        detect_format(None, "export.xlsx", "application/octet-stream")
+    with pytest.raises(UploadError):
+        detect_format("xml")
+
+
+def test_csv_rows_use_the_header():
+    """Test aliases, extra columns, a byte order mark and short rows."""
+    rows = list(iter_csv_rows(io.BytesIO(CSV)))
+
+    assert rows[0] == ("2025-03-10T12:00:00.000Z", "0.1", "0.2", "0.9")
+    assert rows[1] == ("2025-03-10T12:00:00.020Z", "0.2", "0.3", "")
+
+    with pytest.raises(UploadError, match="z"):
+        list(iter_csv_rows(io.BytesIO(b"timestamp,x,y\n1,2,3\n")))
+    with pytest.raises(UploadError):
+        list(iter_csv_rows(io.BytesIO(b"")))
+
+
+@pytest.mark.parametrize("read_size", [1, 7, 4096])
+def test_json_samples_are_read_incrementally(read_size):
+    """Test the backend's own format across any chunk boundaries."""
+    document = json.dumps(
+        {
+            "id": "export",
+            "device_info": {"model": "Watch"},
+            "data": {
+                "samples": [
+                    {"timestamp": "2025-03-10T12:00:00Z", "x": 0.1, "y": 0, "z": 1},
+                    ["2025-03-10T12:00:01Z", 0.2, 0, 1],
+                ]
+            },
+        },
+        indent=2,
+    ).encode("utf-8")
+
+    rows = list(iter_json_samples(io.BytesIO(document), read_size))
+
+    assert rows == [
+        ("2025-03-10T12:00:00Z", 0.1, 0, 1),
+        ("2025-03-10T12:00:01Z", 0.2, 0, 1),
+    ]
+
+
+def test_json_top_level_array_and_errors():
+    """Test arrays of samples and malformed or truncated documents."""
+    rows = iter_json_samples(io.BytesIO(b' [{"timestamp": 1, "x": 1, "y": 1, "z": 1}]'))
+    assert list(rows) == [(1, 1, 1, 1)]
+
+    for document in (
+        b'{"samples": [{"timestamp": 1, "x": 1,',
+        b'{"samples": [1, 2]}',
+        b'{"id": "no samples"}',
+    ):
+        with pytest.raises(UploadError):
+            list(iter_json_samples(io.BytesIO(document), read_size=4))
+
+
+def test_ndjson_samples():
+    """Test JSON Lines exports, including blank and malformed lines."""
+    lines = b'{"timestamp": 1, "x": 1, "y": 1, "z": 1}\n\n{"x": 2}\n'
+    assert list(iter_ndjson_samples(io.BytesIO(lines))) == [
+        (1, 1, 1, 1),
+        (None, 2, None, None),
+    ]
+
+    with pytest.raises(UploadError, match="line 2"):
+        list(iter_ndjson_samples(io.BytesIO(b"{}\n{oops\n")))
+
+
+def test_validate_batch_checks_whole_columns():
+    """Test the schema checks and the normalized samples."""
+    rows = [
+        ("2025-03-10T12:00:00.000Z", "0.1", "0.2", "0.9"),
+        ("2025-03-10 13:00:00.020", "0.2", "", "0.8"),
+        ("yesterday", 1, 1, 1),
+        (1741608000040, 0.15, 0.25, 0.85),
+        ("1741608000.06", "100", "0", "0"),
+        (1741608000.08, "nan", "0", "0"),
+    ]
+
+    samples, rejected, errors, times = validate_batch(rows, first_row=11)
+
+    assert samples == [
+        {"timestamp": "2025-03-10T12:00:00.000000Z", "x": 0.1, "y": 0.2, "z": 0.9},
+        {"timestamp": "2025-03-10T12:00:00.040000Z", "x": 0.15, "y": 0.25, "z": 0.85},
+    ]
+    assert rejected == 4
+    assert errors == [
+        "Row 12: missing or non-numeric value",
+        "Row 13: unreadable timestamp",
+        "Row 15: value beyond 64 g",
+        "Row 16: missing or non-numeric value",
+    ]
+    assert times.tolist() == [1741608000000000000, 1741608000040000000]
+    assert validate_batch(rows, max_errors=1)[2] == [
+        "Row 2: missing or non-numeric value"
+    ]
+
+
+def test_import_recording_batches_and_marks_the_last_batch():
+    """Test batch sizes, progress events and the final flag."""
+    sent = []
+    rows = list(iter_csv_rows(GeneratedCSV(10)))
+    rows[3] = ("bad", "0", "0", "0")
+    rows[7] = (rows[7][0],) + rows[0][1:]
+    rows[8], rows[9] = rows[9], rows[8]
+
+    events = list(import_recording(rows, accept(sent), batch_size=4, max_errors=5))
+
+    assert sent == [(3, 0, False), (4, 1, False), (2, 2, True)]
+    assert [event["rows"] for event in events[:-1]] == [4, 8, 10]
+    summary = events[-1]
+    assert summary["dataset_id"] == "new-dataset"
+    assert summary["imported"] == 9
+    assert summary["rejected"] == 1
+    assert summary["out_of_order"] == 1
+    assert summary["errors"] == ["Row 4: unreadable timestamp"]
+
+
+def test_import_recording_errors():
+    """Test empty imports and batches the backend rejects."""
+    with pytest.raises(UploadError, match="No valid samples"):
+        list(import_recording([("bad", 0, 0, 0)], accept([])))
+
+    rejecting = MagicMock(return_value=(False, None, "Upload failed: full"))
+    with pytest.raises(UploadError, match="full"):
+        list(import_recording(iter_csv_rows(GeneratedCSV(10)), rejecting, 4))
+    assert rejecting.call_count == 1
+
+
+def test_import_memory_stays_bounded():
+    """Test that peak memory doesn't grow with the length of the recording."""
+
+    def peak(rows):
+        tracemalloc.start()
+        try:
+            for _ in import_recording(
+                iter_csv_rows(GeneratedCSV(rows)), accept([]), batch_size=500
+            ):
+                pass
+            return tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+    peak(10)  # Import pandas outside the measurements
+    short, long = peak(2_000), peak(12_000)
+    assert long < short * 1.5
+
+
+def login(client):
+    with client.session_transaction() as sess:
+        sess["token"] = "fake-jwt-token"
+
+
+@pytest.fixture
+def backend(monkeypatch):
+    """A backend session recording the batches posted to it"""
+    session = MagicMock()
+    session.batches = []
+
+    def post(url, json=None, **kwargs):
+        session.batches.append((url, json, kwargs))
+        response = MagicMock(status_code=200)
+        dataset = {"id": "new-dataset"} if json["final"] else {}
+        response.json.return_value = {"status": "success", "data": dataset}
+        return response
+
+    session.post.side_effect = post
+    monkeypatch.setattr("app.dashboard.routes.backend_session", lambda: session)
+    return session
+
+
+def test_upload_streams_progress(app, client, mock_health_data, backend):
+    """Test a raw upload with JSON Lines progress and batched forwarding."""
+    app.config["UPLOAD_BATCH_SIZE"] = 2
+    login(client)
+    client.get("/")
+
+    response = client.post(
+        "/upload?sampling_rate_hz=50&device_type=Watch&filename=export.csv",
+        data=CSV,
+        content_type="application/octet-stream",
+    )
+
+    assert response.status_code == 200
+    assert response.mimetype == "application/x-ndjson"
+    events = [json.loads(line) for line in response.data.decode().splitlines()]
+    assert events[-1]["dataset_id"] == "new-dataset"
+    assert events[-1]["imported"] == 2
+    assert events[-1]["bytes"] == len(CSV)
+    assert events[-1]["errors"] == ["Row 2: missing or non-numeric value"]
+
+    assert [batch["batch"] for _, batch, _ in backend.batches] == [0, 1]
+    assert [batch["final"] for _, batch, _ in backend.batches] == [False, True]
+    assert len({batch["upload_id"] for _, batch, _ in backend.batches}) == 1
+    url, batch, options = backend.batches[-1]
+    assert url.endswith(app.config["API_UPLOAD_PATH"])
+    assert options["headers"]["Authorization"] == "Bearer fake-jwt-token"
+    assert options["timeout"]
+    assert batch["sampling_rate_hz"] == 50
+    assert batch["device_info"]["device_type"] == "Watch"
+    assert batch["samples"] == [
+        {"timestamp": "2025-03-10T12:00:00.040000Z", "x": 0.15, "y": 0.25, "z": 0.85}
+    ]
+    backend.close.assert_called_once()
+
+    # The new dataset is fetched rather than served from the cache
+    client.get("/")
+    assert mock_health_data.call_count == 2
+
+
+def test_upload_reports_errors(client, mock_health_data, backend):
+    """Test failed uploads on both the JSON Lines and form paths."""
+    assert client.post("/upload?sampling_rate_hz=50", data=CSV).status_code == 401
+    login(client)
+
+    response = client.post("/upload?filename=export.csv", data=CSV)
+    assert response.status_code == 400
+    assert "sampling rate" in response.get_json()["error"]
+
+    response = client.post(
+        "/upload?sampling_rate_hz=50&format=json",
+        data=b'{"nothing": []}',
+    )
+    assert json.loads(response.data.decode().splitlines()[-1])["error"]
+    assert backend.batches == []
+
+    response = client.post(
+        "/upload",
+        data={"sampling_rate_hz": "50", "file": (io.BytesIO(b"x,y\n"), "a.csv")},
+        content_type="multipart/form-data",
+        follow_redirects=True,
+    )
+    assert b"Import failed" in response.data
+
+
+BAD_FILES = {
+    "bad.csv": "timestamp,x,y,z\n2025-03-10T12:00:00Z,0.1,0.2,0.9\n".encode("utf-16"),
+    "big.csv": b"timestamp,x,y,z\n2025-03-10T12:00:00Z,"
+    + b"1" * (200 * 1024)
+    + b",0,1\n",
+    "bad.json": b'{"samples": [{"timestamp": "\xff\xfe", "x": 1}]}',
+}
+
+
+@pytest.mark.parametrize("name", sorted(BAD_FILES))
+def test_iter_rows_turns_unreadable_files_into_upload_errors(name):
+    """Test that encoding and CSV errors carry a message for the user."""
+    format = detect_format(filename=name)
+
+    with pytest.raises(UploadError):
+        list(iter_rows(io.BytesIO(BAD_FILES[name]), format))
+
+
+@pytest.mark.parametrize("name", ["bad.csv", "big.csv"])
+def test_upload_rejects_unreadable_files(client, mock_health_data, backend, name):
+    """Test that bad files fail cleanly on both paths, never with a 500."""
+    login(client)
+
+    response = client.post(
+        f"/upload?sampling_rate_hz=50&filename={name}", data=BAD_FILES[name]
+    )
+    assert response.status_code == 200
+    error = json.loads(response.data.decode().splitlines()[-1])["error"]
+    assert "UTF-8" in error or "CSV" in error
+    assert "codec" not in error
+
+    response = client.post(
+        "/upload",
+        data={"sampling_rate_hz": "50", "file": (io.BytesIO(BAD_FILES[name]), name)},
+        content_type="multipart/form-data",
+        follow_redirects=True,
+    )
+    assert response.status_code == 200
+    assert b"Import failed" in response.data
+    assert backend.batches == []
+
+
+def test_upload_form_post_redirects_to_the_new_dataset(
+    client, mock_health_data, backend
+):
+    """Test the form fallback without JavaScript."""
+    login(client)
+
+    response = client.post(
+        "/upload",
+        data={"sampling_rate_hz": "50", "file": (io.BytesIO(CSV), "export.csv")},
+        content_type="multipart/form-data",
+    )
+
+    assert response.status_code == 302
+    assert response.location.endswith("/?dataset=new-dataset")
+    with client.session_transaction() as sess:
+        assert "skipping 1 invalid rows" in sess["_flashes"][0][1]
+
+
+def test_upload_unexpected_errors_are_logged_on_both_paths(
+    app, client, mock_health_data, backend, caplog
+):
+    """Test that an unexpected failure is logged and reported generically."""
+    login(client)
+    backend.post.side_effect = RuntimeError("secret detail")
+
+    response = client.post("/upload?sampling_rate_hz=50&filename=a.csv", data=CSV)
+    error = json.loads(response.data.decode().splitlines()[-1])["error"]
+    assert error == "An unexpected error occurred"
+
+    response = client.post(
+        "/upload",
+        data={"sampling_rate_hz": "50", "file": (io.BytesIO(CSV), "export.csv")},
+        content_type="multipart/form-data",
+    )
+    assert response.status_code == 302
+    assert response.location.endswith("/upload")
+    with client.session_transaction() as sess:
+        message = sess["_flashes"][0][1]
+    assert "unexpected error" in message
+    assert "secret detail" not in message
+    assert caplog.text.count("Import failed") == 2
+
+
+def test_upload_page(client, mock_health_data):
+    """Test that the dashboard links to the import page."""
+    login(client)
+
+    assert b'href="/upload"' in client.get("/").data
+    page = client.get("/upload").data
+    assert b'id="upload-form"' in page
+    assert b"js/upload." in page
+
+
+def test_upload_to_the_stub_backend():
+    """Test an import end to end over a real, kept-alive connection."""
+    server = serve_in_thread(create_stub_app(datasets=1, samples=5))
+    app = create_app("testing")
+    app.config["API_BASE_URL"] = f"http://127.0.0.1:{server.server_port}"
+    app.config["UPLOAD_BATCH_SIZE"] = 1000
+    client = app.test_client()
+
+    try:
+        with app.app_context():
+            token = login_user("alice", "password123")[1]
+        with client.session_transaction() as sess:
+            sess["token"] = token
+
+        response = client.post(
+            "/upload?sampling_rate_hz=50&filename=export.csv",
+            data=GeneratedCSV(2500).read(),
+        )
+        summary = json.loads(response.data.decode().splitlines()[-1])
+        assert summary["batches"] == 3
+        assert summary["imported"] == 2500
+
+        with app.app_context():
+            datasets = get_acceleration_data(token)[1]
+        uploaded = next(d for d in datasets if d["id"] == summary["dataset_id"])
+        assert len(uploaded["data"]["samples"]) == 2500
+        assert uploaded["sampling_rate_hz"] == 50
+    finally:
+        server.shutdown()
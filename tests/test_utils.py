@@ -2,11 +2,16 @@ import pytest
 import pandas as pd
 import numpy as np
 from unittest.mock import patch, MagicMock
-from datetime import datetime
 
 from app.utils.api import login_user, register_user, get_acceleration_data
 from app.utils.charts import create_xyz_chart, create_magnitude_chart
+from app.utils.charts import build_line_figure, use_webgl, XYZ_TRACES
+from app.utils.charts import figure_to_json, render_figure_lean
+from app.utils.charts import build_spectrogram_figure, create_spectrogram_chart
 from app.dashboard.utils import process_acceleration_data, calculate_metrics
+from app.dashboard.utils import slice_time_range, downsample
+from app.dashboard.backends import BACKENDS, available_backends, get_backend
+from app.dashboard.backends import ComputeBackend
 
 
 def test_process_acceleration_data_with_valid_data():
@@ -120,6 +125,185 @@ def test_calculate_metrics_with_empty_data():
     assert metrics["peak_magnitude"] == 0.0
 
 
+def make_processed_frame(periods=10, freq="1s"):
+    """Build a processed frame with evenly spaced UTC timestamps."""
+    return process_acceleration_data(
+        {
+            "data": {
+                "samples": [
+                    {"timestamp": ts.isoformat(), "x": 0.0, "y": 0.0, "z": 1.0}
+                    for ts in pd.date_range(
+                        "2025-03-10T12:00:00Z", periods=periods, freq=freq
+                    )
+                ]
+            }
+        }
+    )
+
+
+def test_slice_time_range_with_offsets():
+    """Test slicing with second offsets from the recording start."""
+    df = make_processed_frame()
+
+    sliced = slice_time_range(df, "2", "5")
+
+    assert list(sliced["index"]) == [2, 3, 4, 5]
+
+
+def test_slice_time_range_with_iso_timestamps():
+    """Test slicing with ISO timestamps, including naive ones."""
+    df = make_processed_frame()
+
+    sliced = slice_time_range(df, "2025-03-10T12:00:07Z", None)
+    assert list(sliced["index"]) == [7, 8, 9]
+
+    sliced = slice_time_range(df, None, "2025-03-10T12:00:01")
+    assert list(sliced["index"]) == [0, 1]
+
+
+def test_slice_time_range_outside_recording():
+    """Test that a window outside the recording yields an empty frame."""
+    df = make_processed_frame()
+
+    assert slice_time_range(df, "100", "200").empty
+    assert slice_time_range(df, "5", "2").empty
+
+
+def test_slice_time_range_rejects_invalid_bounds():
+    """Test that unparseable bounds raise ValueError."""
+    df = make_processed_frame()
+
+    with pytest.raises(ValueError):
+        slice_time_range(df, "yesterday-ish", None)
+
+
+@pytest.mark.parametrize("bound", ["inf", "-inf", "nan", "1e400", "1e20"])
+def test_slice_time_range_rejects_non_finite_offsets(bound):
+    """Test that infinite, NaN and overflowing offsets raise ValueError."""
+    df = make_processed_frame()
+
+    with pytest.raises(ValueError):
+        slice_time_range(df, bound, None)
+    with pytest.raises(ValueError):
+        slice_time_range(df, None, bound)
+
+
+def test_downsample_limits_points():
+    """Test thinning a frame to a maximum number of points."""
+    df = make_processed_frame(periods=100)
+
+    assert len(downsample(df, 10)) == 10
+    assert len(downsample(df, 30)) <= 30
+    assert downsample(df, None) is df
+    assert downsample(df, 1000) is df
+
+
+def make_random_dataset(n=5000, seed=0):
+    """Build a dataset with noisy, unsorted samples around 1g."""
+    rng = np.random.default_rng(seed)
+    timestamps = pd.date_range("2025-03-10T12:00:00Z", periods=n, freq="20ms")
+    values = rng.normal([0.0, 0.0, 1.0], 0.4, size=(n, 3))
+    order = rng.permutation(n)
+    return {
+        "start_time": "2025-03-10T12:00:00Z",
+        "data": {
+            "samples": [
+                {
+                    "timestamp": timestamps[i].strftime("%Y-%m-%dT%H:%M:%S.%fZ"),
+                    "x": values[i, 0],
+                    "y": values[i, 1],
+                    "z": values[i, 2],
+                }
+                for i in order
+            ]
+        },
+    }
+
+
+@pytest.mark.parametrize("precision", ["float32", "int16"])
+def test_compact_frame_layout(precision):
+    """Test that compact frames narrow values and drop index/timestamp columns."""
+    df = process_acceleration_data(make_random_dataset(100), precision)
+
+    assert list(df.columns) == ["offset_ms", "x", "y", "z", "magnitude"]
+    assert df["offset_ms"].dtype == np.int64
+    assert df["x"].dtype == np.dtype(precision)
+    assert df["offset_ms"].is_monotonic_increasing
+    assert df["offset_ms"].iloc[0] == 0
+    assert df["offset_ms"].iloc[-1] == 99 * 20
+
+
+@pytest.mark.parametrize(
+    "precision,tolerance",
+    [("float32", 1e-4), ("int16", 1e-3)],
+)
+def test_compact_frame_metrics_error_is_bounded(precision, tolerance):
+    """Test that compact metrics stay within a small error of float64."""
+    dataset = make_random_dataset()
+    expected = calculate_metrics(process_acceleration_data(dataset))
+    actual = calculate_metrics(process_acceleration_data(dataset, precision))
+
+    assert actual["duration"] == expected["duration"]
+    # Intensity is a percentage derived from the mean magnitude (scaled by 200)
+    assert abs(actual["avg_intensity"] - expected["avg_intensity"]) < tolerance * 200
+    assert abs(actual["peak_magnitude"] - expected["peak_magnitude"]) <= 0.01
+    # Only samples within rounding distance of the threshold may flip
+    assert abs(actual["active_samples"] - expected["active_samples"]) <= 5
+
+
+def test_compact_frame_time_range_and_charts():
+    """Test slicing and charting compact frames."""
+    df = process_acceleration_data(make_random_dataset(100), "int16")
+
+    sliced = slice_time_range(df, "0.1", "2025-03-10T12:00:00.200Z")
+    assert list(sliced.index) == [5, 6, 7, 8, 9, 10]
+
+    figure = build_line_figure(
+        sliced,
+        XYZ_TRACES,
+        title="Acceleration Components",
+        yaxis_title="Acceleration (g)",
+        empty_title="No acceleration data available",
+    )
+    assert list(figure["data"][0]["x"]) == [5, 6, 7, 8, 9, 10]
+    assert figure["data"][0]["y"].dtype == np.float32
+    assert "plotly-graph-div" in create_magnitude_chart(sliced)
+
+
+@pytest.mark.parametrize("precision", ["float32", "int16"])
+def test_frame_layouts_agree_on_second_offsets(precision):
+    """Test that offsets count from the first sample, not start_time."""
+    dataset = make_random_dataset(100)
+    # The recording was started 5 seconds before its first sample
+    dataset["start_time"] = "2025-03-10T11:59:55Z"
+
+    full = process_acceleration_data(dataset)
+    compact = process_acceleration_data(dataset, precision)
+
+    for start, end in (("0.5", "1"), ("1.2", None), (None, "0.3")):
+        expected = slice_time_range(full, start, end)
+        actual = slice_time_range(compact, start, end)
+        assert len(actual) == len(expected) > 0
+        times = compact.attrs["start_time"] + pd.to_timedelta(
+            actual["offset_ms"], unit="ms"
+        )
+        assert list(times) == list(expected["timestamp"])
+
+
+def test_compact_frame_empty_dataset():
+    """Test compact processing of a dataset without samples."""
+    df = process_acceleration_data({"data": {"samples": []}}, "float32")
+
+    assert df.empty
+    assert calculate_metrics(df)["active_samples"] == 0
+
+
+def test_process_acceleration_data_rejects_unknown_precision():
+    """Test that an unknown precision is rejected."""
+    with pytest.raises(ValueError):
+        process_acceleration_data({}, "float16")
+
+
 @patch("app.utils.charts.plotly.offline.plot")
 def test_create_xyz_chart(mock_plot):
     """Test creating XYZ chart with data."""
@@ -137,8 +321,8 @@ def test_create_xyz_chart(mock_plot):
         }
     )
 
-    # Create chart
-    chart = create_xyz_chart(df)
+    # Create chart through plotly's own serializer
+    chart = create_xyz_chart(df, serializer="plotly")
 
     # Check the output
     assert chart == '<div id="chart"></div>'
@@ -162,14 +346,71 @@ def test_create_magnitude_chart(mock_plot):
         }
     )
 
-    # Create chart
-    chart = create_magnitude_chart(df)
+    # Create chart through plotly's own serializer
+    chart = create_magnitude_chart(df, serializer="plotly")
 
     # Check the output
     assert chart == '<div id="chart"></div>'
     mock_plot.assert_called_once()
 
 
+def test_lean_chart_matches_plotly_div_contract():
+    """Test that the lean serializer produces the same div contract as plotly."""
+    df = pd.DataFrame(
+        {
+            "index": [0, 1, 2],
+            "x": [0.1, 0.2, 0.15],
+            "y": [0.2, 0.3, 0.25],
+            "z": [0.9, 0.8, 0.85],
+        }
+    )
+
+    chart = create_xyz_chart(df)
+
+    assert chart.startswith("<div>")
+    assert 'class="plotly-graph-div"' in chart
+    assert "Plotly.newPlot(" in chart
+    assert '"type":"scatter"' in chart
+    assert "Acceleration Components" in chart
+
+
+@patch("app.utils.charts.plotly.offline.plot")
+def test_lean_chart_bypasses_plotly_offline(mock_plot):
+    """Test that the lean path never calls plotly.offline.plot."""
+    df = pd.DataFrame({"index": [0, 1], "magnitude": [1.0, 1.1]})
+
+    create_magnitude_chart(df)
+
+    mock_plot.assert_not_called()
+
+
+def test_figure_to_json_encodes_numpy_arrays():
+    """Test JSON encoding of NumPy arrays, scalars and non-finite values."""
+    encoded = figure_to_json(
+        {
+            "y": np.array([1.5, np.nan], dtype=np.float32),
+            "x": np.arange(2)[::-1],
+            "n": np.int64(3),
+            "text": "</script>",
+        }
+    )
+
+    assert '"y":[1.5,null]' in encoded
+    assert '"x":[1,0]' in encoded
+    assert '"n":3' in encoded
+    assert "</script>" not in encoded
+
+
+def test_render_figure_lean_empty_figure():
+    """Test that an empty figure renders with its height and template."""
+    chart = render_figure_lean(
+        {"data": [], "layout": {"title": {"text": "Empty"}, "height": 300}}
+    )
+
+    assert "height:300px" in chart
+    assert '"template"' in chart
+
+
 @patch("requests.post")
 def test_api_login_user_success(mock_post, app):
     """Test successful login API call."""
@@ -304,3 +545,249 @@ def test_api_get_acceleration_data_failure(mock_get, app):
         assert success is False
         assert data is None
         assert "Authentication failed or session expired" in error
+
+
+def test_use_webgl_switches_on_sample_count():
+    """Test automatic switch between SVG and WebGL rendering."""
+    assert use_webgl(100) is False
+    assert use_webgl(100, webgl_threshold=50) is True
+    assert use_webgl(10**6, render_mode="svg") is False
+    assert use_webgl(1, render_mode="webgl") is True
+
+
+def test_build_line_figure_uses_scattergl_for_large_frames():
+    """Test that large frames get WebGL traces backed by NumPy arrays."""
+    df = pd.DataFrame(
+        {
+            "index": range(1000),
+            "x": np.zeros(1000),
+            "y": np.zeros(1000),
+            "z": np.ones(1000),
+        }
+    )
+
+    figure = build_line_figure(
+        df,
+        XYZ_TRACES,
+        title="Acceleration Components",
+        yaxis_title="Acceleration (g)",
+        empty_title="No acceleration data available",
+        webgl_threshold=500,
+    )
+
+    assert [trace["type"] for trace in figure["data"]] == ["scattergl"] * 3
+    assert all(isinstance(trace["y"], np.ndarray) for trace in figure["data"])
+
+    figure = build_line_figure(
+        df,
+        XYZ_TRACES,
+        title="Acceleration Components",
+        yaxis_title="Acceleration (g)",
+        empty_title="No acceleration data available",
+    )
+    assert [trace["type"] for trace in figure["data"]] == ["scatter"] * 3
+
+
+def test_create_magnitude_chart_renders_webgl():
+    """Test that a WebGL magnitude chart renders to a div."""
+    df = pd.DataFrame(
+        {
+            "index": [0, 1, 2],
+            "magnitude": [0.94, 0.87, 0.9],
+        }
+    )
+
+    chart = create_magnitude_chart(df, render_mode="webgl", serializer="plotly")
+
+    assert "scattergl" in chart
+    assert "Earth's gravity (1g)" in chart
+
+
+def test_spectrogram_figure_bounds_heatmap_cells():
+    """Test that long spectra are pooled to the cell budget."""
+    times = np.arange(1000, dtype=float)
+    freqs = np.linspace(0, 25, 129)
+    power = np.ones((1000, 129))
+
+    figure = build_spectrogram_figure((times, freqs, power), max_cells=129 * 100)
+
+    trace = figure["data"][0]
+    assert trace["type"] == "heatmap"
+    assert trace["z"].shape == (129, 100)
+    assert len(trace["x"]) == 100
+    assert trace["x"][0] == pytest.approx(4.5)
+    assert np.allclose(trace["z"], 0.0)
+
+
+def test_create_spectrogram_chart_without_spectrum():
+    """Test the placeholder chart for recordings shorter than a window."""
+    chart = create_spectrogram_chart(None)
+
+    assert "Not enough data for a spectrogram" in chart
+    assert "plotly-graph-div" in chart
+
+
+def make_tied_dataset(timestamp_format):
+    """Unsorted samples with duplicate timestamps in the given format."""
+    base = pd.Timestamp("2025-03-10T12:00:00")
+    offsets = [40, 0, 20, 20, 60, 0, 80, 20]
+    return {
+        "start_time": "2025-03-10T12:00:00Z",
+        "data": {
+            "samples": [
+                {
+                    "timestamp": (base + pd.Timedelta(milliseconds=offset)).strftime(
+                        timestamp_format
+                    ),
+                    "x": 0.1 * i,
+                    "y": 1.5 - 0.2 * i,
+                    "z": 0.9,
+                }
+                for i, offset in enumerate(offsets)
+            ]
+        },
+    }
+
+
+CONFORMANCE_DATASETS = {
+    "random": lambda: make_random_dataset(2000),
+    "utc_ties": lambda: make_tied_dataset("%Y-%m-%dT%H:%M:%S.%fZ"),
+    "naive_ties": lambda: make_tied_dataset("%Y-%m-%dT%H:%M:%S.%f"),
+    "offset": lambda: make_tied_dataset("%Y-%m-%dT%H:%M:%S.%f+02:00"),
+}
+
+
+@pytest.fixture(params=BACKENDS)
+def backend(request):
+    if request.param == "polars":
+        pytest.importorskip("polars")
+    return get_backend(request.param)
+
+
+@pytest.fixture(params=sorted(CONFORMANCE_DATASETS))
+def conformance_dataset(request):
+    return CONFORMANCE_DATASETS[request.param]()
+
+
+@pytest.mark.parametrize("precision", ["float64", "float32", "int16"])
+def test_backend_frames_match_pandas(backend, conformance_dataset, precision):
+    """Test that every backend ingests, sorts and measures like pandas."""
+    expected = process_acceleration_data(conformance_dataset, precision)
+    actual = backend.process(conformance_dataset, precision)
+
+    assert list(actual.columns) == list(expected.columns)
+    assert actual.attrs == expected.attrs
+    if precision == "float64":
+        assert str(actual["timestamp"].dt.tz) == str(expected["timestamp"].dt.tz)
+        assert (
+            actual["timestamp"].to_numpy() == expected["timestamp"].to_numpy()
+        ).all()
+        actual = actual.drop(columns="timestamp")
+        expected = expected.drop(columns="timestamp")
+    pd.testing.assert_frame_equal(actual, expected, rtol=1e-12)
+
+
+def test_backend_metrics_and_windows_match_pandas(backend, conformance_dataset):
+    """Test metrics and windowed aggregates on float64 and compact frames."""
+    reference = get_backend("pandas")
+    for precision in ("float64", "int16"):
+        df = process_acceleration_data(conformance_dataset, precision)
+
+        expected = calculate_metrics(df)
+        actual = backend.metrics(df)
+        assert actual.keys() == expected.keys()
+        for name, value in expected.items():
+            assert actual[name] == pytest.approx(value, rel=1e-9)
+
+        for window_ms in (20, 1000):
+            pd.testing.assert_frame_equal(
+                backend.window_aggregates(df, window_ms),
+                reference.window_aggregates(df, window_ms),
+                rtol=1e-9,
+            )
+
+
+def test_backend_empty_frames(backend):
+    """Test empty datasets, metrics and aggregates on every backend."""
+    for precision in ("float64", "int16"):
+        df = backend.process({"data": {"samples": []}}, precision)
+        expected = process_acceleration_data({"data": {"samples": []}}, precision)
+
+        assert list(df.columns) == list(expected.columns)
+        assert df.empty
+        assert backend.metrics(df) == calculate_metrics(expected)
+        assert backend.window_aggregates(df, 1000).empty
+
+
+def test_backend_ingest_columns(backend):
+    """Test ingest on missing and integer axes and non-numeric values."""
+    samples = [
+        {"timestamp": "2025-03-10T12:00:00Z", "x": 1, "y": 0.5},
+        {"timestamp": "2025-03-10T12:00:01Z", "x": 2, "y": None, "z": 3},
+    ]
+
+    timestamps, xyz, tz = backend.ingest(samples)
+
+    assert tz == "UTC"
+    assert timestamps.tolist() == [1741608000000000000, 1741608001000000000]
+    assert xyz.dtype == np.float64
+    np.testing.assert_array_equal(xyz, [[1.0, 0.5, np.nan], [2.0, np.nan, 3.0]])
+    with pytest.raises(ValueError):
+        backend.ingest([dict(samples[0], x="high")])
+
+
+def test_compute_backend_requires_every_operation():
+    """Test that a backend missing an operation can't be instantiated."""
+
+    class Partial(ComputeBackend):
+        def sort(self, keys):
+            return keys
+
+    with pytest.raises(TypeError):
+        Partial()
+
+
+def test_window_aggregates_values():
+    """Test the aggregate columns on a small hand-checked frame."""
+    df = process_acceleration_data(make_tied_dataset("%Y-%m-%dT%H:%M:%S.%fZ"))
+
+    windows = get_backend("numpy").window_aggregates(df, 50)
+
+    assert windows["start_ms"].tolist() == [0.0, 50.0]
+    assert windows["samples"].tolist() == [6, 2]
+    assert windows["peak_magnitude"].iloc[0] == pytest.approx(df["magnitude"].max())
+
+
+def test_backend_selection():
+    """Test dispatching by name and rejecting unknown backends."""
+    dataset = make_random_dataset(50)
+
+    frame = process_acceleration_data(dataset, "int16", backend="numpy")
+    assert frame.equals(process_acceleration_data(dataset, "int16"))
+    metrics = calculate_metrics(frame, backend="numpy")
+    assert metrics == pytest.approx(calculate_metrics(frame))
+
+    with pytest.raises(ValueError):
+        get_backend("dask")
+    assert "pandas" in available_backends()
+    assert "numpy" in available_backends()
+
+
+def test_dashboard_uses_the_configured_backend(app, client, mock_health_data):
+    """Test that COMPUTE_BACKEND switches the processing stage."""
+    app.config["COMPUTE_BACKEND"] = "numpy"
+    numpy_backend = get_backend("numpy")
+    with client.session_transaction() as sess:
+        sess["token"] = "fake-jwt-token"
+
+    with patch.object(
+        type(numpy_backend),
+        "process",
+        autospec=True,
+        side_effect=type(numpy_backend).process,
+    ) as process:
+        response = client.get("/")
+
+    assert response.status_code == 200
+    assert process.call_count == 1
+    assert b"plotly-graph-div" in response.data
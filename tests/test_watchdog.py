@@ -0,0 +1,169 @@
+import logging
+import signal
+from unittest.mock import MagicMock
+
+import pytest
+
+from app.utils import watchdog as watchdog_module
+from app.utils.watchdog import MemoryWatchdog, current_rss_kb
+
+GUNICORN = {"SERVER_SOFTWARE": "gunicorn/21.2.0"}
+
+
+@pytest.fixture
+def rss(monkeypatch):
+    """Feed the watchdog RSS readings in KiB, repeating the last one"""
+    readings = []
+
+    def read():
+        return readings.pop(0) if len(readings) > 1 else readings[0]
+
+    monkeypatch.setattr(watchdog_module, "current_rss_kb", read)
+    return readings
+
+
+@pytest.fixture
+def kill(monkeypatch):
+    mock = MagicMock()
+    monkeypatch.setattr(watchdog_module.os, "kill", mock)
+    return mock
+
+
+@pytest.fixture
+def release(monkeypatch):
+    mock = MagicMock()
+    monkeypatch.setattr(watchdog_module, "release_memory", mock)
+    return mock
+
+
+def test_current_rss_kb():
+    """Test that RSS is read from /proc where there is one."""
+    rss = current_rss_kb()
+    if rss is None:
+        pytest.skip("no /proc/self/statm")
+    assert 1024 < rss < 64 * 1024 * 1024
+
+
+def test_history_is_sampled_and_bounded(rss):
+    """Test that RSS is recorded every request but sampled on an interval."""
+    rss.append(100 * 1024)
+    watchdog = MemoryWatchdog(sample_seconds=3600, history=2)
+
+    for _ in range(3):
+        watchdog.check()
+    assert watchdog.stats()["requests"] == 3
+    assert [s["requests"] for s in watchdog.history()] == [1]
+
+    watchdog.sample_seconds = 0
+    rss[:] = [200 * 1024]
+    for _ in range(3):
+        watchdog.check()
+    history = watchdog.history()
+    assert [s["requests"] for s in history] == [5, 6]
+    assert history[-1]["rss_mb"] == 200.0
+    assert watchdog.stats()["peak_mb"] == 200.0
+
+
+def test_no_limit_only_tracks(rss, kill, release):
+    """Test that a limit of 0 never trims or recycles."""
+    rss.append(10 * 1024 * 1024)
+    watchdog = MemoryWatchdog(limit_mb=0)
+
+    watchdog.check(can_recycle=True)
+
+    release.assert_not_called()
+    kill.assert_not_called()
+    assert watchdog.stats()["limit_mb"] is None
+
+
+def test_trimming_below_the_limit_avoids_recycling(rss, kill, release):
+    """Test that a worker whose heap trims below the limit keeps running."""
+    rss.extend([600 * 1024, 400 * 1024])
+    watchdog = MemoryWatchdog(limit_mb=512)
+
+    watchdog.check(can_recycle=True)
+
+    release.assert_called_once()
+    kill.assert_not_called()
+    assert watchdog.stats()["trims"] == 1
+    assert not watchdog.stats()["recycle_requested"]
+
+
+def test_recycles_once_when_still_above_the_limit(rss, kill, release):
+    """Test that a Gunicorn worker sends itself SIGTERM a single time."""
+    rss.append(600 * 1024)
+    watchdog = MemoryWatchdog(limit_mb=512, trim_seconds=3600)
+
+    watchdog.check(can_recycle=True)
+    watchdog.check(can_recycle=True)
+
+    release.assert_called_once()
+    kill.assert_called_once_with(watchdog_module.os.getpid(), signal.SIGTERM)
+    assert watchdog.stats()["recycle_requested"]
+    assert watchdog.history()[-1]["rss_mb"] == 600.0
+
+
+def test_unreadable_rss_after_trimming(rss, kill, release):
+    """Test that losing /proc after a trim neither raises nor recycles."""
+    rss.extend([600 * 1024, None])
+    watchdog = MemoryWatchdog(limit_mb=512)
+
+    watchdog.check(can_recycle=True)
+
+    release.assert_called_once()
+    kill.assert_not_called()
+
+
+def test_trims_are_rate_limited(rss, kill, release):
+    """Test that a breach soon after a trim recycles without trimming again."""
+    rss.extend([600 * 1024, 400 * 1024, 600 * 1024])
+    watchdog = MemoryWatchdog(limit_mb=512, trim_seconds=3600)
+
+    watchdog.check(can_recycle=True)
+    kill.assert_not_called()
+    watchdog.check(can_recycle=True)
+
+    release.assert_called_once()
+    kill.assert_called_once()
+
+
+def test_other_servers_only_log(rss, kill, release, caplog):
+    """Test that outside Gunicorn a breach is logged, not acted on."""
+    rss.append(600 * 1024)
+    watchdog = MemoryWatchdog(limit_mb=512, logger=logging.getLogger("watchdog"))
+
+    with caplog.at_level(logging.WARNING):
+        watchdog.check(can_recycle=False)
+        watchdog.check(can_recycle=False)
+
+    kill.assert_not_called()
+    assert watchdog.stats()["recycle_requested"]
+    assert len([r for r in caplog.records if "not recycled" in r.message]) == 1
+
+
+def test_requests_are_checked_after_the_response(app, client, rss, kill, release):
+    """Test the hook end to end, including detection of Gunicorn."""
+    rss.append(600 * 1024)
+    watchdog = app.extensions["memory_watchdog"]
+    watchdog.limit_kb = 512 * 1024
+
+    response = client.get("/_diagnostics/metrics", environ_base=GUNICORN)
+    assert response.get_json()["memory_watchdog"]["requests"] == 0
+    kill.assert_not_called()
+
+    response.close()
+    kill.assert_called_once()
+    assert watchdog.stats()["requests"] == 1
+
+
+def test_rss_diagnostics(client, rss):
+    """Test that the history and current figures are exported."""
+    rss.append(300 * 1024)
+    client.get("/_diagnostics/metrics").close()
+
+    report = client.get("/_diagnostics/rss").get_json()
+
+    assert report["rss_mb"] == 300.0
+    assert report["requests"] == 1
+    assert report["samples"][0]["rss_mb"] == 300.0
+    assert "time" in report["samples"][0]